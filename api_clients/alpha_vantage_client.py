@@ -1,15 +1,45 @@
 # api_clients/alpha_vantage_client.py
 
+import csv
+import io
 import logging
+from typing import Dict, List, Optional
+
 import requests
 import config # To access ALPHA_VANTAGE_API_KEY
-from utils.api_utils import resilient_get, ttl_cache
+from utils.api_utils import register_cache_clearer, resilient_get, ttl_cache
+from utils.quota import QuotaScheduler
 
 logger = logging.getLogger(__name__)
 
 ALPHA_VANTAGE_API_KEY = config.ALPHA_VANTAGE_API_KEY
 BASE_URL = "https://www.alphavantage.co/query"
 
+# Shared minute/day request budget. Calls are charged to the caller's lane
+# (see utils.quota.call_with_priority); cache hits never reach it.
+QUOTA = QuotaScheduler("alpha_vantage", per_minute=config.ALPHA_VANTAGE_CALLS_PER_MINUTE, per_day=config.ALPHA_VANTAGE_CALLS_PER_DAY)
+register_cache_clearer(QUOTA.reset)
+BUDGET_EXHAUSTED = {"error": "api_limit", "message": "Alpha Vantage request budget exhausted; try again later."}
+
+
+def budget_available(priority: Optional[str] = None) -> bool:
+    """Whether a call in `priority`'s lane (default: the caller's) would get a budget slot right now."""
+    return QUOTA.available(priority)
+
+
+def _acquire_budget(what: str) -> bool:
+    if QUOTA.acquire():
+        return True
+    logger.info(f"Alpha Vantage budget exhausted; skipping request for {what}.")
+    return False
+
+
+def _note_limit(message: str) -> None:
+    """Feed a quota "Note"/"Information" reply back into the budget so later callers skip ahead."""
+    text = (message or "").lower()
+    if "limit" in text or "frequency" in text:
+        QUOTA.report_exhausted(daily="per day" in text or "daily" in text)
+
 @ttl_cache(seconds=60)
 def get_stock_price(symbol: str):
     """
@@ -35,6 +65,9 @@ def get_stock_price(symbol: str):
         "apikey": ALPHA_VANTAGE_API_KEY
     }
 
+    if not _acquire_budget(f"quote {symbol}"):
+        return dict(BUDGET_EXHAUSTED)
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=10) # Added timeout
         response.raise_for_status()  # Raises an HTTPError for bad responses (4XX or 5XX)
@@ -51,6 +84,7 @@ def get_stock_price(symbol: str):
         elif "Note" in data:
             # This often indicates an API call frequency limit
             logger.warning(f"Alpha Vantage API Note for '{symbol}': {data['Note']}")
+            _note_limit(data['Note'])
             return {"error": "api_limit", "message": data['Note']}
         elif not data: # Handles empty response
             logger.warning(f"Empty response from Alpha Vantage for '{symbol}'.")
@@ -100,6 +134,9 @@ def get_stock_news(symbol: str, limit: int = 5):
         "limit": limit # Alpha Vantage API supports a limit parameter, default is 50
     }
 
+    if not _acquire_budget(f"news {symbol}"):
+        return dict(BUDGET_EXHAUSTED)
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=15) # Increased timeout for potentially larger response
         response.raise_for_status()
@@ -134,6 +171,7 @@ def get_stock_news(symbol: str, limit: int = 5):
         elif "Information" in data or "Note" in data: # "Information" can also indicate API limits/issues
             message = data.get("Information", data.get("Note", "API usage limit or issue."))
             logger.warning(f"Alpha Vantage API Info/Note for news on '{symbol}': {message}")
+            _note_limit(message)
             return {"error": "api_limit", "message": message}
         elif not data or ("feed" in data and not data["feed"]): # Handles empty response or empty feed
             logger.info(f"No news found or empty response from Alpha Vantage for '{symbol}'.")
@@ -182,6 +220,9 @@ def get_daily_time_series(symbol: str, outputsize: str = 'compact'):
         "datatype": "json" # Ensure JSON response
     }
 
+    if not _acquire_budget(f"daily series {symbol}"):
+        return dict(BUDGET_EXHAUSTED)
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=15)
         response.raise_for_status()
@@ -214,6 +255,7 @@ def get_daily_time_series(symbol: str, outputsize: str = 'compact'):
         elif "Note" in data or "Information" in data:
             message = data.get("Note", data.get("Information", "API usage limit or issue."))
             logger.warning(f"Alpha Vantage API Note/Info for daily series of '{symbol}': {message}")
+            _note_limit(message)
             return {"error": "api_limit", "message": message}
         else:
             logger.warning(f"Unexpected response structure for daily series from Alpha Vantage for '{symbol}': {data}")
@@ -273,6 +315,9 @@ def get_intraday_time_series(symbol: str, interval: str = '60min', outputsize: s
     # For intraday, Alpha Vantage premium is required for extended history (outputsize=full for more than a few days)
     # Free tier typically provides 1-5 days of intraday data for 'compact' and 'full'.
 
+    if not _acquire_budget(f"intraday series {symbol}"):
+        return dict(BUDGET_EXHAUSTED)
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=20) # Potentially larger data
         response.raise_for_status()
@@ -303,6 +348,7 @@ def get_intraday_time_series(symbol: str, interval: str = '60min', outputsize: s
         elif "Note" in data or "Information" in data:
             message = data.get("Note", data.get("Information", "API usage limit or issue."))
             logger.warning(f"Alpha Vantage API Note/Info for intraday series of '{symbol}' (interval: {interval}): {message}")
+            _note_limit(message)
             return {"error": "api_limit", "message": message}
         else:
             logger.warning(f"Unexpected response structure for intraday series from Alpha Vantage for '{symbol}' (interval: {interval}): {data}")
@@ -345,6 +391,9 @@ def get_currency_exchange_rate(from_currency: str, to_currency: str):
         "apikey": ALPHA_VANTAGE_API_KEY
     }
 
+    if not _acquire_budget(f"exchange rate {from_currency}/{to_currency}"):
+        return None
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=10)
         response.raise_for_status()
@@ -358,6 +407,7 @@ def get_currency_exchange_rate(from_currency: str, to_currency: str):
             logger.warning(f"Alpha Vantage API Error for exchange rate {from_currency}/{to_currency}: {data['Error Message']}")
         elif "Note" in data:
             logger.warning(f"Alpha Vantage API Note for exchange rate {from_currency}/{to_currency}: {data['Note']}")
+            _note_limit(data['Note'])
 
         return None
 
@@ -387,6 +437,9 @@ def search_symbol(keywords: str):
         "apikey": ALPHA_VANTAGE_API_KEY
     }
 
+    if not _acquire_budget(f"symbol search '{keywords}'"):
+        return []
+
     try:
         response = resilient_get(BASE_URL, params=params, timeout=10)
         response.raise_for_status()
@@ -397,6 +450,7 @@ def search_symbol(keywords: str):
         elif "Note" in data or "Information" in data:
             # Limit reached
             logger.warning(f"Alpha Vantage API Note/Info for symbol search '{keywords}': {data.get('Note', data.get('Information'))}")
+            _note_limit(data.get('Note', data.get('Information')))
             return []
         else:
             return []
@@ -406,6 +460,40 @@ def search_symbol(keywords: str):
         return []
 
 
+def get_listing_status() -> Optional[List[Dict[str, str]]]:
+    """
+    Downloads every active US listing (LISTING_STATUS, one CSV for the whole market).
+
+    Returns:
+        A list of dicts with the CSV's columns (symbol, name, exchange, assetType,
+        ipoDate, delistingDate, status), or None on error, quota refusal or an empty file.
+    """
+    if not ALPHA_VANTAGE_API_KEY:
+        logger.error("ALPHA_VANTAGE_API_KEY not configured.")
+        return None
+
+    params = {"function": "LISTING_STATUS", "apikey": ALPHA_VANTAGE_API_KEY}
+    if not _acquire_budget("listing status"):
+        return None
+
+    try:
+        response = resilient_get(BASE_URL, params=params, timeout=30)
+        response.raise_for_status()
+        text = response.text or ""
+        # Errors and quota notes come back as JSON instead of CSV.
+        if text.lstrip().startswith("{"):
+            data = response.json()
+            logger.warning(f"Alpha Vantage API Note/Info for listing status: {data}")
+            _note_limit(data.get('Note', data.get('Information')))
+            return None
+        rows = [row for row in csv.DictReader(io.StringIO(text)) if row.get("symbol")]
+        return rows or None
+
+    except Exception as e:
+        logger.error(f"Error fetching Alpha Vantage listing status: {e}")
+        return None
+
+
 if __name__ == '__main__':
     print("\n--- Alpha Vantage Client Test ---")
 
@@ -10,7 +10,7 @@ import time
 import urllib.parse
 import xml.etree.ElementTree as ET
 from email.utils import parsedate_to_datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Dict, List, Optional, Tuple
 
 import requests
 
@@ -41,14 +41,19 @@ _EUROPEAN_SUFFIX_HINTS = {
 
 
 def _rate_limit_blocking() -> None:
-    """Best-effort per-process rate limiting (blocking)."""
+    """Best-effort per-process rate limiting (blocking).
+
+    Reserves the next request slot under the lock and sleeps outside it, so
+    concurrent callers wait for their own slot instead of queueing on the lock.
+    Async callers should space requests themselves and call ``fetch_stock_news``.
+    """
     global _last_request_ts
     with _rate_lock:
         now = time.monotonic()
-        wait_s = (_last_request_ts + _MIN_REQUEST_INTERVAL_S) - now
-        if wait_s > 0:
-            time.sleep(wait_s)
-        _last_request_ts = time.monotonic()
+        slot = max(now, _last_request_ts + _MIN_REQUEST_INTERVAL_S)
+        _last_request_ts = slot
+    if slot > now:
+        time.sleep(slot - now)
 
 
 def _strip_html(s: str) -> str:
@@ -105,7 +110,88 @@ def _make_rss_url(*, q: str, hl: str, gl: str, ceid: str) -> str:
     return _GOOGLE_NEWS_RSS_SEARCH_URL + "?" + urllib.parse.urlencode(params, quote_via=urllib.parse.quote_plus)
 
 
-def get_stock_news(
+_REQUEST_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
+    ),
+    "Accept": "application/rss+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5",
+}
+
+
+def _clamp_limit(limit: Any) -> int:
+    try:
+        return max(1, min(25, int(limit)))
+    except Exception:
+        return 5
+
+
+def _item_to_article(item: ET.Element) -> Optional[Dict[str, Any]]:
+    title = (item.findtext("title") or "").strip()
+    link = (item.findtext("link") or "").strip()
+    pub = (item.findtext("pubDate") or "").strip()
+    desc = (item.findtext("description") or "").strip()
+    if not title and not link:
+        return None
+
+    source_el = item.find("source")
+    source_name = "Google News"
+    if source_el is not None and (source_el.text or "").strip():
+        source_name = (source_el.text or "").strip()
+
+    # Best-effort published time normalization
+    pub_norm = pub
+    try:
+        dt = parsedate_to_datetime(pub)
+        if dt is not None:
+            # keep a simple format consistent with the rest of the bot
+            pub_norm = dt.strftime("%Y-%m-%d %H:%M:%S")
+    except Exception:
+        pub_norm = pub
+
+    return {
+        "title": title or "Untitled",
+        "url": link,
+        "source": source_name,
+        "time_published": pub_norm,
+        "summary": _strip_html(desc),
+        "sentiment_label": "N/A",
+        "sentiment_score": "N/A",
+    }
+
+
+def parse_rss_items(stream: IO[bytes], limit: int) -> List[Dict[str, Any]]:
+    """Parse RSS ``<item>`` elements incrementally, stopping after ``limit`` articles.
+
+    The rest of the document is never parsed (or, for a streamed response,
+    downloaded). A malformed tail keeps the articles parsed before it.
+    """
+    out: List[Dict[str, Any]] = []
+    seen: set[str] = set()
+    try:
+        for _event, elem in ET.iterparse(stream, events=("end",)):
+            if elem.tag != "item":
+                continue
+            article = _item_to_article(elem)
+            elem.clear()
+            if article is None:
+                continue
+            # De-dupe by link (preferred), fallback to title.
+            dedupe_key = article["url"] or article["title"]
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+            out.append(article)
+            if len(out) >= limit:
+                break
+    except ET.ParseError as e:
+        if not out:
+            raise
+        logger.info("Google News RSS: stopped at malformed XML after %d item(s): %s", len(out), e)
+    return out
+
+
+def fetch_stock_news(
     symbol: str,
     limit: int = 5,
     *,
@@ -114,111 +200,69 @@ def get_stock_news(
     ceid: str = "US:en",
     timeout_s: int = 12,
 ) -> Optional[List[Dict[str, Any]]]:
-    """Fetch recent news for a symbol using Google News RSS.
-
-    Returns a list of dicts compatible with the bot's expected schema, or None.
+    """Fetch news for a symbol from Google News RSS, without caching or rate limiting.
 
-    Dict keys match the existing news providers:
-    - title, url, source, time_published, summary, sentiment_label, sentiment_score
+    The response is streamed into ``parse_rss_items``, so the download stops
+    once ``limit`` articles have been read. Callers are responsible for
+    spacing requests (see ``utils.news``).
     """
     sym = str(symbol or "").strip().upper()
     if not sym:
         return None
+    limit_i = _clamp_limit(limit)
+    url = _make_rss_url(q=_build_query(sym), hl=hl, gl=gl, ceid=ceid)
 
     try:
-        limit_i = max(1, min(25, int(limit)))
-    except Exception:
-        limit_i = 5
-
-    cache_key = (sym, limit_i, str(hl or ""), str(gl or ""), str(ceid or ""))
-    now = time.time()
-
-    with _cache_lock:
-        hit = _cache.get(cache_key)
-        if hit and (now - hit[0]) <= _CACHE_TTL_S:
-            return list(hit[1])
-
-    q = _build_query(sym)
-    url = _make_rss_url(q=q, hl=hl, gl=gl, ceid=ceid)
-
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120 Safari/537.36"
-        ),
-        "Accept": "application/rss+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5",
-    }
-
+        resp = requests.get(url, headers=_REQUEST_HEADERS, timeout=int(timeout_s), allow_redirects=True, stream=True)
+    except Exception as e:
+        logger.warning("Google News RSS error for %s: %s", sym, e)
+        return None
     try:
-        _rate_limit_blocking()
-        resp = requests.get(url, headers=headers, timeout=int(timeout_s), allow_redirects=True)
         if resp.status_code >= 400:
             logger.warning("Google News RSS HTTP %s for %s", resp.status_code, sym)
             return None
-
-        xml_text = resp.text or ""
-        if not xml_text.strip():
-            return None
-
-        root = ET.fromstring(xml_text)
+        resp.raw.decode_content = True  # let urllib3 undo gzip before the parser sees it
+        out = parse_rss_items(resp.raw, limit_i)
     except Exception as e:
         logger.warning("Google News RSS error for %s: %s", sym, e)
         return None
+    finally:
+        resp.close()
 
-    channel = root.find("channel")
-    if channel is None:
-        return None
+    return out or None
 
-    out: List[Dict[str, Any]] = []
-    seen: set[str] = set()
 
-    for item in channel.findall("item"):
-        if len(out) >= limit_i:
-            break
+def get_stock_news(
+    symbol: str,
+    limit: int = 5,
+    *,
+    hl: str = "en",
+    gl: str = "US",
+    ceid: str = "US:en",
+    timeout_s: int = 12,
+) -> Optional[List[Dict[str, Any]]]:
+    """Fetch recent news for a symbol using Google News RSS (cached, rate limited).
+
+    Returns a list of dicts compatible with the bot's expected schema, or None.
 
-        title = (item.findtext("title") or "").strip()
-        link = (item.findtext("link") or "").strip()
-        pub = (item.findtext("pubDate") or "").strip()
-        desc = (item.findtext("description") or "").strip()
+    Dict keys match the existing news providers:
+    - title, url, source, time_published, summary, sentiment_label, sentiment_score
+    """
+    sym = str(symbol or "").strip().upper()
+    if not sym:
+        return None
+    limit_i = _clamp_limit(limit)
 
-        source_el = item.find("source")
-        source_name = "Google News"
-        if source_el is not None and (source_el.text or "").strip():
-            source_name = (source_el.text or "").strip()
+    cache_key = (sym, limit_i, str(hl or ""), str(gl or ""), str(ceid or ""))
+    now = time.time()
 
-        # Best-effort published time normalization
-        pub_norm = pub
-        try:
-            dt = parsedate_to_datetime(pub)
-            if dt is not None:
-                # keep a simple format consistent with the rest of the bot
-                pub_norm = dt.strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            pub_norm = pub
-
-        summary = _strip_html(desc)
-
-        if not title and not link:
-            continue
-
-        # De-dupe by link (preferred), fallback to title.
-        dedupe_key = link or title
-        if dedupe_key in seen:
-            continue
-        seen.add(dedupe_key)
-
-        out.append(
-            {
-                "title": title or "Untitled",
-                "url": link,
-                "source": source_name,
-                "time_published": pub_norm,
-                "summary": summary,
-                "sentiment_label": "N/A",
-                "sentiment_score": "N/A",
-            }
-        )
+    with _cache_lock:
+        hit = _cache.get(cache_key)
+        if hit and (now - hit[0]) <= _CACHE_TTL_S:
+            return list(hit[1])
 
+    _rate_limit_blocking()
+    out = fetch_stock_news(sym, limit_i, hl=hl, gl=gl, ceid=ceid, timeout_s=timeout_s)
     if not out:
         return None
 
@@ -226,9 +270,3 @@ def get_stock_news(
         _cache[cache_key] = (now, list(out))
 
     return out
-
-
-
-
-
-
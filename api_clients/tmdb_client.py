@@ -1,17 +1,29 @@
 # api_clients/tmdb_client.py
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import sys
 import logging
+import threading
+import time
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import config
+from utils.api_utils import register_cache_clearer, ttl_cache
 
 logger = logging.getLogger(__name__)
 
 TMDB_API_KEY = config.TMDB_API_KEY
 BASE_URL = "https://api.themoviedb.org/3"
 
+# One pooled keep-alive session for every TMDB call, instead of a fresh TCP+TLS handshake per request.
+# requests.Session is safe to share across the executor threads for plain GETs.
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+SHOW_DETAILS_TTL_SECONDS = 600
+MOVIE_DETAILS_TTL_SECONDS = 3600
+
 class TMDBError(Exception):
     """Base exception for TMDB API errors."""
     pass
@@ -24,6 +36,71 @@ class TMDBAPIError(TMDBError):
     """Raised when the API returns an error code (HTTP 4xx/5xx)."""
     pass
 
+
+def _append_set(append_to_response) -> frozenset:
+    if not append_to_response:
+        return frozenset()
+    if isinstance(append_to_response, str):
+        parts = append_to_response.split(',')
+    else:
+        parts = append_to_response
+    return frozenset(p.strip() for p in parts if p and p.strip())
+
+
+class _DetailsCache:
+    """
+    TTL cache for /tv/{id} and /movie/{id} responses keyed on (id, append set).
+
+    A cached response whose append set is a superset of the requested one also answers the
+    request (e.g. a cached "credits,keywords,external_ids" response serves "external_ids"),
+    since appended sub-resources are just extra top-level keys on the same payload.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 512):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, item_id, appends: frozenset):
+        now = time.monotonic()
+        with self._lock:
+            candidates = self._entries.get(str(item_id))
+            if not candidates:
+                return None
+            fresh = {k: v for k, v in candidates.items() if v[1] > now}
+            if len(fresh) != len(candidates):
+                self._entries[str(item_id)] = fresh
+            for cached_appends, (value, _expires_at) in fresh.items():
+                if appends <= cached_appends:
+                    return value
+        return None
+
+    def put(self, item_id, appends: frozenset, value) -> None:
+        if not value:
+            return
+        with self._lock:
+            key = str(item_id)
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                oldest = min(self._entries, key=lambda k: max((v[1] for v in self._entries[k].values()), default=0))
+                del self._entries[oldest]
+            variants = self._entries.setdefault(key, {})
+            # Drop variants made redundant by this (wider or equal) response.
+            for cached_appends in [a for a in variants if a <= appends]:
+                del variants[cached_appends]
+            variants[appends] = (value, time.monotonic() + self.ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_show_details_cache = _DetailsCache(SHOW_DETAILS_TTL_SECONDS)
+_movie_details_cache = _DetailsCache(MOVIE_DETAILS_TTL_SECONDS)
+register_cache_clearer(_show_details_cache.clear)
+register_cache_clearer(_movie_details_cache.clear)
+
+@ttl_cache(seconds=600)
 def search_tv_shows(query: str) -> list[dict]:
     """
     Searches for TV shows on TMDB.
@@ -41,7 +118,7 @@ def search_tv_shows(query: str) -> list[dict]:
     search_url = f"{BASE_URL}/search/tv"
 
     try:
-        response = requests.get(search_url, params=params, timeout=15)
+        response = _session.get(search_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -78,6 +155,11 @@ def get_show_details(show_id, append_to_response='next_episode_to_air,last_episo
         logger.error("TMDB_API_KEY not configured.")
         raise TMDBError("TMDB API key is missing.")
 
+    appends = _append_set(append_to_response)
+    cached = _show_details_cache.get(show_id, appends)
+    if cached is not None:
+        return cached
+
     params = {
         'api_key': TMDB_API_KEY
     }
@@ -87,9 +169,11 @@ def get_show_details(show_id, append_to_response='next_episode_to_air,last_episo
     details_url = f"{BASE_URL}/tv/{show_id}"
 
     try:
-        response = requests.get(details_url, params=params, timeout=15)
+        response = _session.get(details_url, params=params, timeout=15)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        _show_details_cache.put(show_id, appends, data)
+        return data
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 404:
             return None # Item not found, return None instead of raising
@@ -102,6 +186,7 @@ def get_show_details(show_id, append_to_response='next_episode_to_air,last_episo
         logger.error(f"Error parsing JSON response from TMDB (get_show_details for ID {show_id}): {e}")
         raise TMDBError(f"Invalid API response: {e}") from e
 
+@ttl_cache(seconds=600)
 def search_movie(query):
     """
     Searches for a movie on TMDB.
@@ -117,7 +202,7 @@ def search_movie(query):
     search_url = f"{BASE_URL}/search/movie"
 
     try:
-        response = requests.get(search_url, params=params, timeout=15)
+        response = _session.get(search_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -154,6 +239,11 @@ def get_movie_details(movie_id, append_to_response='credits,keywords'):
         logger.error("TMDB_API_KEY not configured.")
         raise TMDBError("TMDB API key is missing.")
 
+    appends = _append_set(append_to_response)
+    cached = _movie_details_cache.get(movie_id, appends)
+    if cached is not None:
+        return cached
+
     params = {
         'api_key': TMDB_API_KEY
     }
@@ -163,9 +253,11 @@ def get_movie_details(movie_id, append_to_response='credits,keywords'):
     details_url = f"{BASE_URL}/movie/{movie_id}"
 
     try:
-        response = requests.get(details_url, params=params, timeout=15)
+        response = _session.get(details_url, params=params, timeout=15)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        _movie_details_cache.put(movie_id, appends, data)
+        return data
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 404:
             return None
@@ -183,6 +275,7 @@ def get_poster_url(poster_path, size="w92"):
         return f"https://image.tmdb.org/t/p/{size}{poster_path}"
     return None
 
+@ttl_cache(seconds=1800)
 def get_trending_tv_shows(time_window='week'):
     if not TMDB_API_KEY:
         logger.error("TMDB_API_KEY not configured.")
@@ -198,7 +291,7 @@ def get_trending_tv_shows(time_window='week'):
     trending_url = f"{BASE_URL}/trending/tv/{time_window}"
 
     try:
-        response = requests.get(trending_url, params=params, timeout=15)
+        response = _session.get(trending_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -226,6 +319,7 @@ def get_trending_tv_shows(time_window='week'):
         logger.error(f"Error parsing JSON response from TMDB (get_trending_tv_shows): {e}")
         raise TMDBError(f"Invalid API response: {e}") from e
 
+@ttl_cache(seconds=3600)
 def get_upcoming_movies(region=None, page=1):
     if not TMDB_API_KEY:
         logger.error("TMDB_API_KEY not configured.")
@@ -241,7 +335,7 @@ def get_upcoming_movies(region=None, page=1):
     upcoming_url = f"{BASE_URL}/movie/upcoming"
 
     try:
-        response = requests.get(upcoming_url, params=params, timeout=15)
+        response = _session.get(upcoming_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -273,6 +367,7 @@ def get_upcoming_movies(region=None, page=1):
         logger.error(f"Error parsing JSON response from TMDB (get_upcoming_movies): {e}")
         raise TMDBError(f"Invalid API response: {e}") from e
 
+@ttl_cache(seconds=3600)
 def get_tv_on_the_air(page=1):
     if not TMDB_API_KEY:
         logger.error("TMDB_API_KEY not configured.")
@@ -285,7 +380,7 @@ def get_tv_on_the_air(page=1):
     on_the_air_url = f"{BASE_URL}/tv/on_the_air"
 
     try:
-        response = requests.get(on_the_air_url, params=params, timeout=15)
+        response = _session.get(on_the_air_url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
         
@@ -1,6 +1,10 @@
 import requests
 import logging
 import urllib.parse
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+
+from utils.api_utils import ttl_cache
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +71,7 @@ def get_show_details(tvmaze_id: int, embed: str | list[str] = None) -> dict:
         logger.error(f"Error fetching TVMaze details for ID {tvmaze_id}: {e}")
         raise TVMazeConnectionError(f"Connection error: {e}") from e
 
+@ttl_cache(seconds=86400)
 def lookup_show_by_imdb(imdb_id: str) -> dict:
     """
     Looks up a show on TVMaze using an IMDB ID.
@@ -82,6 +87,7 @@ def lookup_show_by_imdb(imdb_id: str) -> dict:
         logger.error(f"Error looking up show by IMDB ID {imdb_id}: {e}")
         raise TVMazeConnectionError(f"Connection error: {e}") from e
 
+@ttl_cache(seconds=86400)
 def lookup_show_by_thetvdb(thetvdb_id: int) -> dict:
     """
     Looks up a show on TVMaze using a TheTVDB ID.
@@ -127,3 +133,103 @@ def get_show_episodes(tvmaze_id: int) -> list[dict]:
         logger.error(f"Error fetching TVMaze episodes for show ID {tvmaze_id}: {e}")
         raise TVMazeConnectionError(f"Connection error: {e}") from e
 
+
+
+class EpisodeRecord:
+    """Compact episode: only the fields the bot uses, without summaries, images or links."""
+
+    __slots__ = ("id", "season", "number", "name", "airdate", "airstamp", "airstamp_utc", "rating")
+
+    def __init__(self, id, season, number, name, airdate, airstamp, airstamp_utc, rating):
+        self.id = id
+        self.season = season
+        self.number = number
+        self.name = name
+        self.airdate = airdate
+        self.airstamp = airstamp
+        self.airstamp_utc = airstamp_utc
+        self.rating = rating
+
+    @classmethod
+    def from_json(cls, ep: dict) -> "EpisodeRecord":
+        airstamp = ep.get('airstamp') or None
+        airstamp_utc = None
+        if isinstance(airstamp, str):
+            try:
+                dt = datetime.fromisoformat(airstamp.replace("Z", "+00:00"))
+                if dt.tzinfo is None:
+                    dt = dt.replace(tzinfo=timezone.utc)
+                airstamp_utc = dt.astimezone(timezone.utc)
+            except ValueError:
+                airstamp_utc = None
+        rating = ep.get('rating')
+        return cls(
+            ep.get('id'),
+            ep.get('season', 0),
+            ep.get('number', 0),
+            ep.get('name', 'TBA'),
+            ep.get('airdate') or None,
+            airstamp,
+            airstamp_utc,
+            rating.get('average') if isinstance(rating, dict) else None,
+        )
+
+    def as_dict(self) -> dict:
+        """TVMaze-shaped dict for code that consumes raw episode JSON."""
+        return {
+            'id': self.id,
+            'season': self.season,
+            'number': self.number,
+            'name': self.name,
+            'airdate': self.airdate,
+            'airstamp': self.airstamp,
+            'rating': {'average': self.rating},
+        }
+
+
+class ShowEpisodeIndex:
+    """
+    A show's episodes as compact records, kept sorted by airstamp (UTC) and by airdate so
+    "aired since X" and "airing in month M" are bisect lookups instead of full scans.
+    """
+
+    __slots__ = ("_by_stamp", "_stamp_keys", "_by_date", "_date_keys", "_count")
+
+    def __init__(self, episodes: list[dict]):
+        records = [EpisodeRecord.from_json(ep) for ep in episodes or [] if isinstance(ep, dict)]
+        self._count = len(records)
+        self._by_stamp = sorted((r for r in records if r.airstamp_utc), key=lambda r: r.airstamp_utc)
+        self._stamp_keys = [r.airstamp_utc for r in self._by_stamp]
+        self._by_date = sorted((r for r in records if r.airdate), key=lambda r: (r.airdate, r.airstamp or ''))
+        self._date_keys = [r.airdate for r in self._by_date]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def aired_between(self, start_utc: datetime, end_utc: datetime) -> list[EpisodeRecord]:
+        """Episodes whose airstamp falls within [start_utc, end_utc]."""
+        lo = bisect_left(self._stamp_keys, start_utc)
+        hi = bisect_right(self._stamp_keys, end_utc)
+        return self._by_stamp[lo:hi]
+
+    def airing_between_dates(self, start: date | str, end: date | str) -> list[EpisodeRecord]:
+        """Episodes whose airdate falls within [start, end] (dates or ISO "YYYY-MM-DD" strings)."""
+        start_key = start.isoformat() if isinstance(start, date) else str(start)
+        end_key = end.isoformat() if isinstance(end, date) else str(end)
+        lo = bisect_left(self._date_keys, start_key)
+        hi = bisect_right(self._date_keys, end_key)
+        return self._by_date[lo:hi]
+
+    def dated_episodes(self) -> list[EpisodeRecord]:
+        """Every episode with an airdate, in airdate order."""
+        return list(self._by_date)
+
+
+@ttl_cache(seconds=900)
+def get_show_episode_index(tvmaze_id: int) -> ShowEpisodeIndex:
+    """
+    Fetches a show's episode list once and keeps it as a compact, sorted ShowEpisodeIndex
+    (cached per show; empty indexes are not cached). Raises TVMazeConnectionError like
+    get_show_episodes.
+    """
+    return ShowEpisodeIndex(get_show_episodes(tvmaze_id))
@@ -119,6 +119,98 @@ def get_stock_price(symbol: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching Yahoo Finance data for {symbol}: {e}")
         return None
 
+@ttl_cache(seconds=86400)
+def get_symbol_currency(symbol: str) -> Optional[str]:
+    """
+    Trading currency of a symbol (e.g. 'USD', 'PLN'), cached for a day since it
+    practically never changes. Reuses the quote lookup, which reports it.
+    """
+    quote = get_stock_price(symbol)
+    if not quote:
+        return None
+    return quote.get('currency') or None
+
+BATCH_QUOTE_CHUNK_SIZE = 100
+
+
+def _frame_for_ticker(data: Any, ticker: str, single: bool) -> Any:
+    """Picks one ticker's OHLCV frame out of a (possibly multi-ticker) yf.download result."""
+    columns = getattr(data, "columns", None)
+    if columns is not None and getattr(columns, "nlevels", 1) > 1:
+        if ticker not in columns.get_level_values(0):
+            return None
+        return data[ticker]
+    return data if single else None
+
+
+def get_stock_prices_batch(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch quotes for many symbols with one yfinance multi-ticker download per chunk.
+
+    Args:
+        symbols: Stock symbols as stored by the bot (e.g. 'AAPL', 'LPP', 'LPP.WA')
+
+    Returns:
+        Dict keyed by the *input* symbol with quote dicts in the same
+        Alpha Vantage-like shape as get_stock_price ('05. price',
+        '08. previous close', ...). Symbols without usable data are omitted,
+        so callers can fall back to another provider for just those.
+    """
+    by_ticker: Dict[str, List[str]] = {}
+    for symbol in symbols or []:
+        if symbol:
+            by_ticker.setdefault(normalize_symbol(symbol), []).append(symbol)
+    tickers = list(by_ticker)
+
+    quotes: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(tickers), BATCH_QUOTE_CHUNK_SIZE):
+        chunk = tickers[start:start + BATCH_QUOTE_CHUNK_SIZE]
+        try:
+            logger.info(f"Fetching batched Yahoo Finance quotes for {len(chunk)} symbols")
+            data = yf.download(
+                tickers=chunk, period="5d", interval="1d", group_by="ticker",
+                auto_adjust=False, threads=True, progress=False,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching batched Yahoo Finance quotes for {chunk}: {e}")
+            continue
+        if data is None or getattr(data, "empty", True):
+            logger.warning(f"No batched Yahoo Finance data returned for {chunk}")
+            continue
+
+        for ticker in chunk:
+            try:
+                frame = _frame_for_ticker(data, ticker, single=len(chunk) == 1)
+                if frame is None:
+                    continue
+                frame = frame.dropna(subset=["Close"])
+                if frame.empty:
+                    continue
+                latest = frame.iloc[-1]
+                close = float(latest["Close"])
+                prev_close = float(frame.iloc[-2]["Close"]) if len(frame) >= 2 else close
+                change = close - prev_close
+                change_percent = (change / prev_close) * 100 if prev_close else 0.0
+                volume = _safe_float(latest.get("Volume"))
+                quote = {
+                    '01. symbol': ticker,
+                    '05. price': f"{close:.4f}",
+                    '08. previous close': f"{prev_close:.4f}",
+                    '09. change': f"{change:+.4f}",
+                    '10. change percent': f"{change_percent:+.2f}%",
+                    '03. high': f"{float(latest['High']):.4f}",
+                    '04. low': f"{float(latest['Low']):.4f}",
+                    '06. volume': str(int(volume)) if volume is not None and volume == volume else "0",
+                    '07. latest trading day': frame.index[-1].strftime('%Y-%m-%d'),
+                    'source': 'yahoo_finance',
+                }
+            except (KeyError, IndexError, ValueError, TypeError) as e:
+                logger.warning(f"Could not parse batched Yahoo Finance data for {ticker}: {e}")
+                continue
+            for original in by_ticker[ticker]:
+                quotes[original] = quote
+    return quotes
+
 def get_stock_news(symbol: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
     """
     Fetch recent news for a stock symbol using yfinance.
@@ -388,6 +480,48 @@ def get_daily_time_series(symbol: str, outputsize: str = "compact", period: str
         logger.error(f"Error fetching Yahoo Finance time series for {symbol}: {e}")
         return None
 
+def get_daily_bars(symbol: str, start: str, end: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Get daily OHLCV bars for an explicit date range, for the local bar store.
+
+    Args:
+        symbol: Stock symbol
+        start: First date to fetch, "YYYY-MM-DD" (inclusive)
+        end: Date to stop at, "YYYY-MM-DD" (exclusive, as in yfinance); None for up to today
+
+    Returns:
+        List of {ts, open, high, low, close, volume, corporate_action} dicts, oldest
+        first. Prices are split/dividend adjusted as of today; `corporate_action` marks
+        a bar with a split or dividend, after which earlier stored bars are stale.
+        An empty list means the provider answered but had no bars in the range; None
+        means the fetch failed.
+    """
+    try:
+        normalized_symbol = normalize_symbol(symbol)
+        logger.info(f"Fetching Yahoo Finance daily bars for {normalized_symbol} from {start} to {end or 'today'}")
+        hist = yf.Ticker(normalized_symbol).history(start=start, end=end, interval="1d")
+
+        bars = []
+        for ts, row in hist.iterrows():
+            close = _safe_float(row.get('Close'))
+            if close is None or close != close:  # skip missing / NaN closes
+                continue
+            bars.append({
+                "ts": ts.strftime('%Y-%m-%d'),
+                "open": _safe_float(row.get('Open')),
+                "high": _safe_float(row.get('High')),
+                "low": _safe_float(row.get('Low')),
+                "close": close,
+                "volume": _safe_float(row.get('Volume')),
+                "corporate_action": bool(_safe_float(row.get('Dividends')) or _safe_float(row.get('Stock Splits'))),
+            })
+        bars.sort(key=lambda bar: bar["ts"])
+        return bars
+
+    except Exception as e:
+        logger.error(f"Error fetching Yahoo Finance daily bars for {symbol}: {e}")
+        return None
+
 @ttl_cache(seconds=300)
 def get_intraday_time_series(symbol: str, interval: str = "60min", outputsize: str = "compact") -> Optional[List[Tuple[str, float]]]:
     """
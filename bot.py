@@ -24,6 +24,7 @@ from utils.activity_report import (
     normalize_activity_report_payload,
     get_activity_report_chart_image,
 )
+from utils import chart_render
 
 # Get logger
 log = logger.get_logger(__name__)
@@ -305,19 +306,17 @@ async def _deliver_webhook_report(
                         lines.append(f"• **{lang}**: {w} words")
                 embed.add_field(name="By language", value="\n".join(lines)[:1024], inline=False)
 
-                allow_external = bool(getattr(config, "ALLOW_EXTERNAL_CHARTS", True))
-                if allow_external:
-                    chart = await bot.loop.run_in_executor(
-                        None,
-                        get_activity_report_chart_image,
-                        "Words & listening time by language",
-                        labels,
-                        words,
-                        minutes,
-                    )
-                    if chart:
-                        file = discord.File(fp=chart, filename="activity_report.png")
-                        embed.set_image(url="attachment://activity_report.png")
+                chart = await bot.loop.run_in_executor(
+                    None,
+                    get_activity_report_chart_image,
+                    "Words & listening time by language",
+                    labels,
+                    words,
+                    minutes,
+                )
+                if chart:
+                    file = discord.File(fp=chart, filename="activity_report.png")
+                    embed.set_image(url="attachment://activity_report.png")
 
         allowed_mentions = discord.AllowedMentions.none()
         if embed or file:
@@ -572,6 +571,8 @@ async def main():
 
 if __name__ == "__main__":
     log.info("Starting bot execution from __main__.")
+    # Fork the chart render workers while this is still the only thread (see utils/chart_render.py).
+    chart_render.start_pool(config.CHART_RENDER_PROCESSES)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
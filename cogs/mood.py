@@ -1333,21 +1333,20 @@ class MoodCog(commands.Cog, name="Mood"):
             energy_vals = None
 
         chart_png_bytes: Optional[bytes] = None
-        # Avoid generating enormous charts for long time ranges.
-        if len(labels) <= 370:
-            try:
-                chart_buf = get_mood_daily_chart_image(
-                    f"Mood report — {period_label}",
-                    labels,
-                    mood_vals,
-                    energy_vals,
-                    chart_width=980,
-                    chart_height=420,
-                )
-                if chart_buf is not None:
-                    chart_png_bytes = chart_buf.getvalue()
-            except Exception:
-                chart_png_bytes = None
+        # Long ranges are downsampled to the chart width by the chart builder.
+        try:
+            chart_buf = get_mood_daily_chart_image(
+                f"Mood report — {period_label}",
+                labels,
+                mood_vals,
+                energy_vals,
+                chart_width=980,
+                chart_height=420,
+            )
+            if chart_buf is not None:
+                chart_png_bytes = chart_buf.getvalue()
+        except Exception:
+            chart_png_bytes = None
 
         html_bytes = to_html_report_bytes(
             title=f"Mood report — {period_label}",
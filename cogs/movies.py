@@ -4,13 +4,18 @@ import discord
 from discord.ext import commands, tasks
 from api_clients import tmdb_client
 from api_clients.tmdb_client import TMDBError, TMDBConnectionError, TMDBAPIError
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta, timezone
 import logging
 import typing
 from utils.paginator import BasePaginatorView, SelectionView, NUMBER_EMOJIS
+from utils.timezone_utils import sqlite_utc_timestamp
 
 logger = logging.getLogger(__name__)
 
+# Release-date refresh schedule: far-off releases are re-checked weekly, near ones daily.
+MOVIE_RELEASE_NEAR_DAYS = 30
+MOVIE_RELEASE_FAR_REFRESH_DAYS = 7
+
 def format_runtime(minutes):
     if minutes is None:
         return "N/A"
@@ -40,8 +45,8 @@ class MyMoviesPaginatorView(BasePaginatorView):
 
         description_lines = []
         for sub in page_subs:
-            movie_title = sub.get('movie_title', 'Unknown Title')
-            release_date = sub.get('release_date', 'Unknown Release Date')
+            movie_title = sub.get('movie_title') or sub.get('title') or 'Unknown Title'
+            release_date = sub.get('release_date') or 'Unknown Release Date'
             tmdb_id = sub.get('movie_tmdb_id') # Ensure this key matches DB result
             if not tmdb_id and 'tmdb_id' in sub: tmdb_id = sub['tmdb_id'] # Fallback if key varies
 
@@ -386,7 +391,7 @@ class MoviesCog(commands.Cog, name="Movies"):
             poster_path = ""
 
         try:
-            success = await self.bot.loop.run_in_executor(None, self.db_manager.add_movie_subscription, ctx.author.id, movie_id, actual_movie_title, poster_path)
+            success = await self.bot.loop.run_in_executor(None, self.db_manager.add_movie_subscription, ctx.author.id, movie_id, actual_movie_title, poster_path, release_date)
             if success:
                 await self.send_response(ctx,f"Successfully subscribed to **{actual_movie_title}** (Release: {release_date})!", ephemeral=True)
             else:
@@ -502,121 +507,158 @@ class MoviesCog(commands.Cog, name="Movies"):
         view = MyMoviesPaginatorView(user_id=user_id, items=subscriptions)
         await view.start(ctx, ephemeral=True)
 
+    @staticmethod
+    def _next_release_check(release_date_str: typing.Optional[str], today: date, now_utc: datetime) -> str:
+        """Weekly re-checks for movies more than MOVIE_RELEASE_NEAR_DAYS out, daily otherwise."""
+        days = 1
+        if release_date_str:
+            try:
+                release_date_obj = datetime.strptime(release_date_str, '%Y-%m-%d').date()
+                if (release_date_obj - today).days > MOVIE_RELEASE_NEAR_DAYS:
+                    days = MOVIE_RELEASE_FAR_REFRESH_DAYS
+            except ValueError:
+                pass
+        # A little under a full day so the next daily loop run is not skipped due to jitter.
+        return sqlite_utc_timestamp(now_utc + timedelta(days=days) - timedelta(hours=1))
+
+    @staticmethod
+    def _is_dnd_active(prefs: dict, current_time_obj: time) -> bool:
+        if not prefs.get('dnd_enabled', False):
+            return False
+        try:
+            dnd_start_time_obj = datetime.strptime(prefs.get('dnd_start_time') or "00:00", '%H:%M').time()
+            dnd_end_time_obj = datetime.strptime(prefs.get('dnd_end_time') or "00:00", '%H:%M').time()
+        except ValueError:
+            dnd_start_time_obj = time(0, 0)
+            dnd_end_time_obj = time(0, 0)
+        if dnd_start_time_obj <= dnd_end_time_obj:
+            return dnd_start_time_obj <= current_time_obj <= dnd_end_time_obj
+        return current_time_obj >= dnd_start_time_obj or current_time_obj <= dnd_end_time_obj
+
     @tasks.loop(hours=24)
     async def check_movie_releases(self):
-        """Checks for movie releases and notifies subscribed users."""
+        """
+        Checks for movie releases and notifies subscribed users.
+
+        1. Refresh the stored release date of each distinct movie whose refresh is due
+           (one TMDB call per tmdb_id, however many users follow it).
+        2. Notify from an indexed `release_date <= today` query over unnotified subscriptions.
+        """
         if not self.db_manager:
             logger.error("MoviesCog: DataManager (db_manager) not available. Cannot check movie releases.")
             return
 
         logger.info("MoviesCog: check_movie_releases task is running.")
-        all_subscriptions_by_user = await self.bot.loop.run_in_executor(None, self.db_manager.get_all_movie_subscriptions)
-        if not all_subscriptions_by_user:
-            logger.info("MoviesCog: No movie subscriptions found to check.")
-            return
-
         today = date.today()
+        now_utc = datetime.now(timezone.utc)
         logger.info(f"MoviesCog: Today's date for release check: {today}")
 
-        for user_id_str, user_subs_list in all_subscriptions_by_user.items():
+        details_by_movie: typing.Dict[int, dict] = {}
+        try:
+            due_movies = await self.bot.loop.run_in_executor(None, self.db_manager.list_movies_due_for_release_refresh, sqlite_utc_timestamp(now_utc))
+        except Exception as e:
+            logger.error(f"MoviesCog: Could not load movies due for a release refresh: {e}")
+            due_movies = []
+
+        for movie in due_movies or []:
+            movie_tmdb_id = movie.get('tmdb_id')
+            try:
+                fresh_movie_details = await self.bot.loop.run_in_executor(None, tmdb_client.get_movie_details, movie_tmdb_id)
+            except TMDBError as e:
+                logger.error(f"MoviesCog: TMDB error fetching details for movie ID {movie_tmdb_id} during release check: {e}")
+                continue
+            except Exception as tmdb_err:
+                logger.error(f"MoviesCog: Unexpected error fetching TMDB details for movie ID {movie_tmdb_id} during release check: {tmdb_err}")
+                continue
+            if not fresh_movie_details:
+                logger.warning(f"MoviesCog: Could not fetch details for movie '{movie.get('title')}' (ID: {movie_tmdb_id}) from TMDB.")
+                continue
+            details_by_movie[movie_tmdb_id] = fresh_movie_details
+            release_date_str = fresh_movie_details.get('release_date') or movie.get('release_date')
+            await self.bot.loop.run_in_executor(
+                None, self.db_manager.update_movie_release_info, movie_tmdb_id, release_date_str,
+                self._next_release_check(release_date_str, today, now_utc), fresh_movie_details.get('title')
+            )
+        if due_movies:
+            logger.info(f"MoviesCog: Refreshed release dates for {len(details_by_movie)}/{len(due_movies)} movie(s).")
+
+        try:
+            released_subs = await self.bot.loop.run_in_executor(None, self.db_manager.get_released_unnotified_movie_subscriptions, today.isoformat())
+        except Exception as e:
+            logger.error(f"MoviesCog: Could not load released movie subscriptions: {e}")
+            return
+        if not released_subs:
+            logger.info("MoviesCog: No released, unnotified movie subscriptions.")
+            return
+
+        subs_by_user: typing.Dict[str, typing.List[dict]] = {}
+        for sub in released_subs:
+            subs_by_user.setdefault(sub['user_id'], []).append(sub)
+
+        for user_id_str, user_subs_list in subs_by_user.items():
             try:
                 user_id = int(user_id_str)
+                prefs = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_all_preferences, user_id)
+                if self._is_dnd_active(prefs or {}, datetime.now().time()):
+                    logger.info(f"MoviesCog: DND active for user {user_id}. Skipping {len(user_subs_list)} movie notification(s).")
+                    continue
+
                 discord_user_obj = await self.bot.fetch_user(user_id)
                 if not discord_user_obj:
                     logger.warning(f"MoviesCog: Could not fetch user {user_id}. Skipping their movie notifications.")
                     continue
 
-                dnd_enabled = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_preference, user_id, 'dnd_enabled', False)
-                dnd_start_str = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_preference, user_id, 'dnd_start_time', "00:00")
-                dnd_end_str = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_preference, user_id, 'dnd_end_time', "00:00")
-                
-                try:
-                    dnd_start_time_obj = datetime.strptime(dnd_start_str, '%H:%M').time()
-                    dnd_end_time_obj = datetime.strptime(dnd_end_str, '%H:%M').time()
-                except ValueError:
-                    logger.warning(f"MoviesCog: Invalid DND time format for user {user_id}. Using defaults.")
-                    dnd_start_time_obj = time(0,0)
-                    dnd_end_time_obj = time(0,0)
-
                 for sub_item_dict in user_subs_list:
-                    movie_tmdb_id = sub_item_dict.get('tmdb_id')
-                    movie_title_from_sub = sub_item_dict.get('title', 'Unknown Movie')
-                    notified_status_bool = bool(sub_item_dict.get('notified_status', 0))
-
-                    if notified_status_bool:
-                        continue
+                    movie_tmdb_id = sub_item_dict['tmdb_id']
+                    movie_details = details_by_movie.get(movie_tmdb_id)
+                    if movie_details is None:
+                        try:
+                            movie_details = await self.bot.loop.run_in_executor(None, tmdb_client.get_movie_details, movie_tmdb_id) or {}
+                        except Exception as e:
+                            logger.warning(f"MoviesCog: Could not fetch details for released movie {movie_tmdb_id}; notifying with stored data: {e}")
+                            movie_details = {}
+                        details_by_movie[movie_tmdb_id] = movie_details
 
-                    if not movie_tmdb_id:
-                        logger.warning(f"MoviesCog: Subscription item for user {user_id} is missing tmdb_id. Sub: {sub_item_dict}")
-                        continue
-                        
-                    try:
-                        fresh_movie_details = await self.bot.loop.run_in_executor(None, tmdb_client.get_movie_details, movie_tmdb_id)
-                        if not fresh_movie_details or not fresh_movie_details.get('release_date'):
-                            logger.warning(f"MoviesCog: Could not fetch release date for movie '{movie_title_from_sub}' (ID: {movie_tmdb_id}) for user {user_id} from TMDB. Skipping.")
-                            continue
-                        release_date_str_from_tmdb = fresh_movie_details['release_date']
-                        actual_movie_title_to_display = fresh_movie_details.get('title', movie_title_from_sub)
-                    except TMDBError as e:
-                        logger.error(f"MoviesCog: TMDB error fetching details for movie ID {movie_tmdb_id} during release check: {e}")
-                        continue
-                    except Exception as tmdb_err:
-                        logger.error(f"MoviesCog: Unexpected error fetching TMDB details for movie ID {movie_tmdb_id} during release check: {tmdb_err}")
-                        continue
-                    
+                    actual_movie_title_to_display = movie_details.get('title') or sub_item_dict.get('title') or 'Unknown Movie'
                     try:
-                        release_date_obj_from_tmdb = datetime.strptime(release_date_str_from_tmdb, '%Y-%m-%d').date()
+                        release_date_obj = datetime.strptime(sub_item_dict['release_date'], '%Y-%m-%d').date()
                     except ValueError:
-                        logger.error(f"MoviesCog: Invalid release date format '{release_date_str_from_tmdb}' from TMDB for movie '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}).")
+                        logger.error(f"MoviesCog: Invalid stored release date '{sub_item_dict['release_date']}' for movie ID {movie_tmdb_id}.")
                         continue
-                    
-                    if release_date_obj_from_tmdb <= today:
-                        logger.info(f"MoviesCog: Movie '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) released on or before {today} for user {user_id}. Preparing notification.")
-                        
-                        current_time_obj = datetime.now().time()
-                        is_dnd_active_now = False
-                        if dnd_enabled:
-                            if dnd_start_time_obj <= dnd_end_time_obj:
-                                if dnd_start_time_obj <= current_time_obj <= dnd_end_time_obj: is_dnd_active_now = True
-                            else:
-                                if current_time_obj >= dnd_start_time_obj or current_time_obj <= dnd_end_time_obj: is_dnd_active_now = True
-                        
-                        if is_dnd_active_now:
-                            logger.info(f"MoviesCog: DND active for user {user_id}. Skipping notification for '{actual_movie_title_to_display}'.")
-                            continue
-
-                        embed_title = f"🎬 Movie Released: {actual_movie_title_to_display}"
-                        embed_description = (
-                            f"The movie **{actual_movie_title_to_display}** has been released!\n\n"
-                            f"**Release Date:** {release_date_obj_from_tmdb.strftime('%B %d, %Y')}\n"
-                            f"**Overview:** {fresh_movie_details.get('overview', 'No overview available.')[:500]}"
-                        )
-                        embed_color = discord.Color.blue()
-                        
-                        notification_embed = discord.Embed(title=embed_title, description=embed_description, color=embed_color)
-                        if fresh_movie_details.get('poster_path'):
-                            poster_url = tmdb_client.get_poster_url(fresh_movie_details['poster_path'])
-                            if poster_url:
-                                notification_embed.set_thumbnail(url=poster_url)
-                        
-                        notification_embed.set_footer(text=f"Movie ID: {movie_tmdb_id} | Data from TMDB")
-                        
-                        try:
-                            await discord_user_obj.send(embed=notification_embed)
-                            logger.info(f"MoviesCog: Sent release notification for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) to user {user_id}.")
-                            
-                            update_success = await self.bot.loop.run_in_executor(None, self.db_manager.update_movie_notified_status, user_id, movie_tmdb_id, True)
-                            if update_success:
-                                logger.info(f"MoviesCog: Updated notified status for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) for user {user_id}.")
-                            else:
-                                logger.error(f"MoviesCog: FAILED to update notified status for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) for user {user_id}.")
-
-                        except discord.Forbidden:
-                            logger.warning(f"MoviesCog: Cannot send DM to user {user_id} (Forbidden). They might have DMs disabled or blocked the bot.")
-                        except discord.HTTPException as ehttp:
-                            logger.error(f"MoviesCog: HTTP error sending DM for movie '{actual_movie_title_to_display}' to user {user_id}: {ehttp}")
-                        except Exception as e_send_dm:
-                            logger.error(f"MoviesCog: Error sending movie release DM for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) to user {user_id}: {e_send_dm}", exc_info=True)
+
+                    logger.info(f"MoviesCog: Movie '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) released on or before {today} for user {user_id}. Preparing notification.")
+                    embed_description = (
+                        f"The movie **{actual_movie_title_to_display}** has been released!\n\n"
+                        f"**Release Date:** {release_date_obj.strftime('%B %d, %Y')}\n"
+                        f"**Overview:** {(movie_details.get('overview') or 'No overview available.')[:500]}"
+                    )
+                    notification_embed = discord.Embed(
+                        title=f"🎬 Movie Released: {actual_movie_title_to_display}",
+                        description=embed_description,
+                        color=discord.Color.blue()
+                    )
+                    poster_path = movie_details.get('poster_path') or sub_item_dict.get('poster_path')
+                    if poster_path:
+                        poster_url = tmdb_client.get_poster_url(poster_path)
+                        if poster_url:
+                            notification_embed.set_thumbnail(url=poster_url)
+                    notification_embed.set_footer(text=f"Movie ID: {movie_tmdb_id} | Data from TMDB")
+
+                    try:
+                        await discord_user_obj.send(embed=notification_embed)
+                        logger.info(f"MoviesCog: Sent release notification for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) to user {user_id}.")
+
+                        update_success = await self.bot.loop.run_in_executor(None, self.db_manager.update_movie_notified_status, user_id, movie_tmdb_id, True)
+                        if update_success:
+                            logger.info(f"MoviesCog: Updated notified status for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) for user {user_id}.")
+                        else:
+                            logger.error(f"MoviesCog: FAILED to update notified status for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) for user {user_id}.")
+                    except discord.Forbidden:
+                        logger.warning(f"MoviesCog: Cannot send DM to user {user_id} (Forbidden). They might have DMs disabled or blocked the bot.")
+                    except discord.HTTPException as ehttp:
+                        logger.error(f"MoviesCog: HTTP error sending DM for movie '{actual_movie_title_to_display}' to user {user_id}: {ehttp}")
+                    except Exception as e_send_dm:
+                        logger.error(f"MoviesCog: Error sending movie release DM for '{actual_movie_title_to_display}' (ID: {movie_tmdb_id}) to user {user_id}: {e_send_dm}", exc_info=True)
             except Exception as e_user_loop:
                 logger.error(f"MoviesCog: Error processing subscriptions for user ID string '{user_id_str}': {e_user_loop}", exc_info=True)
 
@@ -4,26 +4,46 @@ import discord
 import asyncio # Added for rate limiting
 import functools # Added for partial
 import logging # For background task logging
+import time # For throttling progress edits
 import typing # For type hinting
-from datetime import datetime, timezone # For earnings/dividend date math
+import config
+from datetime import date, datetime, timedelta, timezone # For earnings/dividend date math
 from discord.ext import commands, tasks
 from api_clients import alpha_vantage_client
 from api_clients.alpha_vantage_client import get_daily_time_series, get_intraday_time_series # Added
 from api_clients import yahoo_finance_client # Added Yahoo Finance support
-from api_clients import google_news_rss_client
-from utils.chart_utils import get_stock_chart_image # Added
+from utils.chart_utils import CHART_CACHE, get_stock_chart_image
+from utils.fx import FX_BASE_CURRENCIES, FxService
+from utils.news import NewsAggregator
+from utils.portfolio import PortfolioHistoryEngine, PortfolioValuator
+from utils.quota import PRIORITY_BACKGROUND, call_with_priority
+from utils.quote_router import PROVIDER_LABELS, QUOTE_ROUTER
+from utils.symbol_directory import SymbolDirectory
+from utils.timezone_utils import parse_sqlite_utc_timestamp
 # Individual function imports from data_manager are no longer needed if using an instance
 
 # Configure logging for this cog
 logger = logging.getLogger(__name__)
 
-STOCK_CHECK_INTERVAL_MINUTES = 60 # Check one stock approximately every hour
+STOCK_CHECK_INTERVAL_MINUTES = 15 # Every cycle evaluates all alert symbols from one batched quote fetch
+ALERT_AV_FALLBACK_MAX_SYMBOLS = 5 # Alpha Vantage free tier is ~5 calls/min; only used for Yahoo misses
 
 # Earnings/dividend alert configuration
 PREF_EARNINGS_ALERTS = "earnings_alerts"        # bool: opt-in toggle
 PREF_EARNINGS_LEAD_DAYS = "earnings_lead_days"  # int: days ahead to alert
 DEFAULT_EARNINGS_LEAD_DAYS = 3
 EARNINGS_CHECK_INTERVAL_HOURS = 24
+# The sweep fetches each distinct tracked symbol once into the corporate_events table,
+# then fans reminders out to users from SQLite.
+CORPORATE_EVENTS_CONCURRENCY = 4
+CORPORATE_EVENTS_REFRESH_HOURS = 20 # Shorter than the check interval so every daily sweep refetches
+CALENDAR_FAR_FUTURE = "9999-12-31"
+
+# Portfolio FX conversions are served from memory; one batched download refreshes every known currency.
+FX_REFRESH_INTERVAL_MINUTES = 60
+
+# Symbol autocomplete is served from the local symbol directory (see utils.symbol_directory).
+SYMBOL_DIRECTORY_CHECK_HOURS = 24 # Sources are only re-downloaded once older than SYMBOL_DIRECTORY_REFRESH_HOURS
 
 # Per-user opt-out for the whole stock feature. Stocks are enabled by default;
 # a user can turn the commands off with /stocks_disable.
@@ -43,18 +63,79 @@ SUPPORTED_TIMESPAN = {
     "MAX": {"func": get_daily_time_series, "params": {'outputsize': 'full'}, "label": "Max Available", "is_intraday": False},
 }
 
+# Local daily bar store: charts read ranges from SQLite and only fetch the missing head/tail.
+DAILY_BAR_INTERVAL = "1d"
+DAILY_BAR_REFRESH_HOURS = 12 # The newest stored bar is re-fetched at most this often per symbol
+MAX_HISTORY_START = date(1970, 1, 1)
+TIMESPAN_CALENDAR_DAYS = {"1D": 1, "5D": 7, "1M": 31, "3M": 92, "6M": 183, "1Y": 366}
+
+def _timespan_start_date(timespan_upper: str, today: date) -> date:
+    """First calendar date a daily chart for `timespan_upper` needs."""
+    if timespan_upper == "YTD":
+        return today.replace(month=1, day=1)
+    if timespan_upper in TIMESPAN_CALENDAR_DAYS:
+        return today - timedelta(days=TIMESPAN_CALENDAR_DAYS[timespan_upper])
+    return MAX_HISTORY_START
+
+def _plan_bar_fetches(sync: typing.Optional[dict], start: str, now_utc: datetime) -> typing.List[typing.Tuple[str, typing.Optional[str]]]:
+    """
+    (fetch_start, fetch_end_exclusive) ranges needed so the store covers `start`..today:
+    everything when nothing is stored, the missing head when `start` predates the stored
+    coverage, and the tail from the newest stored bar when the last sync is stale.
+    """
+    if not sync:
+        return [(start, None)]
+    plans = []
+    if start < sync["covered_from"]:
+        plans.append((start, sync["covered_from"]))
+    synced_at = parse_sqlite_utc_timestamp(sync.get("synced_at"))
+    if not sync.get("last_ts") or not synced_at or now_utc - synced_at >= timedelta(hours=DAILY_BAR_REFRESH_HOURS):
+        plans.append((sync.get("last_ts") or sync["covered_from"], None))
+    return plans
+
+def _corporate_events_from_info(earnings: typing.Optional[dict], dividend: typing.Optional[dict]) -> typing.List[dict]:
+    """corporate_events rows (event_type, event_date, value, currency) from get_earnings_info / get_dividend_info results."""
+    events = []
+    if earnings and earnings.get("next_earnings_date"):
+        events.append({
+            "event_type": "earnings", "event_date": earnings["next_earnings_date"],
+            "value": earnings.get("eps_estimate"), "currency": earnings.get("currency"),
+        })
+    if dividend and dividend.get("pays_dividend") and dividend.get("ex_dividend_date"):
+        events.append({
+            "event_type": "ex_dividend", "event_date": dividend["ex_dividend_date"],
+            "value": dividend.get("last_dividend_value"), "currency": dividend.get("currency"),
+        })
+    return events
+
+def _is_complete_quote(price_data: typing.Any) -> bool:
+    return (
+        isinstance(price_data, dict)
+        and "error" not in price_data
+        and "05. price" in price_data
+        and "08. previous close" in price_data
+    )
+
 class Stocks(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db_manager = bot.db_manager # Get the DataManager instance from the bot
-        self.unique_stocks_queue = []
-        self.current_queue_index = 0
+        self.alert_fallback_cursor = 0 # Rotates the Alpha Vantage fallback over symbols Yahoo missed
+        self.fx_service = FxService(self.db_manager) # Shared spot FX rates, backed by currency_rates
+        self.news = NewsAggregator(bot.loop) # Cached, deduplicated headlines from every news provider
+        self.symbol_directory = SymbolDirectory(
+            self.db_manager, config.SYMBOL_DIRECTORY_FILE, config.SYMBOL_DIRECTORY_REFRESH_HOURS
+        )
         self.check_stock_alerts.start() # Start the background task
         self.check_corporate_events.start() # Earnings/dividend alert task
+        self.refresh_fx_rates.start()
+        self.refresh_symbol_directory.start()
 
     def cog_unload(self):
         self.check_stock_alerts.cancel() # Ensure the task is cancelled on cog unload
         self.check_corporate_events.cancel()
+        self.refresh_fx_rates.cancel()
+        self.refresh_symbol_directory.cancel()
 
     async def cog_check(self, ctx: commands.Context) -> bool:
         """
@@ -109,20 +190,80 @@ class Stocks(commands.Cog):
 
     async def _fetch_stock_news_any_provider(self, symbol: str, limit: int = 5) -> typing.Optional[typing.List[dict]]:
         """
-        Prefer Google News RSS (free/no key), fallback to Yahoo.
+        Google News RSS and Yahoo headlines, merged and deduplicated (see utils.news).
         """
-        sym = str(symbol or "").strip().upper()
-        limit = max(1, min(25, int(limit)))
-        if not sym:
-            return None
+        return await self.news.get(symbol, limit)
+
+    async def _fetch_alert_quotes(self, symbols: typing.List[str]) -> typing.Dict[str, dict]:
+        """
+        Quotes for every alert symbol: one batched Yahoo Finance download, then
+        Alpha Vantage (quota-limited) for at most ALERT_AV_FALLBACK_MAX_SYMBOLS misses,
+        rotating through the misses so none of them is starved across cycles.
+        """
+        quotes = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_prices_batch, symbols)
+        quotes = {sym: q for sym, q in (quotes or {}).items() if _is_complete_quote(q)}
+
+        missing = [sym for sym in symbols if sym not in quotes]
+        if not missing:
+            return quotes
+        logger.info(f"{len(missing)} alert symbol(s) missing from batched quotes; using Alpha Vantage fallback.")
+
+        offset = self.alert_fallback_cursor % len(missing)
+        fallback = (missing[offset:] + missing[:offset])[:ALERT_AV_FALLBACK_MAX_SYMBOLS]
+        self.alert_fallback_cursor = offset + len(fallback)
+        for symbol in fallback:
+            if not alpha_vantage_client.budget_available(PRIORITY_BACKGROUND):
+                logger.info("Alpha Vantage budget is reserved for interactive requests. Remaining symbols will retry next cycle.")
+                break
+            price_data = await self.bot.loop.run_in_executor(
+                None, call_with_priority, PRIORITY_BACKGROUND, alpha_vantage_client.get_stock_price, symbol
+            )
+            if isinstance(price_data, dict) and price_data.get("error") in ("api_limit", "config_error"):
+                logger.warning(f"Alpha Vantage unavailable ({price_data.get('error')}) while checking {symbol}. Remaining symbols will retry next cycle.")
+                break
+            if _is_complete_quote(price_data):
+                quotes[symbol] = price_data
+            else:
+                logger.error(f"Could not fetch complete price data for {symbol} during alert check.")
+        return quotes
 
-        rss_news = await self.bot.loop.run_in_executor(None, google_news_rss_client.get_stock_news, sym, limit)
-        if isinstance(rss_news, list) and rss_news:
-            return rss_news
+    async def _get_daily_closes(self, symbol: str, start_date: date) -> typing.Optional[typing.List[typing.Tuple[str, float]]]:
+        """
+        Daily (date, close) pairs from start_date to today, served from the local bar
+        store. Only the gaps the store is missing are fetched from Yahoo Finance.
+        """
+        ticker = yahoo_finance_client.normalize_symbol(symbol)
+        start = start_date.isoformat()
+        if not self.db_manager:
+            bars = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_bars, ticker, start)
+            return [(bar["ts"], bar["close"]) for bar in bars] if bars else None
+
+        sync = await self.bot.loop.run_in_executor(None, self.db_manager.get_stock_bar_sync, ticker, DAILY_BAR_INTERVAL)
+        for fetch_start, fetch_end in _plan_bar_fetches(sync, start, datetime.now(timezone.utc)):
+            bars = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_bars, ticker, fetch_start, fetch_end)
+            if bars is None:
+                logger.warning(f"Could not fill daily bars for {ticker} from {fetch_start}; serving what is stored.")
+                continue
+            if sync and fetch_end is None and any(
+                bar.get("corporate_action") and bar["ts"] > sync["last_ts"] for bar in bars
+            ):
+                # A new split or dividend re-adjusts all earlier prices: the stored bars would show a false jump.
+                # The tail starts at last_ts inclusive; an action on that bar was already applied.
+                full_start = min(sync["covered_from"], start)
+                logger.info(f"Split/dividend in the new {ticker} bars; re-fetching stored history from {full_start}.")
+                full = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_bars, ticker, full_start)
+                if full is None:
+                    logger.warning(f"Could not re-fetch adjusted history for {ticker}; serving what is stored.")
+                    continue
+                await self.bot.loop.run_in_executor(
+                    None, functools.partial(self.db_manager.store_stock_bars, ticker, DAILY_BAR_INTERVAL, full, full_start, replace=True)
+                )
+                continue
+            # store_stock_bars only ever widens coverage, so passing fetch_start is safe for tail refreshes too.
+            await self.bot.loop.run_in_executor(None, self.db_manager.store_stock_bars, ticker, DAILY_BAR_INTERVAL, bars, fetch_start)
 
-        # Yahoo fallback (sometimes has better direct ticker linkage)
-        yf_news = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_news, sym, limit)
-        return yf_news if isinstance(yf_news, list) and yf_news else None
+        rows = await self.bot.loop.run_in_executor(None, self.db_manager.get_stock_bars, ticker, DAILY_BAR_INTERVAL, start)
+        return [(row["ts"], row["close"]) for row in rows] or None
 
     @tasks.loop(minutes=STOCK_CHECK_INTERVAL_MINUTES)
     async def check_stock_alerts(self):
@@ -131,127 +272,78 @@ class Stocks(commands.Cog):
             return
 
         logger.info("Stock alert check task running...")
-        all_user_alerts_map = await self.bot.loop.run_in_executor(None, self.db_manager.get_all_active_alerts_for_monitoring) # Returns dict {user_id: {symbol: alert_details}}
+        alert_index = await self.bot.loop.run_in_executor(None, self.db_manager.get_stock_alert_index)
+        symbols = alert_index.symbols()
 
-        if not all_user_alerts_map:
+        if not symbols:
             logger.info("No active stock alerts to monitor.")
             return
 
-        # Extract all unique symbols from the map
-        all_symbols_with_alerts = set()
-        for user_id_str, stock_alerts_dict in all_user_alerts_map.items():
-            for symbol_str in stock_alerts_dict.keys():
-                all_symbols_with_alerts.add(symbol_str)
-        
-        latest_unique_symbols = sorted(list(all_symbols_with_alerts))
-
-
-        if not latest_unique_symbols:
-            logger.info("No unique symbols from active alerts.")
-            self.unique_stocks_queue = []
-            self.current_queue_index = 0
-            return
-
-        # Update queue if the set of unique symbols has changed
-        if set(latest_unique_symbols) != set(self.unique_stocks_queue):
-            logger.info(f"Unique stock list changed. Old: {self.unique_stocks_queue}, New: {latest_unique_symbols}")
-            self.unique_stocks_queue = latest_unique_symbols
-            self.current_queue_index = 0 # Reset index if list changes
-
-        if not self.unique_stocks_queue:
-            logger.info("Stock monitoring queue is empty after update.")
-            return
-        
-        if self.current_queue_index >= len(self.unique_stocks_queue):
-            self.current_queue_index = 0
+        quotes = await self._fetch_alert_quotes(symbols)
+        logger.info(f"Fetched quotes for {len(quotes)}/{len(symbols)} alert symbols.")
 
-        symbol_to_check = self.unique_stocks_queue[self.current_queue_index]
-        logger.info(f"Selected stock for current check: {symbol_to_check}")
+        for symbol in symbols:
+            price_data = quotes.get(symbol)
+            if not price_data:
+                continue
+            try:
+                current_price = float(price_data['05. price'])
+                previous_close_price = float(price_data['08. previous close'])
+            except (ValueError, TypeError) as e:
+                logger.error(f"Could not parse price/previous close for {symbol}. Data: {price_data}. Error: {e}")
+                continue
+            if previous_close_price == 0:
+                logger.warning(f"Cannot calculate DPC for {symbol} as previous_close_price is 0.")
+            for user_id_str, direction, threshold in alert_index.crossed(symbol, current_price, previous_close_price):
+                await self._send_triggered_alert(int(user_id_str), symbol, direction, threshold, current_price, previous_close_price)
+        logger.info(f"Finished alert check for {len(symbols)} symbols.")
+
+    async def _send_triggered_alert(self, user_id_int: int, symbol_to_check: str, direction: str, threshold: float,
+                                    current_price: float, previous_close_price: float):
+        """DMs the user about a crossed alert threshold and deactivates that target."""
+        if direction == "above":
+            triggered_message = f"📈 **Price Alert!** {symbol_to_check} has risen above your target of ${threshold:.2f}. Current price: ${current_price:.2f}"
+        elif direction == "below":
+            triggered_message = f"📉 **Price Alert!** {symbol_to_check} has fallen below your target of ${threshold:.2f}. Current price: ${current_price:.2f}"
+        else:
+            percentage_change = ((current_price - previous_close_price) / previous_close_price) * 100
+            if direction == "dpc_above":
+                triggered_message = f"📈 **DPC Alert!** {symbol_to_check} is up +{percentage_change:.2f}% today (currently ${current_price:.2f}), meeting your +{threshold:.2f}% target."
+            else:
+                triggered_message = f"📉 **DPC Alert!** {symbol_to_check} is down {percentage_change:.2f}% today (currently ${current_price:.2f}), meeting your -{threshold:.2f}% target."
 
-        self.current_queue_index = (self.current_queue_index + 1) % len(self.unique_stocks_queue)
-        
-        await asyncio.sleep(2) # Small delay
-        price_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_stock_price, symbol_to_check)
-
-        if not price_data or "error" in price_data or "05. price" not in price_data or "08. previous close" not in price_data:
-            error_msg = price_data.get("message", "Unknown API error or invalid/incomplete data") if isinstance(price_data, dict) else "No data received"
-            logger.error(f"Could not fetch complete price data for {symbol_to_check} during alert check: {error_msg}")
-            if isinstance(price_data, dict) and price_data.get("error") == "api_limit":
-                logger.warning(f"Alpha Vantage API limit reached while checking {symbol_to_check}. Task will retry next cycle.")
+        discord_user_obj = await self.bot.fetch_user(user_id_int)
+        if not discord_user_obj:
+            logger.warning(f"Could not find user {user_id_int} for alert on {symbol_to_check}.")
             return
-
         try:
-            current_price = float(price_data['05. price'])
-            previous_close_price = float(price_data['08. previous close'])
-            logger.info(f"Data for {symbol_to_check}: Current Price: {current_price}, Previous Close: {previous_close_price}")
-        except (ValueError, TypeError) as e:
-            logger.error(f"Could not parse price/previous close for {symbol_to_check}. Data: {price_data}. Error: {e}")
-            return
-
-        # Iterate through users who have alerts for this specific symbol_to_check
-        for user_id_str, user_specific_alerts_dict in all_user_alerts_map.items():
-            if symbol_to_check not in user_specific_alerts_dict:
-                continue # This user doesn't have an alert for the current symbol
-
-            alert_details = user_specific_alerts_dict[symbol_to_check] # This is the dict of alert conditions
-            user_id_int = int(user_id_str) # Convert string user_id to int
-            
-            discord_user_obj = await self.bot.fetch_user(user_id_int)
-            if not discord_user_obj:
-                logger.warning(f"Could not find user {user_id_int} for alert on {symbol_to_check}.")
-                continue
-
-            triggered_message = None
-            deactivate_direction = None
-
-            # --- Price Target Checks ---
-            # alert_details keys are like 'target_above', 'active_above', etc.
-            if alert_details.get('active_above') and alert_details.get('target_above') is not None:
-                if current_price > float(alert_details['target_above']): # Ensure comparison with float
-                    triggered_message = f"📈 **Price Alert!** {symbol_to_check} has risen above your target of ${float(alert_details['target_above']):.2f}. Current price: ${current_price:.2f}"
-                    deactivate_direction = "above"
-            
-            if not triggered_message and alert_details.get('active_below') and alert_details.get('target_below') is not None:
-                if current_price < float(alert_details['target_below']): # Ensure comparison with float
-                    triggered_message = f"📉 **Price Alert!** {symbol_to_check} has fallen below your target of ${float(alert_details['target_below']):.2f}. Current price: ${current_price:.2f}"
-                    deactivate_direction = "below"
-
-            # --- Daily Percentage Change (DPC) Target Checks ---
-            if not triggered_message and previous_close_price != 0:
-                percentage_change = ((current_price - previous_close_price) / previous_close_price) * 100
-                logger.info(f"DPC calc for {symbol_to_check} (User {user_id_int}): Current: {current_price}, Prev Close: {previous_close_price}, Change: {percentage_change:.2f}%")
-
-                if alert_details.get('dpc_above_active') and alert_details.get('dpc_above_target') is not None:
-                    if percentage_change > float(alert_details['dpc_above_target']):
-                        triggered_message = f"📈 **DPC Alert!** {symbol_to_check} is up +{percentage_change:.2f}% today (currently ${current_price:.2f}), meeting your +{float(alert_details['dpc_above_target']):.2f}% target."
-                        deactivate_direction = "dpc_above"
-                
-                if not triggered_message and alert_details.get('dpc_below_active') and alert_details.get('dpc_below_target') is not None:
-                    if percentage_change < 0 and abs(percentage_change) > float(alert_details['dpc_below_target']):
-                         triggered_message = f"📉 **DPC Alert!** {symbol_to_check} is down {percentage_change:.2f}% today (currently ${current_price:.2f}), meeting your -{float(alert_details['dpc_below_target']):.2f}% target."
-                         deactivate_direction = "dpc_below"
-            elif not triggered_message and previous_close_price == 0:
-                logger.warning(f"Cannot calculate DPC for {symbol_to_check} as previous_close_price is 0.")
-
-            if triggered_message and deactivate_direction:
-                try:
-                    await discord_user_obj.send(triggered_message)
-                    logger.info(f"Sent alert DM to user {user_id_int} for {symbol_to_check} ({deactivate_direction} target). Message: {triggered_message}")
-                    await self.bot.loop.run_in_executor(None, self.db_manager.deactivate_stock_alert_target, user_id_int, symbol_to_check, deactivate_direction)
-                    logger.info(f"Deactivated {deactivate_direction} alert for user {user_id_int}, stock {symbol_to_check}.")
-                except discord.Forbidden:
-                    logger.warning(f"Could not send DM to user {user_id_int} (DM disabled or bot blocked).")
-                except Exception as e:
-                    logger.error(f"Error sending DM or deactivating alert for user {user_id_int}, {symbol_to_check}: {e}")
-        logger.info(f"Finished alert check for {symbol_to_check}.")
+            await discord_user_obj.send(triggered_message)
+            logger.info(f"Sent alert DM to user {user_id_int} for {symbol_to_check} ({direction} target). Message: {triggered_message}")
+            await self.bot.loop.run_in_executor(None, self.db_manager.deactivate_stock_alert_target, user_id_int, symbol_to_check, direction)
+            logger.info(f"Deactivated {direction} alert for user {user_id_int}, stock {symbol_to_check}.")
+        except discord.Forbidden:
+            logger.warning(f"Could not send DM to user {user_id_int} (DM disabled or bot blocked).")
+        except Exception as e:
+            logger.error(f"Error sending DM or deactivating alert for user {user_id_int}, {symbol_to_check}: {e}")
 
     @check_stock_alerts.before_loop
     async def before_check_stock_alerts(self):
         await self.bot.wait_until_ready()
         logger.info("Stock alert monitoring task is waiting for bot to be ready...")
 
+    async def symbol_autocomplete(self, interaction: discord.Interaction, current: str) -> typing.List[discord.app_commands.Choice[str]]:
+        """
+        Autocomplete for stock symbols from the local symbol directory (in memory, no API calls).
+        """
+        choices = []
+        for entry in self.symbol_directory.search(current, limit=25):
+            label = f"{entry['symbol']} - {entry['name']}" if entry["name"] else entry["symbol"]
+            choices.append(discord.app_commands.Choice(name=label[:100], value=entry["symbol"]))
+        return choices
+
     @commands.hybrid_command(name="stock_price", description="Get the current price of a stock.")
     @discord.app_commands.describe(symbol="The stock symbol (e.g., AAPL, MSFT, LPP.WA)")
+    @discord.app_commands.autocomplete(symbol=symbol_autocomplete)
     async def stock_price(self, ctx: commands.Context, *, symbol: str):
         """
         Fetches and displays the current price and other relevant information for a given stock symbol.
@@ -268,29 +360,11 @@ class Stocks(commands.Cog):
         logger.info(f"[STOCK_PRICE_DEBUG] Command received for symbol: {symbol}")
         upper_symbol = symbol.upper()
         
-        # First try Alpha Vantage (for US stocks)
-        logger.info(f"[STOCK_PRICE_DEBUG] Attempting Alpha Vantage for {upper_symbol}")
-        price_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_stock_price, upper_symbol)
-        data_source = "Alpha Vantage"
-        logger.info(f"[STOCK_PRICE_DEBUG] Alpha Vantage raw response for {upper_symbol}: {price_data}")
-
-        # If Alpha Vantage fails or has API limits, try Yahoo Finance as fallback
-        if not price_data or "error" in price_data:
-            if price_data and price_data.get("error") == "api_limit":
-                logger.info(f"[STOCK_PRICE_DEBUG] Alpha Vantage API limit for {upper_symbol}. Falling back to Yahoo.")
-            else:
-                logger.info(f"[STOCK_PRICE_DEBUG] Alpha Vantage failed for {upper_symbol} (Data: {price_data}). Falling back to Yahoo.")
-            
-            # Try Yahoo Finance
-            logger.info(f"[STOCK_PRICE_DEBUG] Attempting Yahoo Finance for {upper_symbol} (normalized to {yahoo_finance_client.normalize_symbol(upper_symbol)})")
-            price_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, upper_symbol)
-            data_source = "Yahoo Finance"
-            logger.info(f"[STOCK_PRICE_DEBUG] Yahoo Finance raw response for {yahoo_finance_client.normalize_symbol(upper_symbol)}: {price_data}")
-            
-            # If Yahoo Finance also fails, we're out of options
-            if not price_data:
-                logger.info(f"[STOCK_PRICE_DEBUG] Yahoo Finance also failed for {yahoo_finance_client.normalize_symbol(upper_symbol)}. No more APIs to try.")
-        
+        # Hedged across Alpha Vantage and Yahoo Finance; the faster usable answer wins.
+        price_data = await QUOTE_ROUTER.quote(self.bot.loop, upper_symbol)
+        data_source = PROVIDER_LABELS[price_data["source"]] if price_data else "N/A"
+        logger.info(f"[STOCK_PRICE_DEBUG] Quote router response for {upper_symbol} from {data_source}: {price_data}")
+
         # Check if we have valid data from any source
         if not price_data:
             logger.error(f"[STOCK_PRICE_DEBUG] All APIs failed for {upper_symbol}.")
@@ -305,21 +379,7 @@ class Stocks(commands.Cog):
             return
 
         if price_data: # This block now processes data from AV or YF
-            if "error" in price_data: # This error is now from the *second* attempt if AV failed
-                error_type = price_data["error"]
-                error_message = price_data.get("message", "An unspecified error occurred.")
-                logger.error(f"[STOCK_PRICE_DEBUG] Final data source ({data_source}) reported error for {upper_symbol}: Type: {error_type}, Msg: {error_message}")
-                if error_type == "api_limit":
-                    await ctx.followup.send(f"Could not retrieve price for {upper_symbol}: {error_message}")
-                elif error_type == "config_error":
-                    logger.error(f"Stock price configuration error for {upper_symbol}: {error_message}") # Log server-side
-                    await ctx.followup.send(f"Could not retrieve price for {upper_symbol} due to a server configuration issue. Please notify the bot administrator.")
-                elif error_type == "api_error":
-                    await ctx.followup.send(f"Could not retrieve price for {upper_symbol}: {error_message}")
-                else: # Unknown error type in dictionary
-                    logger.error(f"Stock price: Unknown error type '{error_type}' for {upper_symbol}: {error_message}")
-                    await ctx.followup.send(f"Error fetching data for {upper_symbol}. An unexpected error occurred with the data provider.")
-            elif "01. symbol" in price_data and "05. price" in price_data: # Success from either AV or YF
+            if "01. symbol" in price_data and "05. price" in price_data: # Normalized quote from either provider
                 logger.info(f"[STOCK_PRICE_DEBUG] Successfully processed data for {upper_symbol} from {data_source}.")
                 stock_symbol_from_api = price_data['01. symbol']
                 
@@ -418,6 +478,7 @@ class Stocks(commands.Cog):
         quantity="Number of shares (e.g., 10.5)",
         purchase_price="Price per share at purchase (e.g., 150.75)"
     )
+    @discord.app_commands.autocomplete(symbol=symbol_autocomplete)
     async def track_stock(self, ctx: commands.Context, symbol: str, quantity: typing.Optional[float] = None, purchase_price: typing.Optional[float] = None):
         """
         Allows a user to start tracking a stock symbol.
@@ -510,10 +571,9 @@ class Stocks(commands.Cog):
             return
 
         embed = discord.Embed(title=f"📊 Your Tracked Stocks ({len(tracked_stocks_list)})", color=discord.Color.purple())
-        embed.set_footer(text="Data provided by Alpha Vantage. Prices may be delayed. Alerts shown are active.")
+        embed.set_footer(text="Data provided by Alpha Vantage / Yahoo Finance. Prices may be delayed. Alerts shown are active.")
         
         description_lines = []
-        api_call_count = 0
         max_calls_for_prices = 3
 
         if len(tracked_stocks_list) > max_calls_for_prices:
@@ -530,11 +590,16 @@ class Stocks(commands.Cog):
                 stock_display += f" ({quantity} @ ${purchase_price:,.2f})"
             
             if i < max_calls_for_prices:
-                if api_call_count > 0:
-                    await asyncio.sleep(13)
-                
-                price_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_stock_price, symbol_upper)
-                api_call_count += 1
+                # The shared Alpha Vantage budget paces these calls; once it is spent, go
+                # straight to Yahoo Finance rather than sending a request that will be rejected.
+                if alpha_vantage_client.budget_available():
+                    price_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_stock_price, symbol_upper)
+                else:
+                    price_data = dict(alpha_vantage_client.BUDGET_EXHAUSTED)
+                if not price_data or "error" in price_data:
+                    yf_price_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, symbol_upper)
+                    if yf_price_data:
+                        price_data = yf_price_data
 
                 if price_data:
                     if "error" in price_data:
@@ -747,6 +812,7 @@ class Stocks(commands.Cog):
         symbol="The stock symbol (e.g., AAPL, MSFT)",
         timespan=f"The timespan for the chart. Default '1M'. Options: {', '.join(SUPPORTED_TIMESPAN.keys())}"
     )
+    @discord.app_commands.autocomplete(symbol=symbol_autocomplete)
     async def stock_chart(self, ctx: commands.Context, symbol: str, timespan: str = "1M"):
         """
         Generates and displays a stock price chart for a given symbol and timespan.
@@ -773,56 +839,42 @@ class Stocks(commands.Cog):
         api_params = config["params"].copy() # Use a copy to avoid modifying the original dict
         display_label = config["label"]
 
-        logger.info(f"Fetching chart data for {symbol_for_display} (normalized: {normalized_symbol}), timespan {timespan_upper} using Alpha Vantage first.")
-        data_source = "Alpha Vantage" # Default data source
-
-        # Call the appropriate Alpha Vantage function
         if config["is_intraday"]:
+            logger.info(f"Fetching chart data for {symbol_for_display} (normalized: {normalized_symbol}), timespan {timespan_upper} using Alpha Vantage first.")
+            data_source = "Alpha Vantage"
             time_series_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_intraday_time_series, symbol_for_display, api_params['interval'], api_params['outputsize'])
-        else: # Daily
-            time_series_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_daily_time_series, symbol_for_display, api_params['outputsize'])
+        else: # Daily: local bar store, topped up from Yahoo Finance
+            logger.info(f"Fetching chart data for {symbol_for_display} (normalized: {normalized_symbol}), timespan {timespan_upper} from the local bar store.")
+            data_source = "Yahoo Finance"
+            start_date = _timespan_start_date(timespan_upper, datetime.now(timezone.utc).date())
+            time_series_data = await self._get_daily_closes(normalized_symbol, start_date)
 
-        # Check if Alpha Vantage failed (no data, error dict, or empty list), then try Yahoo Finance
-        alpha_vantage_failed = False
+        # Check if the primary source failed (no data, error dict, or empty list), then try the other provider
+        primary_failed = False
         if not time_series_data:
-            logger.warning(f"Alpha Vantage: No time series data for {symbol_for_display} ({display_label}).")
-            alpha_vantage_failed = True
+            logger.warning(f"{data_source}: No time series data for {symbol_for_display} ({display_label}).")
+            primary_failed = True
         elif isinstance(time_series_data, dict) and "error" in time_series_data:
-            logger.warning(f"Alpha Vantage: API error for {symbol_for_display} ({display_label}): {time_series_data.get('message')}")
-            alpha_vantage_failed = True
-        elif isinstance(time_series_data, list) and not time_series_data:
-            logger.warning(f"Alpha Vantage: Empty list returned for {symbol_for_display} ({display_label}).")
-            alpha_vantage_failed = True
+            logger.warning(f"{data_source}: API error for {symbol_for_display} ({display_label}): {time_series_data.get('message')}")
+            primary_failed = True
 
-        if alpha_vantage_failed:
+        if primary_failed and not config["is_intraday"]:
+            logger.info(f"Attempting to fetch daily chart data for {symbol_for_display} via Alpha Vantage.")
+            data_source = "Alpha Vantage"
+            time_series_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_daily_time_series, symbol_for_display, api_params['outputsize'])
+        elif primary_failed:
             logger.info(f"Attempting to fetch chart data for {normalized_symbol} via Yahoo Finance.")
             data_source = "Yahoo Finance"
-            
-            # Map timespan to Yahoo Finance period
-            yahoo_period = "max" # Default fallback
-            if timespan_upper == "1D": yahoo_period = "1d" # Intraday
-            elif timespan_upper == "5D": yahoo_period = "5d" # Intraday
-            elif timespan_upper == "1M": yahoo_period = "1mo"
-            elif timespan_upper == "3M": yahoo_period = "3mo"
-            elif timespan_upper == "6M": yahoo_period = "6mo"
-            elif timespan_upper == "YTD": yahoo_period = "ytd"
-            elif timespan_upper == "1Y": yahoo_period = "1y"
-            elif timespan_upper == "MAX": yahoo_period = "max"
-
-            if config["is_intraday"]:
-                # Map Alpha Vantage interval to approximate Yahoo interval
-                av_interval = api_params['interval']
-                if av_interval == "1min": yahoo_interval = "1m"
-                elif av_interval == "5min": yahoo_interval = "5m"
-                elif av_interval == "15min": yahoo_interval = "15m"
-                elif av_interval == "30min": yahoo_interval = "30m"
-                elif av_interval == "60min": yahoo_interval = "60m" # or 1h
-                else: yahoo_interval = "60m" # Default
-                # Yahoo intraday needs '1d' or '5d' period usually, but for 1D/5D timespan we set it above.
-                # If user requested intraday via timespan param logic:
-                time_series_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_intraday_time_series, normalized_symbol, yahoo_interval)
-            else: # Daily
-                time_series_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_time_series, normalized_symbol, "compact", yahoo_period)
+
+            # Map Alpha Vantage interval to approximate Yahoo interval
+            av_interval = api_params['interval']
+            if av_interval == "1min": yahoo_interval = "1m"
+            elif av_interval == "5min": yahoo_interval = "5m"
+            elif av_interval == "15min": yahoo_interval = "15m"
+            elif av_interval == "30min": yahoo_interval = "30m"
+            elif av_interval == "60min": yahoo_interval = "60m" # or 1h
+            else: yahoo_interval = "60m" # Default
+            time_series_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_intraday_time_series, normalized_symbol, yahoo_interval)
         
         # Post-fetch processing (common for both AV and YF data)
         if not time_series_data:
@@ -840,7 +892,6 @@ class Stocks(commands.Cog):
         # For YTD, we need to filter data to be from the start of the current year
         if timespan_upper == "YTD":
             try:
-                from datetime import datetime
                 current_year_start = datetime.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
                 
                 filtered_data = []
@@ -878,13 +929,14 @@ class Stocks(commands.Cog):
                 color=discord.Color.blue()
             )
             embed.set_image(url="attachment://chart.png")
-            embed.set_footer(text=f"Chart generated using QuickChart.io | Data from {data_source}")
+            embed.set_footer(text=f"Data from {data_source}")
             await ctx.send(file=file, embed=embed)
         else:
             await ctx.send(f"Sorry, I couldn't generate the chart for {symbol_for_display} ({display_label}) at this time.", ephemeral=True)
 
     @commands.hybrid_command(name="stock_news", description="Get recent news for a stock symbol.")
     @discord.app_commands.describe(symbol="The stock symbol (e.g., AAPL, MSFT)")
+    @discord.app_commands.autocomplete(symbol=symbol_autocomplete)
     async def stock_news(self, ctx: commands.Context, *, symbol: str):
         """
         Fetches and displays recent news articles for a given stock symbol.
@@ -911,7 +963,7 @@ class Stocks(commands.Cog):
             title=f"📰 Recent News for {upper_symbol}",
             color=discord.Color.blue()
         )
-        embed.set_footer(text="News provided by Google News RSS (best-effort).")
+        embed.set_footer(text="News from Google News RSS and Yahoo Finance (best-effort).")
 
         for i, article in enumerate(news_data):
             if i >= 5: # Should be handled by API client limit, but as a safeguard
@@ -960,9 +1012,8 @@ class Stocks(commands.Cog):
         `!set_portfolio_currency EUR`
         """
         currency = currency.upper()
-        valid_currencies = ["USD", "EUR", "PLN", "GBP", "CAD", "JPY", "AUD"]
-        if currency not in valid_currencies:
-            await ctx.send(f"⚠️ Unsupported currency. Please choose from: {', '.join(valid_currencies)}", ephemeral=True)
+        if currency not in FX_BASE_CURRENCIES:
+            await ctx.send(f"⚠️ Unsupported currency. Please choose from: {', '.join(FX_BASE_CURRENCIES)}", ephemeral=True)
             return
 
         user_id = ctx.author.id
@@ -1011,106 +1062,46 @@ class Stocks(commands.Cog):
         pref_currency_symbol = currency_symbols.get(pref_currency, pref_currency)
 
         embed = discord.Embed(title=f"💰 Your Stock Portfolio ({pref_currency})", color=discord.Color.gold())
-        embed.set_footer(text="Data provided by Alpha Vantage/Yahoo Finance. Prices may be delayed.")
+        embed.set_footer(text="Data provided by Yahoo Finance/Alpha Vantage. Prices may be delayed.")
 
-        overall_cost_basis = 0.0
-        overall_market_value = 0.0
-        api_call_count = 0
-        individual_holdings_details = [] # Store list of dicts
-
-        # Message to inform user about potential delay
+        # Message to inform user about potential delay; edited with running totals as holdings resolve.
         status_msg = None # Initialize status_msg
         if len(portfolio_stocks) > 1: # Only show if fetching multiple prices
-            status_msg = await ctx.send(f"Fetching current prices for {len(portfolio_stocks)} holdings... this may take a moment due to API rate limits.", ephemeral=True)
-
-        for stock_data in portfolio_stocks:
-            symbol = stock_data["symbol"]
-            quantity = stock_data["quantity"]
-            purchase_price = stock_data["purchase_price"]
-            # stored_currency = stock_data.get("currency", "USD") # Assuming stored price is in this currency
-
-            if api_call_count > 0:
-                await asyncio.sleep(2) # Short delay to be nice to APIs
-
-            # Fetch current price
-            current_price_data = await self.bot.loop.run_in_executor(None, alpha_vantage_client.get_stock_price, symbol)
-            data_source = "Alpha Vantage"
-            api_call_count += 1
+            status_msg = await ctx.send(f"Fetching current prices for {len(portfolio_stocks)} holdings...", ephemeral=True)
 
-            # Fallback to Yahoo
-            if not current_price_data or "error" in current_price_data:
-                current_price_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, symbol)
-                data_source = "Yahoo Finance"
-
-            current_price = None
-            stock_currency = "USD"
-            api_error_for_stock = False
-
-            if current_price_data and "05. price" in current_price_data:
-                try:
-                    current_price = float(current_price_data["05. price"])
-                    stock_currency = current_price_data.get('currency', 'USD')
-                except (ValueError, TypeError):
-                    api_error_for_stock = True
-            else:
-                api_error_for_stock = True
-
-            # Conversion Logic
-            exchange_rate = 1.0
-            if not api_error_for_stock and stock_currency != pref_currency:
-                # Need conversion
-                # Yahoo convention: BaseQuote=X. EURUSD=X means 1 EUR = x USD.
-                pair_symbol = f"{stock_currency}{pref_currency}=X"
-                fx_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, pair_symbol)
-                
-                if not fx_data:
-                     # Try inverse
-                     pair_symbol_inv = f"{pref_currency}{stock_currency}=X"
-                     fx_data_inv = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, pair_symbol_inv)
-                     if fx_data_inv and "05. price" in fx_data_inv:
-                         exchange_rate = 1.0 / float(fx_data_inv["05. price"])
-                elif "05. price" in fx_data:
-                    exchange_rate = float(fx_data["05. price"])
-                
-                # Apply conversion
-                current_price = current_price * exchange_rate
-                # Note: purchase_price is historical. We should ideally convert it at historical rate.
-                # But we don't have purchase date. So we have to assume purchase_price was entered in the SAME currency as the stock trades in?
-                # OR purchase_price is in 'currency' column of tracked_stocks.
-                # Let's assume purchase_price is in the stock's native currency for now, and convert it using CURRENT rate (approx) 
-                # OR we should convert cost basis using current rate to see "value if sold now vs cost if bought now"? 
-                # No, Cost Basis should be fixed in portfolio currency. 
-                # Limitation: We don't know historical FX. 
-                # COMPROMISE: Convert purchase_price using CURRENT FX rate. 
-                # This preserves the % gain/loss of the asset itself, but ignores FX gain/loss.
-                purchase_price = purchase_price * exchange_rate 
-
-            cost_basis = quantity * purchase_price
-            market_value = 0.0
-            gain_loss = 0.0
-            gain_loss_pct_str = "N/A"
-
-            if current_price is not None and not api_error_for_stock:
-                market_value = quantity * current_price
-                overall_cost_basis += cost_basis
-                overall_market_value += market_value
-                
-                gain_loss = market_value - cost_basis
-                if cost_basis != 0:
-                    gain_loss_pct = (gain_loss / cost_basis) * 100
-                    gain_loss_pct_str = f"{gain_loss_pct:+.2f}%"
-            elif api_error_for_stock:
-                market_value = "N/A (API Error)"
+        last_status_edit = 0.0
 
+        async def _on_update(partial: dict):
+            nonlocal last_status_edit
+            if not status_msg or partial["complete"] or time.monotonic() - last_status_edit < 1.0:
+                return
+            last_status_edit = time.monotonic()
+            try:
+                await status_msg.edit(content=(
+                    f"Valued {partial['resolved']}/{len(portfolio_stocks)} holdings... "
+                    f"running total {pref_currency_symbol}{partial['total_market_value']:,.2f}"
+                ))
+            except discord.HTTPException:
+                pass
+
+        valuation = await PortfolioValuator(self.bot.loop, fx=self.fx_service).value(portfolio_stocks, pref_currency, on_update=_on_update)
+
+        overall_cost_basis = valuation["total_cost_basis"]
+        overall_market_value = valuation["total_market_value"]
+        individual_holdings_details = []
+        for row in valuation["holdings"]:
+            valued = row["status"] == "ok"
             individual_holdings_details.append({
-                "symbol": symbol,
-                "quantity": quantity,
-                "current_price": current_price if not api_error_for_stock else "N/A",
-                "market_value": market_value,
-                "gain_loss": gain_loss if not api_error_for_stock else "N/A",
-                "gain_loss_pct_str": gain_loss_pct_str,
-                "source": data_source
+                "symbol": row["symbol"],
+                "quantity": row["quantity"],
+                "current_price": row["current_price"] if valued else "N/A",
+                "market_value": row["market_value"] if valued else ("N/A (timed out)" if row["status"] == "pending" else "N/A (API Error)"),
+                "gain_loss": row["gain_loss"] if valued else "N/A",
+                "gain_loss_pct_str": f"{row['gain_loss_pct']:+.2f}%" if valued and row["gain_loss_pct"] is not None else "N/A",
+                "source": row["source"]
             })
+        if valuation["pending"]:
+            embed.set_footer(text=f"Still waiting on: {', '.join(valuation['pending'])}. Totals exclude them. Prices may be delayed.")
 
         overall_gain_loss = overall_market_value - overall_cost_basis
         overall_gain_loss_pct_str = "N/A"
@@ -1220,6 +1211,25 @@ class Stocks(commands.Cog):
         
         embed.add_field(name=f"🔍 Yahoo Finance Test ({upper_symbol} → {normalized_symbol})", value=yf_status, inline=False)
         
+        budget = alpha_vantage_client.QUOTA.snapshot()
+        embed.add_field(
+            name="⏳ Alpha Vantage Budget",
+            value=f"{budget['minute_remaining']} call(s) left this minute, {budget['day_remaining']} today",
+            inline=False,
+        )
+        router_lines = []
+        for provider, stats in QUOTE_ROUTER.snapshot().items():
+            p90 = f"{stats['p90']:.2f}s" if stats["p90"] is not None else "n/a"
+            router_lines.append(f"{PROVIDER_LABELS[provider]}: p90 {p90}, errors {stats['error_rate']:.0%} ({stats['samples']} calls)")
+        embed.add_field(name="🔀 Quote Router", value="\n".join(router_lines), inline=False)
+        charts = CHART_CACHE.snapshot()
+        hit_rate = f"{charts['hit_rate']:.0%}" if charts["hit_rate"] is not None else "n/a"
+        embed.add_field(
+            name="🖼️ Chart Cache",
+            value=f"hit rate {hit_rate} ({charts['memory_hits']} memory, {charts['disk_hits']} disk, {charts['misses']} misses)",
+            inline=False,
+        )
+
         # Overall recommendation
         if (av_result and "01. symbol" in av_result) or (yf_result and "01. symbol" in yf_result):
             recommendation = "✅ At least one API is working - stock_price command should succeed"
@@ -1332,116 +1342,18 @@ class Stocks(commands.Cog):
         # 2. Get Preference
         pref_currency = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_preference, user_id, "portfolio_currency", "USD")
 
-        # 3. Fetch History for each stock
+        # 3. Fetch and align history
         config = SUPPORTED_TIMESPAN[timespan_upper]
-        # Always use Daily for portfolio history to reduce noise and align easier, unless 1D/5D?
-        # 1D portfolio chart is hard because intraday alignment is messy.
-        # Let's support 1M+ for now effectively, or map others to Daily.
-        # Actually, if user asks for 1D/5D, we should try intraday if possible, but let's stick to daily for robustness first for portfolio.
-        # Users usually want to see "Growth since X".
-        # If timespan is intraday (1D, 5D), let's fallback to 'daily' logic or warn.
-        # Let's force Daily for portfolio chart for simplicity and reliability.
-        
-        yahoo_period = "1mo" # Default
-        if timespan_upper == "1D": yahoo_period = "1d"
-        elif timespan_upper == "5D": yahoo_period = "5d"
-        elif timespan_upper == "1M": yahoo_period = "1mo"
-        elif timespan_upper == "3M": yahoo_period = "3mo"
-        elif timespan_upper == "6M": yahoo_period = "6mo"
-        elif timespan_upper == "YTD": yahoo_period = "ytd"
-        elif timespan_upper == "1Y": yahoo_period = "1y"
-        elif timespan_upper == "MAX": yahoo_period = "max"
-
-        # We will use Yahoo Finance for batch/history because it's easier to get aligned daily data without strict rate limits of AV free tier.
-        # Also AV doesn't support "last 1 year" easily without full output size which is huge.
-        
-        stock_histories = {} # symbol -> {date_str: price}
-        conversion_rates = {} # symbol -> rate (approx current) OR {date_str: rate}
-
-        for stock in portfolio_stocks:
-            symbol = stock['symbol'].upper()
-            # Fetch history
-            # Use Yahoo Finance explicitly for portfolio history construction
-            hist_data = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_time_series, symbol, "compact", yahoo_period)
-            
-            if not hist_data:
-                # Try AV as fallback? AV daily full is heavy.
-                # Stick to Yahoo for history chart.
-                logger.warning(f"Could not fetch history for {symbol}")
-                continue
-
-            # Normalize to dict
-            stock_histories[symbol] = {item[0]: item[1] for item in hist_data}
-            
-            # Determine currency conversion
-            # We need to know the stock's currency to convert.
-            # get_stock_price fetches metadata including currency.
-            # We can optimize by checking one current price call or assuming we know it?
-            # Let's just fetch current info once to get currency.
-            info = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_stock_price, symbol)
-            stock_curr = info.get('currency', 'USD') if info else 'USD'
-
-            if stock_curr != pref_currency:
-                # Fetch FX history
-                pair = f"{stock_curr}{pref_currency}=X"
-                fx_hist = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_daily_time_series, pair, "compact", yahoo_period)
-                if fx_hist:
-                    conversion_rates[symbol] = {item[0]: item[1] for item in fx_hist}
-                else:
-                    # Fallback: constant rate
-                    logger.warning(f"Could not fetch FX history for {pair}. Using 1.0")
-                    conversion_rates[symbol] = 1.0
-            else:
-                conversion_rates[symbol] = 1.0
-
-        if not stock_histories:
-             await ctx.send("Could not retrieve historical data for any of your stocks.", ephemeral=True)
-             return
-
-        # 4. Align and Sum
-        all_dates = set()
-        for s in stock_histories:
-            all_dates.update(stock_histories[s].keys())
-        
-        sorted_dates = sorted(list(all_dates))
-        portfolio_series = []
-
-        # Helper to find closest previous date's value (fill forward)
-        # Keys must be symbols (strings), not stock objects (dicts)
-        last_known_prices = {s['symbol'].upper(): 0.0 for s in portfolio_stocks}
-        last_known_fx = {s['symbol'].upper(): 1.0 for s in portfolio_stocks}
-
-        for date_str in sorted_dates:
-            daily_total = 0.0
-            
-            for stock in portfolio_stocks:
-                sym = stock['symbol'].upper()
-                qty = stock['quantity']
-                
-                if sym not in stock_histories: continue
-
-                # Update Price
-                if date_str in stock_histories[sym]:
-                    last_known_prices[sym] = stock_histories[sym][date_str]
-                
-                # Update FX
-                if isinstance(conversion_rates.get(sym), dict):
-                    if date_str in conversion_rates[sym]:
-                        last_known_fx[sym] = conversion_rates[sym][date_str]
-                    # else keep last known
-                elif isinstance(conversion_rates.get(sym), (int, float)):
-                     last_known_fx[sym] = conversion_rates[sym]
-                
-                # Calc value
-                val = last_known_prices[sym] * last_known_fx[sym] * qty
-                daily_total += val
-            
-            if daily_total > 0:
-                portfolio_series.append((date_str, daily_total))
-
-        # 5. Generate Chart
+        # Portfolio history is always daily (1D/5D just use a short daily window): intraday
+        # alignment across exchanges is messy and users mostly want "growth since X".
+        # All price/FX series come from the local daily bar store, fetched concurrently.
+        start_date = _timespan_start_date(timespan_upper, datetime.now(timezone.utc).date())
+        engine = PortfolioHistoryEngine(self.bot.loop, self._get_daily_closes, fx=self.fx_service)
+        portfolio_series = await engine.build(portfolio_stocks, pref_currency, start_date)
+
+        # 4. Generate Chart
         if not portfolio_series:
-             await ctx.send("Insufficient data to generate portfolio chart.", ephemeral=True)
+             await ctx.send("Could not retrieve enough historical data for your stocks to generate a portfolio chart.", ephemeral=True)
              return
              
         display_label = config["label"]
@@ -1617,22 +1529,23 @@ class Stocks(commands.Cog):
             await ctx.send("You aren't tracking any stocks yet. Use `/track_stock` first.")
             return
 
-        rows = []
-        for stock in tracked:
-            symbol = stock.get("symbol")
-            if not symbol:
-                continue
-            info = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_earnings_info, symbol)
-            if info and info.get("next_earnings_date"):
-                rows.append((info["next_earnings_date"], symbol))
-            await asyncio.sleep(0.2)  # be gentle on the data provider
+        # Normally the daily sweep has already stored these; only fetch symbols it hasn't seen yet.
+        stale_before = (datetime.now(timezone.utc) - timedelta(hours=CORPORATE_EVENTS_REFRESH_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+        missing = await self.bot.loop.run_in_executor(
+            None, self.db_manager.list_tracked_symbols_needing_event_refresh, stale_before, user_id
+        )
+        if missing:
+            await self._refresh_corporate_events(missing)
 
+        today_iso = datetime.now(timezone.utc).date().isoformat()
+        rows = await self.bot.loop.run_in_executor(
+            None, self.db_manager.list_tracked_corporate_events, "earnings", today_iso, CALENDAR_FAR_FUTURE, user_id
+        )
         if not rows:
             await ctx.send("No upcoming earnings dates found for your tracked stocks.")
             return
 
-        rows.sort(key=lambda r: r[0])
-        lines = [f"**{sym}** — {dt}" for dt, sym in rows]
+        lines = [f"**{row['symbol']}** — {row['event_date']}" for row in rows]
         embed = discord.Embed(
             title="📅 Upcoming Earnings — Your Tracked Stocks",
             description="\n".join(lines),
@@ -1667,87 +1580,120 @@ class Stocks(commands.Cog):
         else:
             await ctx.send("Please specify `on` or `off`. Example: `/earnings_alerts on lead_days:5`")
 
-    @tasks.loop(hours=EARNINGS_CHECK_INTERVAL_HOURS)
-    async def check_corporate_events(self):
-        """Daily: DM opted-in users when a tracked stock's earnings are near."""
-        if not self.db_manager:
-            logger.error("StocksCog: DataManager not available; skipping earnings check.")
-            return
+    async def _refresh_corporate_events(self, symbols: typing.List[str]) -> int:
+        """
+        Symbol stage: fetches earnings and dividend info once per symbol (at most
+        CORPORATE_EVENTS_CONCURRENCY at a time) into the corporate_events table.
+        Returns how many symbols were stored.
+        """
+        semaphore = asyncio.Semaphore(CORPORATE_EVENTS_CONCURRENCY)
+        results = await asyncio.gather(*(self._refresh_symbol_events(symbol, semaphore) for symbol in symbols))
+        return sum(1 for ok in results if ok)
 
+    async def _refresh_symbol_events(self, symbol: str, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            try:
+                earnings = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_earnings_info, symbol)
+                dividend = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_dividend_info, symbol)
+            except Exception as e:
+                logger.error(f"Corporate events: error fetching {symbol}: {e}")
+                return False
+        if earnings is None and dividend is None:
+            # get_dividend_info only returns None when Yahoo has no ticker info at all; keep the
+            # previously stored events and leave the symbol stale so the next sweep retries it.
+            logger.info(f"Corporate events: no data for {symbol}; will retry next sweep.")
+            return False
         try:
-            opted_in = await self.bot.loop.run_in_executor(
-                None, self.db_manager.list_users_with_preference, PREF_EARNINGS_ALERTS
-            )
+            return bool(await self.bot.loop.run_in_executor(
+                None, self.db_manager.replace_corporate_events, symbol, _corporate_events_from_info(earnings, dividend)
+            ))
         except Exception as e:
-            logger.error(f"Earnings checker: failed to list opted-in users: {e}")
-            return
+            logger.error(f"Corporate events: error storing {symbol}: {e}")
+            return False
 
-        today = datetime.now(timezone.utc).date()
-        for row in opted_in or []:
-            if not row.get("value"):
+    async def _send_earnings_reminders(self, today: date) -> int:
+        """
+        Fan-out stage: matches stored earnings dates against each opted-in user's lead
+        days and DMs reminders not yet recorded in sent_corporate_events. Returns DMs sent.
+        """
+        opted_in = await self.bot.loop.run_in_executor(None, self.db_manager.list_users_with_preference, PREF_EARNINGS_ALERTS)
+        lead_by_user: typing.Dict[str, int] = {row["user_id"]: DEFAULT_EARNINGS_LEAD_DAYS for row in opted_in or [] if row.get("value")}
+        if not lead_by_user:
+            return 0
+        lead_rows = await self.bot.loop.run_in_executor(None, self.db_manager.list_users_with_preference, PREF_EARNINGS_LEAD_DAYS)
+        for row in lead_rows or []:
+            if row["user_id"] in lead_by_user:
+                try:
+                    lead_by_user[row["user_id"]] = int(row["value"])
+                except (ValueError, TypeError):
+                    pass
+
+        today_iso = today.isoformat()
+        horizon = today + timedelta(days=max(0, max(lead_by_user.values())))
+        events = await self.bot.loop.run_in_executor(
+            None, self.db_manager.list_tracked_corporate_events, "earnings", today_iso, horizon.isoformat()
+        )
+        already_sent = await self.bot.loop.run_in_executor(None, self.db_manager.get_sent_corporate_events, "earnings", today_iso)
+
+        sent_count = 0
+        for event in events or []:
+            user_id_str, symbol, event_date = event["user_id"], event["symbol"], event["event_date"]
+            lead_days = lead_by_user.get(user_id_str)
+            if lead_days is None or (user_id_str, symbol, event_date) in already_sent:
                 continue
             try:
-                user_id = int(row["user_id"])
-            except (ValueError, TypeError, KeyError):
+                user_id = int(user_id_str)
+                days_until = (date.fromisoformat(event_date) - today).days
+            except (ValueError, TypeError):
+                continue
+            if days_until > lead_days:
                 continue
 
-            # Isolate each user: a DB or provider hiccup for one user must not
-            # abort the whole loop (which would stop the daily task entirely).
             try:
-                lead_days = await self.bot.loop.run_in_executor(
-                    None, self.db_manager.get_user_preference, user_id, PREF_EARNINGS_LEAD_DAYS, DEFAULT_EARNINGS_LEAD_DAYS
+                user_obj = await self.bot.fetch_user(user_id)
+                if not user_obj:
+                    continue
+                when = "today" if days_until == 0 else f"in {days_until} day(s)"
+                message = f"📅 **Earnings reminder:** **{symbol}** reports earnings {when} (**{event_date}**)."
+                if event.get("value") is not None:
+                    message += f" EPS estimate: {event['value']:.2f}."
+                await user_obj.send(message)
+                await self.bot.loop.run_in_executor(
+                    None, self.db_manager.mark_corporate_event_sent, user_id, symbol, "earnings", event_date
                 )
-                try:
-                    lead_days = int(lead_days)
-                except (ValueError, TypeError):
-                    lead_days = DEFAULT_EARNINGS_LEAD_DAYS
-
-                tracked = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_tracked_stocks, user_id)
-                for stock in tracked or []:
-                    symbol = stock.get("symbol")
-                    if not symbol:
-                        continue
-                    info = await self.bot.loop.run_in_executor(None, yahoo_finance_client.get_earnings_info, symbol)
-                    await asyncio.sleep(0.2)
-                    if not info or not info.get("next_earnings_date"):
-                        continue
-                    try:
-                        event_date = datetime.strptime(info["next_earnings_date"], "%Y-%m-%d").date()
-                    except ValueError:
-                        continue
+                sent_count += 1
+                logger.info(f"Sent earnings alert to {user_id} for {symbol} ({event_date}).")
+            except discord.Forbidden:
+                logger.warning(f"Could not DM earnings alert to user {user_id} (DMs disabled).")
+            except Exception as e:
+                logger.error(f"Error sending earnings alert to {user_id} for {symbol}: {e}")
+        return sent_count
 
-                    days_until = (event_date - today).days
-                    if not (0 <= days_until <= lead_days):
-                        continue
+    @tasks.loop(hours=EARNINGS_CHECK_INTERVAL_HOURS)
+    async def check_corporate_events(self):
+        """Daily: refresh corporate events per tracked symbol, then DM opted-in users whose earnings are near."""
+        if not self.db_manager:
+            logger.error("StocksCog: DataManager not available; skipping earnings check.")
+            return
 
-                    already_sent = await self.bot.loop.run_in_executor(
-                        None, self.db_manager.has_sent_corporate_event, user_id, symbol, "earnings", info["next_earnings_date"]
-                    )
-                    if already_sent:
-                        continue
+        now_utc = datetime.now(timezone.utc)
+        stale_before = (now_utc - timedelta(hours=CORPORATE_EVENTS_REFRESH_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            await self.bot.loop.run_in_executor(None, self.db_manager.prune_untracked_corporate_events)
+            symbols = await self.bot.loop.run_in_executor(None, self.db_manager.list_tracked_symbols_needing_event_refresh, stale_before)
+        except Exception as e:
+            logger.error(f"Earnings checker: failed to list tracked symbols: {e}")
+            symbols = []
+        # A failed refresh only means older stored dates are used; reminders still go out.
+        refreshed = await self._refresh_corporate_events(symbols) if symbols else 0
 
-                    try:
-                        user_obj = await self.bot.fetch_user(user_id)
-                        if not user_obj:
-                            continue
-                        when = "today" if days_until == 0 else f"in {days_until} day(s)"
-                        message = f"📅 **Earnings reminder:** **{symbol}** reports earnings {when} (**{info['next_earnings_date']}**)."
-                        if info.get("eps_estimate") is not None:
-                            message += f" EPS estimate: {info['eps_estimate']:.2f}."
-                        await user_obj.send(message)
-                        await self.bot.loop.run_in_executor(
-                            None, self.db_manager.mark_corporate_event_sent, user_id, symbol, "earnings", info["next_earnings_date"]
-                        )
-                        logger.info(f"Sent earnings alert to {user_id} for {symbol} ({info['next_earnings_date']}).")
-                    except discord.Forbidden:
-                        logger.warning(f"Could not DM earnings alert to user {user_id} (DMs disabled).")
-                    except Exception as e:
-                        logger.error(f"Error sending earnings alert to {user_id} for {symbol}: {e}")
-            except Exception as e:
-                logger.error(f"Earnings checker: error processing user {user_id}: {e}")
-                continue
+        try:
+            sent = await self._send_earnings_reminders(now_utc.date())
+        except Exception as e:
+            logger.error(f"Earnings checker: failed to send reminders: {e}")
+            return
 
-        logger.info("Corporate events (earnings) check complete.")
+        logger.info(f"Corporate events check complete: refreshed {refreshed}/{len(symbols)} symbol(s), sent {sent} reminder(s).")
 
     @check_corporate_events.before_loop
     async def before_check_corporate_events(self):
@@ -1762,6 +1708,48 @@ class Stocks(commands.Cog):
         if not self.check_corporate_events.is_running():
             self.check_corporate_events.restart()
 
+    @tasks.loop(minutes=FX_REFRESH_INTERVAL_MINUTES)
+    async def refresh_fx_rates(self):
+        """Hourly: re-quotes every known currency in one batch so portfolio conversions never hit the network."""
+        updated = await self.bot.loop.run_in_executor(None, self.fx_service.refresh)
+        logger.info(f"FX refresh complete: {updated} rate(s) updated.")
+
+    @refresh_fx_rates.before_loop
+    async def before_refresh_fx_rates(self):
+        await self.bot.wait_until_ready()
+        # Serve the persisted rates right away; the first iteration then refreshes them.
+        await self.bot.loop.run_in_executor(None, self.fx_service.load)
+        logger.info("FX refresh task is ready; loop starting.")
+
+    @refresh_fx_rates.error
+    async def refresh_fx_rates_error(self, error: Exception):
+        logger.error(f"FX refresh task crashed: {error}", exc_info=True)
+        if not self.refresh_fx_rates.is_running():
+            self.refresh_fx_rates.restart()
+
+    @tasks.loop(hours=SYMBOL_DIRECTORY_CHECK_HOURS)
+    async def refresh_symbol_directory(self):
+        """Daily: re-imports stale symbol directory sources and reindexes them for autocomplete."""
+        if not self.db_manager:
+            logger.error("StocksCog: DataManager not available; skipping symbol directory refresh.")
+            return
+        indexed = await self.bot.loop.run_in_executor(None, self.symbol_directory.refresh)
+        logger.info(f"Symbol directory refresh complete: {indexed} listing(s) indexed.")
+
+    @refresh_symbol_directory.before_loop
+    async def before_refresh_symbol_directory(self):
+        await self.bot.wait_until_ready()
+        # Autocomplete works from the stored listings while the first refresh runs.
+        if self.db_manager:
+            await self.bot.loop.run_in_executor(None, self.symbol_directory.load)
+        logger.info("Symbol directory task is ready; loop starting.")
+
+    @refresh_symbol_directory.error
+    async def refresh_symbol_directory_error(self, error: Exception):
+        logger.error(f"Symbol directory task crashed: {error}", exc_info=True)
+        if not self.refresh_symbol_directory.is_running():
+            self.refresh_symbol_directory.restart()
+
 async def setup(bot):
     await bot.add_cog(Stocks(bot))
     logger.info("Stocks Cog has been loaded and stock alert task initialized.")
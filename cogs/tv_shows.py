@@ -3,24 +3,47 @@
 import discord
 from discord.ext import commands, tasks
 from api_clients import tmdb_client, tvmaze_client
-from api_clients.tmdb_client import TMDBError, TMDBConnectionError, TMDBAPIError
+from api_clients.tmdb_client import TMDBConnectionError, TMDBAPIError
 from datetime import datetime, date, timedelta, timezone
 import calendar
 import asyncio
+import bisect
 import logging
 import json
 import typing
 from utils.paginator import BasePaginatorView, SelectionView, NUMBER_EMOJIS
-from utils.timezone_utils import tzinfo_from_name
+from utils.timezone_utils import sqlite_utc_timestamp, tzinfo_from_name
+from utils.title_index import TitleIndex, normalize_title
 
 logger = logging.getLogger(__name__)
 
 ITEMS_PER_PAGE_DEFAULT = 5
+CALENDAR_SYNC_STALE_HOURS = 12
+CALENDAR_SYNC_BATCH_SIZE = 50
+AUTOCOMPLETE_NETWORK_WAIT_SECONDS = 2.0
+TV_BATCH_CONCURRENCY = 4
+MONTHLY_DIGEST_SEND_HOUR = 9
+MONTHLY_DIGEST_INDEX_TTL_HOURS = 6
 
 class MyTVShowsPaginatorView(BasePaginatorView):
     def __init__(self, *, timeout=300, user_id: int, all_subs: list, bot_instance, items_per_page: int = ITEMS_PER_PAGE_DEFAULT):
         super().__init__(timeout=timeout, user_id=user_id, items=all_subs, items_per_page=items_per_page)
         self.bot = bot_instance # Needed for async tasks (run_in_executor)
+        self._show_details: typing.Dict[int, dict] = {}  # Successful TMDB details, per view
+
+    async def _fetch_page_data(self, page: int) -> list:
+        """TMDB details (or the exception raised) for each show on `page`, fetched concurrently."""
+        page_subs = self.page_items(page)
+
+        async def _details(show_id):
+            if show_id in self._show_details:
+                return self._show_details[show_id]
+            details = await self.bot.loop.run_in_executor(None, tmdb_client.get_show_details, show_id)
+            if details:
+                self._show_details[show_id] = details
+            return details
+
+        return await asyncio.gather(*(_details(sub['show_tmdb_id']) for sub in page_subs), return_exceptions=True)
 
     async def _get_embed_for_current_page(self) -> discord.Embed:
         self._update_button_states()
@@ -45,13 +68,8 @@ class MyTVShowsPaginatorView(BasePaginatorView):
         footer_parts.append("Data from TMDB.")
         embed.set_footer(text=" ".join(footer_parts))
 
-        # Fetch show details concurrently via asyncio.gather
-        show_ids = [sub['show_tmdb_id'] for sub in page_subs]
-        fetch_tasks = [
-            self.bot.loop.run_in_executor(None, tmdb_client.get_show_details, sid)
-            for sid in show_ids
-        ]
-        show_details_list = await asyncio.gather(*fetch_tasks, return_exceptions=True)
+        # Page details come from the view's cache (prefetched while the previous page was shown).
+        show_details_list = await self.get_page_data(self.current_page)
 
         shows_with_errors = 0
         for sub, details_or_exc in zip(page_subs, show_details_list):
@@ -110,6 +128,8 @@ class MyTVShowsPaginatorView(BasePaginatorView):
         
         current_description = embed.description if embed.description else ""
         if shows_with_errors > 0:
+            # Retry the failed shows next time this page is shown; successful ones stay cached.
+            self.invalidate_page(self.current_page)
             error_msg = f"⚠️ Encountered errors loading data for {shows_with_errors} show(s) on this page."
             current_description = f"{current_description}\n{error_msg}".strip()
         
@@ -126,9 +146,15 @@ class TVShows(commands.Cog):
     def __init__(self, bot, db_manager):
         self.bot = bot
         self.db_manager = db_manager
+        self._show_index = TitleIndex()
+        self._show_search_tasks: typing.Dict[str, asyncio.Task] = {}
+        self._digest_send_index: typing.Optional[typing.List[tuple]] = None
+        self._digest_index_built_at: typing.Optional[datetime] = None
         logger.info("TVShows Cog: Initializing and starting tasks.")
         self.check_new_episodes.start()
         self.check_monthly_tv_digest.start()
+        self.sync_episode_calendar.start()
+        self.refresh_show_index.start()
 
     @staticmethod
     def _parse_tvmaze_airstamp_to_utc(airstamp: typing.Optional[str]) -> typing.Optional[datetime]:
@@ -209,32 +235,70 @@ class TVShows(commands.Cog):
         logger.info("TVShows Cog: Unloading and cancelling background tasks.")
         self.check_new_episodes.cancel()
         self.check_monthly_tv_digest.cancel()
+        self.sync_episode_calendar.cancel()
+        self.refresh_show_index.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self):
         logger.info("TVShows Cog is ready and listener has been triggered.")
 
+    @staticmethod
+    def _show_index_items(shows: typing.Any) -> typing.List[dict]:
+        """Shapes TMDB show results into TitleIndex items with a "Name (year)" label."""
+        items = []
+        for show in shows or []:
+            if not isinstance(show, dict):
+                continue
+            name = show.get('name') or show.get('original_name')
+            if not name or show.get('id') is None:
+                continue
+            year_str = show.get('first_air_date') or ''
+            year = year_str[:4] if year_str else ''
+            items.append({'id': show['id'], 'name': name, 'label': f"{name} ({year})" if year else name})
+        return items
+
+    async def _refresh_show_search(self, query: str) -> None:
+        try:
+            results = await self.bot.loop.run_in_executor(None, tmdb_client.search_tv_shows, query)
+        except Exception as e:
+            logger.debug(f"tv_autocomplete: background search for '{query}' failed: {e}")
+            return
+        items = self._show_index_items(results)
+        self._show_index.add_many(items)
+        self._show_index.store_query_results(query, [item['id'] for item in items])
+
+    def _schedule_show_search(self, query: str) -> asyncio.Task:
+        """Starts (or joins) the background TMDB search for a cold autocomplete query."""
+        key = normalize_title(query)
+        task = self._show_search_tasks.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._refresh_show_search(query))
+            self._show_search_tasks[key] = task
+            task.add_done_callback(lambda _t, k=key: self._show_search_tasks.pop(k, None))
+        return task
+
     async def tv_autocomplete(self, interaction: discord.Interaction, current: str) -> typing.List[discord.app_commands.Choice[str]]:
         """
-        Autocomplete for TV shows using TMDB search.
+        Autocomplete for TV shows, served from the local show index. Cold queries trigger a
+        background TMDB search; we only wait on it (briefly) when nothing matches locally.
         """
-        if not current:
-             return []
-        if len(current) < 3:
-             return []
-        
-        results = await self.bot.loop.run_in_executor(None, tmdb_client.search_tv_shows, current)
-        
-        choices = []
-        if results:
-            for show in results[:25]:
-                name = show.get('name') or show.get('original_name')
-                if not name: continue
-                year_str = show.get('first_air_date', '')
-                year = year_str[:4] if year_str else ''
-                label = f"{name} ({year})" if year else name
-                choices.append(discord.app_commands.Choice(name=label[:100], value=name[:100]))
-        return choices
+        if not current or not current.strip():
+            return []
+
+        matches = self._show_index.search(current, 25)
+        if len(normalize_title(current)) >= 3 and not self._show_index.has_fresh_query(current):
+            task = self._schedule_show_search(current)
+            if not matches:
+                try:
+                    await asyncio.wait_for(asyncio.shield(task), timeout=AUTOCOMPLETE_NETWORK_WAIT_SECONDS)
+                except Exception:
+                    pass
+                matches = self._show_index.search(current, 25)
+
+        return [
+            discord.app_commands.Choice(name=m['label'][:100], value=m['name'][:100])
+            for m in matches
+        ]
 
     async def tv_subscription_autocomplete(self, interaction: discord.Interaction, current: str) -> typing.List[discord.app_commands.Choice[str]]:
         """
@@ -369,6 +433,7 @@ class TVShows(commands.Cog):
         try:
             success = await self.bot.loop.run_in_executor(None, self.db_manager.add_tv_show_subscription, ctx.author.id, show_id, actual_show_name, poster_path, tvmaze_id)
             if success:
+                self._show_index.add(show_id, actual_show_name, weight=2)
                 await self.send_response(ctx, f"Successfully subscribed to {actual_show_name}!", ephemeral=True)
             else:
                 await self.send_response(ctx, f"Could not subscribe to {actual_show_name} due to a database error. Please try again later.", ephemeral=True)
@@ -410,83 +475,118 @@ class TVShows(commands.Cog):
             logger.error(f"Error fetching existing subscriptions for batch subscribe: {e}")
             existing_tmdb_ids = set()
 
-        for show_name in shows:
+        semaphore = asyncio.Semaphore(TV_BATCH_CONCURRENCY)
+        pending_tasks = [asyncio.create_task(self._resolve_batch_show(name, semaphore)) for name in shows]
+
+        progress_msg = None
+        try:
+            progress_msg = await self.send_response(ctx, embed=self._build_batch_subscribe_embed(results, [], 0, len(shows)), ephemeral=True, wait=True)
+        except Exception as e:
+            logger.debug(f"Could not send batch subscribe progress embed: {e}")
+
+        # Resolved shows waiting for the single DB write at the end.
+        to_add: typing.List[dict] = []
+        done_count = 0
+        last_edit = 0.0
+        for next_done in asyncio.as_completed(pending_tasks):
+            entry = await next_done
+            done_count += 1
+            status = entry["status"]
+            if status == "ok":
+                show_id = entry["show_tmdb_id"]
+                if show_id in existing_tmdb_ids:
+                    results["already_subscribed"].append(entry["show_name"])
+                else:
+                    existing_tmdb_ids.add(show_id)  # Avoid dupes within the same batch if user listed twice
+                    to_add.append(entry)
+            elif status == "ambiguous":
+                results["ambiguous"].append(entry["input"])
+            else:
+                results["failed"].append(entry["reason"])
+
+            now = asyncio.get_running_loop().time()
+            if progress_msg is not None and done_count < len(shows) and now - last_edit >= 1.0:
+                last_edit = now
+                try:
+                    await progress_msg.edit(embed=self._build_batch_subscribe_embed(results, to_add, done_count, len(shows)))
+                except Exception as e:
+                    logger.debug(f"Could not update batch subscribe progress embed: {e}")
+
+        if to_add:
+            try:
+                success = await self.bot.loop.run_in_executor(None, self.db_manager.add_tv_show_subscriptions_bulk, ctx.author.id, to_add)
+            except Exception:
+                logger.exception(f"Error batch subscribing user {ctx.author.id} to {len(to_add)} show(s)")
+                success = False
+            for entry in to_add:
+                if success:
+                    self._show_index.add(entry["show_tmdb_id"], entry["show_name"], weight=2)
+                    results["success"].append(entry["show_name"])
+                else:
+                    results["failed"].append(f"{entry['show_name']} (Database Error)")
+
+        embed = self._build_batch_subscribe_embed(results, [], len(shows), len(shows))
+        if progress_msg is not None:
+            try:
+                await progress_msg.edit(embed=embed)
+                return
+            except Exception as e:
+                logger.debug(f"Could not edit final batch subscribe embed, sending a new one: {e}")
+        await self.send_response(ctx, embed=embed, ephemeral=True)
+
+    async def _resolve_batch_show(self, show_name: str, semaphore: asyncio.Semaphore) -> dict:
+        """
+        Resolves one tv_batch_subscribe entry (TMDB search + TVMaze id) under `semaphore`.
+        Returns {"status": "ok"|"ambiguous"|"failed", ...}.
+        """
+        async with semaphore:
             try:
                 search_results = await self.bot.loop.run_in_executor(None, tmdb_client.search_tv_shows, show_name)
             except Exception as e:
                 logger.error(f"Batch subscribe search error for '{show_name}': {e}")
-                results["failed"].append(f"{show_name} (Search Error)")
-                continue
+                return {"status": "failed", "input": show_name, "reason": f"{show_name} (Search Error)"}
 
             if not search_results:
-                results["failed"].append(f"{show_name} (Not Found)")
-                continue
+                return {"status": "failed", "input": show_name, "reason": f"{show_name} (Not Found)"}
 
-            selected_show = None
-            
-            # Auto-selection logic
             if len(search_results) == 1:
                 selected_show = search_results[0]
             else:
-                # Try to find exact match
-                exact_matches = [s for s in search_results if s.get('name', '').lower() == show_name.lower()]
-                if len(exact_matches) == 1:
-                    selected_show = exact_matches[0]
-                elif len(exact_matches) > 1:
-                     # Multiple exact matches? Pick the most popular/first one?
-                     # Usually the first one returned by TMDB is the most relevant.
-                     selected_show = exact_matches[0] 
-                else:
-                     # No exact match. Check if the first result is a "very good" match?
-                     # For batch, we might be strict to avoid wrong subscriptions.
-                     # But users might expect loose matching.
-                     # Let's go with: if strict match fails, mark as ambiguous.
-                     results["ambiguous"].append(show_name)
-                     continue
-            
-            if not selected_show:
-                 results["failed"].append(show_name) # Should not happen given logic above
-                 continue
+                # Be strict in batch mode to avoid wrong subscriptions: only exact name matches
+                # auto-select (TMDB's first, i.e. most relevant, one if several share the name).
+                exact_matches = [s for s in search_results if (s.get('name') or '').lower() == show_name.lower()]
+                if not exact_matches:
+                    return {"status": "ambiguous", "input": show_name}
+                selected_show = exact_matches[0]
 
             show_id = selected_show['id']
             actual_show_name = selected_show['name']
-            
-            if show_id in existing_tmdb_ids:
-                results["already_subscribed"].append(actual_show_name)
-                continue
-
-            poster_path = selected_show.get('poster_path', "")
-            
+            self._show_index.add_many(self._show_index_items([selected_show]))
             tvmaze_id = await self._resolve_tvmaze_id(show_id, actual_show_name)
+            return {
+                "status": "ok",
+                "input": show_name,
+                "show_tmdb_id": show_id,
+                "show_name": actual_show_name,
+                "poster_path": selected_show.get('poster_path', ""),
+                "show_tvmaze_id": tvmaze_id,
+            }
 
-            try:
-                success = await self.bot.loop.run_in_executor(
-                    None, 
-                    self.db_manager.add_tv_show_subscription, 
-                    ctx.author.id, 
-                    show_id, 
-                    actual_show_name, 
-                    poster_path, 
-                    tvmaze_id
-                )
-                if success:
-                    results["success"].append(actual_show_name)
-                    existing_tmdb_ids.add(show_id) # Add to avoid dupes within the same batch if user listed twice
-                else:
-                    results["failed"].append(f"{actual_show_name} (Database Error)")
-            except Exception:
-                logger.exception(f"Error batch subscribing to {actual_show_name}")
-                results["failed"].append(f"{actual_show_name} (Unknown Error)")
-            
-            # Small delay to be nice to APIs
-            await asyncio.sleep(0.2)
+    @staticmethod
+    def _build_batch_subscribe_embed(results: dict, pending: typing.List[dict], done: int, total: int) -> discord.Embed:
+        finished = done >= total and not pending
+        embed = discord.Embed(
+            title="Batch Subscription Results" if finished else f"Batch Subscription — resolving {done}/{total}…",
+            color=discord.Color.blue()
+        )
 
-        # Build Report
-        embed = discord.Embed(title="Batch Subscription Results", color=discord.Color.blue())
-        
         if results["success"]:
             success_str = "\n".join([f"✅ {name}" for name in results["success"]])
             embed.add_field(name="Subscribed", value=success_str[:1024], inline=False)
+
+        if pending:
+            pending_str = "\n".join([f"⏳ {entry['show_name']}" for entry in pending])
+            embed.add_field(name="Found", value=pending_str[:1024], inline=False)
         
         if results["already_subscribed"]:
             already_str = "\n".join([f"ℹ️ {name}" for name in results["already_subscribed"]])
@@ -500,7 +600,7 @@ class TVShows(commands.Cog):
             failed_str = "\n".join([f"❌ {name}" for name in results["failed"]])
             embed.add_field(name="Failed", value=failed_str[:1024], inline=False)
 
-        await self.send_response(ctx, embed=embed, ephemeral=True)
+        return embed
 
     @commands.hybrid_command(name="tv_unsubscribe", description="Unsubscribe from TV show notifications.")
     @discord.app_commands.describe(show_name="The name of the TV show to unsubscribe from")
@@ -819,102 +919,11 @@ class TVShows(commands.Cog):
         today = date.today()
         schedule_end_date = today + timedelta(days=days)
 
-        upcoming_episodes_by_date = {}
-
-        if len(subscriptions) > 10:
-            await self.send_response(ctx, "You have many subscriptions! Generating your schedule might take a moment...", ephemeral=True)
-
-        for sub_idx, sub in enumerate(subscriptions):
-            show_id = sub['show_tmdb_id']
-            show_name_stored = sub['show_name']
-            tvmaze_id = sub.get('show_tvmaze_id')
-            logger.debug(f"tv_schedule: Processing subscription user {user_id}, show_id: {show_id}, tvmaze_id: {tvmaze_id}, name: {show_name_stored}")
-
-            episode_found = False
-
-            # 1. Try TVMaze
-            if tvmaze_id:
-                try:
-                    tvmaze_details = await self.bot.loop.run_in_executor(None, tvmaze_client.get_show_details, tvmaze_id, "nextepisode")
-                    if tvmaze_details:
-                        embedded = tvmaze_details.get('_embedded', {})
-                        next_ep = embedded.get('nextepisode')
-                        
-                        if next_ep:
-                             air_date_str = next_ep.get('airdate')
-                             if air_date_str:
-                                 try:
-                                    ep_air_date = datetime.strptime(air_date_str, '%Y-%m-%d').date()
-                                    if today <= ep_air_date < schedule_end_date:
-                                        ep_name = next_ep.get('name', 'TBA')
-                                        ep_season = next_ep.get('season', 0)
-                                        ep_num = next_ep.get('number', 0)
-                                        current_show_name = tvmaze_details.get('name', show_name_stored)
-
-                                        episode_info = {
-                                            'show_name': current_show_name,
-                                            'season_number': ep_season,
-                                            'episode_number': ep_num,
-                                            'episode_name': ep_name,
-                                            'air_date_obj': ep_air_date
-                                        }
-                                        
-                                        if ep_air_date not in upcoming_episodes_by_date:
-                                            upcoming_episodes_by_date[ep_air_date] = []
-                                        upcoming_episodes_by_date[ep_air_date].append(episode_info)
-                                        episode_found = True
-                                 except ValueError: pass
-                except Exception as e:
-                    logger.error(f"TVMaze schedule fetch failed for {show_id}: {e}")
-
-            if episode_found:
-                continue
-
-            # 2. Fallback to TMDB
-            try:
-                show_details_tmdb = await self.bot.loop.run_in_executor(None, tmdb_client.get_show_details, show_id)
-                logger.debug(f"tv_schedule: TMDB details for show_id {show_id} (user {user_id}): {show_details_tmdb}")
-
-                if show_details_tmdb and show_details_tmdb.get('next_episode_to_air'):
-                    next_ep = show_details_tmdb['next_episode_to_air']
-                    logger.debug(f"tv_schedule: Found next_episode_to_air for show_id {show_id} (user {user_id}): {next_ep.get('air_date')}")
-                    air_date_str = next_ep.get('air_date')
+        calendar_episodes = await self._fetch_calendar_episodes(user_id, today, schedule_end_date - timedelta(days=1))
 
-                    if air_date_str:
-                        try:
-                            ep_air_date = datetime.strptime(air_date_str, '%Y-%m-%d').date()
-                            if today <= ep_air_date < schedule_end_date:
-                                ep_name = next_ep.get('name', 'TBA')
-                                ep_season = next_ep.get('season_number', 0) 
-                                ep_num = next_ep.get('episode_number', 0) 
-                                current_show_name = show_details_tmdb.get('name', show_name_stored)
-
-                                episode_info = {
-                                    'show_name': current_show_name,
-                                    'season_number': ep_season,
-                                    'episode_number': ep_num,
-                                    'episode_name': ep_name,
-                                    'air_date_obj': ep_air_date 
-                                }
-                                
-                                if ep_air_date not in upcoming_episodes_by_date:
-                                    upcoming_episodes_by_date[ep_air_date] = []
-                                upcoming_episodes_by_date[ep_air_date].append(episode_info)
-                                logger.debug(f"tv_schedule: Added episode {episode_info.get('episode_name')} for show {show_id} (user {user_id}) on {ep_air_date} to schedule.")
-                        except ValueError:
-                            logger.warning(f"Could not parse air_date '{air_date_str}' for show ID {show_id} (user {user_id})")
-                        except Exception as e_inner:
-                            logger.error(f"Error processing episode for show ID {show_id} (user {user_id}): {e_inner}")
-                elif show_details_tmdb:
-                    logger.debug(f"tv_schedule: No 'next_episode_to_air' data in TMDB details for show_id {show_id} (user {user_id}). Details: {show_details_tmdb}")
-                else:
-                    logger.warning(f"tv_schedule: Received no TMDB details (None) for show_id {show_id} (user {user_id}).")
-            
-            except TMDBError as e:
-                logger.error(f"tv_schedule: TMDB Error fetching details for show ID {show_id}: {e}")
-                continue
-            except Exception as e:
-                logger.error(f"Generic error fetching/processing show ID {show_id} (user {user_id}) in tv_schedule: {e}")
+        upcoming_episodes_by_date = {}
+        for ep in calendar_episodes:
+            upcoming_episodes_by_date.setdefault(ep['air_date_obj'], []).append(ep)
 
         if not upcoming_episodes_by_date:
             logger.info(f"tv_schedule: No upcoming episodes found for user {user_id}. Sending corresponding message.")
@@ -960,100 +969,153 @@ class TVShows(commands.Cog):
             logger.error(f"Unexpected error sending schedule for user {user_id}: {e}")
             await self.send_response(ctx, "An unexpected error occurred while displaying your schedule.", ephemeral=True)
 
-    async def _fetch_monthly_schedule(self, user_id: int, year: int, month: int) -> typing.List[dict]:
+    @staticmethod
+    def _calendar_rows_from_tvmaze(episode_index: typing.Optional[tvmaze_client.ShowEpisodeIndex]) -> typing.List[dict]:
+        """Converts a show's TVMaze episode index into `episode_calendar` rows (dated episodes only)."""
+        rows = []
+        if not episode_index:
+            return rows
+        for ep in episode_index.dated_episodes():
+            if ep.id is None:
+                continue
+            try:
+                datetime.strptime(ep.airdate, "%Y-%m-%d")
+            except ValueError:
+                continue
+            rows.append({
+                'episode_key': f"tvmaze:{ep.id}",
+                'season_number': ep.season,
+                'episode_number': ep.number,
+                'name': ep.name,
+                'air_date': ep.airdate,
+                'airstamp_utc': ep.airstamp,
+                'rating': ep.rating,
+                'source': 'TVMaze',
+            })
+        return rows
+
+    @staticmethod
+    def _calendar_rows_from_tmdb(details: typing.Any) -> typing.List[dict]:
+        """Fallback calendar rows from TMDB's `last_episode_to_air` / `next_episode_to_air`."""
+        rows = []
+        if not isinstance(details, dict):
+            return rows
+        for key in ('next_episode_to_air', 'last_episode_to_air'):
+            ep = details.get(key)
+            if not ep or not ep.get('air_date'):
+                continue
+            try:
+                datetime.strptime(ep['air_date'], "%Y-%m-%d")
+            except ValueError:
+                continue
+            season = ep.get('season_number', 0)
+            number = ep.get('episode_number', 0)
+            rows.append({
+                'episode_key': f"tmdb:{ep.get('id') or f'{season}x{number}'}",
+                'season_number': season,
+                'episode_number': number,
+                'name': ep.get('name', 'TBA'),
+                'air_date': ep['air_date'],
+                'airstamp_utc': None,
+                'rating': ep.get('vote_average'),
+                'source': 'TMDB',
+            })
+        return rows
+
+    async def _sync_show_calendar(self, show_id: int, tvmaze_id: typing.Optional[int]) -> bool:
         """
-        Fetches all upcoming/scheduled episodes for the user's subscriptions in the given calendar month.
-        Returns a sorted list of episode dicts.
+        Refreshes the materialized `episode_calendar` rows for one show: the full TVMaze episode
+        list for shows with a TVMaze id, otherwise TMDB's last/next episode.
+        Returns False and keeps the stored rows when the source fails or returns nothing, so a
+        transient error never truncates a show's calendar. The attempt is still stamped, so
+        the show is retried by the stale sweep rather than on every read.
+        """
+        rows = None
+        if tvmaze_id:
+            try:
+                episode_index = await self.bot.loop.run_in_executor(None, tvmaze_client.get_show_episode_index, tvmaze_id)
+                rows = self._calendar_rows_from_tvmaze(episode_index)
+            except Exception as e:
+                logger.debug(f"Calendar sync: TVMaze episodes fetch failed for show {show_id} (tvmaze {tvmaze_id}): {e}")
+        else:
+            try:
+                details = await self.bot.loop.run_in_executor(None, tmdb_client.get_show_details, show_id)
+                rows = self._calendar_rows_from_tmdb(details)
+            except Exception as e:
+                logger.debug(f"Calendar sync: TMDB details fetch failed for show {show_id}: {e}")
+        if not rows:
+            if rows is not None:
+                logger.debug(f"Calendar sync: no episodes for show {show_id}; keeping stored calendar.")
+            await self.bot.loop.run_in_executor(None, self.db_manager.mark_episode_calendar_synced, show_id, tvmaze_id)
+            return False
+        return bool(await self.bot.loop.run_in_executor(
+            None, self.db_manager.replace_episode_calendar_for_show, show_id, tvmaze_id, rows
+        ))
+
+    async def _fetch_calendar_episodes(self, user_id: int, start: date, end: date) -> typing.List[dict]:
+        """
+        Episodes of the user's subscribed shows airing between `start` and `end` (inclusive),
+        read from the materialized calendar. Shows that were never synced are synced first.
         """
         try:
-            subscriptions = await self.bot.loop.run_in_executor(None, self.db_manager.get_user_tv_subscriptions, user_id)
+            missing = await self.bot.loop.run_in_executor(None, self.db_manager.list_user_shows_missing_calendar, user_id)
+            if missing:
+                semaphore = asyncio.Semaphore(TV_BATCH_CONCURRENCY)
+
+                async def sync(sub: dict) -> bool:
+                    async with semaphore:
+                        return await self._sync_show_calendar(sub['show_tmdb_id'], sub.get('show_tvmaze_id'))
+
+                await asyncio.gather(*(sync(sub) for sub in missing), return_exceptions=True)
+            rows = await self.bot.loop.run_in_executor(
+                None, self.db_manager.get_user_episode_calendar, user_id, start.isoformat(), end.isoformat()
+            )
         except Exception as e:
-            logger.error(f"Error fetching subscriptions for user {user_id} in monthly schedule: {e}")
+            logger.error(f"Error reading episode calendar for user {user_id}: {e}")
             return []
 
-        if not subscriptions:
-            return []
+        return self._calendar_rows_to_episodes(rows)
+
+    @staticmethod
+    def _calendar_rows_to_episodes(rows: typing.Iterable[dict]) -> typing.List[dict]:
+        """
+        Converts calendar rows (with show_tmdb_id / show_name) into the episode dicts used by the
+        schedule embeds, dropping duplicates. Rows are expected in air date order.
+        """
+        episodes = []
+        seen = set()
+        for row in rows or []:
+            try:
+                ep_date = datetime.strptime(row['air_date'], "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                continue
+            key = (row['show_name'], row['season_number'], row['episode_number'], row['air_date'])
+            if key in seen:
+                continue
+            seen.add(key)
+            episodes.append({
+                'show_name': row['show_name'],
+                'show_id': row['show_tmdb_id'],
+                'season_number': row['season_number'] or 0,
+                'episode_number': row['episode_number'] or 0,
+                'episode_name': row['name'] or 'TBA',
+                'air_date': row['air_date'],
+                'air_date_obj': ep_date,
+                'air_datetime_utc': row['airstamp_utc'],
+                'rating': row['rating'],
+                'source': row['source'],
+            })
+        return episodes
 
+    async def _fetch_monthly_schedule(self, user_id: int, year: int, month: int) -> typing.List[dict]:
+        """
+        Fetches all upcoming/scheduled episodes for the user's subscriptions in the given calendar month.
+        Returns a sorted list of episode dicts.
+        """
         _, num_days = calendar.monthrange(year, month)
         month_start = date(year, month, 1)
         month_end = date(year, month, num_days)
-
-        episodes = []
-
-        for sub in subscriptions:
-            show_id = sub['show_tmdb_id']
-            show_name = sub['show_name']
-            tvmaze_id = sub.get('show_tvmaze_id')
-
-            show_episodes_found = False
-
-            # 1. TVMaze
-            if tvmaze_id:
-                try:
-                    all_eps = await self.bot.loop.run_in_executor(None, tvmaze_client.get_show_episodes, tvmaze_id)
-                    if all_eps and isinstance(all_eps, list):
-                        for ep in all_eps:
-                            airdate_str = ep.get('airdate')
-                            if not airdate_str:
-                                continue
-                            try:
-                                ep_date = datetime.strptime(airdate_str, "%Y-%m-%d").date()
-                                if month_start <= ep_date <= month_end:
-                                    episodes.append({
-                                        'show_name': show_name,
-                                        'show_id': show_id,
-                                        'season_number': ep.get('season', 0),
-                                        'episode_number': ep.get('number', 0),
-                                        'episode_name': ep.get('name', 'TBA'),
-                                        'air_date': airdate_str,
-                                        'air_date_obj': ep_date,
-                                        'air_datetime_utc': ep.get('airstamp'),
-                                        'rating': ep.get('rating', {}).get('average'),
-                                        'source': 'TVMaze'
-                                    })
-                                    show_episodes_found = True
-                            except ValueError:
-                                pass
-                except Exception as e:
-                    logger.debug(f"TVMaze monthly fetch error for show {show_id}: {e}")
-
-            # 2. TMDB fallback
-            if not show_episodes_found:
-                try:
-                    details = await self.bot.loop.run_in_executor(None, tmdb_client.get_show_details, show_id)
-                    if details:
-                        for key in ('next_episode_to_air', 'last_episode_to_air'):
-                            ep = details.get(key)
-                            if ep and ep.get('air_date'):
-                                try:
-                                    ep_date = datetime.strptime(ep['air_date'], "%Y-%m-%d").date()
-                                    if month_start <= ep_date <= month_end:
-                                        episodes.append({
-                                            'show_name': details.get('name', show_name),
-                                            'show_id': show_id,
-                                            'season_number': ep.get('season_number', 0),
-                                            'episode_number': ep.get('episode_number', 0),
-                                            'episode_name': ep.get('name', 'TBA'),
-                                            'air_date': ep['air_date'],
-                                            'air_date_obj': ep_date,
-                                            'air_datetime_utc': None,
-                                            'rating': ep.get('vote_average'),
-                                            'source': 'TMDB'
-                                        })
-                                except ValueError:
-                                    pass
-                except Exception as e:
-                    logger.debug(f"TMDB monthly fetch error for show {show_id}: {e}")
-
-        # Deduplicate episodes by (show_name, season_number, episode_number, air_date)
-        unique_episodes = {}
-        for ep in episodes:
-            key = (ep['show_name'], ep['season_number'], ep['episode_number'], ep['air_date'])
-            if key not in unique_episodes:
-                unique_episodes[key] = ep
-
-        sorted_episodes = sorted(unique_episodes.values(), key=lambda x: (x['air_date_obj'], x.get('air_datetime_utc') or ''))
-        return sorted_episodes
+        return await self._fetch_calendar_episodes(user_id, month_start, month_end)
 
     @staticmethod
     def _build_monthly_schedule_embed(year: int, month: int, episodes: typing.List[dict], user_display_name: str = "") -> discord.Embed:
@@ -1225,6 +1287,20 @@ class TVShows(commands.Cog):
         today_utc = now_utc.date()
         window_start_utc = now_utc - timedelta(days=7)
 
+        # Load every "already notified" key for this cycle in one query; the loop below
+        # then does in-memory membership tests instead of two DB round trips per episode.
+        notified_pairs = [
+            (uid_str, sub['show_tmdb_id'])
+            for uid_str, subs in all_subscriptions.items()
+            for sub in subs
+            if isinstance(sub, dict) and sub.get('show_tmdb_id') is not None
+        ]
+        try:
+            notified_keys = await self.bot.loop.run_in_executor(None, self.db_manager.get_notified_episode_keys_bulk, notified_pairs)
+        except Exception as e:
+            logger.error(f"Failed to bulk-load sent episode notifications: {e}")
+            notified_keys = {}
+
         for user_id_str, user_subs in all_subscriptions.items():
             try:
                 user_id = int(user_id_str)
@@ -1257,6 +1333,9 @@ class TVShows(commands.Cog):
                 show_name_stored = sub['show_name']
                 tvmaze_id = sub.get('show_tvmaze_id')
                 poster_path = sub.get('poster_path')
+                sub_notified = notified_keys.setdefault(
+                    (str(user_id_str), show_id), {"episode_ids": set(), "episode_numbers": set()}
+                )
 
                 # Avoid duplicate checks for the same show within the same user cycle
                 dedup_key = tvmaze_id or show_id or show_name_stored.strip().lower()
@@ -1338,10 +1417,16 @@ class TVShows(commands.Cog):
                             
                             potential_episodes = []
                             if check_full_list:
-                                # Fetch all episodes to catch batch drops
-                                all_episodes = await self.bot.loop.run_in_executor(None, tvmaze_client.get_show_episodes, tvmaze_id)
-                                if all_episodes:
-                                    potential_episodes = all_episodes
+                                # Use the full (cached, compact) episode index to catch batch drops;
+                                # only episodes released inside the check window are considered.
+                                episode_index = await self.bot.loop.run_in_executor(None, tvmaze_client.get_show_episode_index, tvmaze_id)
+                                if episode_index:
+                                    potential_episodes = [r.as_dict() for r in episode_index.aired_between(window_start_utc, now_utc)]
+                                    potential_episodes += [
+                                        r.as_dict()
+                                        for r in episode_index.airing_between_dates(today_utc - timedelta(days=7), today_utc)
+                                        if r.airstamp_utc is None
+                                    ]
                             else:
                                 # Just check the embedded ones if no recent activity detected (saves API calls)
                                 if 'nextepisode' in embedded: potential_episodes.append(embedded['nextepisode'])
@@ -1386,19 +1471,12 @@ class TVShows(commands.Cog):
                                             if (isinstance(ep_season, int) and isinstance(ep_num, int) and ep_season > 0 and ep_num > 0 and ln_season == ep_season and ln_num == ep_num) or (ep_id is not None and ln_id == ep_id):
                                                 already_notified = True
 
-                                        # Multi-layer check 2: Check by episode key
-                                        if not already_notified and ep_key:
-                                            already_notified = await self.bot.loop.run_in_executor(
-                                                None, self.db_manager.has_user_been_notified_for_episode, user_id, show_id, ep_key
-                                            )
-
-                                        # Multi-layer check 3: Check by season / episode number
-                                        if not already_notified and isinstance(ep_season, int) and isinstance(ep_num, int) and ep_season > 0 and ep_num > 0:
-                                            already_notified_by_num = await self.bot.loop.run_in_executor(
-                                                None, self.db_manager.has_user_been_notified_for_episode_by_number, user_id, show_id, ep_season, ep_num
+                                        # Multi-layer check 2/3: episode key or season / episode number
+                                        # against the bulk-loaded sent notifications.
+                                        if not already_notified:
+                                            already_notified = self.db_manager.is_episode_in_notified_keys(
+                                                sub_notified, ep_key, ep_season, ep_num
                                             )
-                                            if already_notified_by_num:
-                                                already_notified = True
 
                                         if not already_notified:
                                             if not any(e['id'] == ep_id for e in episodes_to_notify):
@@ -1454,20 +1532,9 @@ class TVShows(commands.Cog):
                                             already_notified = True
 
                                     if not already_notified:
-                                        already_notified = await self.bot.loop.run_in_executor(
-                                            None, 
-                                            self.db_manager.has_user_been_notified_for_episode, 
-                                            user_id, 
-                                            show_id, 
-                                            f"tmdb:{tmdb_ep_id}"
-                                        )
-
-                                    if not already_notified and isinstance(ep_season, int) and isinstance(ep_num, int) and ep_season > 0 and ep_num > 0:
-                                        already_notified_by_num = await self.bot.loop.run_in_executor(
-                                            None, self.db_manager.has_user_been_notified_for_episode_by_number, user_id, show_id, ep_season, ep_num
+                                        already_notified = self.db_manager.is_episode_in_notified_keys(
+                                            sub_notified, f"tmdb:{tmdb_ep_id}", ep_season, ep_num
                                         )
-                                        if already_notified_by_num:
-                                            already_notified = True
 
                                     if not already_notified:
                                         if not any(ep.get('id') == last_aired_ep.get('id') for ep in episodes_to_notify):
@@ -1566,6 +1633,9 @@ class TVShows(commands.Cog):
                                 ep_season if isinstance(ep_season, int) else 0,
                                 ep_num if isinstance(ep_num, int) else 0
                             )
+                            sub_notified["episode_ids"].add(ep_id_key)
+                            if isinstance(ep_season, int) and isinstance(ep_num, int) and ep_season > 0 and ep_num > 0:
+                                sub_notified["episode_numbers"].add((ep_season, ep_num))
                         logger.info(f"Logged {len(episodes_to_notify)} sent notifications for User {user_id}, Show {show_id}.")
 
                     except discord.Forbidden:
@@ -1599,56 +1669,156 @@ class TVShows(commands.Cog):
         await self.bot.wait_until_ready()
         logger.info("TVShows check_new_episodes task is ready; loop starting.")
 
-    @tasks.loop(hours=1)
-    async def check_monthly_tv_digest(self):
+    @tasks.loop(hours=6)
+    async def refresh_show_index(self):
         """
-        Checks once per hour whether it is 09:00 AM on the 1st of the month in the user's
-        local timezone, and automatically delivers a monthly TV release calendar DM.
+        Seeds the autocomplete index with every subscribed show plus TMDB's trending and
+        on-the-air lists, so most lookups never need a network round-trip.
         """
         try:
             all_subs = await self.bot.loop.run_in_executor(None, self.db_manager.get_all_tv_subscriptions)
-            if not all_subs:
-                return
+            for subs in (all_subs or {}).values():
+                for sub in subs:
+                    self._show_index.add(sub.get('show_tmdb_id'), sub.get('show_name'), weight=2)
+        except Exception as e:
+            logger.error(f"refresh_show_index: failed to load subscriptions: {e}")
 
-            user_ids = set()
-            for sub in all_subs:
-                uid = sub.get("user_id")
-                if uid:
-                    user_ids.add(int(uid))
+        for fetch, args in ((tmdb_client.get_trending_tv_shows, ('week',)), (tmdb_client.get_tv_on_the_air, (1,))):
+            try:
+                shows = await self.bot.loop.run_in_executor(None, fetch, *args)
+                self._show_index.add_many(self._show_index_items(shows), weight=1)
+            except Exception as e:
+                logger.warning(f"refresh_show_index: {fetch.__name__} failed: {e}")
+        logger.info(f"TV show autocomplete index holds {len(self._show_index)} show(s).")
 
-            now_utc = datetime.now(timezone.utc)
+    @refresh_show_index.before_loop
+    async def before_refresh_show_index(self):
+        await self.bot.wait_until_ready()
 
-            for user_id in user_ids:
-                try:
-                    # Check user preference: tv_monthly_digest (default True)
-                    is_enabled = await self.bot.loop.run_in_executor(
-                        None, self.db_manager.get_user_preference, user_id, "tv_monthly_digest", True
-                    )
-                    if is_enabled is False or str(is_enabled).lower() in ("false", "off", "0", "no"):
-                        continue
+    @tasks.loop(hours=1)
+    async def sync_episode_calendar(self):
+        """
+        Keeps the materialized `episode_calendar` fresh: re-syncs subscribed shows whose
+        calendar is older than CALENDAR_SYNC_STALE_HOURS and drops rows for unsubscribed shows.
+        """
+        try:
+            stale_before = sqlite_utc_timestamp(datetime.now(timezone.utc) - timedelta(hours=CALENDAR_SYNC_STALE_HOURS))
+            shows = await self.bot.loop.run_in_executor(
+                None, self.db_manager.list_shows_needing_calendar_sync, stale_before, CALENDAR_SYNC_BATCH_SIZE
+            )
+            synced = 0
+            for show in shows or []:
+                if await self._sync_show_calendar(show['show_tmdb_id'], show.get('show_tvmaze_id')):
+                    synced += 1
+                await asyncio.sleep(0.5)
+            await self.bot.loop.run_in_executor(None, self.db_manager.prune_unsubscribed_episode_calendar)
+            if shows:
+                logger.info(f"Episode calendar sync: refreshed {synced}/{len(shows)} show(s).")
+        except Exception as e:
+            logger.error(f"Unexpected error in sync_episode_calendar loop: {e}")
 
-                    # Get user timezone
-                    tz_name = await self.bot.loop.run_in_executor(
-                        None, self.db_manager.get_user_preference, user_id, "timezone", "Europe/Warsaw"
-                    )
-                    user_tz = tzinfo_from_name(tz_name)
-                    user_local_now = now_utc.astimezone(user_tz)
+    @sync_episode_calendar.before_loop
+    async def before_sync_episode_calendar(self):
+        await self.bot.wait_until_ready()
+        logger.info("TVShows sync_episode_calendar task is ready; loop starting.")
+
+    @staticmethod
+    def _digest_send_time_utc(tz, year: int, month: int) -> datetime:
+        return datetime(year, month, 1, MONTHLY_DIGEST_SEND_HOUR, tzinfo=tz).astimezone(timezone.utc)
+
+    async def _build_digest_send_index(self, now_utc: datetime) -> typing.List[tuple]:
+        """
+        Precomputes, for every user with TV subscriptions and the digest enabled, the UTC time of
+        their next digest (the 1st of the month at MONTHLY_DIGEST_SEND_HOUR local time).
+        Returns (send_at_utc, user_id, period_key, deadline_utc) tuples sorted by send time;
+        the deadline is the end of the user's local 1st so a late bot start still delivers that day.
+        """
+        all_subs = await self.bot.loop.run_in_executor(None, self.db_manager.get_all_tv_subscriptions)
+        if not all_subs:
+            return []
 
-                    # Trigger only on the 1st of the month at or after 09:00 local time
-                    if user_local_now.day != 1 or user_local_now.hour < 9:
-                        continue
+        def _pref_map(key: str) -> dict:
+            rows = self.db_manager.list_users_with_preference(key)
+            return {str(r["user_id"]): r["value"] for r in rows or []}
 
-                    current_period_key = f"{user_local_now.year}-{user_local_now.month:02d}"
+        enabled = await self.bot.loop.run_in_executor(None, _pref_map, "tv_monthly_digest")
+        timezones = await self.bot.loop.run_in_executor(None, _pref_map, "timezone")
+        last_sent = await self.bot.loop.run_in_executor(None, _pref_map, "last_sent_tv_monthly_digest")
 
-                    # Check if already sent for this month
-                    last_sent = await self.bot.loop.run_in_executor(
-                        None, self.db_manager.get_user_preference, user_id, "last_sent_tv_monthly_digest", None
-                    )
-                    if last_sent == current_period_key:
-                        continue
+        index = []
+        for uid in all_subs:
+            uid = str(uid)
+            flag = enabled.get(uid, True)
+            if flag is False or str(flag).lower() in ("false", "off", "0", "no"):
+                continue
+            user_tz = tzinfo_from_name(timezones.get(uid) or "Europe/Warsaw")
+            local_now = now_utc.astimezone(user_tz)
+            year, month = local_now.year, local_now.month
+            deadline = datetime(year, month, 2, tzinfo=user_tz).astimezone(timezone.utc)
+            if last_sent.get(uid) == f"{year}-{month:02d}" or now_utc >= deadline:
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                deadline = datetime(year, month, 2, tzinfo=user_tz).astimezone(timezone.utc)
+            send_at = self._digest_send_time_utc(user_tz, year, month)
+            index.append((send_at, int(uid), f"{year}-{month:02d}", deadline))
+        index.sort()
+        return index
+
+    async def _monthly_show_calendars(self, year: int, month: int) -> typing.Dict[int, typing.List[dict]]:
+        """
+        Digest stage 1: one month calendar per distinct subscribed show. Stale shows are
+        synced once each, however many users follow them.
+        """
+        stale_before = sqlite_utc_timestamp(datetime.now(timezone.utc) - timedelta(hours=CALENDAR_SYNC_STALE_HOURS))
+        shows = await self.bot.loop.run_in_executor(None, self.db_manager.list_shows_needing_calendar_sync, stale_before, 10000)
+        for show in shows or []:
+            await self._sync_show_calendar(show['show_tmdb_id'], show.get('show_tvmaze_id'))
+        _, num_days = calendar.monthrange(year, month)
+        return await self.bot.loop.run_in_executor(
+            None, self.db_manager.get_subscribed_episode_calendar, date(year, month, 1).isoformat(), date(year, month, num_days).isoformat()
+        ) or {}
+
+    @tasks.loop(minutes=15)
+    async def check_monthly_tv_digest(self):
+        """
+        Delivers the monthly TV release calendar DM at 09:00 on the 1st of the month in each
+        user's local timezone. Due users come from a precomputed send-time index; the digest is
+        built per distinct show first and then assembled per user.
+        """
+        try:
+            now_utc = datetime.now(timezone.utc)
+            if (self._digest_send_index is None or self._digest_index_built_at is None
+                    or now_utc - self._digest_index_built_at >= timedelta(hours=MONTHLY_DIGEST_INDEX_TTL_HOURS)):
+                self._digest_send_index = await self._build_digest_send_index(now_utc)
+                self._digest_index_built_at = now_utc
+
+            index = self._digest_send_index
+            due_count = bisect.bisect_right(index, (now_utc, float("inf")))
+            if not due_count:
+                return
+            due = index[:due_count]
+            del index[:due_count]
+            due = [entry for entry in due if now_utc < entry[3]]
+            if not due:
+                return
+
+            all_subs = await self.bot.loop.run_in_executor(None, self.db_manager.get_all_tv_subscriptions) or {}
+            show_calendars: typing.Dict[str, typing.Dict[int, typing.List[dict]]] = {}
 
-                    # Fetch upcoming episodes for current month
-                    episodes = await self._fetch_monthly_schedule(user_id, user_local_now.year, user_local_now.month)
+            for _send_at, user_id, period_key, _deadline in due:
+                try:
+                    if period_key not in show_calendars:
+                        year, month = (int(part) for part in period_key.split("-"))
+                        show_calendars[period_key] = await self._monthly_show_calendars(year, month)
+                    month_calendar = show_calendars[period_key]
+                    year, month = (int(part) for part in period_key.split("-"))
+
+                    # Stage 2: assemble the user's digest from the shared per-show calendars.
+                    rows = []
+                    for sub in all_subs.get(str(user_id), []):
+                        for cal_row in month_calendar.get(sub.get('show_tmdb_id'), []):
+                            rows.append({**cal_row, 'show_name': sub.get('show_name'), 'show_tmdb_id': sub.get('show_tmdb_id')})
+                    rows.sort(key=lambda r: (r['air_date'], r.get('airstamp_utc') or ''))
+                    episodes = self._calendar_rows_to_episodes(rows)
 
                     user = self.bot.get_user(user_id)
                     if not user:
@@ -1658,12 +1828,12 @@ class TVShows(commands.Cog):
                             user = None
 
                     if user:
-                        embed = self._build_monthly_schedule_embed(user_local_now.year, user_local_now.month, episodes, user.display_name)
+                        embed = self._build_monthly_schedule_embed(year, month, episodes, user.display_name)
                         try:
                             await user.send(embed=embed)
-                            logger.info(f"Sent monthly TV digest for {current_period_key} to user {user_id}.")
+                            logger.info(f"Sent monthly TV digest for {period_key} to user {user_id}.")
                             await self.bot.loop.run_in_executor(
-                                None, self.db_manager.set_user_preference, user_id, "last_sent_tv_monthly_digest", current_period_key
+                                None, self.db_manager.set_user_preference, user_id, "last_sent_tv_monthly_digest", period_key
                             )
                         except discord.Forbidden:
                             logger.warning(f"Cannot send monthly TV digest to user {user_id} (DMs disabled).")
@@ -66,6 +66,10 @@ class Settings(BaseSettings):
     TMDB_API_KEY: str = ""
     TMDB_API_KEY_FILE: str = ""
     ALPHA_VANTAGE_API_KEY: str
+    ALPHA_VANTAGE_CALLS_PER_MINUTE: int = 5  # free tier; raise for a premium key
+    ALPHA_VANTAGE_CALLS_PER_DAY: int = 25
+    SYMBOL_DIRECTORY_FILE: str = ""  # optional CSV (symbol,name[,exchange,assetType]) merged into the symbol directory
+    SYMBOL_DIRECTORY_REFRESH_HOURS: int = 168
     OPENWEATHERMAP_API_KEY: str
     SQLITE_DB_PATH: str = "data/app.db"
     WEBHOOK_BASE_URL: str = "http://localhost:5000"
@@ -73,6 +77,11 @@ class Settings(BaseSettings):
     WEBHOOK_MAX_BYTES: int = 50 * 1024
     WEBHOOK_RATE_LIMIT_PER_MIN: int = 30
     ALLOW_EXTERNAL_CHARTS: bool = True
+    CHART_RENDERER: str = "local"  # "local" (in-process renderer) or "quickchart" (quickchart.io, local fallback)
+    CHART_RENDER_PROCESSES: int = 2  # local render pool size, forked at startup; 0 renders in the calling thread
+    CHART_CACHE_DIR: str = "data/chart_cache"
+    CHART_CACHE_MEMORY_MB: int = 32
+    CHART_CACHE_DISK_MB: int = 256  # 0 keeps rendered charts in memory only
 
     # Timer / Firebase sync (owner-only feature)
     FIREBASE_DATABASE_URL: str = ""
@@ -108,6 +117,10 @@ try:
     TMDB_API_KEY = settings.TMDB_API_KEY
     TMDB_API_KEY_FILE = settings.TMDB_API_KEY_FILE
     ALPHA_VANTAGE_API_KEY = settings.ALPHA_VANTAGE_API_KEY
+    ALPHA_VANTAGE_CALLS_PER_MINUTE = settings.ALPHA_VANTAGE_CALLS_PER_MINUTE
+    ALPHA_VANTAGE_CALLS_PER_DAY = settings.ALPHA_VANTAGE_CALLS_PER_DAY
+    SYMBOL_DIRECTORY_FILE = settings.SYMBOL_DIRECTORY_FILE
+    SYMBOL_DIRECTORY_REFRESH_HOURS = settings.SYMBOL_DIRECTORY_REFRESH_HOURS
     OPENWEATHERMAP_API_KEY = settings.OPENWEATHERMAP_API_KEY
     SQLITE_DB_PATH = settings.SQLITE_DB_PATH
     WEBHOOK_BASE_URL = settings.WEBHOOK_BASE_URL
@@ -115,6 +128,11 @@ try:
     WEBHOOK_MAX_BYTES = settings.WEBHOOK_MAX_BYTES
     WEBHOOK_RATE_LIMIT_PER_MIN = settings.WEBHOOK_RATE_LIMIT_PER_MIN
     ALLOW_EXTERNAL_CHARTS = settings.ALLOW_EXTERNAL_CHARTS
+    CHART_RENDERER = settings.CHART_RENDERER
+    CHART_RENDER_PROCESSES = settings.CHART_RENDER_PROCESSES
+    CHART_CACHE_DIR = settings.CHART_CACHE_DIR
+    CHART_CACHE_MEMORY_MB = settings.CHART_CACHE_MEMORY_MB
+    CHART_CACHE_DISK_MB = settings.CHART_CACHE_DISK_MB
     FIREBASE_DATABASE_URL = settings.FIREBASE_DATABASE_URL
     FIREBASE_DATABASE_SECRET = settings.FIREBASE_DATABASE_SECRET
     TIMER_OWNER_ID = settings.TIMER_OWNER_ID
@@ -237,6 +237,27 @@ class DataManagerCore:
         )
         """
         create_table_if_not_exists("movie_subscriptions", create_movie_subscriptions_sql)
+        # movie_subscriptions release schedule columns (release_date + per-movie refresh times)
+        try:
+            cols = self._execute_query("PRAGMA table_info(movie_subscriptions);", fetch_all=True)
+            if cols and isinstance(cols, list):
+                col_names = {c.get("name") for c in cols if isinstance(c, dict)}
+                for col_name, col_type in (("release_date", "TEXT"), ("release_checked_at", "TIMESTAMP"), ("next_release_check", "TIMESTAMP")):
+                    if col_name not in col_names:
+                        self._execute_query(f"ALTER TABLE movie_subscriptions ADD COLUMN {col_name} {col_type};", commit=True)
+                        logger.info(f"Column '{col_name}' added successfully to movie_subscriptions.")
+        except Exception as e:
+            logger.warning(f"Could not apply movie_subscriptions schema migration: {e}")
+        if not self._execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_movie_subs_unnotified_release ON movie_subscriptions(notified_status, release_date);",
+            commit=True,
+        ):
+            logger.warning("Could not create idx_movie_subs_unnotified_release.")
+        if not self._execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_movie_subs_next_release_check ON movie_subscriptions(next_release_check);",
+            commit=True,
+        ):
+            logger.warning("Could not create idx_movie_subs_next_release_check.")
 
         # Tracked Stocks
         create_tracked_stocks_sql = """
@@ -290,6 +311,78 @@ class DataManagerCore:
         """
         create_table_if_not_exists("currency_rates", create_currency_rates_sql)
 
+        # Local OHLC bar store (charts read ranges from here; providers only fill the gaps)
+        create_stock_bars_sql = """
+        CREATE TABLE IF NOT EXISTS stock_bars (
+            symbol TEXT NOT NULL,
+            interval TEXT NOT NULL, -- e.g. "1d"
+            ts TEXT NOT NULL, -- "YYYY-MM-DD" for daily bars
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL NOT NULL,
+            volume REAL,
+            PRIMARY KEY (symbol, interval, ts)
+        ) WITHOUT ROWID
+        """
+        create_table_if_not_exists("stock_bars", create_stock_bars_sql)
+
+        create_stock_bar_sync_sql = """
+        CREATE TABLE IF NOT EXISTS stock_bar_sync (
+            symbol TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            covered_from TEXT NOT NULL, -- earliest ts the store is complete from
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (symbol, interval)
+        )
+        """
+        create_table_if_not_exists("stock_bar_sync", create_stock_bar_sync_sql)
+
+        # Corporate Events (next earnings / ex-dividend date per tracked symbol, maintained by the corporate events sweep)
+        create_corporate_events_sql = """
+        CREATE TABLE IF NOT EXISTS corporate_events (
+            symbol TEXT NOT NULL, -- as tracked (upper-cased), not provider-normalized
+            event_type TEXT NOT NULL, -- 'earnings' | 'ex_dividend'
+            event_date TEXT NOT NULL, -- YYYY-MM-DD
+            value REAL, -- EPS estimate (earnings) or last payout per share (ex_dividend)
+            currency TEXT,
+            PRIMARY KEY (symbol, event_type)
+        )
+        """
+        create_table_if_not_exists("corporate_events", create_corporate_events_sql)
+        if not self._execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_corporate_events_type_date ON corporate_events(event_type, event_date);",
+            commit=True,
+        ):
+            logger.warning("Could not create idx_corporate_events_type_date.")
+
+        create_corporate_events_sync_sql = """
+        CREATE TABLE IF NOT EXISTS corporate_events_sync (
+            symbol TEXT PRIMARY KEY,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        create_table_if_not_exists("corporate_events_sync", create_corporate_events_sync_sql)
+
+        # Symbol directory: every known listing for local symbol search/autocomplete.
+        # Symbols are stored in Yahoo Finance form (AAPL, CDR.WA); `source` names the import.
+        create_symbol_directory_sql = """
+        CREATE TABLE IF NOT EXISTS symbol_directory (
+            symbol TEXT PRIMARY KEY,
+            name TEXT NOT NULL DEFAULT '',
+            exchange TEXT,
+            asset_type TEXT,
+            source TEXT NOT NULL,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        create_table_if_not_exists("symbol_directory", create_symbol_directory_sql)
+        if not self._execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_symbol_directory_source ON symbol_directory (source, imported_at)",
+            commit=True,
+        ):
+            logger.warning("Could not create idx_symbol_directory_source.")
+
         # Sent Episode Notifications
         create_sent_episode_notifications_sql = """
         CREATE TABLE IF NOT EXISTS sent_episode_notifications (
@@ -304,6 +397,38 @@ class DataManagerCore:
         )
         """
         create_table_if_not_exists("sent_episode_notifications", create_sent_episode_notifications_sql)
+
+        # Episode Calendar (materialized airing schedule per subscribed show, maintained by the TV sync task)
+        create_episode_calendar_sql = """
+        CREATE TABLE IF NOT EXISTS episode_calendar (
+            show_tmdb_id INTEGER NOT NULL,
+            episode_key TEXT NOT NULL, -- provider-prefixed id, e.g. "tvmaze:12345" / "tmdb:678"
+            show_tvmaze_id INTEGER,
+            season_number INTEGER,
+            episode_number INTEGER,
+            name TEXT,
+            air_date TEXT, -- YYYY-MM-DD (network-local air date, as reported by the provider)
+            airstamp_utc TEXT, -- ISO-8601 UTC, NULL when only a date is known
+            rating REAL,
+            source TEXT NOT NULL DEFAULT 'TVMaze',
+            PRIMARY KEY (show_tmdb_id, episode_key)
+        )
+        """
+        create_table_if_not_exists("episode_calendar", create_episode_calendar_sql)
+        if not self._execute_query(
+            "CREATE INDEX IF NOT EXISTS idx_episode_calendar_show_date ON episode_calendar(show_tmdb_id, air_date);",
+            commit=True,
+        ):
+            logger.warning("Could not create idx_episode_calendar_show_date.")
+
+        create_episode_calendar_sync_sql = """
+        CREATE TABLE IF NOT EXISTS episode_calendar_sync (
+            show_tmdb_id INTEGER PRIMARY KEY,
+            show_tvmaze_id INTEGER,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+        create_table_if_not_exists("episode_calendar_sync", create_episode_calendar_sync_sql)
         # sent_episode_notifications schema migration for older DBs
         try:
             cols = self._execute_query("PRAGMA table_info(sent_episode_notifications);", fetch_all=True)
@@ -1,5 +1,6 @@
 import json
 import logging
+import sqlite3
 from typing import List, Dict, Any, Optional, Union, Tuple
 
 logger = logging.getLogger(__name__)
@@ -19,6 +20,52 @@ class MediaMixin:
         }
         return self._execute_query(query, params, commit=True)
 
+    def add_tv_show_subscriptions_bulk(self, user_id: int, shows: List[Dict[str, Any]]) -> bool:
+        """
+        Inserts several subscriptions for one user in a single transaction.
+        Each show dict needs show_tmdb_id and show_name; poster_path/show_tvmaze_id are optional.
+        """
+        user_id_str = str(user_id)
+        rows = [
+            {
+                "user_id": user_id_str,
+                "show_tmdb_id": show["show_tmdb_id"],
+                "show_name": show["show_name"],
+                "poster_path": show.get("poster_path"),
+                "show_tvmaze_id": show.get("show_tvmaze_id"),
+            }
+            for show in shows or []
+        ]
+        if not rows:
+            return True
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                cur.executemany(
+                    """
+                    INSERT OR IGNORE INTO tv_subscriptions (user_id, show_tmdb_id, show_name, poster_path, last_notified_episode_details, show_tvmaze_id)
+                    VALUES (:user_id, :show_tmdb_id, :show_name, :poster_path, NULL, :show_tvmaze_id)
+                    """,
+                    rows,
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"add_tv_show_subscriptions_bulk failed for user {user_id_str}: {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
     def update_tv_subscription_tvmaze_id(self, user_id: int, show_tmdb_id: int, show_tvmaze_id: int) -> bool:
         user_id_str = str(user_id)
         query = """
@@ -212,14 +259,251 @@ class MediaMixin:
         result = self._execute_query(query, params, fetch_one=True)
         return bool(result)
 
+    def get_notified_episode_keys_bulk(
+        self, pairs: List[Tuple[Any, int]]
+    ) -> Dict[Tuple[str, int], Dict[str, set]]:
+        """
+        Loads every sent-notification key for a batch of (user_id, show_tmdb_id) pairs.
+
+        Returns {(user_id_str, show_tmdb_id): {"episode_ids": set[str], "episode_numbers": set[(season, episode)]}}
+        with an entry for every requested pair (empty sets when nothing was sent yet), so the
+        background episode check can do in-memory membership tests instead of one query per episode.
+        """
+        wanted: List[Tuple[str, int]] = []
+        seen = set()
+        for user_id, show_tmdb_id in pairs or []:
+            try:
+                key = (str(user_id), int(show_tmdb_id))
+            except (TypeError, ValueError):
+                continue
+            if key not in seen:
+                seen.add(key)
+                wanted.append(key)
+
+        result: Dict[Tuple[str, int], Dict[str, set]] = {
+            key: {"episode_ids": set(), "episode_numbers": set()} for key in wanted
+        }
+        if not wanted:
+            return result
+
+        # Chunk to stay well below SQLite's bound-parameter limit (2 params per pair).
+        chunk_size = 400
+        for start in range(0, len(wanted), chunk_size):
+            chunk = wanted[start:start + chunk_size]
+            values_sql = ", ".join(f"(:u{i}, :s{i})" for i in range(len(chunk)))
+            params: Dict[str, Any] = {}
+            for i, (uid, sid) in enumerate(chunk):
+                params[f"u{i}"] = uid
+                params[f"s{i}"] = sid
+            query = f"""
+            WITH wanted(user_id, show_tmdb_id) AS (VALUES {values_sql})
+            SELECT n.user_id, n.show_tmdb_id, n.episode_tmdb_id, n.season_number, n.episode_number
+            FROM sent_episode_notifications n
+            JOIN wanted w ON w.user_id = n.user_id AND w.show_tmdb_id = n.show_tmdb_id
+            """
+            rows = self._execute_query(query, params, fetch_all=True)
+            for row in rows or []:
+                try:
+                    key = (str(row["user_id"]), int(row["show_tmdb_id"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                entry = result.get(key)
+                if entry is None:
+                    continue
+                if row.get("episode_tmdb_id") is not None:
+                    entry["episode_ids"].add(str(row["episode_tmdb_id"]))
+                season, episode = row.get("season_number"), row.get("episode_number")
+                if isinstance(season, int) and isinstance(episode, int) and season > 0 and episode > 0:
+                    entry["episode_numbers"].add((season, episode))
+        return result
+
+    def is_episode_in_notified_keys(self, notified: Optional[Dict[str, set]], episode_id: Any, season_number: Any = None, episode_number: Any = None) -> bool:
+        """
+        In-memory counterpart of has_user_been_notified_for_episode(_by_number) for one entry
+        returned by get_notified_episode_keys_bulk. Keeps the legacy raw-integer id fallback.
+        """
+        if not notified:
+            return False
+        ids = notified.get("episode_ids") or set()
+        normalized_id, legacy_int = self._normalize_episode_notification_id(episode_id)
+        if normalized_id is not None:
+            if str(normalized_id) in ids:
+                return True
+            if legacy_int is not None and str(legacy_int) in ids:
+                return True
+        if isinstance(season_number, int) and isinstance(episode_number, int) and season_number > 0 and episode_number > 0:
+            return (season_number, episode_number) in (notified.get("episode_numbers") or set())
+        return False
+
+    # --- Episode Calendar ---
+    def replace_episode_calendar_for_show(self, show_tmdb_id: int, show_tvmaze_id: Optional[int], episodes: List[Dict[str, Any]]) -> bool:
+        """
+        Atomically replaces the stored calendar rows for one show and stamps its sync time.
+
+        Each episode dict uses the keys: episode_key, season_number, episode_number, name,
+        air_date, airstamp_utc, rating, source.
+        """
+        rows = []
+        for ep in episodes or []:
+            if not isinstance(ep, dict) or not ep.get("episode_key"):
+                continue
+            rows.append({
+                "show_tmdb_id": show_tmdb_id,
+                "episode_key": str(ep["episode_key"]),
+                "show_tvmaze_id": show_tvmaze_id,
+                "season_number": ep.get("season_number"),
+                "episode_number": ep.get("episode_number"),
+                "name": ep.get("name"),
+                "air_date": ep.get("air_date"),
+                "airstamp_utc": ep.get("airstamp_utc"),
+                "rating": ep.get("rating"),
+                "source": ep.get("source") or "TVMaze",
+            })
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                cur.execute("DELETE FROM episode_calendar WHERE show_tmdb_id = :show_tmdb_id", {"show_tmdb_id": show_tmdb_id})
+                if rows:
+                    cur.executemany(
+                        """
+                        INSERT OR REPLACE INTO episode_calendar
+                            (show_tmdb_id, episode_key, show_tvmaze_id, season_number, episode_number, name, air_date, airstamp_utc, rating, source)
+                        VALUES (:show_tmdb_id, :episode_key, :show_tvmaze_id, :season_number, :episode_number, :name, :air_date, :airstamp_utc, :rating, :source)
+                        """,
+                        rows,
+                    )
+                cur.execute(
+                    """
+                    INSERT INTO episode_calendar_sync (show_tmdb_id, show_tvmaze_id, synced_at)
+                    VALUES (:show_tmdb_id, :show_tvmaze_id, CURRENT_TIMESTAMP)
+                    ON CONFLICT(show_tmdb_id) DO UPDATE SET
+                        show_tvmaze_id = excluded.show_tvmaze_id,
+                        synced_at = CURRENT_TIMESTAMP
+                    """,
+                    {"show_tmdb_id": show_tmdb_id, "show_tvmaze_id": show_tvmaze_id},
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"replace_episode_calendar_for_show failed for show {show_tmdb_id}: {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
+    def mark_episode_calendar_synced(self, show_tmdb_id: int, show_tvmaze_id: Optional[int]) -> bool:
+        """
+        Stamps a show's sync time without touching its calendar rows: used when a sync found
+        nothing usable, so the show waits for the next stale sweep instead of being retried
+        on every read.
+        """
+        query = """
+        INSERT INTO episode_calendar_sync (show_tmdb_id, show_tvmaze_id, synced_at)
+        VALUES (:show_tmdb_id, :show_tvmaze_id, CURRENT_TIMESTAMP)
+        ON CONFLICT(show_tmdb_id) DO UPDATE SET
+            show_tvmaze_id = excluded.show_tvmaze_id,
+            synced_at = CURRENT_TIMESTAMP
+        """
+        params = {"show_tmdb_id": show_tmdb_id, "show_tvmaze_id": show_tvmaze_id}
+        return self._execute_query(query, params, commit=True)
+
+    def list_shows_needing_calendar_sync(self, stale_before_utc: str, limit: int = 200) -> List[Dict[str, Any]]:
+        """
+        Distinct subscribed shows whose calendar was never synced or was synced before
+        `stale_before_utc` ("YYYY-MM-DD HH:MM:SS"), oldest first. Also re-syncs shows whose
+        TVMaze id has been resolved since the last sync.
+        """
+        query = """
+        SELECT s.show_tmdb_id, MAX(s.show_tvmaze_id) AS show_tvmaze_id, MAX(s.show_name) AS show_name
+        FROM tv_subscriptions s
+        LEFT JOIN episode_calendar_sync cs ON cs.show_tmdb_id = s.show_tmdb_id
+        GROUP BY s.show_tmdb_id
+        HAVING MAX(cs.synced_at) IS NULL
+            OR MAX(cs.synced_at) < :stale_before
+            OR (MAX(s.show_tvmaze_id) IS NOT NULL AND MAX(cs.show_tvmaze_id) IS NULL)
+        ORDER BY MAX(cs.synced_at) IS NOT NULL, MAX(cs.synced_at)
+        LIMIT :limit
+        """
+        params = {"stale_before": stale_before_utc, "limit": max(1, int(limit))}
+        return self._execute_query(query, params, fetch_all=True)
+
+    def list_user_shows_missing_calendar(self, user_id: int) -> List[Dict[str, Any]]:
+        """A user's subscribed shows that have never been synced into episode_calendar."""
+        query = """
+        SELECT s.show_tmdb_id, s.show_tvmaze_id, s.show_name
+        FROM tv_subscriptions s
+        LEFT JOIN episode_calendar_sync cs ON cs.show_tmdb_id = s.show_tmdb_id
+        WHERE s.user_id = :user_id AND cs.show_tmdb_id IS NULL
+        """
+        return self._execute_query(query, {"user_id": str(user_id)}, fetch_all=True)
+
+    def get_user_episode_calendar(self, user_id: int, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Episodes of the user's subscribed shows with start_date <= air_date <= end_date
+        (ISO "YYYY-MM-DD" bounds), ordered by air date / airstamp.
+        """
+        query = """
+        SELECT s.show_tmdb_id, s.show_name,
+               c.episode_key, c.season_number, c.episode_number, c.name,
+               c.air_date, c.airstamp_utc, c.rating, c.source
+        FROM tv_subscriptions s
+        JOIN episode_calendar c ON c.show_tmdb_id = s.show_tmdb_id
+        WHERE s.user_id = :user_id
+          AND c.air_date >= :start_date AND c.air_date <= :end_date
+        ORDER BY c.air_date, c.airstamp_utc
+        """
+        params = {"user_id": str(user_id), "start_date": start_date, "end_date": end_date}
+        return self._execute_query(query, params, fetch_all=True)
+
+    def get_subscribed_episode_calendar(self, start_date: str, end_date: str) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Calendar rows of every subscribed show airing between start_date and end_date
+        (inclusive, ISO dates), grouped by show_tmdb_id and ordered by air date / airstamp.
+        Each distinct show appears once regardless of how many users follow it.
+        """
+        query = """
+        SELECT c.show_tmdb_id, c.episode_key, c.season_number, c.episode_number, c.name,
+               c.air_date, c.airstamp_utc, c.rating, c.source
+        FROM episode_calendar c
+        WHERE c.show_tmdb_id IN (SELECT DISTINCT show_tmdb_id FROM tv_subscriptions)
+          AND c.air_date >= :start_date AND c.air_date <= :end_date
+        ORDER BY c.show_tmdb_id, c.air_date, c.airstamp_utc
+        """
+        rows = self._execute_query(query, {"start_date": start_date, "end_date": end_date}, fetch_all=True)
+        by_show: Dict[int, List[Dict[str, Any]]] = {}
+        for row in rows or []:
+            by_show.setdefault(row["show_tmdb_id"], []).append(row)
+        return by_show
+
+    def prune_unsubscribed_episode_calendar(self) -> bool:
+        """Drops calendar rows and sync stamps for shows nobody is subscribed to any more."""
+        ok = self._execute_query(
+            "DELETE FROM episode_calendar WHERE show_tmdb_id NOT IN (SELECT show_tmdb_id FROM tv_subscriptions)",
+            commit=True,
+        )
+        ok_sync = self._execute_query(
+            "DELETE FROM episode_calendar_sync WHERE show_tmdb_id NOT IN (SELECT show_tmdb_id FROM tv_subscriptions)",
+            commit=True,
+        )
+        return bool(ok and ok_sync)
+
     # --- Movie Subscriptions ---
-    def add_movie_subscription(self, user_id: int, tmdb_id: int, title: str, poster_path: str) -> bool:
+    def add_movie_subscription(self, user_id: int, tmdb_id: int, title: str, poster_path: str, release_date: Optional[str] = None) -> bool:
         user_id_str = str(user_id)
         query = """
-        INSERT OR IGNORE INTO movie_subscriptions (user_id, tmdb_id, title, poster_path, notified_status)
-        VALUES (:user_id, :tmdb_id, :title, :poster_path, 0)
+        INSERT OR IGNORE INTO movie_subscriptions (user_id, tmdb_id, title, poster_path, notified_status, release_date)
+        VALUES (:user_id, :tmdb_id, :title, :poster_path, 0, :release_date)
         """
-        params = {"user_id": user_id_str, "tmdb_id": tmdb_id, "title": title, "poster_path": poster_path}
+        params = {"user_id": user_id_str, "tmdb_id": tmdb_id, "title": title, "poster_path": poster_path, "release_date": release_date or None}
         return self._execute_query(query, params, commit=True)
 
     def remove_movie_subscription(self, user_id: int, tmdb_id: int) -> bool:
@@ -230,7 +514,7 @@ class MediaMixin:
 
     def get_user_movie_subscriptions(self, user_id: int) -> List[Dict[str, Any]]:
         user_id_str = str(user_id)
-        query = "SELECT user_id, tmdb_id, title, poster_path, notified_status FROM movie_subscriptions WHERE user_id = :user_id"
+        query = "SELECT user_id, tmdb_id, title, poster_path, notified_status, release_date FROM movie_subscriptions WHERE user_id = :user_id"
         params = {"user_id": user_id_str}
         subscriptions = self._execute_query(query, params, fetch_all=True)
         for sub in subscriptions: # Convert 0/1 to False/True
@@ -238,7 +522,7 @@ class MediaMixin:
         return subscriptions
 
     def get_all_movie_subscriptions(self) -> Dict[str, List[Dict[str, Any]]]:
-        query = "SELECT user_id, tmdb_id, title, poster_path, notified_status FROM movie_subscriptions"
+        query = "SELECT user_id, tmdb_id, title, poster_path, notified_status, release_date FROM movie_subscriptions"
         subscriptions = self._execute_query(query, fetch_all=True)
         result_dict: Dict[str, List[Dict[str, Any]]] = {}
         for sub in subscriptions:
@@ -257,4 +541,41 @@ class MediaMixin:
         params = {"status": 1 if status else 0, "user_id": user_id_str, "tmdb_id": tmdb_id}
         return self._execute_query(query, params, commit=True)
 
+    def list_movies_due_for_release_refresh(self, now_utc: str) -> List[Dict[str, Any]]:
+        """
+        Distinct unnotified movies whose release date should be re-checked with TMDB
+        (never checked, or next_release_check <= now_utc "YYYY-MM-DD HH:MM:SS").
+        """
+        query = """
+        SELECT tmdb_id, MAX(title) AS title, MAX(release_date) AS release_date
+        FROM movie_subscriptions
+        WHERE notified_status = 0
+          AND (next_release_check IS NULL OR next_release_check <= :now)
+        GROUP BY tmdb_id
+        """
+        return self._execute_query(query, {"now": now_utc}, fetch_all=True)
+
+    def update_movie_release_info(self, tmdb_id: int, release_date: Optional[str], next_check_utc: str, title: Optional[str] = None) -> bool:
+        """Stores a refreshed release date (and title) for every subscription to `tmdb_id`."""
+        query = """
+        UPDATE movie_subscriptions
+        SET release_date = :release_date,
+            title = COALESCE(:title, title),
+            release_checked_at = CURRENT_TIMESTAMP,
+            next_release_check = :next_check
+        WHERE tmdb_id = :tmdb_id
+        """
+        params = {"release_date": release_date or None, "title": title, "next_check": next_check_utc, "tmdb_id": tmdb_id}
+        return self._execute_query(query, params, commit=True)
+
+    def get_released_unnotified_movie_subscriptions(self, today: str) -> List[Dict[str, Any]]:
+        """Unnotified subscriptions whose stored release_date is on or before `today` (ISO date)."""
+        query = """
+        SELECT user_id, tmdb_id, title, poster_path, release_date
+        FROM movie_subscriptions
+        WHERE notified_status = 0 AND release_date IS NOT NULL AND release_date <= :today
+        ORDER BY user_id, release_date
+        """
+        return self._execute_query(query, {"today": today}, fetch_all=True)
+
     # --- Tracked Stocks ---
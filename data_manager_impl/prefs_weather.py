@@ -1,5 +1,6 @@
 import json
 import logging
+import sqlite3
 from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
@@ -115,6 +116,50 @@ class PrefsWeatherMixin:
             return float(result['rate'])
         return None
 
+    def get_all_currency_rates(self) -> Dict[str, Dict[str, Any]]:
+        """Every stored pair as {currency_pair: {"rate", "last_updated"}}."""
+        rows = self._execute_query("SELECT currency_pair, rate, last_updated FROM currency_rates", fetch_all=True)
+        return {
+            row["currency_pair"]: {"rate": float(row["rate"]), "last_updated": row["last_updated"]}
+            for row in rows or []
+        }
+
+    def update_currency_rates(self, rates: Dict[str, float]) -> bool:
+        """Upserts many {currency_pair: rate} entries in one transaction."""
+        rows = [{"pair": pair, "rate": float(rate)} for pair, rate in (rates or {}).items()]
+        if not rows:
+            return True
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                cur.executemany(
+                    """
+                    INSERT INTO currency_rates (currency_pair, rate, last_updated)
+                    VALUES (:pair, :rate, CURRENT_TIMESTAMP)
+                    ON CONFLICT(currency_pair) DO UPDATE SET
+                        rate = excluded.rate,
+                        last_updated = CURRENT_TIMESTAMP
+                    """,
+                    rows,
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"update_currency_rates failed for {len(rows)} pair(s): {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
     # --- Weather Schedules ---
     def add_weather_schedule(self, user_id: int, schedule_time: str, location: Optional[str] = None) -> bool:
         user_id_str = str(user_id)
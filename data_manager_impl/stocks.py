@@ -1,5 +1,8 @@
 import logging
-from typing import List, Dict, Any, Optional, Union
+import sqlite3
+from typing import List, Dict, Any, Optional, Set, Tuple, Union
+
+from utils.alert_index import AlertThresholdIndex
 
 logger = logging.getLogger(__name__)
 
@@ -119,7 +122,10 @@ class StocksMixin:
         if all_targets_none:
             query_delete = "DELETE FROM stock_alerts WHERE user_id = :user_id AND symbol = :symbol"
             params_delete = {"user_id": user_id_str, "symbol": symbol_upper}
-            return self._execute_query(query_delete, params_delete, commit=True)
+            success = self._execute_query(query_delete, params_delete, commit=True)
+            if success:
+                self._update_loaded_alert_index(user_id_str, symbol_upper, None)
+            return success
         else:
             # Upsert logic
             query_upsert = """
@@ -150,7 +156,10 @@ class StocksMixin:
                 "dpc_above_target": update_data["dpc_above_target"], "dpc_above_active": 1 if update_data["dpc_above_active"] else 0,
                 "dpc_below_target": update_data["dpc_below_target"], "dpc_below_active": 1 if update_data["dpc_below_active"] else 0,
             }
-            return self._execute_query(query_upsert, params_upsert, commit=True)
+            success = self._execute_query(query_upsert, params_upsert, commit=True)
+            if success:
+                self._update_loaded_alert_index(user_id_str, symbol_upper, update_data)
+            return success
 
 
     def get_stock_alert(self, user_id: int, stock_symbol: str) -> Optional[Dict[str, Any]]:
@@ -187,7 +196,11 @@ class StocksMixin:
         # _execute_query with commit=True returns True on successful execution, not if rows were affected.
         # A more complex approach would be needed if strict "changed" status is required.
         # For now, assume if it ran, it's fine.
-        return self._execute_query(query, params, commit=True)
+        success = self._execute_query(query, params, commit=True)
+        index = getattr(self, "_stock_alert_index", None)
+        if success and index is not None:
+            index.remove(user_id_str, symbol_upper, direction)
+        return success
 
     def get_user_all_stock_alerts(self, user_id: int) -> List[Dict[str, Any]]:
         user_id_str = str(user_id)
@@ -226,7 +239,287 @@ class StocksMixin:
             
         return active_alerts_to_monitor
 
+    def get_stock_alert_index(self) -> AlertThresholdIndex:
+        """
+        In-memory threshold index of all active alerts, loaded from SQLite once and
+        then kept current by add_stock_alert / deactivate_stock_alert_target.
+        """
+        with self._lock:
+            index = getattr(self, "_stock_alert_index", None)
+            if index is None:
+                index = AlertThresholdIndex()
+                for uid, alerts_for_user in self.get_all_active_alerts_for_monitoring().items():
+                    for symbol, alert_details in alerts_for_user.items():
+                        index.set_alert(uid, symbol, alert_details)
+                self._stock_alert_index = index
+                logger.info(f"Loaded stock alert index with {len(index)} active thresholds.")
+            return index
+
+    def _update_loaded_alert_index(self, user_id_str: str, symbol_upper: str, alert_row: Optional[Dict[str, Any]]) -> None:
+        # Before the first get_stock_alert_index() call there is nothing to keep in sync.
+        index = getattr(self, "_stock_alert_index", None)
+        if index is not None:
+            index.set_alert(user_id_str, symbol_upper, alert_row)
+
+    # --- OHLC Bar Store ---
+    def get_stock_bar_sync(self, symbol: str, interval: str = "1d") -> Optional[Dict[str, Any]]:
+        """Coverage info for a stored series: covered_from, synced_at and the newest stored ts (last_ts)."""
+        query = """
+        SELECT s.covered_from, s.synced_at,
+               (SELECT MAX(b.ts) FROM stock_bars b WHERE b.symbol = s.symbol AND b.interval = s.interval) AS last_ts
+        FROM stock_bar_sync s
+        WHERE s.symbol = :symbol AND s.interval = :interval
+        """
+        return self._execute_query(query, {"symbol": symbol.upper(), "interval": interval}, fetch_one=True)
+
+    def store_stock_bars(self, symbol: str, interval: str, bars: List[Dict[str, Any]], covered_from: str,
+                         replace: bool = False) -> bool:
+        """
+        Upserts bars (dicts with ts, open, high, low, close, volume) and widens the
+        recorded coverage to start at `covered_from`, in one transaction. With `replace`,
+        the symbol's stored bars and coverage are dropped first (re-adjusted history).
+        """
+        symbol_upper = symbol.upper()
+        rows = [
+            {
+                "symbol": symbol_upper, "interval": interval, "ts": bar["ts"],
+                "open": bar.get("open"), "high": bar.get("high"), "low": bar.get("low"),
+                "close": bar["close"], "volume": bar.get("volume"),
+            }
+            for bar in bars or []
+            if isinstance(bar, dict) and bar.get("ts") and bar.get("close") is not None
+        ]
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                if replace:
+                    params = {"symbol": symbol_upper, "interval": interval}
+                    cur.execute("DELETE FROM stock_bars WHERE symbol = :symbol AND interval = :interval", params)
+                    cur.execute("DELETE FROM stock_bar_sync WHERE symbol = :symbol AND interval = :interval", params)
+                if rows:
+                    cur.executemany(
+                        """
+                        INSERT INTO stock_bars (symbol, interval, ts, open, high, low, close, volume)
+                        VALUES (:symbol, :interval, :ts, :open, :high, :low, :close, :volume)
+                        ON CONFLICT(symbol, interval, ts) DO UPDATE SET
+                            open = excluded.open, high = excluded.high, low = excluded.low,
+                            close = excluded.close, volume = excluded.volume
+                        """,
+                        rows,
+                    )
+                cur.execute(
+                    """
+                    INSERT INTO stock_bar_sync (symbol, interval, covered_from, synced_at)
+                    VALUES (:symbol, :interval, :covered_from, CURRENT_TIMESTAMP)
+                    ON CONFLICT(symbol, interval) DO UPDATE SET
+                        covered_from = MIN(covered_from, excluded.covered_from),
+                        synced_at = CURRENT_TIMESTAMP
+                    """,
+                    {"symbol": symbol_upper, "interval": interval, "covered_from": covered_from},
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"store_stock_bars failed for {symbol_upper} ({interval}): {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
+    def get_stock_bars(self, symbol: str, interval: str = "1d", start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored bars for `symbol` with start <= ts <= end (both optional), oldest first."""
+        query = """
+        SELECT ts, open, high, low, close, volume FROM stock_bars
+        WHERE symbol = :symbol AND interval = :interval
+          AND (:start IS NULL OR ts >= :start)
+          AND (:end IS NULL OR ts <= :end)
+        ORDER BY ts
+        """
+        params = {"symbol": symbol.upper(), "interval": interval, "start": start, "end": end}
+        return self._execute_query(query, params, fetch_all=True) or []
+
+    # --- Corporate Events Store (one row per tracked symbol and event type) ---
+    def list_tracked_symbols_needing_event_refresh(self, stale_before_utc: str, user_id: Optional[int] = None) -> List[str]:
+        """
+        Distinct tracked symbols whose corporate events were never fetched or were fetched
+        before `stale_before_utc` ("YYYY-MM-DD HH:MM:SS"), oldest first. Pass `user_id`
+        to only consider that user's tracked stocks.
+        """
+        query = """
+        SELECT t.symbol
+        FROM (SELECT DISTINCT symbol FROM tracked_stocks WHERE :user_id IS NULL OR user_id = :user_id) t
+        LEFT JOIN corporate_events_sync cs ON cs.symbol = t.symbol
+        WHERE cs.synced_at IS NULL OR cs.synced_at < :stale_before
+        ORDER BY cs.synced_at IS NOT NULL, cs.synced_at, t.symbol
+        """
+        params = {"stale_before": stale_before_utc, "user_id": str(user_id) if user_id is not None else None}
+        rows = self._execute_query(query, params, fetch_all=True)
+        return [row["symbol"] for row in rows or []]
+
+    def replace_corporate_events(self, symbol: str, events: List[Dict[str, Any]]) -> bool:
+        """
+        Atomically replaces the stored events for one symbol and stamps its sync time.
+        Each event dict uses the keys: event_type, event_date, value, currency.
+        """
+        symbol_upper = symbol.upper()
+        rows = [
+            {
+                "symbol": symbol_upper, "event_type": ev["event_type"], "event_date": ev["event_date"],
+                "value": ev.get("value"), "currency": ev.get("currency"),
+            }
+            for ev in events or []
+            if isinstance(ev, dict) and ev.get("event_type") and ev.get("event_date")
+        ]
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                cur.execute("DELETE FROM corporate_events WHERE symbol = :symbol", {"symbol": symbol_upper})
+                if rows:
+                    cur.executemany(
+                        """
+                        INSERT INTO corporate_events (symbol, event_type, event_date, value, currency)
+                        VALUES (:symbol, :event_type, :event_date, :value, :currency)
+                        ON CONFLICT(symbol, event_type) DO UPDATE SET
+                            event_date = excluded.event_date, value = excluded.value, currency = excluded.currency
+                        """,
+                        rows,
+                    )
+                cur.execute(
+                    """
+                    INSERT INTO corporate_events_sync (symbol, synced_at)
+                    VALUES (:symbol, CURRENT_TIMESTAMP)
+                    ON CONFLICT(symbol) DO UPDATE SET synced_at = CURRENT_TIMESTAMP
+                    """,
+                    {"symbol": symbol_upper},
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"replace_corporate_events failed for {symbol_upper}: {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
+    def list_tracked_corporate_events(self, event_type: str, start_date: str, end_date: str,
+                                      user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        (user_id, symbol, event_date, value, currency) for every tracked stock whose stored
+        `event_type` event falls between start_date and end_date (inclusive, ISO dates),
+        ordered by event date. Pass `user_id` to restrict to one user's tracked stocks.
+        """
+        query = """
+        SELECT t.user_id, t.symbol, e.event_date, e.value, e.currency
+        FROM tracked_stocks t
+        JOIN corporate_events e ON e.symbol = t.symbol
+        WHERE e.event_type = :event_type
+          AND e.event_date >= :start_date AND e.event_date <= :end_date
+          AND (:user_id IS NULL OR t.user_id = :user_id)
+        ORDER BY e.event_date, t.symbol
+        """
+        params = {
+            "event_type": event_type, "start_date": start_date, "end_date": end_date,
+            "user_id": str(user_id) if user_id is not None else None,
+        }
+        return self._execute_query(query, params, fetch_all=True) or []
+
+    def prune_untracked_corporate_events(self) -> bool:
+        """Drops stored events and sync stamps for symbols nobody tracks any more."""
+        ok = self._execute_query(
+            "DELETE FROM corporate_events WHERE symbol NOT IN (SELECT symbol FROM tracked_stocks)",
+            commit=True,
+        )
+        ok_sync = self._execute_query(
+            "DELETE FROM corporate_events_sync WHERE symbol NOT IN (SELECT symbol FROM tracked_stocks)",
+            commit=True,
+        )
+        return bool(ok and ok_sync)
+
     # --- Corporate Event Notifications (earnings / ex-dividend de-dup) ---
+    def get_sent_corporate_events(self, event_type: str, since_date: str) -> Set[Tuple[str, str, str]]:
+        """(user_id, symbol, event_date) keys already notified for `event_type` events on or after `since_date`."""
+        query = """
+        SELECT user_id, symbol, event_date FROM sent_corporate_events
+        WHERE event_type = :event_type AND event_date >= :since_date
+        """
+        rows = self._execute_query(query, {"event_type": event_type, "since_date": since_date}, fetch_all=True)
+        return {(row["user_id"], row["symbol"], row["event_date"]) for row in rows or []}
+
+    # --- Symbol Directory ---
+    def replace_symbol_directory(self, source: str, entries: List[Dict[str, Any]]) -> bool:
+        """
+        Atomically replaces every directory row imported from `source` with `entries`
+        (dicts with symbol, name, exchange, asset_type). A symbol already imported
+        from another source is taken over by this one.
+        """
+        rows = [
+            {
+                "symbol": str(e["symbol"]).strip().upper(), "name": (e.get("name") or "").strip(),
+                "exchange": e.get("exchange"), "asset_type": e.get("asset_type"), "source": source,
+            }
+            for e in entries or []
+            if isinstance(e, dict) and str(e.get("symbol") or "").strip()
+        ]
+        conn = self._get_connection()
+        cur = None
+        with self._lock:
+            try:
+                cur = conn.cursor()
+                cur.execute("DELETE FROM symbol_directory WHERE source = :source", {"source": source})
+                cur.executemany(
+                    """
+                    INSERT INTO symbol_directory (symbol, name, exchange, asset_type, source, imported_at)
+                    VALUES (:symbol, :name, :exchange, :asset_type, :source, CURRENT_TIMESTAMP)
+                    ON CONFLICT(symbol) DO UPDATE SET
+                        name = excluded.name, exchange = excluded.exchange, asset_type = excluded.asset_type,
+                        source = excluded.source, imported_at = CURRENT_TIMESTAMP
+                    """,
+                    rows,
+                )
+                conn.commit()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"replace_symbol_directory failed for source {source}: {e}")
+                try:
+                    conn.rollback()
+                except sqlite3.Error:
+                    pass
+                return False
+            finally:
+                try:
+                    if cur:
+                        cur.close()
+                except Exception:
+                    pass
+
+    def list_symbol_directory(self) -> List[Dict[str, Any]]:
+        query = "SELECT symbol, name, exchange, asset_type, source FROM symbol_directory ORDER BY symbol"
+        return self._execute_query(query, fetch_all=True) or []
+
+    def get_symbol_directory_imported_at(self, source: str) -> Optional[str]:
+        """UTC timestamp of the last import from `source`, or None if it never ran."""
+        query = "SELECT MAX(imported_at) AS imported_at FROM symbol_directory WHERE source = :source"
+        row = self._execute_query(query, {"source": source}, fetch_one=True)
+        return row["imported_at"] if row else None
+
     def has_sent_corporate_event(self, user_id: int, symbol: str, event_type: str, event_date: str) -> bool:
         query = """
         SELECT 1 FROM sent_corporate_events
@@ -5,17 +5,23 @@ Runs on host system to provide Yahoo Finance data to Docker containers
 This bypasses Docker networking issues with Yahoo Finance
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import sys
 import os
+import gzip
+import hashlib
+import json
 import logging
+import threading
 import time
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add the current directory to Python path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from api_clients.yahoo_finance_client import get_stock_price, get_daily_time_series, get_intraday_time_series
+from api_clients.yahoo_finance_client import get_stock_price, get_stock_prices_batch, get_daily_time_series, get_intraday_time_series
+from utils.api_utils import register_cache_clearer
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -56,7 +62,7 @@ def _require_auth() -> bool:
 
 @app.before_request
 def _guard_requests():
-    if request.path.startswith("/stock/"):
+    if request.path.startswith("/stock"):  # /stock/<symbol>... and the /stocks batch/stream routes
         if not _require_auth():
             return jsonify({"error": "unauthorized"}), 401
         # Rate limit per IP (default 60 req/min)
@@ -65,6 +71,113 @@ def _guard_requests():
         if not _rate_limit(key, limit, 60):
             return jsonify({"error": "rate_limited"}), 429
 
+# --- Shared response cache with per-key request coalescing ---
+# Mirrors the client-side ttl_cache lifetimes; the proxy is shared by every bot container,
+# so caching the rendered body here (plus singleflight on a miss) means one upstream fetch
+# per (endpoint, symbol, params) no matter how many callers ask at once.
+QUOTE_TTL_S = 60
+DAILY_TTL_S = 600
+INTRADAY_TTL_S = 300
+GZIP_MIN_BYTES = 1024
+
+class _SingleFlight:
+    """Runs fn once per key at a time; concurrent callers for the same key wait for and share its result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"done": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call["done"].set()
+
+_singleflight = _SingleFlight()
+_RESPONSE_CACHE: dict = {}
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+def _clear_response_cache():
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.clear()
+
+register_cache_clearer(_clear_response_cache)
+
+def _cached_entry(key):
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry and entry["expires_at"] > time.monotonic():
+            return entry
+        _RESPONSE_CACHE.pop(key, None)
+        return None
+
+def _build_entry(key, ttl, producer, compress):
+    # Another flight may have filled the cache between our miss and becoming leader.
+    entry = _cached_entry(key)
+    if entry:
+        return entry
+    payload, status = producer()
+    return _store_entry(key, ttl, payload, status, compress)
+
+def _store_entry(key, ttl, payload, status, compress=False):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    entry = {
+        "status": status,
+        "payload": payload,
+        "body": body,
+        # Content hash for caching only; blake2b is fast and not flagged as a weak hash.
+        "etag": hashlib.blake2b(body, digest_size=20).hexdigest(),
+        "gzip_body": gzip.compress(body) if compress and len(body) >= GZIP_MIN_BYTES else None,
+        "expires_at": time.monotonic() + ttl,
+    }
+    if status == 200:  # only successes are shared; errors are retried by the next caller
+        with _RESPONSE_CACHE_LOCK:
+            _RESPONSE_CACHE[key] = entry
+    return entry
+
+def _cached_json_response(key, ttl, producer, compress=False):
+    """
+    JSON response for `key`, served from the shared cache or produced by exactly one
+    in-flight upstream call. Successful responses carry an ETag (If-None-Match -> 304)
+    and, when `compress` is set and the client accepts it, a gzip body.
+    """
+    entry = _cached_entry(key) or _singleflight.do(key, lambda: _build_entry(key, ttl, producer, compress))
+    if entry["status"] != 200:
+        return Response(entry["body"], status=entry["status"], mimetype="application/json")
+
+    # The gzip and identity bodies are different representations, so each gets its own ETag.
+    use_gzip = entry["gzip_body"] is not None and "gzip" in request.accept_encodings
+    etag = f"{entry['etag']}-gz" if use_gzip else entry["etag"]
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    elif use_gzip:
+        resp = Response(entry["gzip_body"], status=200, mimetype="application/json")
+        resp.headers["Content-Encoding"] = "gzip"
+    else:
+        resp = Response(entry["body"], status=200, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.max_age = max(0, int(entry["expires_at"] - time.monotonic()))
+    if entry["gzip_body"] is not None:
+        resp.vary.add("Accept-Encoding")
+    return resp
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -75,14 +188,16 @@ def get_stock_data(symbol):
     """Get stock price data for a symbol"""
     try:
         logger.info(f"Stock proxy request for symbol: {symbol}")
-        data = get_stock_price(symbol)
-        
-        if data:
-            logger.info(f"Successfully retrieved data for {symbol}")
-            return jsonify(data)
-        else:
+
+        def produce():
+            data = get_stock_price(symbol)
+            if data:
+                logger.info(f"Successfully retrieved data for {symbol}")
+                return data, 200
             logger.warning(f"No data found for {symbol}")
-            return jsonify({"error": "No data found"}), 404
+            return {"error": "No data found"}, 404
+
+        return _cached_json_response(("quote", symbol.upper()), QUOTE_TTL_S, produce)
             
     except Exception as e:
         logger.error(f"Error getting stock data for {symbol}: {e}")
@@ -95,14 +210,15 @@ def get_daily_data(symbol):
         outputsize = request.args.get('outputsize', 'compact')
         logger.info(f"Daily data request for symbol: {symbol}, outputsize: {outputsize}")
         
-        data = get_daily_time_series(symbol, outputsize)
-        
-        if data:
-            logger.info(f"Successfully retrieved daily data for {symbol}: {len(data)} points")
-            return jsonify({"symbol": symbol, "data": data})
-        else:
+        def produce():
+            data = get_daily_time_series(symbol, outputsize)
+            if data:
+                logger.info(f"Successfully retrieved daily data for {symbol}: {len(data)} points")
+                return {"symbol": symbol, "data": data}, 200
             logger.warning(f"No daily data found for {symbol}")
-            return jsonify({"error": "No data found"}), 404
+            return {"error": "No data found"}, 404
+
+        return _cached_json_response(("daily", symbol.upper(), outputsize), DAILY_TTL_S, produce, compress=True)
             
     except Exception as e:
         logger.error(f"Error getting daily data for {symbol}: {e}")
@@ -116,19 +232,175 @@ def get_intraday_data(symbol):
         outputsize = request.args.get('outputsize', 'compact')
         logger.info(f"Intraday data request for symbol: {symbol}, interval: {interval}")
         
-        data = get_intraday_time_series(symbol, interval, outputsize)
-        
-        if data:
-            logger.info(f"Successfully retrieved intraday data for {symbol}: {len(data)} points")
-            return jsonify({"symbol": symbol, "interval": interval, "data": data})
-        else:
+        def produce():
+            data = get_intraday_time_series(symbol, interval, outputsize)
+            if data:
+                logger.info(f"Successfully retrieved intraday data for {symbol}: {len(data)} points")
+                return {"symbol": symbol, "interval": interval, "data": data}, 200
             logger.warning(f"No intraday data found for {symbol}")
-            return jsonify({"error": "No data found"}), 404
+            return {"error": "No data found"}, 404
+
+        return _cached_json_response(("intraday", symbol.upper(), interval, outputsize), INTRADAY_TTL_S, produce, compress=True)
             
     except Exception as e:
         logger.error(f"Error getting intraday data for {symbol}: {e}")
         return jsonify({"error": str(e)}), 500
 
+# --- Batch and streaming quotes ---
+MAX_BATCH_SYMBOLS = 50
+BATCH_CHUNK_SIZE = 10  # upstream multi-ticker downloads run in parallel chunks so early chunks stream first
+SSE_DEFAULT_INTERVAL_S = 15
+SSE_MIN_INTERVAL_S = 5
+SSE_MAX_STREAM_S = 300  # clients reconnect after this; keeps dead connections from piling up
+SSE_MAX_STREAMS = 4  # each open stream holds a sync worker thread
+
+_BATCH_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stock-proxy-batch")
+_SSE_SLOTS = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+def _parse_symbols(raw):
+    symbols = []
+    for part in (raw or "").split(","):
+        symbol = part.strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+def _fetch_batch_chunk(chunk):
+    """One bulk upstream download for `chunk`; each symbol's result lands in the shared cache."""
+    def produce():
+        quotes = get_stock_prices_batch(chunk)
+        for symbol in chunk:
+            if quotes.get(symbol):
+                _store_entry(("batch_quote", symbol), QUOTE_TTL_S, quotes[symbol], 200)
+        return quotes
+
+    quotes = _singleflight.do(("batch", tuple(chunk)), produce)
+    return chunk, quotes
+
+def _fetch_single_quote(symbol):
+    def produce():
+        data = get_stock_price(symbol)
+        return (data, 200) if data else ({"error": "No data found"}, 404)
+
+    entry = _cached_entry(("quote", symbol)) or _singleflight.do(
+        ("quote", symbol), lambda: _build_entry(("quote", symbol), QUOTE_TTL_S, produce, False)
+    )
+    return symbol, entry
+
+def _iter_quotes(symbols):
+    """
+    Yields (symbol, status, payload) for every symbol as soon as it resolves: cached
+    quotes first, then each bulk chunk as it completes, then single-symbol fallbacks
+    for anything the bulk download did not return.
+    """
+    misses = []
+    for symbol in symbols:
+        entry = _cached_entry(("batch_quote", symbol)) or _cached_entry(("quote", symbol))
+        if entry and entry["status"] == 200:
+            yield symbol, 200, entry["payload"]
+        else:
+            misses.append(symbol)
+
+    chunks = [misses[i:i + BATCH_CHUNK_SIZE] for i in range(0, len(misses), BATCH_CHUNK_SIZE)]
+    resolved = set()
+    for future in as_completed([_BATCH_EXECUTOR.submit(_fetch_batch_chunk, chunk) for chunk in chunks]):
+        try:
+            chunk, quotes = future.result()
+        except Exception as e:
+            logger.error(f"Batch quote fetch failed: {e}")
+            continue
+        for symbol in chunk:
+            if quotes.get(symbol):
+                resolved.add(symbol)
+                yield symbol, 200, quotes[symbol]
+
+    fallback = [symbol for symbol in misses if symbol not in resolved]
+    for future in as_completed([_BATCH_EXECUTOR.submit(_fetch_single_quote, symbol) for symbol in fallback]):
+        try:
+            symbol, entry = future.result()
+        except Exception as e:
+            logger.error(f"Single quote fallback failed: {e}")
+            continue
+        yield symbol, entry["status"], entry["payload"]
+
+@app.route('/stocks', methods=['GET'])
+def get_stocks_batch():
+    """Quotes for ?symbols=A,B,C streamed as NDJSON, one line per symbol as it resolves."""
+    symbols = _parse_symbols(request.args.get('symbols'))
+    if not symbols:
+        return jsonify({"error": "symbols query parameter is required"}), 400
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({"error": f"at most {MAX_BATCH_SYMBOLS} symbols per request"}), 400
+    logger.info(f"Batch quote request for {len(symbols)} symbols")
+
+    def generate():
+        for symbol, status, payload in _iter_quotes(symbols):
+            line = {"symbol": symbol, "status": status}
+            if status == 200:
+                line["data"] = payload
+            else:
+                line["error"] = payload.get("error", "No data found") if isinstance(payload, dict) else "No data found"
+            yield json.dumps(line, separators=(",", ":")) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route('/stocks/stream', methods=['GET'])
+def stream_stocks():
+    """
+    Server-sent events for ?symbols=A,B,C: a `quote` event whenever a symbol's quote
+    changes, checked every ?interval= seconds, with keep-alive comments in between.
+    Event ids count up per stream and continue from Last-Event-ID on reconnect.
+    At most SSE_MAX_STREAMS streams are open at once, each for SSE_MAX_STREAM_S.
+    """
+    symbols = _parse_symbols(request.args.get('symbols'))
+    if not symbols:
+        return jsonify({"error": "symbols query parameter is required"}), 400
+    if len(symbols) > MAX_BATCH_SYMBOLS:
+        return jsonify({"error": f"at most {MAX_BATCH_SYMBOLS} symbols per request"}), 400
+    try:
+        interval = max(SSE_MIN_INTERVAL_S, int(request.args.get('interval', SSE_DEFAULT_INTERVAL_S)))
+    except ValueError:
+        interval = SSE_DEFAULT_INTERVAL_S
+    try:
+        last_event_id = max(0, int(request.headers.get('Last-Event-ID', 0)))
+    except ValueError:
+        last_event_id = 0
+    if not _SSE_SLOTS.acquire(blocking=False):
+        logger.warning("Quote stream refused: all stream slots are in use")
+        resp = jsonify({"error": "too many open streams, retry later"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = str(interval)
+        return resp
+    logger.info(f"Quote stream opened for {len(symbols)} symbols every {interval}s")
+
+    def generate():
+        last_sent = {}
+        event_id = last_event_id
+        deadline = time.monotonic() + SSE_MAX_STREAM_S
+        yield f"retry: {interval * 1000}\n\n"
+        while time.monotonic() < deadline:
+            sent_any = False
+            for symbol, status, payload in _iter_quotes(symbols):
+                if status != 200:
+                    continue
+                body = json.dumps({"symbol": symbol, "data": payload}, separators=(",", ":"))
+                if last_sent.get(symbol) == body:
+                    continue
+                last_sent[symbol] = body
+                sent_any = True
+                event_id += 1
+                yield f"event: quote\nid: {event_id}\ndata: {body}\n\n"
+            if not sent_any:
+                yield ": keep-alive\n\n"
+            time.sleep(interval)
+
+    resp = Response(stream_with_context(generate()), mimetype="text/event-stream")
+    # Runs even if the client disconnects before the generator starts.
+    resp.call_on_close(_SSE_SLOTS.release)
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"
+    return resp
+
 if __name__ == '__main__':
     print("🏭 Starting Stock Proxy Service...")
     print("📊 This service provides Yahoo Finance data to Docker containers")
@@ -137,6 +409,8 @@ if __name__ == '__main__':
     print("   GET /stock/<symbol> - Get current stock price")
     print("   GET /stock/<symbol>/daily?outputsize=compact - Get daily data")
     print("   GET /stock/<symbol>/intraday?interval=60min - Get intraday data")
+    print("   GET /stocks?symbols=A,B,C - Batch quotes (NDJSON stream)")
+    print("   GET /stocks/stream?symbols=A,B,C&interval=15 - Quote updates (server-sent events)")
     print("")
     print("🚀 Starting server on http://localhost:9999")
     print("   Container access: http://host.docker.internal:9999")
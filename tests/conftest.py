@@ -11,6 +11,7 @@ os.environ["ALPHA_VANTAGE_API_KEY"] = "dummy_av_key"
 os.environ["OPENWEATHERMAP_API_KEY"] = "dummy_owm_key"
 os.environ["SQLITE_DB_PATH"] = "bot_data.db" # Optional
 os.environ["TIMER_OWNER_ID"] = "123"
+os.environ["CHART_CACHE_DISK_MB"] = "0"  # keep rendered test charts out of data/
 
 # Add the root project path to sys.path
 # Assuming tests/conftest.py is one level deep from root
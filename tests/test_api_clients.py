@@ -41,7 +41,7 @@ def test_get_stock_price_api_limit(mock_get):
 
 # --- TMDB Tests ---
 
-@patch('api_clients.tmdb_client.requests.get')
+@patch('api_clients.tmdb_client._session.get')
 def test_search_movie_success(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -57,7 +57,7 @@ def test_search_movie_success(mock_get):
     assert result[0]['title'] == "Inception"
     assert result[0]['id'] == 1
 
-@patch('api_clients.tmdb_client.requests.get')
+@patch('api_clients.tmdb_client._session.get')
 def test_search_tv_shows_success(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -73,6 +73,24 @@ def test_search_tv_shows_success(mock_get):
     assert result[0]['name'] == "Breaking Bad"
     assert result[0]['id'] == 100
 
+@patch('api_clients.tmdb_client._session.get')
+def test_get_movie_details_reuses_cached_append_superset(mock_get):
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"id": 27205, "title": "Inception", "credits": {}, "keywords": {}, "external_ids": {}}
+    mock_get.return_value = mock_response
+
+    full = tmdb_client.get_movie_details(27205, "credits,keywords,external_ids")
+    # Subsets (in any order) are served from the cached superset response.
+    assert tmdb_client.get_movie_details(27205, "external_ids") is full
+    assert tmdb_client.get_movie_details("27205", "keywords, credits") is full
+    assert mock_get.call_count == 1
+
+    # An append set not covered by any cached response needs a new request.
+    tmdb_client.get_movie_details(27205, "credits,videos")
+    assert mock_get.call_count == 2
+    assert mock_get.call_args.kwargs["params"]["append_to_response"] == "credits,videos"
+
 
 # --- Steam matching tests (no network) ---
 
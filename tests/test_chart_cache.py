@@ -0,0 +1,77 @@
+import os
+from unittest.mock import MagicMock, patch
+
+from utils import chart_utils
+from utils.chart_cache import ChartCache
+
+
+def _config(title="Habit"):
+    return chart_utils._create_habit_weekday_chart_config(title, list("MTWTFSS"), [1, 2, 3, 0, 0, 1, 2])
+
+
+def test_key_depends_on_content_not_dict_order():
+    a = {"type": "bar", "data": {"labels": ["x"], "datasets": [{"data": [1]}]}}
+    b = {"data": {"datasets": [{"data": [1]}], "labels": ["x"]}, "type": "bar"}
+    assert ChartCache.key(a, 800, 400, "local") == ChartCache.key(b, 800, 400, "local")
+    assert ChartCache.key(a, 800, 400, "local") != ChartCache.key(a, 800, 401, "local")
+    assert ChartCache.key(a, 800, 400, "local") != ChartCache.key(a, 800, 400, "quickchart")
+
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    cache = ChartCache(memory_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"y" * 10)
+    assert cache.get("a") == b"x" * 10      # "b" is now the least recently used
+    cache.put("c", b"z" * 10)
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    cache.put("huge", b"h" * 100)           # larger than the whole tier: not kept
+    assert cache.get("huge") is None
+    stats = cache.snapshot()
+    assert (stats["memory_hits"], stats["misses"], stats["memory_bytes"]) == (3, 2, 20)
+    assert stats["hit_rate"] == 0.6
+
+
+def test_disk_tier_survives_restarts_and_stays_under_budget(tmp_path):
+    cache = ChartCache(memory_bytes=1024, directory=str(tmp_path), disk_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"y" * 10)
+    os.utime(tmp_path / "a.png", (1, 1))    # "a" is the oldest file after a restart
+
+    restarted = ChartCache(memory_bytes=1024, directory=str(tmp_path), disk_bytes=25)
+    assert restarted.get("b") == b"y" * 10
+    assert restarted.snapshot()["disk_hits"] == 1
+    restarted.put("c", b"z" * 10)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b.png", "c.png"]
+    assert restarted.get("b") == b"y" * 10 and restarted.snapshot()["memory_hits"] == 1  # promoted to memory
+
+
+def test_repeated_charts_render_once():
+    with patch('utils.chart_utils.chart_render.render_png', return_value=b"\x89PNG fake") as mock_render:
+        first = chart_utils.get_habit_weekday_chart_image("Habit", list("MTWTFSS"), [1, 2, 3, 0, 0, 1, 2])
+        second = chart_utils.get_habit_weekday_chart_image("Habit", list("MTWTFSS"), [1, 2, 3, 0, 0, 1, 2])
+        chart_utils.get_habit_weekday_chart_image("Other", list("MTWTFSS"), [1, 2, 3, 0, 0, 1, 2])
+    assert first.getvalue() == second.getvalue() == b"\x89PNG fake"
+    assert mock_render.call_count == 2
+    assert chart_utils.CHART_CACHE.snapshot()["memory_hits"] == 1
+
+
+@patch('utils.chart_utils.requests.post')
+def test_quickchart_images_are_cached_too(mock_post):
+    mock_post.return_value = MagicMock(status_code=200, content=b"\x89PNG remote")
+    with patch('config.CHART_RENDERER', "quickchart", create=True):
+        for _ in range(3):
+            assert chart_utils.render_chart_image(_config(), 800, 420).getvalue() == b"\x89PNG remote"
+    mock_post.assert_called_once()
+
+
+@patch('utils.chart_utils.requests.post')
+def test_quickchart_fallback_is_not_cached_as_quickchart(mock_post):
+    mock_post.return_value = MagicMock(status_code=500, text="down")
+    with patch('config.CHART_RENDERER', "quickchart", create=True), \
+            patch('utils.chart_utils.chart_render.render_png', return_value=b"\x89PNG local") as mock_render:
+        assert chart_utils.render_chart_image(_config(), 800, 420).getvalue() == b"\x89PNG local"
+        assert chart_utils.render_chart_image(_config(), 800, 420).getvalue() == b"\x89PNG local"
+        mock_post.return_value = MagicMock(status_code=200, content=b"\x89PNG remote")
+        assert chart_utils.render_chart_image(_config(), 800, 420).getvalue() == b"\x89PNG remote"
+    assert mock_post.call_count == 3
+    mock_render.assert_called_once()  # the second fallback reused the cached local render
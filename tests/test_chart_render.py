@@ -0,0 +1,118 @@
+import struct
+import time
+import zlib
+import numpy as np
+import pytest
+from unittest.mock import MagicMock, patch
+
+from utils import chart_render, chart_utils
+from utils.activity_report import get_activity_report_chart_image
+
+
+def _decode_png(data):
+    """(width, height, pixels) of an 8-bit RGB PNG written with the Up filter."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    idat, pos = b"", 8
+    while pos < len(data):
+        (length,), tag = struct.unpack(">I", data[pos:pos + 4]), data[pos + 4:pos + 8]
+        if tag == b"IDAT":
+            idat += data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+    rows = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, width * 3 + 1)
+    assert set(rows[:, 0]) == {2}
+    pixels = np.cumsum(rows[:, 1:].astype(np.int64), axis=0) % 256
+    return width, height, pixels.reshape(height, width, 3).astype(np.uint8)
+
+
+def _line_config(values):
+    return chart_utils._create_chart_config("AAPL", "1 Month", [(f"2026-06-{i + 1:02d}", v) for i, v in enumerate(values)])
+
+
+def test_png_encoder_round_trips_pixels():
+    rgb = np.random.default_rng(1).integers(0, 256, size=(5, 7, 3), dtype=np.uint8)
+    width, height, pixels = _decode_png(chart_render.encode_png(rgb))
+    assert (width, height) == (7, 5)
+    assert np.array_equal(pixels, rgb)
+
+
+def test_line_chart_draws_series_fill_and_gaps():
+    config = _line_config([100.0, 102.0, 101.0, 105.0, 104.0])
+    width, height, pixels = _decode_png(chart_render.render_png(config, 400, 300))
+    assert (width, height) == (400, 300)
+    teal = (np.abs(pixels.astype(int) - (75, 192, 192)).sum(axis=2) < 40)
+    assert teal.sum() > 300                          # the price line
+    assert (pixels == 255).all(axis=2).mean() > 0.5  # mostly white background
+
+    config["data"]["datasets"][0]["data"][2] = None  # a gap splits the line in two
+    config["data"]["datasets"][0]["fill"] = False
+    _, _, gapped = _decode_png(chart_render.render_png(config, 400, 300))
+    assert 0 < (np.abs(gapped.astype(int) - (75, 192, 192)).sum(axis=2) < 40).sum() < teal.sum()
+
+
+def test_axis_ticks_follow_chart_js_options():
+    axis = chart_render._Axis([1.0, 7.5], {"beginAtZero": True, "min": 0, "max": 10, "ticks": {"stepSize": 1}}, 5)
+    assert axis.ticks == [float(i) for i in range(11)]
+    axis = chart_render._Axis([3.0, 9.0], {"beginAtZero": True, "suggestedMax": 11.25}, 5)
+    assert (axis.lo, axis.hi, axis.step) == (0.0, 12.5, 2.5) and axis.label(2.5) == "2.5"
+    assert chart_render._Axis([0.0, 0.9], {}, 5).label(0.2) == "0.2"
+    axis = chart_render._Axis([95.2, 104.9], {"min": 95.0, "max": 105.5, "ticks": {"callback": "function(value) { return '$' + value.toFixed(2); }"}}, 5)
+    assert axis.ticks[0] >= 95.0 and axis.ticks[-1] <= 105.5 and axis.label(100) == "$100.00"
+
+
+@patch('utils.chart_utils.requests.post')
+def test_every_chart_renders_offline_by_default(mock_post):
+    charts = [
+        chart_utils.get_stock_chart_image("AAPL", "1 Month", [("2026-06-01", 1.0), ("2026-06-02", 2.0)]),
+        chart_utils.get_weekly_reading_chart_image("Pages — week", ["Mon", "Tue"], [10, 0], unit="pages"),
+        chart_utils.get_habit_daily_chart_image("Habit", ["06-01", "06-02"], [1, 0]),
+        chart_utils.get_habit_weekday_chart_image("Habit", list("MTWTFSS"), [1, 2, 3, 0, 0, 1, 2]),
+        chart_utils.get_mood_daily_chart_image("Mood", ["a", "b", "c"], [5, None, 7], [4, 6, None]),
+        chart_utils.get_todo_daily_created_done_chart_image("To-dos", ["a", "b"], [3, 1], [2, 2]),
+        chart_utils.get_todo_weekday_done_chart_image("Done", list("MTWTFSS"), [0, 1, 0, 2, 0, 0, 5]),
+        get_activity_report_chart_image("Words & minutes", ["Polski", "English"], [1200, 300], [45.0, 10.0]),
+    ]
+    for chart in charts:
+        assert chart is not None and chart.getvalue()[:8] == b"\x89PNG\r\n\x1a\n"
+    mock_post.assert_not_called()
+    assert _decode_png(charts[-1].getvalue())[:2] == (900, 420)
+
+
+@patch('utils.chart_utils.requests.post')
+def test_quickchart_renderer_falls_back_and_respects_allow_external(mock_post):
+    config = _line_config([1.0, 2.0, 3.0])
+    mock_post.return_value = MagicMock(status_code=500, text="down")
+    with patch('config.CHART_RENDERER', "quickchart", create=True):
+        assert chart_utils.render_chart_image(config, 300, 200).getvalue()[:4] == b"\x89PNG"
+        mock_post.assert_called_once()
+        with patch('config.ALLOW_EXTERNAL_CHARTS', False):
+            chart_utils.render_chart_image(config, 300, 200)
+    mock_post.assert_called_once()
+
+
+def test_render_pool_matches_in_process_rendering():
+    config = chart_utils._create_todo_daily_created_done_chart_config("To-dos", ["a", "b", "c"], [3, 1, 4], [2, 2, 0])
+    chart_render.start_pool(1)
+    try:
+        pooled = chart_render.render_png(config, 320, 240)
+    finally:
+        chart_render.shutdown_pool()
+    assert pooled == chart_render.render_png(config, 320, 240)
+
+
+def test_render_pool_timeout_fails_without_rendering_in_process():
+    config = _line_config([1.0, 2.0, 3.0])
+    chart_render.start_pool(1)
+    try:
+        chart_render._pool.submit(time.sleep, 0.5)  # keeps the only worker busy
+        with pytest.raises(TimeoutError):  # not silently re-rendered in-process
+            chart_render.render_png(config, 320, 240, timeout=0.05)
+        assert chart_render._pool is not None  # a slow chart does not tear the pool down
+    finally:
+        chart_render.shutdown_pool()
+
+
+def test_unsupported_configs_fail_cleanly():
+    with pytest.raises(ValueError):
+        chart_render.render_png({"type": "pie", "data": {"datasets": [{"data": [1]}]}}, 300, 200)
+    assert chart_utils.render_chart_image({"type": "line", "data": {}}, 10, 10) is None
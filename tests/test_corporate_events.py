@@ -1,6 +1,7 @@
 import re
-from datetime import date
-from unittest.mock import patch, MagicMock
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch, AsyncMock, MagicMock
 
 from api_clients import yahoo_finance_client
 
@@ -120,3 +121,71 @@ def test_corporate_event_dedup(db_manager):
 
     # Symbol lookups are case-insensitive (stored upper-cased).
     assert db_manager.has_sent_corporate_event(uid, "aapl", "earnings", "2026-07-30") is True
+
+
+# --- corporate events store + sweep ---
+
+def test_corporate_events_store(db_manager):
+    db_manager.add_tracked_stock(1, "AAPL")
+    db_manager.add_tracked_stock(2, "aapl")
+    db_manager.add_tracked_stock(2, "KO")
+    assert db_manager.list_tracked_symbols_needing_event_refresh("2100-01-01 00:00:00") == ["AAPL", "KO"]
+
+    assert db_manager.replace_corporate_events("AAPL", [
+        {"event_type": "earnings", "event_date": "2026-10-20", "value": 1.5, "currency": "USD"},
+    ])
+    assert db_manager.replace_corporate_events("KO", [])  # fetched, nothing upcoming
+    assert db_manager.list_tracked_symbols_needing_event_refresh("2000-01-01 00:00:00") == []
+    assert db_manager.list_tracked_symbols_needing_event_refresh("2100-01-01 00:00:00", user_id=1) == ["AAPL"]
+
+    rows = db_manager.list_tracked_corporate_events("earnings", "2026-10-18", "2026-10-25")
+    assert [(r["user_id"], r["symbol"]) for r in rows] == [("1", "AAPL"), ("2", "AAPL")]
+    assert db_manager.list_tracked_corporate_events("earnings", "2026-10-18", "2026-10-19") == []
+    assert len(db_manager.list_tracked_corporate_events("earnings", "2026-10-18", "2026-10-25", user_id=2)) == 1
+
+    db_manager.mark_corporate_event_sent(1, "AAPL", "earnings", "2026-10-20")
+    db_manager.mark_corporate_event_sent(1, "AAPL", "earnings", "2026-07-30")
+    assert db_manager.get_sent_corporate_events("earnings", "2026-10-18") == {("1", "AAPL", "2026-10-20")}
+
+    db_manager.remove_tracked_stock(1, "AAPL")
+    db_manager.remove_tracked_stock(2, "AAPL")
+    assert db_manager.prune_untracked_corporate_events()
+    assert db_manager.list_tracked_corporate_events("earnings", "2026-10-18", "2026-10-25") == []
+
+
+@pytest.mark.asyncio
+async def test_corporate_events_sweep_fetches_each_symbol_once(db_manager, mock_bot):
+    from cogs.stocks import Stocks, PREF_EARNINGS_ALERTS, PREF_EARNINGS_LEAD_DAYS
+
+    today = datetime.now(timezone.utc).date()
+    for uid in (1, 2, 3):
+        db_manager.add_tracked_stock(uid, "AAPL")
+        db_manager.set_user_preference(uid, PREF_EARNINGS_ALERTS, uid != 3)
+    db_manager.set_user_preference(2, PREF_EARNINGS_LEAD_DAYS, 1)
+    db_manager.add_tracked_stock(1, "MSFT")
+    # User 1 was already reminded about MSFT.
+    msft_date = (today + timedelta(days=1)).isoformat()
+    db_manager.mark_corporate_event_sent(1, "MSFT", "earnings", msft_date)
+
+    earnings = {
+        "AAPL": {"next_earnings_date": (today + timedelta(days=2)).isoformat(), "eps_estimate": 1.5},
+        "MSFT": {"next_earnings_date": msft_date, "eps_estimate": None},
+    }
+    cog = Stocks.__new__(Stocks)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    users = {uid: MagicMock(send=AsyncMock()) for uid in (1, 2, 3)}
+    mock_bot.fetch_user = AsyncMock(side_effect=users.get)
+
+    with patch('cogs.stocks.yahoo_finance_client.get_earnings_info', side_effect=earnings.get) as mock_earnings, \
+         patch('cogs.stocks.yahoo_finance_client.get_dividend_info', return_value={"pays_dividend": False}) as mock_div:
+        await cog.check_corporate_events.coro(cog)
+        await cog.check_corporate_events.coro(cog)  # second run: data is fresh and reminders were recorded
+
+    assert sorted(c.args[0] for c in mock_earnings.call_args_list) == ["AAPL", "MSFT"]
+    assert mock_div.call_count == 2
+    users[1].send.assert_awaited_once()
+    assert "**AAPL** reports earnings in 2 day(s)" in users[1].send.await_args.args[0]
+    assert "EPS estimate: 1.50" in users[1].send.await_args.args[0]
+    users[2].send.assert_not_awaited()  # lead time of 1 day
+    users[3].send.assert_not_awaited()  # opted out
@@ -101,6 +101,75 @@ def test_sent_episode_notifications(db_manager):
     assert db_manager.has_user_been_notified_for_episode_by_number(user_id, show_id, 3, 9) is False
 
 
+def test_notified_episode_keys_bulk(db_manager):
+    db_manager.add_tv_show_subscription(1, 10, "Show A", "/a.jpg")
+    db_manager.add_tv_show_subscription(1, 20, "Show B", "/b.jpg")
+    db_manager.add_tv_show_subscription(2, 10, "Show A", "/a.jpg")
+    db_manager.add_sent_episode_notification(1, 10, "tvmaze:111", 2, 5)
+    db_manager.add_sent_episode_notification(1, 20, "tmdb:222", 1, 1)
+    # Legacy row stored with a raw integer id (pre provider-prefix).
+    db_manager._execute_query(
+        "INSERT INTO sent_episode_notifications (user_id, show_tmdb_id, episode_tmdb_id) VALUES ('2', 10, 333)",
+        commit=True,
+    )
+
+    keys = db_manager.get_notified_episode_keys_bulk([(1, 10), ("1", 20), (2, 10), (3, 10)])
+    assert set(keys) == {("1", 10), ("1", 20), ("2", 10), ("3", 10)}
+    assert keys[("1", 10)]["episode_ids"] == {"tvmaze:111"}
+    assert keys[("1", 10)]["episode_numbers"] == {(2, 5)}
+    assert keys[("3", 10)] == {"episode_ids": set(), "episode_numbers": set()}
+
+    check = db_manager.is_episode_in_notified_keys
+    assert check(keys[("1", 10)], "tvmaze:111") is True
+    assert check(keys[("1", 10)], "tvmaze:999", 2, 5) is True
+    assert check(keys[("1", 10)], "tvmaze:999", 1, 1) is False  # S1E1 was sent for a different show
+    assert check(keys[("1", 20)], "tmdb:999", 1, 1) is True
+    assert check(keys[("2", 10)], "tvmaze:333") is True  # legacy integer id fallback
+    assert check(keys[("3", 10)], "tvmaze:111", 2, 5) is False
+
+
+def test_episode_calendar(db_manager):
+    db_manager.add_tv_show_subscription(1, 10, "Show A", "/a.jpg", 100)
+    db_manager.add_tv_show_subscription(1, 20, "Show B", "/b.jpg")
+    db_manager.add_tv_show_subscription(2, 10, "Show A", "/a.jpg", 100)
+
+    assert {r["show_tmdb_id"] for r in db_manager.list_user_shows_missing_calendar(1)} == {10, 20}
+    assert {r["show_tmdb_id"] for r in db_manager.list_shows_needing_calendar_sync("2000-01-01 00:00:00")} == {10, 20}
+
+    assert db_manager.replace_episode_calendar_for_show(10, 100, [
+        {"episode_key": "tvmaze:2", "season_number": 1, "episode_number": 2, "name": "Two",
+         "air_date": "2026-08-14", "airstamp_utc": "2026-08-14T02:00:00+00:00"},
+        {"episode_key": "tvmaze:1", "season_number": 1, "episode_number": 1, "name": "One",
+         "air_date": "2026-08-07", "rating": 7.5},
+    ])
+    assert db_manager.replace_episode_calendar_for_show(20, None, [
+        {"episode_key": "tmdb:5", "season_number": 3, "episode_number": 1, "name": "Premiere",
+         "air_date": "2026-09-01", "source": "TMDB"},
+    ])
+
+    assert db_manager.list_user_shows_missing_calendar(1) == []
+    assert db_manager.list_shows_needing_calendar_sync("2000-01-01 00:00:00") == []
+
+    august = db_manager.get_user_episode_calendar(1, "2026-08-01", "2026-08-31")
+    assert [r["name"] for r in august] == ["One", "Two"]
+    assert august[0]["show_name"] == "Show A"
+    assert august[0]["rating"] == 7.5
+    assert august[0]["source"] == "TVMaze"
+    assert [r["name"] for r in db_manager.get_user_episode_calendar(2, "2026-08-01", "2026-09-30")] == ["One", "Two"]
+    assert [r["source"] for r in db_manager.get_user_episode_calendar(1, "2026-09-01", "2026-09-30")] == ["TMDB"]
+
+    # Re-sync replaces the show's rows rather than appending.
+    db_manager.replace_episode_calendar_for_show(10, 100, [
+        {"episode_key": "tvmaze:3", "season_number": 1, "episode_number": 3, "name": "Three", "air_date": "2026-08-21"},
+    ])
+    assert [r["name"] for r in db_manager.get_user_episode_calendar(1, "2026-08-01", "2026-08-31")] == ["Three"]
+
+    db_manager.remove_tv_show_subscription(1, 20)
+    assert db_manager.prune_unsubscribed_episode_calendar()
+    assert db_manager.get_user_episode_calendar(1, "2026-09-01", "2026-09-30") == []
+    assert db_manager._execute_query("SELECT COUNT(*) AS n FROM episode_calendar_sync", fetch_one=True)["n"] == 1
+
+
 def test_sent_episode_notifications_migration_from_old_schema(tmp_path):
     import sqlite3
     from unittest.mock import patch
@@ -1040,3 +1109,25 @@ def test_backup_db(db_manager, tmp_path):
     assert row["quantity"] == 5.0
     conn.close()
 
+
+
+def test_movie_release_schedule(db_manager):
+    db_manager.add_movie_subscription(1, 100, "Dune 3", "/d.jpg", "2026-12-18")
+    db_manager.add_movie_subscription(2, 100, "Dune 3", "/d.jpg", "2026-12-18")
+    db_manager.add_movie_subscription(1, 200, "Old Movie", "/o.jpg", "2026-01-01")
+
+    due = db_manager.list_movies_due_for_release_refresh("2026-10-18 00:00:00")
+    assert sorted(m["tmdb_id"] for m in due) == [100, 200]
+
+    assert db_manager.update_movie_release_info(100, "2026-10-17", "2026-10-25 00:00:00", "Dune: Part Three")
+    due = db_manager.list_movies_due_for_release_refresh("2026-10-18 00:00:00")
+    assert [m["tmdb_id"] for m in due] == [200]
+
+    released = db_manager.get_released_unnotified_movie_subscriptions("2026-10-18")
+    assert sorted((r["user_id"], r["tmdb_id"]) for r in released) == [("1", 100), ("1", 200), ("2", 100)]
+    assert {r["title"] for r in released if r["tmdb_id"] == 100} == {"Dune: Part Three"}
+
+    db_manager.update_movie_notified_status(1, 100, True)
+    released = db_manager.get_released_unnotified_movie_subscriptions("2026-10-18")
+    assert sorted((r["user_id"], r["tmdb_id"]) for r in released) == [("1", 200), ("2", 100)]
+    assert db_manager.get_user_movie_subscriptions(2)[0]["release_date"] == "2026-10-17"
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch
+
+from utils.fx import FX_BASE_CURRENCIES, FxService
+
+
+def _batch(rates):
+    return lambda symbols: {s: {"05. price": str(rates[s])} for s in symbols if s in rates}
+
+
+def test_cross_rates_triangulate_through_usd_then_eur():
+    fx = FxService()
+    fx._rates.update({"USDPLN": 4.0, "USDGBP": 0.8, "EURCHF": 0.95, "USDEUR": 0.9})
+    assert fx.rate("usd", "pln") == 4.0
+    assert fx.rate("PLN", "USD") == pytest.approx(0.25)      # inverse
+    assert fx.rate("PLN", "GBP") == pytest.approx(0.2)       # USDGBP / USDPLN
+    assert fx.rate("EUR", "CHF") == 0.95
+    assert fx.rate("PLN", "CHF") == pytest.approx(0.9 * 0.95 / 4.0)  # USD->EUR->CHF bridges the pivots
+    del fx._rates["USDEUR"]
+    assert fx.rate("PLN", "CHF") is None                     # no pivot links both legs
+    fx._rates["EURPLN"] = 4.3
+    assert fx.rate("PLN", "CHF") == pytest.approx(0.95 / 4.3)  # via EUR
+    assert fx.rate("JPY", "JPY") == 1.0
+
+
+def test_refresh_batches_all_currencies_and_persists(db_manager):
+    rates = {"USDEUR=X": 0.9, "USDPLN=X": 4.0, "USDGBP=X": 0.8, "USDCAD=X": 1.4,
+             "USDJPY=X": 150.0, "USDAUD=X": 1.5, "EURSEK=X": 11.0}
+    fx = FxService(db_manager)
+    with patch('utils.fx.yahoo_finance_client.get_stock_prices_batch', side_effect=_batch(rates)) as mock_batch:
+        assert fx.refresh(["sek"]) == 7
+
+    # One USD batch for everything, then one EUR batch for the USD miss only.
+    usd_batch, eur_batch = (call.args[0] for call in mock_batch.call_args_list)
+    assert sorted(usd_batch) == sorted(f"USD{c}=X" for c in set(FX_BASE_CURRENCIES) | {"SEK"} if c != "USD")
+    assert eur_batch == ["EURSEK=X"]
+    assert fx.rate("SEK", "PLN") == pytest.approx(4.0 / 0.9 / 11.0)
+
+    stored = db_manager.get_all_currency_rates()
+    assert stored["USDPLN"]["rate"] == 4.0 and stored["EURSEK"]["rate"] == 11.0
+
+
+def test_loaded_rates_are_served_without_network(db_manager):
+    db_manager.update_currency_rates({"USDPLN": 4.0, "USDCHF": 0.9})
+    fx = FxService(db_manager)
+    assert fx.load() == 2
+    assert "CHF" in fx.currencies()  # learned from the stored pairs, refreshed from now on
+    with patch('utils.fx.yahoo_finance_client.get_stock_prices_batch') as mock_batch:
+        assert fx.ensure("PLN", "CHF") == pytest.approx(0.225)
+        assert fx.ensure("CHF", "USD") == pytest.approx(1 / 0.9)
+    mock_batch.assert_not_called()
+
+
+def test_ensure_refreshes_once_for_an_unknown_pair():
+    fx = FxService()
+    with patch('utils.fx.yahoo_finance_client.get_stock_prices_batch', return_value={}) as mock_batch:
+        assert fx.ensure("USD", "XYZ") is None
+    assert mock_batch.call_count == 2  # the USD batch, then the EUR retry for its misses
+    assert "XYZ" in fx.currencies()
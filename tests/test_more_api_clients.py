@@ -38,6 +38,38 @@ def test_tvmaze_get_show_episodes(mock_get):
     assert len(result) == 1
     assert result[0]['name'] == "Pilot"
 
+@patch('api_clients.tvmaze_client.requests.get')
+def test_tvmaze_show_episode_index_bisect_lookups(mock_get):
+    from datetime import datetime, date, timezone
+
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = [
+        {"id": 3, "name": "Three", "season": 1, "number": 3, "airdate": "2026-08-14",
+         "airstamp": "2026-08-14T02:00:00+00:00", "summary": "<p>long</p>", "image": {}, "_links": {}},
+        {"id": 1, "name": "One", "season": 1, "number": 1, "airdate": "2026-07-31",
+         "airstamp": "2026-07-31T02:00:00+00:00", "rating": {"average": 7.9}},
+        {"id": 2, "name": "Two", "season": 1, "number": 2, "airdate": "2026-08-07", "airstamp": None},
+        {"id": 4, "name": "TBA", "season": 1, "number": 4, "airdate": "", "airstamp": None},
+    ]
+    mock_get.return_value = mock_response
+
+    index = tvmaze_client.get_show_episode_index(1)
+    assert len(index) == 4
+    assert tvmaze_client.get_show_episode_index(1) is index  # cached per show
+    assert mock_get.call_count == 1
+
+    aired = index.aired_between(datetime(2026, 7, 31, 2, 0, tzinfo=timezone.utc), datetime(2026, 8, 14, 1, 0, tzinfo=timezone.utc))
+    assert [ep.id for ep in aired] == [1]
+    assert [ep.id for ep in index.airing_between_dates(date(2026, 8, 1), date(2026, 8, 31))] == [2, 3]
+    assert [ep.id for ep in index.airing_between_dates("2026-07-31", "2026-07-31")] == [1]
+    assert [ep.id for ep in index.dated_episodes()] == [1, 2, 3]
+
+    as_dict = index.dated_episodes()[0].as_dict()
+    assert as_dict["rating"] == {"average": 7.9}
+    assert "summary" not in as_dict
+    assert not hasattr(index.dated_episodes()[0], "__dict__")
+
 # --- Yahoo Finance Tests ---
 
 @patch('api_clients.yahoo_finance_client.yf.Ticker')
@@ -0,0 +1,42 @@
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from cogs.movies import MoviesCog
+
+
+@pytest.mark.asyncio
+async def test_check_movie_releases_fetches_each_movie_once(mock_bot, db_manager):
+    db_manager.add_movie_subscription(1, 100, "Released", "/r.jpg", "2099-01-01")
+    db_manager.add_movie_subscription(2, 100, "Released", "/r.jpg", "2099-01-01")
+    db_manager.add_movie_subscription(1, 200, "Far Future", "/f.jpg", "2099-06-01")
+    db_manager.set_user_preference(2, "dnd_enabled", True)
+    db_manager.set_user_preference(2, "dnd_start_time", "00:00")
+    db_manager.set_user_preference(2, "dnd_end_time", "23:59")
+
+    cog = MoviesCog.__new__(MoviesCog)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    user = MagicMock(send=AsyncMock())
+    mock_bot.fetch_user = AsyncMock(return_value=user)
+
+    today = date.today().isoformat()
+    details = {
+        100: {"id": 100, "title": "Released", "release_date": today, "overview": "Out now"},
+        200: {"id": 200, "title": "Far Future", "release_date": "2099-06-01"},
+    }
+    with patch("cogs.movies.tmdb_client.get_movie_details", side_effect=lambda mid: details[mid]) as get_details:
+        await cog.check_movie_releases()
+        assert sorted(c.args[0] for c in get_details.call_args_list) == [100, 200]
+
+        # Second run: nothing is due for a refresh, and user 1 was already notified.
+        await cog.check_movie_releases()
+        assert get_details.call_count == 2
+
+    assert user.send.call_count == 1
+    assert "Released" in user.send.call_args.kwargs["embed"].title
+    notified = {s["tmdb_id"]: s["notified_status"] for s in db_manager.get_user_movie_subscriptions(1)}
+    assert notified == {100: True, 200: False}
+    # User 2 is in DND, so their notification stays pending.
+    assert db_manager.get_user_movie_subscriptions(2)[0]["notified_status"] is False
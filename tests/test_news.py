@@ -0,0 +1,111 @@
+import asyncio
+import io
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from api_clients import google_news_rss_client
+from utils.news import NEWS_FRESH_S, NEWS_STALE_S, NewsAggregator, canonical_url, merge_headlines
+from utils.portfolio import ProviderLimiter
+
+
+def _rss(n, tail=""):
+    items = "".join(
+        f"<item><title>Story {i} - Reuters</title><link>https://example.com/{i}</link>"
+        f"<pubDate>Mon, 0{1 + i % 9} Jun 2026 10:00:00 GMT</pubDate><source>Reuters</source></item>"
+        for i in range(n)
+    )
+    return f"<rss><channel><title>Feed</title>{items}{tail}".encode()
+
+
+def _article(title, url="", published="2026-06-01 10:00:00", source="Yahoo Finance"):
+    return {"title": title, "url": url, "source": source, "time_published": published}
+
+
+def test_rss_parsing_stops_after_limit():
+    # Everything after the second item is malformed and never reached.
+    articles = google_news_rss_client.parse_rss_items(io.BytesIO(_rss(3, tail="<item><<broken")), 2)
+    assert [a["title"] for a in articles] == ["Story 0 - Reuters", "Story 1 - Reuters"]
+    assert articles[0]["time_published"] == "2026-06-01 10:00:00" and articles[0]["source"] == "Reuters"
+
+
+@patch('api_clients.google_news_rss_client.requests.get')
+def test_fetch_stock_news_streams_the_response(mock_get):
+    response = MagicMock(status_code=200, raw=io.BytesIO(_rss(30)))
+    mock_get.return_value = response
+    articles = google_news_rss_client.fetch_stock_news("AAPL", limit=3)
+    assert len(articles) == 3
+    assert mock_get.call_args.kwargs["stream"] is True
+    response.close.assert_called_once()
+
+
+def test_merge_dedupes_by_canonical_url_and_title_similarity():
+    google = [
+        _article("Apple beats earnings estimates - Reuters", "https://news.google.com/rss/articles/abc", "2026-06-02 09:00:00", "Reuters"),
+        _article("Apple unveils new iPhone", "https://www.example.com/iphone/?utm_source=rss", "2026-06-01 08:00:00"),
+    ]
+    yahoo = [
+        _article("Apple Beats Earnings Estimates!", "https://finance.yahoo.com/a", "2026-06-02 09:05:00"),
+        _article("Apple unveils the new iPhone lineup", "https://example.com/iphone", "2026-06-01 08:00:00"),
+        _article("Apple supplier expands in India", "https://finance.yahoo.com/b", "2026-06-03 12:00:00"),
+    ]
+    merged = merge_headlines([google, yahoo], limit=10)
+    assert [a["url"] for a in merged] == [
+        "https://finance.yahoo.com/b",                         # newest first
+        "https://news.google.com/rss/articles/abc",            # the earlier provider wins a duplicate
+        "https://www.example.com/iphone/?utm_source=rss",
+    ]
+    assert canonical_url("https://WWW.Example.com/a/?id=1&utm_medium=x#top") == "//example.com/a?id=1"
+
+
+@pytest.mark.asyncio
+async def test_aggregator_caches_and_revalidates_stale_entries(mock_bot):
+    clock = [1000.0]
+    calls = []
+    HEADLINES = ["Apple beats estimates", "Fed holds rates steady"]
+
+    def google(symbol, limit):
+        calls.append(("google", symbol))
+        n = sum(1 for provider, _ in calls if provider == "google")
+        return [_article(HEADLINES[n - 1], f"https://g.com/{n}", f"2026-06-0{n} 10:00:00")]
+
+    def yahoo(symbol, limit):
+        calls.append(("yahoo", symbol))
+        return None
+
+    unspaced = ProviderLimiter({"google_news": (2, 0.0), "yahoo_finance": (4, 0.0)})
+    news = NewsAggregator(mock_bot.loop, limiter=unspaced, providers={"google_news": google, "yahoo_finance": yahoo},
+                          clock=lambda: clock[0])
+    first = await news.get("aapl", limit=5)
+    assert [a["title"] for a in first] == ["Apple beats estimates"]
+    assert len(calls) == 2
+
+    clock[0] += NEWS_FRESH_S - 1
+    assert await news.get("AAPL") == first and len(calls) == 2   # fresh: no provider calls
+
+    clock[0] += 2
+    assert await news.get("AAPL") == first                      # stale: old answer now, refresh behind it
+    await asyncio.sleep(0.05)
+    assert len(calls) == 4
+    merged = await news.get("AAPL")
+    assert [a["title"] for a in merged] == ["Fed holds rates steady", "Apple beats estimates"]  # merged, newest first
+
+    clock[0] += NEWS_STALE_S
+    with patch.object(news, "providers", {"google_news": lambda s, n: None}):
+        assert await news.get("AAPL") == merged                 # providers down: cached headlines kept
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_refresh():
+    loop = asyncio.get_running_loop()
+    calls = []
+
+    def slow(symbol, limit):
+        calls.append(symbol)
+        time.sleep(0.2)
+        return [_article("Only story", "https://x.com/1")]
+
+    news = NewsAggregator(loop, providers={"google_news": slow})
+    results = await asyncio.gather(*[news.get("MSFT") for _ in range(5)])
+    assert calls == ["MSFT"]
+    assert all(r[0]["title"] == "Only story" for r in results)
@@ -0,0 +1,170 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from utils.portfolio import PortfolioValuator, ProviderLimiter
+
+
+def _holding(symbol, quantity=1, purchase_price=100.0):
+    return {"symbol": symbol, "quantity": quantity, "purchase_price": purchase_price}
+
+
+@pytest.mark.asyncio
+async def test_valuator_dedupes_symbols_and_fx_pairs(mock_bot):
+    prices = {
+        "AAPL": {"05. price": "200.0", "currency": "USD"},
+        "MSFT": {"05. price": "400.0", "currency": "USD"},
+        "LPP.WA": {"05. price": "15000.0", "currency": "PLN"},
+    }
+    calls = []
+
+    def fake_price(symbol):
+        calls.append(symbol)
+        return prices.get(symbol)
+
+    holdings = [_holding("AAPL", 2), _holding("MSFT"), _holding("aapl", 1, 150.0), _holding("LPP.WA", 1, 14000.0)]
+    with patch('utils.portfolio.yahoo_finance_client.get_stock_price', side_effect=fake_price), \
+         patch('utils.fx.yahoo_finance_client.get_stock_prices_batch', return_value={"USDPLN=X": {"05. price": "4.0"}}) as mock_fx, \
+         patch('api_clients.alpha_vantage_client.get_stock_price') as mock_av:
+        valuation = await PortfolioValuator(mock_bot.loop).value(holdings, "PLN")
+
+    mock_av.assert_not_called()
+    assert sorted(calls) == ["AAPL", "LPP.WA", "MSFT"]
+    assert "USDPLN=X" in mock_fx.call_args_list[0].args[0]  # FX comes from one batched refresh
+    rows = valuation["holdings"]
+    assert [r["symbol"] for r in rows] == ["AAPL", "MSFT", "AAPL", "LPP.WA"]
+    assert rows[0]["current_price"] == pytest.approx(800.0)
+    assert rows[3]["exchange_rate"] == 1.0
+    assert valuation["complete"] and valuation["pending"] == []
+    assert valuation["total_market_value"] == pytest.approx(1600 + 1600 + 800 + 15000)
+    assert valuation["total_cost_basis"] == pytest.approx(800 + 400 + 600 + 14000)
+
+
+@pytest.mark.asyncio
+async def test_valuator_falls_back_to_alpha_vantage(mock_bot):
+    with patch('utils.portfolio.yahoo_finance_client.get_stock_price', return_value=None), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', return_value={"05. price": "110.0"}):
+        valuation = await PortfolioValuator(mock_bot.loop).value([_holding("IBM")], "USD")
+    row = valuation["holdings"][0]
+    assert row["source"] == "Alpha Vantage"
+    assert row["gain_loss_pct"] == pytest.approx(10.0)
+
+
+@pytest.mark.asyncio
+async def test_valuator_fetches_concurrently_and_returns_partial_results():
+    loop = asyncio.get_running_loop()
+
+    def fake_price(symbol):
+        time.sleep(1.0 if symbol == "SLOW" else 0.2)
+        return {"05. price": "10.0", "currency": "USD"}
+
+    updates = []
+
+    async def on_update(partial):
+        updates.append(partial["resolved"])
+
+    holdings = [_holding(s) for s in ("A", "B", "C", "SLOW")]
+    started = time.monotonic()
+    with patch('utils.portfolio.yahoo_finance_client.get_stock_price', side_effect=fake_price):
+        valuator = PortfolioValuator(loop, ProviderLimiter({"yahoo_finance": (4, 0.0)}), timeout=0.6)
+        valuation = await valuator.value(holdings, "USD", on_update=on_update)
+
+    assert time.monotonic() - started < 0.9  # three 0.2s fetches ran in parallel, SLOW was abandoned
+    assert updates == [1, 2, 3]
+    assert valuation["pending"] == ["SLOW"]
+    assert not valuation["complete"]
+    assert valuation["total_market_value"] == pytest.approx(30.0)
+
+
+@pytest.mark.asyncio
+async def test_provider_limiter_spaces_quota_limited_calls(mock_bot):
+    limiter = ProviderLimiter({"alpha_vantage": (1, 0.1)})
+    stamps = []
+    await asyncio.gather(*[limiter.run(mock_bot.loop, "alpha_vantage", lambda: stamps.append(time.monotonic())) for _ in range(3)])
+    assert len(stamps) == 3
+    assert stamps[2] - stamps[0] >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_my_portfolio_command_uses_valuator(db_manager, mock_bot):
+    from unittest.mock import AsyncMock, MagicMock
+    from cogs.stocks import Stocks
+    from utils.fx import FxService
+
+    db_manager.add_tracked_stock(42, "AAPL", quantity=2, purchase_price=100.0)
+    db_manager.add_tracked_stock(42, "MSFT", quantity=1, purchase_price=500.0)
+    db_manager.add_tracked_stock(42, "TSLA")  # watch-only, not part of the portfolio
+    cog = Stocks.__new__(Stocks)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    cog.fx_service = FxService(db_manager)
+    ctx = MagicMock()
+    ctx.author.id = 42
+    ctx.defer = AsyncMock()
+    ctx.send = AsyncMock()
+
+    quotes = {"AAPL": {"05. price": "150.0", "currency": "USD"}, "MSFT": None}
+    with patch('utils.portfolio.yahoo_finance_client.get_stock_price', side_effect=quotes.get), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', return_value={"error": "api_limit"}):
+        await cog.my_portfolio.callback(cog, ctx)
+
+    embed = ctx.send.await_args_list[-1].kwargs["embed"]
+    summary = embed.fields[0].value
+    assert "$300.00" in summary and "$200.00" in summary
+    msft = embed.fields[1].value.split("**MSFT**")[1]
+    assert "Price: `N/A`" in msft  # no quote from either provider
+
+
+def test_align_portfolio_history_forward_fills():
+    from utils.portfolio import align_portfolio_history
+
+    prices = {
+        "AAPL": [("2026-01-02", 10.0), ("2026-01-05", 12.0)],
+        "LPP.WA": [("2026-01-05", 100.0), ("2026-01-06", 110.0)],
+        "GONE": [],
+    }
+    fx = {"AAPL": 1.0, "LPP.WA": [("2026-01-01", 0.25), ("2026-01-06", 0.5)], "GONE": 1.0}
+    series = align_portfolio_history({"AAPL": 2, "LPP.WA": 1, "GONE": 5}, prices, fx)
+    assert series == [
+        ("2026-01-02", 20.0),                 # LPP not listed yet -> contributes 0
+        ("2026-01-05", 24.0 + 25.0),
+        ("2026-01-06", 24.0 + 55.0),          # AAPL price carried forward, new FX rate used
+    ]
+
+
+def test_align_portfolio_history_is_fast_for_large_max_charts():
+    from datetime import date, timedelta
+    from utils.portfolio import align_portfolio_history
+
+    days = [(date(1990, 1, 1) + timedelta(days=i)).isoformat() for i in range(12000)]
+    prices = {f"S{n}": [(d, 1.0 + n) for d in days[n::2]] for n in range(50)}
+    fx = {f"S{n}": [(d, 2.0) for d in days[::7]] for n in range(50)}
+
+    started = time.perf_counter()
+    series = align_portfolio_history({sym: 1 for sym in prices}, prices, fx)
+    assert time.perf_counter() - started < 1.0
+    assert len(series) == 12000
+    assert series[-1][1] == pytest.approx(2.0 * sum(1.0 + n for n in range(50)))
+
+
+@pytest.mark.asyncio
+async def test_portfolio_history_engine_fetches_each_series_once(mock_bot):
+    from datetime import date
+    from utils.portfolio import PortfolioHistoryEngine
+
+    fetched = []
+
+    async def fake_closes(key, start):
+        fetched.append(key)
+        await asyncio.sleep(0)
+        return {"CDR.WA": [("2026-01-02", 100.0)], "KGH.WA": [("2026-01-02", 50.0)],
+                "PLNUSD=X": [("2026-01-02", 0.25)]}.get(key)
+
+    currencies = {"CDR.WA": "PLN", "KGH.WA": "PLN"}
+    with patch('utils.portfolio.yahoo_finance_client.get_symbol_currency', side_effect=currencies.get):
+        engine = PortfolioHistoryEngine(mock_bot.loop, fake_closes)
+        series = await engine.build([_holding("CDR.WA", 2), _holding("KGH.WA", 4), _holding("cdr.wa", 1)], "USD", date(2026, 1, 1))
+
+    assert sorted(fetched) == ["CDR.WA", "KGH.WA", "PLNUSD=X"]
+    assert series == [("2026-01-02", pytest.approx((3 * 100.0 + 4 * 50.0) * 0.25))]
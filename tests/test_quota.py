@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+from api_clients import alpha_vantage_client
+from utils.quota import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QuotaScheduler, call_with_priority
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_minute_and_day_buckets_refill():
+    clock = FakeClock()
+    quota = QuotaScheduler("test", per_minute=2, per_day=3, background_reserve=(0, 0), max_wait={PRIORITY_INTERACTIVE: 0}, clock=clock)
+    assert quota.acquire() and quota.acquire()
+    assert not quota.available() and not quota.acquire()  # minute bucket empty, no waiting allowed
+    assert quota.seconds_until_available() == 30.0
+
+    clock.now += 30
+    assert quota.acquire()
+    clock.now += 60
+    # The minute bucket has refilled but the day's calls are spent.
+    assert not quota.acquire()
+    assert quota.snapshot() == {"minute_remaining": 2, "day_remaining": 0}
+
+
+def test_day_budget_is_a_hard_count_over_24_hours():
+    clock = FakeClock()
+    quota = QuotaScheduler("test", per_minute=100, per_day=3, background_reserve=(0, 0), max_wait={PRIORITY_INTERACTIVE: 0}, clock=clock)
+    assert quota.acquire()
+    for _ in range(2):
+        clock.now += 8 * 3600
+        assert quota.acquire()
+    # 16h after the first call: a refilling bucket would have handed back two calls.
+    assert not quota.available() and not quota.acquire()
+    assert quota.seconds_until_available() == 8 * 3600
+    clock.now += 8 * 3600
+    assert quota.acquire() and not quota.acquire()  # only the first call has left the window
+
+
+def test_background_lane_keeps_a_reserve_for_interactive_requests():
+    quota = QuotaScheduler("test", per_minute=3, per_day=100, background_reserve=(1, 0), clock=FakeClock())
+    assert call_with_priority(PRIORITY_BACKGROUND, quota.acquire)
+    assert quota.acquire(PRIORITY_BACKGROUND)
+    assert not quota.available(PRIORITY_BACKGROUND)
+    assert not quota.acquire(PRIORITY_BACKGROUND)  # the last token is reserved
+    assert quota.available(PRIORITY_INTERACTIVE) and quota.acquire(PRIORITY_INTERACTIVE)
+
+
+def test_interactive_waits_for_a_token_and_preempts_background():
+    quota = QuotaScheduler("test", per_minute=60, per_day=100, background_reserve=(0, 0))
+    for _ in range(60):
+        assert quota.acquire()
+    # A token refills every second: interactive callers wait for it, background ones refuse.
+    assert not quota.acquire(PRIORITY_BACKGROUND)
+    assert quota.acquire(PRIORITY_INTERACTIVE, max_wait=0.5) is False  # predicted wait is ~1s
+    granted = []
+    waiter = threading.Thread(target=lambda: granted.append(quota.acquire(PRIORITY_INTERACTIVE, max_wait=2.0)))
+    waiter.start()
+    time.sleep(0.1)
+    assert not quota.available(PRIORITY_BACKGROUND)  # an interactive request is queued
+    waiter.join(timeout=3)
+    assert granted == [True]
+
+
+@patch('api_clients.alpha_vantage_client.requests.get')
+def test_alpha_vantage_skips_requests_once_budget_is_spent(mock_get):
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute..."
+    }
+    mock_get.return_value = mock_response
+
+    assert alpha_vantage_client.get_stock_price("IBM")["error"] == "api_limit"
+    assert mock_get.call_count == 1
+    # The limit reply drained the minute budget, so the next call is refused locally.
+    assert not alpha_vantage_client.budget_available(PRIORITY_BACKGROUND)
+    with patch.object(alpha_vantage_client.QUOTA, "max_wait", {PRIORITY_INTERACTIVE: 0.0}):
+        assert alpha_vantage_client.get_stock_price("MSFT") == alpha_vantage_client.BUDGET_EXHAUSTED
+        assert alpha_vantage_client.search_symbol("Microsoft") == []
+    assert mock_get.call_count == 1
@@ -0,0 +1,100 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+
+from utils.quota import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, current_priority
+from utils.quote_router import MIN_SAMPLES, QuoteRouter, normalize_quote
+
+
+def _quote(price, **extra):
+    return dict({"01. symbol": "AAPL", "05. price": str(price), "09. change": "2.00"}, **extra)
+
+
+def test_normalize_quote_unifies_provider_shapes():
+    av = normalize_quote({"05. price": "110.0", "08. previous close": "100.0"}, "alpha_vantage", "IBM")
+    assert av["01. symbol"] == "IBM" and av["currency"] == "USD" and av["source"] == "alpha_vantage"
+
+    yf = normalize_quote(_quote(102.0, currency="PLN", source="yahoo_finance"), "yahoo_finance", "AAPL")
+    assert yf["08. previous close"] == "100.0000"  # derived from price - change
+    assert yf["currency"] == "PLN"
+
+    assert normalize_quote({"error": "api_limit"}, "alpha_vantage", "IBM") is None
+    assert normalize_quote({"05. price": "N/A"}, "yahoo_finance", "IBM") is None
+    assert normalize_quote(None, "yahoo_finance", "IBM") is None
+
+
+@pytest.mark.asyncio
+async def test_router_hedges_a_slow_primary():
+    loop = asyncio.get_running_loop()
+
+    def slow_yahoo(symbol):
+        time.sleep(1.5)
+        return _quote(1.0)
+
+    router = QuoteRouter(available={})
+    started = time.monotonic()
+    with patch('api_clients.yahoo_finance_client.get_stock_price', side_effect=slow_yahoo), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', return_value=_quote(2.0)) as mock_av, \
+         patch('utils.quote_router.HEDGE_DEFAULT_DELAY_S', 0.5):
+        record = await router.quote(loop, "AAPL")
+
+    assert time.monotonic() - started < 1.2  # did not wait for Yahoo's 1.5s
+    assert record["source"] == "alpha_vantage" and record["05. price"] == "2.0"
+    mock_av.assert_called_once_with("AAPL")
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_immediately_and_skips_exhausted_budget(mock_bot):
+    router = QuoteRouter(available={"alpha_vantage": lambda: True})
+    with patch('api_clients.yahoo_finance_client.get_stock_price', return_value=None), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', return_value=_quote(3.0)):
+        assert (await router.quote(mock_bot.loop, "AAPL"))["source"] == "alpha_vantage"
+
+    router = QuoteRouter(available={"alpha_vantage": lambda: False})
+    with patch('api_clients.yahoo_finance_client.get_stock_price', return_value=None), \
+         patch('api_clients.alpha_vantage_client.get_stock_price') as mock_av:
+        assert await router.quote(mock_bot.loop, "AAPL") is None
+    mock_av.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_hedges_spend_only_the_background_budget():
+    loop = asyncio.get_running_loop()
+    lanes = []
+
+    def slow_yahoo_failure(symbol):
+        time.sleep(0.8)
+        return None
+
+    def av_quote(symbol):
+        lanes.append(current_priority())
+        return _quote(2.0)
+
+    with patch('api_clients.yahoo_finance_client.get_stock_price', side_effect=slow_yahoo_failure), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', side_effect=av_quote), \
+         patch('utils.quote_router.HEDGE_DEFAULT_DELAY_S', 0.2):
+        hedged = await QuoteRouter(available={}, hedge_available={}).quote(loop, "AAPL")
+        # With the background budget spent there is no hedge: Alpha Vantage is only the failover.
+        started = time.monotonic()
+        failover = await QuoteRouter(available={}, hedge_available={"alpha_vantage": lambda: False}).quote(loop, "AAPL")
+        assert time.monotonic() - started >= 0.8
+
+    assert hedged["source"] == failover["source"] == "alpha_vantage"
+    assert lanes == [PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE]
+
+
+@pytest.mark.asyncio
+async def test_router_promotes_the_more_reliable_provider(mock_bot):
+    router = QuoteRouter(available={})
+    assert router.provider_order() == ["yahoo_finance", "alpha_vantage"]
+
+    with patch('api_clients.yahoo_finance_client.get_stock_price', return_value=None), \
+         patch('api_clients.alpha_vantage_client.get_stock_price', return_value=_quote(3.0)):
+        for _ in range(MIN_SAMPLES):
+            await router.quote(mock_bot.loop, "AAPL")
+
+    # Alpha Vantage now has enough successful samples; Yahoo has only failures.
+    assert router.provider_order() == ["alpha_vantage", "yahoo_finance"]
+    stats = router.snapshot()
+    assert stats["yahoo_finance"]["error_rate"] == 1.0 and stats["alpha_vantage"]["samples"] == MIN_SAMPLES
@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from api_clients import yahoo_finance_client
+from cogs.stocks import Stocks
+
+
+def _ohlc(closes):
+    index = pd.to_datetime([f"2026-10-{12 + i:02d}" for i in range(len(closes))])
+    return pd.DataFrame(
+        {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": [1000] * len(closes)},
+        index=index,
+    )
+
+
+@patch('api_clients.yahoo_finance_client.yf.download')
+def test_get_stock_prices_batch_multi_ticker(mock_download):
+    frames = {"AAPL": _ohlc([100.0, 110.0]), "LPP.WA": _ohlc([50.0, 45.0]), "GONE": _ohlc([float("nan")] * 2)}
+    mock_download.return_value = pd.concat(frames, axis=1)
+
+    quotes = yahoo_finance_client.get_stock_prices_batch(["AAPL", "LPP", "GONE", "MISSING"])
+
+    mock_download.assert_called_once()
+    assert mock_download.call_args.kwargs["tickers"] == ["AAPL", "LPP.WA", "GONE", "MISSING"]
+    assert set(quotes) == {"AAPL", "LPP"}  # keyed by the stored symbol, misses omitted
+    assert float(quotes["AAPL"]["05. price"]) == 110.0
+    assert float(quotes["AAPL"]["08. previous close"]) == 100.0
+    assert quotes["LPP"]["01. symbol"] == "LPP.WA"
+    assert quotes["LPP"]["10. change percent"] == "-10.00%"
+
+
+@patch('api_clients.yahoo_finance_client.yf.download')
+def test_get_stock_prices_batch_single_flat_frame(mock_download):
+    mock_download.return_value = _ohlc([10.0, 12.0])
+    quotes = yahoo_finance_client.get_stock_prices_batch(["MSFT"])
+    assert float(quotes["MSFT"]["05. price"]) == 12.0
+
+
+def _make_cog(db_manager, mock_bot):
+    cog = Stocks.__new__(Stocks)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    cog.alert_fallback_cursor = 0
+    return cog
+
+
+@pytest.mark.asyncio
+async def test_check_stock_alerts_evaluates_every_symbol(db_manager, mock_bot):
+    db_manager.add_stock_alert(1, "AAPL", target_above=100)
+    db_manager.add_stock_alert(2, "MSFT", target_below=300)
+    db_manager.add_stock_alert(3, "IBM", dpc_above_target=5)
+    user = MagicMock(send=AsyncMock())
+    mock_bot.fetch_user = AsyncMock(return_value=user)
+    cog = _make_cog(db_manager, mock_bot)
+
+    batch = {
+        "AAPL": {"05. price": "120.0", "08. previous close": "119.0"},
+        "MSFT": {"05. price": "310.0", "08. previous close": "305.0"},
+    }
+    av_quote = {"01. symbol": "IBM", "05. price": "110.0", "08. previous close": "100.0"}
+    with patch('cogs.stocks.yahoo_finance_client.get_stock_prices_batch', return_value=batch) as mock_batch, \
+         patch('cogs.stocks.alpha_vantage_client.get_stock_price', return_value=av_quote) as mock_av:
+        await cog.check_stock_alerts.coro(cog)
+
+    mock_batch.assert_called_once_with(["AAPL", "IBM", "MSFT"])
+    mock_av.assert_called_once_with("IBM")  # only the batch miss goes to Alpha Vantage
+    assert user.send.await_count == 2
+    assert not db_manager.get_stock_alert(1, "AAPL")["active_above"]
+    assert not db_manager.get_stock_alert(3, "IBM")["dpc_above_active"]
+    assert db_manager.get_stock_alert(2, "MSFT")["active_below"]
+
+
+@pytest.mark.asyncio
+async def test_alert_fallback_stops_on_api_limit(db_manager, mock_bot):
+    for symbol in ("AAA", "BBB", "CCC"):
+        db_manager.add_stock_alert(1, symbol, target_above=1)
+    mock_bot.fetch_user = AsyncMock()
+    cog = _make_cog(db_manager, mock_bot)
+
+    with patch('cogs.stocks.yahoo_finance_client.get_stock_prices_batch', return_value={}), \
+         patch('cogs.stocks.alpha_vantage_client.get_stock_price', return_value={"error": "api_limit"}) as mock_av:
+        await cog.check_stock_alerts.coro(cog)
+
+    assert mock_av.call_count == 1
+    mock_bot.fetch_user.assert_not_called()
+
+
+def test_alert_threshold_index_crossings():
+    from utils.alert_index import AlertThresholdIndex
+
+    index = AlertThresholdIndex()
+    index.set_alert(1, "aapl", {"target_above": 100.0, "active_above": True, "target_below": 90.0, "active_below": True})
+    index.set_alert(2, "AAPL", {"target_above": 150.0, "active_above": True, "dpc_above_target": 5.0, "dpc_above_active": True})
+    index.set_alert(3, "AAPL", {"target_below": 95.0, "active_below": True, "dpc_below_target": 2.0, "dpc_below_active": True})
+    index.set_alert(4, "AAPL", {"target_above": 50.0, "active_above": False})
+
+    assert index.symbols() == ["AAPL"]
+    assert len(index) == 6
+    assert index.crossed("AAPL", 100.0, 100.0) == []  # strict comparisons, like the old checks
+    assert index.crossed("AAPL", 120.0, 100.0) == [("1", "above", 100.0), ("2", "dpc_above", 5.0)]
+    # One hit per user: user 3's price target wins over its DPC target.
+    assert index.crossed("AAPL", 92.0, 100.0) == [("3", "below", 95.0)]
+    assert index.crossed("AAPL", 89.0, 0) == [("1", "below", 90.0), ("3", "below", 95.0)]
+
+    index.remove(1, "AAPL", "below")
+    index.set_alert(3, "AAPL", None)
+    assert index.crossed("AAPL", 89.0, 0) == []
+    index.set_alert(2, "AAPL", None)
+    index.remove(1, "AAPL", "above")
+    assert index.symbols() == [] and len(index) == 0
+
+
+def test_stock_alert_index_tracks_db_writes(db_manager):
+    db_manager.add_stock_alert(1, "AAPL", target_above=200.0)
+    index = db_manager.get_stock_alert_index()
+    assert db_manager.get_stock_alert_index() is index
+    assert index.crossed("AAPL", 210.0) == [("1", "above", 200.0)]
+
+    db_manager.add_stock_alert(2, "msft", target_below=300.0)
+    assert index.symbols() == ["AAPL", "MSFT"]
+    db_manager.add_stock_alert(1, "AAPL", target_above=250.0)
+    assert index.crossed("AAPL", 210.0) == []
+
+    db_manager.deactivate_stock_alert_target(2, "MSFT", "below")
+    db_manager.add_stock_alert(1, "AAPL", clear_above=True)  # deletes the row
+    assert index.symbols() == []
@@ -0,0 +1,91 @@
+import pytest
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+
+from cogs.stocks import Stocks, _plan_bar_fetches, _timespan_start_date
+
+
+def _bar(ts, close):
+    return {"ts": ts, "open": close, "high": close, "low": close, "close": close, "volume": 100.0}
+
+
+def test_stock_bar_store_roundtrip(db_manager):
+    assert db_manager.get_stock_bar_sync("AAPL") is None
+    assert db_manager.store_stock_bars("aapl", "1d", [_bar("2026-10-13", 10.0), _bar("2026-10-14", 11.0)], "2026-10-01")
+    # Re-storing a bar updates it; a later, narrower covered_from never shrinks coverage.
+    assert db_manager.store_stock_bars("AAPL", "1d", [_bar("2026-10-14", 12.0), _bar("2026-10-15", 13.0)], "2026-10-14")
+
+    sync = db_manager.get_stock_bar_sync("AAPL")
+    assert sync["covered_from"] == "2026-10-01"
+    assert sync["last_ts"] == "2026-10-15"
+    assert [(r["ts"], r["close"]) for r in db_manager.get_stock_bars("AAPL", "1d", "2026-10-14")] == [
+        ("2026-10-14", 12.0), ("2026-10-15", 13.0)
+    ]
+    assert len(db_manager.get_stock_bars("AAPL", "1d", end="2026-10-13")) == 1
+    assert db_manager.get_stock_bars("AAPL", "1wk") == []
+
+
+def test_plan_bar_fetches():
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    assert _plan_bar_fetches(None, "2026-09-17", now) == [("2026-09-17", None)]
+
+    fresh = {"covered_from": "2026-09-17", "synced_at": "2026-10-18 06:00:00", "last_ts": "2026-10-16"}
+    assert _plan_bar_fetches(fresh, "2026-09-17", now) == []
+    assert _plan_bar_fetches(fresh, "2026-01-01", now) == [("2026-01-01", "2026-09-17")]
+
+    stale = dict(fresh, synced_at="2026-10-17 09:00:00")
+    assert _plan_bar_fetches(stale, "2026-10-01", now) == [("2026-10-16", None)]
+
+    assert _timespan_start_date("YTD", date(2026, 10, 18)) == date(2026, 1, 1)
+    assert _timespan_start_date("1M", date(2026, 10, 18)) == date(2026, 9, 17)
+    assert _timespan_start_date("MAX", date(2026, 10, 18)) == date(1970, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_get_daily_closes_only_fetches_gaps(db_manager, mock_bot):
+    cog = Stocks.__new__(Stocks)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+
+    with patch('cogs.stocks.yahoo_finance_client.get_daily_bars',
+               return_value=[_bar("2026-10-15", 20.0), _bar("2026-10-16", 21.0)]) as mock_bars:
+        first = await cog._get_daily_closes("LPP", date(2026, 10, 1))
+        second = await cog._get_daily_closes("LPP", date(2026, 10, 10))
+
+    assert first == [("2026-10-15", 20.0), ("2026-10-16", 21.0)]
+    assert second == first
+    # One provider call: the second, narrower request is served entirely from SQLite.
+    mock_bars.assert_called_once_with("LPP.WA", "2026-10-01", None)
+
+    with patch('cogs.stocks.yahoo_finance_client.get_daily_bars', return_value=[]) as mock_bars:
+        await cog._get_daily_closes("LPP", date(2026, 9, 1))
+    mock_bars.assert_called_once_with("LPP.WA", "2026-09-01", "2026-10-01")
+
+
+@pytest.mark.asyncio
+async def test_split_in_new_bars_refetches_stored_history(db_manager, mock_bot):
+    cog = Stocks.__new__(Stocks)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    db_manager.store_stock_bars("LPP.WA", "1d", [_bar("2026-09-01", 400.0), _bar("2026-09-02", 404.0)], "2026-09-01")
+    conn = db_manager._get_connection()
+    conn.execute("UPDATE stock_bar_sync SET synced_at = '2026-09-03 00:00:00'")
+    conn.commit()
+
+    split = dict(_bar("2026-10-16", 101.0), corporate_action=True)
+    adjusted = [_bar("2026-09-01", 100.0), _bar("2026-09-02", 101.0), split]
+    with patch('cogs.stocks.yahoo_finance_client.get_daily_bars', side_effect=[[split], adjusted]) as mock_bars:
+        closes = await cog._get_daily_closes("LPP", date(2026, 9, 1))
+
+    # The 4:1 split re-adjusts old prices: the whole stored range is replaced, not just the tail.
+    assert closes == [("2026-09-01", 100.0), ("2026-09-02", 101.0), ("2026-10-16", 101.0)]
+    assert mock_bars.call_args_list[1].args == ("LPP.WA", "2026-09-01")
+    assert db_manager.get_stock_bar_sync("LPP.WA")["covered_from"] == "2026-09-01"
+
+    # The next tail refresh starts at that split bar again: it must not trigger another full re-fetch.
+    conn.execute("UPDATE stock_bar_sync SET synced_at = '2026-10-16 00:00:00'")
+    conn.commit()
+    with patch('cogs.stocks.yahoo_finance_client.get_daily_bars', return_value=[split, _bar("2026-10-19", 102.0)]) as mock_bars:
+        closes = await cog._get_daily_closes("LPP", date(2026, 9, 1))
+    mock_bars.assert_called_once_with("LPP.WA", "2026-10-16", None)
+    assert closes[-1] == ("2026-10-19", 102.0) and len(closes) == 4
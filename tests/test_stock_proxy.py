@@ -1,3 +1,4 @@
+import threading
 import pytest
 from unittest.mock import patch
 from stock_proxy_service import app
@@ -43,3 +44,132 @@ def test_get_intraday_data_success(mock_get_intraday, client):
     assert rv.json['interval'] == '60min'
 
 
+
+@patch('stock_proxy_service.get_stock_price')
+def test_stock_data_etag_and_shared_cache(mock_get_price, client):
+    mock_get_price.return_value = {"01. symbol": "TEST", "05. price": "100.00"}
+    first = client.get('/stock/TEST')
+    etag = first.headers['ETag']
+    assert etag
+
+    second = client.get('/stock/test', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b""
+    assert mock_get_price.call_count == 1  # served from the shared cache
+
+@patch('stock_proxy_service.get_stock_price')
+def test_stock_data_errors_are_not_cached(mock_get_price, client):
+    mock_get_price.return_value = None
+    assert client.get('/stock/NOPE').status_code == 404
+    assert client.get('/stock/NOPE').status_code == 404
+    assert mock_get_price.call_count == 2
+
+@patch('stock_proxy_service.get_daily_time_series')
+def test_daily_data_gzip(mock_get_daily, client):
+    import gzip, json
+    mock_get_daily.return_value = [(f"2023-01-{d:02d}", 100.0 + d) for d in range(1, 29)] * 3
+    rv = client.get('/stock/TEST/daily', headers={'Accept-Encoding': 'gzip'})
+    assert rv.status_code == 200
+    assert rv.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in rv.headers['Vary']
+    assert len(json.loads(gzip.decompress(rv.data))['data']) == 84
+
+    plain = client.get('/stock/TEST/daily')
+    assert 'Content-Encoding' not in plain.headers
+    assert len(plain.json['data']) == 84
+    assert rv.headers['ETag'] == plain.headers['ETag'][:-1] + '-gz"'  # one ETag per representation
+    assert client.get('/stock/TEST/daily', headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+    assert client.get('/stock/TEST/daily', headers={'If-None-Match': plain.headers['ETag'],
+                                                    'Accept-Encoding': 'gzip'}).status_code == 200
+
+def test_singleflight_coalesces_concurrent_calls():
+    import threading
+    import time
+    from stock_proxy_service import _SingleFlight
+
+    flight = _SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "quote"
+
+    results = []
+    def worker():
+        results.append(flight.do(("quote", "AAPL"), slow_fetch))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=worker) for _ in range(4)]
+    for t in followers:
+        t.start()
+    time.sleep(0.2)  # let the followers reach the in-flight call
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert results == ["quote"] * 5
+    assert len(calls) == 1
+    assert flight._calls == {}
+
+@patch('stock_proxy_service.get_stock_price')
+@patch('stock_proxy_service.get_stock_prices_batch')
+def test_batch_quotes_ndjson(mock_batch, mock_get_price, client):
+    import json
+    mock_batch.side_effect = lambda chunk: {s: {"05. price": "1.00"} for s in chunk if s != "ODD"}
+    mock_get_price.side_effect = lambda s: {"05. price": "2.00"} if s == "ODD" else None
+
+    rv = client.get('/stocks?symbols=aapl,ODD,msft,aapl')
+    assert rv.status_code == 200
+    assert rv.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in rv.data.decode().splitlines()]
+    assert sorted(line['symbol'] for line in lines) == ['AAPL', 'MSFT', 'ODD']
+    assert {line['symbol']: line['data']['05. price'] for line in lines} == {'AAPL': '1.00', 'MSFT': '1.00', 'ODD': '2.00'}
+    mock_batch.assert_called_once_with(['AAPL', 'ODD', 'MSFT'])
+
+    # A second batch is served from the shared cache without upstream calls.
+    rv = client.get('/stocks?symbols=MSFT,ODD')
+    assert len(rv.data.decode().splitlines()) == 2
+    assert mock_batch.call_count == 1 and mock_get_price.call_count == 1
+
+def test_batch_quotes_requires_symbols(client):
+    assert client.get('/stocks').status_code == 400
+    too_many = ",".join(f"S{i}" for i in range(60))
+    assert client.get(f'/stocks?symbols={too_many}').status_code == 400
+
+@patch('stock_proxy_service.time.sleep')
+@patch('stock_proxy_service.get_stock_prices_batch')
+def test_stream_quotes_sse(mock_batch, mock_sleep, client):
+    mock_batch.side_effect = lambda chunk: {s: {"05. price": "1.00"} for s in chunk}
+    rv = client.get('/stocks/stream?symbols=AAPL&interval=1')
+    assert rv.mimetype == 'text/event-stream'
+    events = rv.response
+    assert next(events).decode().startswith('retry: 5000')  # interval clamped to the minimum
+    first = next(events).decode()
+    assert first.startswith('event: quote\nid: 1\n') and '"AAPL"' in first
+    # Unchanged quote on the next tick -> keep-alive comment only.
+    assert next(events).decode() == ': keep-alive\n\n'
+    rv.close()
+
+@patch('stock_proxy_service.time.sleep')
+@patch('stock_proxy_service.get_stock_prices_batch')
+def test_stream_resumes_ids_and_caps_open_streams(mock_batch, mock_sleep, client):
+    mock_batch.side_effect = lambda chunk: {s: {"05. price": "1.00"} for s in chunk}
+    slots = threading.BoundedSemaphore(1)
+    with patch('stock_proxy_service._SSE_SLOTS', slots):
+        rv = client.get('/stocks/stream?symbols=AAPL,MSFT', headers={'Last-Event-ID': '41'})
+        events = rv.response
+        next(events)
+        assert [next(events).decode().split('\n')[1] for _ in range(2)] == ['id: 42', 'id: 43']
+        assert not slots.acquire(blocking=False)  # the open stream holds the only slot
+        rv.close()
+
+        assert slots.acquire(blocking=False)  # closing the stream freed it
+        busy = client.get('/stocks/stream?symbols=AAPL')
+        assert busy.status_code == 503 and busy.headers['Retry-After'] == '15'
+        slots.release()
@@ -0,0 +1,87 @@
+import time
+from unittest.mock import MagicMock, patch
+
+from utils.symbol_directory import (
+    SOURCE_ALPHA_VANTAGE, SOURCE_BUILTIN, SOURCE_FILE, SymbolDirectory, load_listing_file,
+)
+
+LISTING = [
+    {"symbol": "AAPL", "name": "Apple Inc", "exchange": "NASDAQ", "assetType": "Stock", "status": "Active"},
+    {"symbol": "MSFT", "name": "Microsoft Corporation", "exchange": "NASDAQ", "assetType": "Stock", "status": "Active"},
+    {"symbol": "BAC", "name": "Bank of America Corp", "exchange": "NYSE", "assetType": "Stock", "status": "Active"},
+    {"symbol": "AAP", "name": "Advance Auto Parts Inc", "exchange": "NYSE", "assetType": "Stock", "status": "Active"},
+]
+
+
+def _directory(extra=()):
+    directory = SymbolDirectory()
+    directory.load([
+        {"symbol": row["symbol"], "name": row["name"], "exchange": row["exchange"], "asset_type": row["assetType"]}
+        for row in LISTING
+    ] + [{"symbol": "CDR.WA", "name": "CD Projekt SA"}, {"symbol": "LPP.WA", "name": ""}] + list(extra))
+    return directory
+
+
+def _symbols(results):
+    return [r["symbol"] for r in results]
+
+
+def test_search_ranks_exact_prefix_name_and_fuzzy_matches():
+    directory = _directory()
+    assert _symbols(directory.search("AAPL"))[0] == "AAPL"
+    assert _symbols(directory.search("aap")) == ["AAP", "AAPL"]         # shorter completion first
+    assert _symbols(directory.search("LPP"))[0] == "LPP.WA"              # normalize_symbol adds .WA
+    assert _symbols(directory.search("aapl.us"))[0] == "AAPL"
+    assert _symbols(directory.search("cdr")) == ["CDR.WA"]               # base ticker without suffix
+    assert _symbols(directory.search("bank of am"))[0] == "BAC"          # name prefix
+    assert _symbols(directory.search("america"))[0] == "BAC"             # any word of the name
+    assert _symbols(directory.search("micrsoft")) == ["MSFT"]            # typo, trigram match
+    assert directory.search("") == [] and directory.search("zzzz") == []
+    assert directory.get("lpp")["symbol"] == "LPP.WA" and directory.get("NOPE") is None
+
+
+def test_search_stays_under_a_millisecond():
+    extra = [{"symbol": f"S{n:05d}", "name": f"Company {n} Holdings Group"} for n in range(20000)]
+    directory = _directory(extra)
+    queries = ["AAPL", "a", "S1234", "microsoft", "bank of", "micrsoft", "holdings"]
+    started = time.perf_counter()
+    for _ in range(50):
+        for query in queries:
+            directory.search(query, limit=25)
+    assert (time.perf_counter() - started) / (50 * len(queries)) < 0.001
+
+
+def test_refresh_imports_sources_and_skips_fresh_listing(db_manager, tmp_path):
+    listing_file = tmp_path / "wse.csv"
+    listing_file.write_text("Symbol,Name,Exchange\nCDR,CD Projekt,WSE\nkgh.wa,KGHM Polska Miedz,WSE\n", encoding="utf-8")
+    assert _symbols(load_listing_file(str(listing_file))) == ["CDR.WA", "KGH.WA"]
+
+    directory = SymbolDirectory(db_manager, str(listing_file), refresh_hours=24)
+    with patch('api_clients.alpha_vantage_client.get_listing_status', return_value=LISTING) as mock_listing:
+        directory.refresh()
+        directory.refresh()  # the stored listing is still fresh
+    mock_listing.assert_called_once()
+
+    rows = {row["symbol"]: row for row in db_manager.list_symbol_directory()}
+    assert rows["AAPL"]["source"] == SOURCE_ALPHA_VANTAGE
+    assert rows["CDR.WA"]["source"] == SOURCE_FILE and rows["CDR.WA"]["name"] == "CD Projekt"
+    assert rows["PKO.WA"]["source"] == SOURCE_BUILTIN
+
+    # A restart serves the stored directory without any download.
+    restarted = SymbolDirectory(db_manager)
+    assert restarted.load() == len(rows)
+    assert _symbols(restarted.search("kghm")) == ["KGH.WA"]
+
+
+@patch('api_clients.alpha_vantage_client.resilient_get')
+def test_alpha_vantage_listing_status_parses_csv(mock_get):
+    from api_clients import alpha_vantage_client
+
+    mock_get.return_value = MagicMock(text=(
+        "symbol,name,exchange,assetType,ipoDate,delistingDate,status\r\n"
+        "A,Agilent Technologies Inc,NYSE,Stock,1999-11-18,null,Active\r\n"
+    ))
+    rows = alpha_vantage_client.get_listing_status()
+    assert rows == [{"symbol": "A", "name": "Agilent Technologies Inc", "exchange": "NYSE", "assetType": "Stock",
+                     "ipoDate": "1999-11-18", "delistingDate": "null", "status": "Active"}]
+    assert mock_get.call_args.kwargs["params"]["function"] == "LISTING_STATUS"
@@ -51,21 +51,13 @@ def test_build_monthly_schedule_embed_empty():
 
 
 @pytest.mark.asyncio
-async def test_fetch_monthly_schedule():
-    mock_bot = MagicMock()
-    mock_bot.loop = MagicMock()
-    mock_bot.loop.run_in_executor = AsyncMock()
-
-    mock_db = MagicMock()
-    mock_db.get_user_tv_subscriptions.return_value = [
-        {"show_tmdb_id": 125988, "show_name": "Silo", "show_tvmaze_id": 38052}
-    ]
+async def test_fetch_monthly_schedule(db_manager, mock_bot):
+    db_manager.add_tv_show_subscription(12345, 125988, "Silo", "/silo.jpg", 38052)
 
     cog = TVShows.__new__(TVShows)
     cog.bot = mock_bot
-    cog.db_manager = mock_db
+    cog.db_manager = db_manager
 
-    # Setup run_in_executor to return subscriptions and episodes
     tvmaze_episodes = [
         {
             "id": 1,
@@ -80,6 +72,8 @@ async def test_fetch_monthly_schedule():
             "season": 3,
             "number": 6,
             "airdate": "2026-08-07",
+            "airstamp": "2026-08-07T07:00:00+00:00",
+            "rating": {"average": 8.1},
         },
         {
             "id": 3,
@@ -97,70 +91,76 @@ async def test_fetch_monthly_schedule():
         },
     ]
 
-    async def side_effect(executor, func, *args):
-        if func == mock_db.get_user_tv_subscriptions:
-            return mock_db.get_user_tv_subscriptions(*args)
-        return tvmaze_episodes
-
-    mock_bot.loop.run_in_executor.side_effect = side_effect
-
-    with patch("cogs.tv_shows.tvmaze_client.get_show_episodes", return_value=tvmaze_episodes):
+    with patch("cogs.tv_shows.tvmaze_client.get_show_episodes", return_value=tvmaze_episodes) as get_eps:
         episodes = await cog._fetch_monthly_schedule(12345, 2026, 8)
+        # Second read is served from the materialized calendar without hitting TVMaze again.
+        september = await cog._fetch_monthly_schedule(12345, 2026, 9)
 
+    assert get_eps.call_count == 1
     assert len(episodes) == 2
     assert episodes[0]["air_date"] == "2026-08-07"
     assert episodes[1]["air_date"] == "2026-08-14"
     assert episodes[0]["episode_name"] == "August Ep 1"
+    assert episodes[0]["air_date_obj"] == date(2026, 8, 7)
+    assert episodes[0]["air_datetime_utc"] == "2026-08-07T07:00:00+00:00"
+    assert episodes[0]["rating"] == 8.1
+    assert episodes[0]["show_id"] == 125988
+    assert [ep["episode_name"] for ep in september] == ["September Ep"]
 
 
 @pytest.mark.asyncio
-async def test_monthly_digest_schedule_conditions():
-    """Verify that digest triggers on 1st of month at >= 09:00 local time and respects dedup key."""
-    mock_bot = MagicMock()
-    mock_bot.loop = MagicMock()
-    mock_bot.loop.run_in_executor = AsyncMock()
-
-    mock_db = MagicMock()
-    mock_db.get_all_tv_subscriptions.return_value = [
-        {"user_id": "817792006372851743", "show_tmdb_id": 125988}
-    ]
+async def test_monthly_digest_schedule_conditions(db_manager, mock_bot):
+    """Digest fires at 09:00 local on the 1st from the send-time index and respects the dedup key."""
+    enabled_uid, disabled_uid = 817792006372851743, 42
+    db_manager.add_tv_show_subscription(enabled_uid, 125988, "Silo", "/silo.jpg", 38052)
+    db_manager.add_tv_show_subscription(disabled_uid, 125988, "Silo", "/silo.jpg", 38052)
+    db_manager.set_user_preference(enabled_uid, "timezone", "Europe/Warsaw")
+    db_manager.set_user_preference(enabled_uid, "last_sent_tv_monthly_digest", "2026-08")
+    db_manager.set_user_preference(disabled_uid, "tv_monthly_digest", False)
+    db_manager.replace_episode_calendar_for_show(125988, 38052, [
+        {"episode_key": "tvmaze:1", "season_number": 3, "episode_number": 1, "name": "Aug", "air_date": "2026-08-28"},
+        {"episode_key": "tvmaze:2", "season_number": 3, "episode_number": 2, "name": "Sep", "air_date": "2026-09-04"},
+    ])
 
     cog = TVShows.__new__(TVShows)
     cog.bot = mock_bot
-    cog.db_manager = mock_db
-
-    # 1. On 1st of month at 09:15 CET, should trigger
-    test_now_utc = datetime(2026, 9, 1, 7, 15, tzinfo=timezone.utc)  # 09:15 CEST
-
-    mock_user = MagicMock()
-    mock_user.display_name = "Kamil"
-    mock_user.send = AsyncMock()
-    mock_bot.get_user.return_value = mock_user
-
-    async def side_effect(executor, func, *args):
-        if func == mock_db.get_all_tv_subscriptions:
-            return mock_db.get_all_tv_subscriptions()
-        if func == mock_db.get_user_preference:
-            pref_key = args[1]
-            if pref_key == "tv_monthly_digest":
-                return True
-            if pref_key == "timezone":
-                return "Europe/Warsaw"
-            if pref_key == "last_sent_tv_monthly_digest":
-                return "2026-08" # Not sent for 2026-09 yet
-        if func == mock_db.get_user_tv_subscriptions:
-            return [{"show_tmdb_id": 125988, "show_name": "Silo", "show_tvmaze_id": 38052}]
-        if func == mock_db.set_user_preference:
-            return True
-        return []
-
-    mock_bot.loop.run_in_executor.side_effect = side_effect
-
-    with patch("cogs.tv_shows.datetime") as mock_dt:
-        mock_dt.now.return_value = test_now_utc
-        mock_dt.strptime = datetime.strptime
-        await cog.check_monthly_tv_digest()
-
-    assert mock_user.send.called
-    sent_embed = mock_user.send.call_args[1]["embed"]
+    cog.db_manager = db_manager
+    cog._digest_send_index = None
+    cog._digest_index_built_at = None
+    cog._sync_show_calendar = AsyncMock(return_value=True)
+
+    users = {}
+    def get_user(uid):
+        if uid not in users:
+            users[uid] = MagicMock(display_name=f"user{uid}", send=AsyncMock())
+        return users[uid]
+    mock_bot.get_user.side_effect = get_user
+
+    current = {"now": datetime(2026, 9, 1, 6, 50, tzinfo=timezone.utc)}  # 08:50 CEST
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return current["now"]
+
+    async def run_at(now):
+        current["now"] = now
+        with patch("cogs.tv_shows.datetime", FakeDatetime):
+            await cog.check_monthly_tv_digest()
+
+    await run_at(datetime(2026, 9, 1, 6, 50, tzinfo=timezone.utc))
+    assert users == {}
+
+    await run_at(datetime(2026, 9, 1, 7, 15, tzinfo=timezone.utc))  # 09:15 CEST
+    assert set(users) == {enabled_uid}
+    sent_embed = users[enabled_uid].send.call_args[1]["embed"]
     assert "September 2026" in sent_embed.title
+    assert "**1** episode(s)" in sent_embed.description
+    assert db_manager.get_user_preference(enabled_uid, "last_sent_tv_monthly_digest") == "2026-09"
+
+    # Already consumed from the index, and a rebuilt index skips to October.
+    await run_at(datetime(2026, 9, 1, 7, 30, tzinfo=timezone.utc))
+    cog._digest_send_index = None
+    await run_at(datetime(2026, 9, 1, 7, 45, tzinfo=timezone.utc))
+    assert users[enabled_uid].send.call_count == 1
+    assert [entry[2] for entry in cog._digest_send_index] == ["2026-10"]
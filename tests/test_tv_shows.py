@@ -0,0 +1,148 @@
+import asyncio
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from cogs.tv_shows import TVShows
+from utils.title_index import TitleIndex
+
+
+def _make_cog(mock_bot, db_manager):
+    cog = TVShows.__new__(TVShows)
+    cog.bot = mock_bot
+    cog.db_manager = db_manager
+    cog._show_index = TitleIndex()
+    cog._show_search_tasks = {}
+    return cog
+
+
+@pytest.mark.asyncio
+async def test_tv_autocomplete_served_locally_with_background_refresh(mock_bot, db_manager):
+    cog = _make_cog(mock_bot, db_manager)
+    cog._show_index.add(1396, "Breaking Bad", "Breaking Bad (2008)", weight=2)
+
+    search_results = [
+        {"id": 1396, "name": "Breaking Bad", "first_air_date": "2008-01-20"},
+        {"id": 99999, "name": "Breaking Point", "first_air_date": "2021-05-01"},
+    ]
+    with patch("cogs.tv_shows.tmdb_client.search_tv_shows", return_value=search_results) as search:
+        choices = await cog.tv_autocomplete(None, "break")
+        # Local hit is returned immediately; the network refresh runs in the background.
+        assert [c.value for c in choices] == ["Breaking Bad"]
+        await asyncio.gather(*list(cog._show_search_tasks.values()))
+        assert search.call_count == 1
+
+        choices = await cog.tv_autocomplete(None, "break")
+        assert [c.name for c in choices] == ["Breaking Bad (2008)", "Breaking Point (2021)"]
+        # Warm query: no further network calls.
+        assert search.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_tv_autocomplete_cold_query_waits_for_network(mock_bot, db_manager):
+    cog = _make_cog(mock_bot, db_manager)
+    with patch("cogs.tv_shows.tmdb_client.search_tv_shows", return_value=[{"id": 5, "name": "Severance", "first_air_date": "2022-02-18"}]):
+        choices = await cog.tv_autocomplete(None, "seve")
+        assert [c.name for c in choices] == ["Severance (2022)"]
+        # Short prefixes never reach the network.
+        assert await cog.tv_autocomplete(None, "xy") == []
+
+
+@pytest.mark.asyncio
+async def test_tv_batch_subscribe_resolves_concurrently_and_writes_once(mock_bot, db_manager):
+    from unittest.mock import AsyncMock, MagicMock
+
+    cog = _make_cog(mock_bot, db_manager)
+    db_manager.add_tv_show_subscription(42, 3, "Silo", "/silo.jpg")
+
+    catalog = {
+        "breaking bad": [{"id": 1, "name": "Breaking Bad", "poster_path": "/bb.jpg"}],
+        "the bear": [{"id": 2, "name": "The Bear"}, {"id": 20, "name": "The Bear Cub"}],
+        "silo": [{"id": 3, "name": "Silo"}],
+        "office": [{"id": 4, "name": "The Office"}, {"id": 5, "name": "The Office (UK)"}],
+    }
+
+    progress_msg = MagicMock()
+    progress_msg.edit = AsyncMock()
+    ctx = MagicMock()
+    ctx.interaction = None
+    ctx.author.id = 42
+    ctx.defer = AsyncMock()
+    ctx.send = AsyncMock(return_value=progress_msg)
+
+    cog._resolve_tvmaze_id = AsyncMock(return_value=777)
+    bulk = MagicMock(wraps=db_manager.add_tv_show_subscriptions_bulk)
+    db_manager.add_tv_show_subscriptions_bulk = bulk
+
+    with patch("cogs.tv_shows.tmdb_client.search_tv_shows", side_effect=lambda q: catalog.get(q.lower(), [])):
+        await cog.tv_batch_subscribe.callback(cog, ctx, show_names="Breaking Bad, The Bear, Silo, Office, Nope, breaking bad")
+
+    assert bulk.call_count == 1
+    subs = {s["show_tmdb_id"]: s for s in db_manager.get_user_tv_subscriptions(42)}
+    assert set(subs) == {1, 2, 3}
+    assert subs[1]["show_tvmaze_id"] == 777
+
+    final_embed = progress_msg.edit.call_args.kwargs["embed"]
+    fields = {f.name: f.value for f in final_embed.fields}
+    assert final_embed.title == "Batch Subscription Results"
+    assert "Breaking Bad" in fields["Subscribed"] and "The Bear" in fields["Subscribed"]
+    assert "Silo" in fields["Already Subscribed"]
+    assert "Office" in fields["Ambiguous (Please subscribe individually)"]
+    assert "Nope (Not Found)" in fields["Failed"]
+
+
+@pytest.mark.asyncio
+async def test_my_tv_shows_paginator_caches_details_and_retries_errors(mock_bot):
+    from cogs.tv_shows import MyTVShowsPaginatorView
+
+    subs = [{"show_tmdb_id": i, "show_name": f"Show {i}"} for i in range(1, 4)]
+    view = MyTVShowsPaginatorView(user_id=1, all_subs=subs, bot_instance=mock_bot, items_per_page=2)
+
+    calls = []
+    def details(show_id):
+        calls.append(show_id)
+        if show_id == 2 and calls.count(2) == 1:
+            raise RuntimeError("boom")
+        return {"id": show_id}
+
+    with patch("cogs.tv_shows.tmdb_client.get_show_details", side_effect=details):
+        embed = await view._get_embed_for_current_page()
+        assert "errors loading data for 1 show" in embed.description
+        embed = await view._get_embed_for_current_page()
+        assert not embed.description or "errors" not in embed.description
+
+    # Show 1 came from the per-view cache on the retry; only the failed show was re-fetched.
+    assert calls == [1, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_calendar_sync_failure_keeps_stored_tvmaze_calendar(mock_bot, db_manager):
+    cog = _make_cog(mock_bot, db_manager)
+    db_manager.add_tv_show_subscription(1, 125988, "Silo", "/silo.jpg", 38052)
+    stored = [{"episode_key": f"tvmaze:{i}", "season_number": 3, "episode_number": i, "name": f"Ep {i}",
+               "air_date": f"2026-08-{i:02d}"} for i in range(1, 6)]
+    db_manager.replace_episode_calendar_for_show(125988, 38052, stored)
+
+    with patch('cogs.tv_shows.tvmaze_client.get_show_episode_index', side_effect=RuntimeError("timeout")), \
+            patch('cogs.tv_shows.tmdb_client.get_show_details') as mock_tmdb:
+        assert await cog._sync_show_calendar(125988, 38052) is False
+    mock_tmdb.assert_not_called()  # TMDB's two-row fallback is only for shows without a TVMaze id
+    assert len(db_manager.get_user_episode_calendar(1, "2026-08-01", "2026-08-31")) == 5
+
+    with patch('cogs.tv_shows.tmdb_client.get_show_details', return_value=None):
+        assert await cog._sync_show_calendar(125988, None) is False  # an empty result never replaces rows
+    assert len(db_manager.get_user_episode_calendar(1, "2026-08-01", "2026-08-31")) == 5
+
+
+@pytest.mark.asyncio
+async def test_empty_calendar_source_is_not_refetched_on_every_read(mock_bot, db_manager):
+    cog = _make_cog(mock_bot, db_manager)
+    db_manager.add_tv_show_subscription(1, 555, "Announced Show", "/a.jpg", None)
+
+    with patch('cogs.tv_shows.tmdb_client.get_show_details', return_value={"id": 555}) as mock_tmdb:
+        assert await cog._fetch_calendar_episodes(1, date(2026, 10, 1), date(2026, 10, 31)) == []
+        assert await cog._fetch_calendar_episodes(1, date(2026, 10, 1), date(2026, 10, 31)) == []
+    mock_tmdb.assert_called_once()  # the empty sync was stamped; the stale sweep retries it later
+    assert db_manager.list_user_shows_missing_calendar(1) == []
+    assert db_manager.list_shows_needing_calendar_sync("2000-01-01 00:00:00") == []
@@ -37,6 +37,37 @@ def test_generate_stock_chart_url_empty_data():
     url = chart_utils.generate_stock_chart_url("TEST", "1D", [])
     assert url is None
 
+def test_downsample_indices_keeps_shape_and_endpoints():
+    values = [0.0] * 10000
+    values[4321] = 50.0   # a one-point spike must survive
+    values[7000] = -30.0
+    keep = chart_utils.downsample_indices([values], 200)
+    assert len(keep) == 200 and keep[0] == 0 and keep[-1] == 9999
+    assert 4321 in keep and 7000 in keep
+    assert keep == sorted(set(keep))
+    assert chart_utils.downsample_indices([[1.0, 2.0]], 200) == [0, 1]
+
+
+def test_stock_chart_config_is_bounded_by_chart_width():
+    data_points = [(f"2020-01-01 {i % 24:02d}:00:00", 100.0 + (i % 97)) for i in range(200000)]
+    config = chart_utils._create_chart_config("TEST", "MAX", data_points, chart_utils.max_points_for_width(800))
+    prices = config["data"]["datasets"][0]["data"]
+    assert len(prices) == len(config["data"]["labels"]) == 800
+    assert prices[-1] == data_points[-1][1] and max(prices) == 196.0 and min(prices) == 100.0
+
+
+def test_mood_chart_downsamples_series_together_and_keeps_gaps():
+    n = 2000
+    labels = [f"day{i}" for i in range(n)]
+    mood = [None if 500 <= i < 700 else float(i % 10) for i in range(n)]
+    energy = [float((i * 3) % 10) for i in range(n)]
+    config = chart_utils._create_mood_daily_chart_config("Mood", labels, mood, energy, max_points=300)
+    mood_out, energy_out = (ds["data"] for ds in config["data"]["datasets"])
+    assert len(config["data"]["labels"]) == len(mood_out) == len(energy_out) == 300
+    assert config["data"]["labels"][0] == "day0" and config["data"]["labels"][-1] == f"day{n - 1}"
+    assert None in mood_out   # the 200-day gap still breaks the line
+    assert all(energy[int(label[3:])] == e for label, e in zip(config["data"]["labels"], energy_out))
+
 # --- Paginator Tests ---
 
 @pytest.mark.asyncio
@@ -98,6 +129,46 @@ async def test_paginator_button_states():
     assert view.last_page_button.disabled is True
 
 
+@pytest.mark.asyncio
+async def test_paginator_page_data_cached_and_prefetched():
+    import asyncio
+
+    fetched = []
+
+    class CountingView(paginator.BasePaginatorView):
+        async def _fetch_page_data(self, page):
+            fetched.append(page)
+            return [f"detail-{item}" for item in self.page_items(page)]
+
+        async def _get_embed_for_current_page(self):
+            data = await self.get_page_data(self.current_page)
+            return MagicMock(description=",".join(data))
+
+    view = CountingView(user_id=1, items=list(range(12)), items_per_page=5)
+    ctx = MagicMock()
+    ctx.interaction = None
+    ctx.send = AsyncMock()
+    await view.start(ctx)
+    assert ctx.send.call_args.kwargs["embed"].description == "detail-0,detail-1,detail-2,detail-3,detail-4"
+
+    # Page 1 is prefetched in the background after the first render.
+    await asyncio.gather(*list(view._page_tasks.values()))
+    assert fetched == [0, 1]
+
+    interaction = MagicMock()
+    interaction.response.edit_message = AsyncMock()
+    view.current_page = 1
+    await view._edit_message(interaction)
+    await asyncio.gather(*list(view._page_tasks.values()))
+    view.current_page = 0
+    await view._edit_message(interaction)
+    # Flipping forward and back re-uses cached pages; only page 2 was prefetched on top.
+    assert fetched == [0, 1, 2]
+
+    view.invalidate_page(0)
+    await view._edit_message(interaction)
+    assert fetched == [0, 1, 2, 0]
+
 def test_article_html_extraction_basic():
     html = """
     <html><head><title>x</title><script>var a=1;</script></head>
@@ -177,3 +248,48 @@ def test_number_emojis_imported_in_cogs():
 
     assert movies_emojis == paginator.NUMBER_EMOJIS
     assert tv_emojis == paginator.NUMBER_EMOJIS
+
+# --- Title Index Tests ---
+
+def test_title_index_prefix_and_fuzzy_search():
+    from utils.title_index import TitleIndex, normalize_title
+
+    assert normalize_title("  Pokémon: The Series! ") == "pokemon the series"
+
+    index = TitleIndex()
+    index.add(1, "Breaking Bad", "Breaking Bad (2008)", weight=1)
+    index.add(2, "Better Call Saul")
+    index.add(3, "Bad Sisters", weight=2)
+    index.add(4, "The Bear")
+
+    assert [m["id"] for m in index.search("brea")] == [1]
+    assert index.search("brea")[0]["label"] == "Breaking Bad (2008)"
+    # Full-title prefix outranks a word-prefix match, regardless of weight.
+    assert [m["id"] for m in index.search("bad")] == [3, 1]
+    assert [m["id"] for m in index.search("bet call")] == [2]
+    # Trigram fallback tolerates typos.
+    assert index.search("braking bad")[0]["id"] == 1
+    assert index.search("zzzz") == []
+
+    # Renaming re-indexes the entry.
+    index.add(4, "The Bear Cub")
+    assert [m["name"] for m in index.search("cub")] == ["The Bear Cub"]
+    assert len(index) == 4
+
+
+def test_title_index_query_cache_expires():
+    from utils.title_index import TitleIndex
+
+    index = TitleIndex(query_ttl=60)
+    index.add(10, "Severance")
+    index.add(11, "Silo")
+    assert index.has_fresh_query("sev") is False
+
+    with patch("utils.title_index.time.monotonic", return_value=1000.0):
+        index.store_query_results("Sev", [11, 10])
+        assert index.has_fresh_query("sev") is True
+        # Cached network ranking is served even where the local prefix would not match.
+        assert [m["id"] for m in index.search("sev")][:2] == [11, 10]
+    with patch("utils.title_index.time.monotonic", return_value=1061.0):
+        assert index.has_fresh_query("sev") is False
+        assert [m["id"] for m in index.search("sev")] == [10]
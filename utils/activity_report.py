@@ -1,10 +1,7 @@
 import re
-import io
 from typing import Optional
 
-import requests
-
-QUICKCHART_BASE_URL = "https://quickchart.io/chart"
+from utils.chart_utils import render_chart_image
 
 
 def _parse_minutes(value: str) -> Optional[float]:
@@ -243,17 +240,4 @@ def get_activity_report_chart_image(
         },
     }
 
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
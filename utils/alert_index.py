@@ -0,0 +1,110 @@
+# utils/alert_index.py
+"""
+In-memory threshold index over active stock alerts, so the alert loop can find
+every alert a new quote crosses without walking (or re-reading) all alerts.
+
+Per symbol it keeps four lists sorted by threshold:
+
+* ``above``     - fires when price > threshold     -> thresholds left of the price
+* ``below``     - fires when price < threshold     -> thresholds right of the price
+* ``dpc_above`` - fires when daily % change > threshold
+* ``dpc_below`` - fires when daily % change < -threshold
+
+Each lookup is a bisect, i.e. O(log n + k) for k crossed alerts. The index is
+kept in step with SQLite by the StocksMixin write methods.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DIRECTIONS = ("above", "below", "dpc_above", "dpc_below")
+
+# direction -> (target column, active column) in the stock_alerts table
+ALERT_COLUMNS = {
+    "above": ("target_above", "active_above"),
+    "below": ("target_below", "active_below"),
+    "dpc_above": ("dpc_above_target", "dpc_above_active"),
+    "dpc_below": ("dpc_below_target", "dpc_below_active"),
+}
+
+
+def _threshold_key(entry: Tuple[float, str]) -> float:
+    return entry[0]
+
+
+class AlertThresholdIndex:
+    """Sorted ``(threshold, user_id)`` lists per symbol and direction."""
+
+    def __init__(self):
+        self._by_symbol: Dict[str, Dict[str, List[Tuple[float, str]]]] = {}
+        self._by_alert: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(directions) for directions in self._by_alert.values())
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return sorted(symbol for symbol, lists in self._by_symbol.items() if any(lists.values()))
+
+    def set_alert(self, user_id: Any, symbol: str, alert_row: Optional[Dict[str, Any]]) -> None:
+        """Replaces the indexed thresholds for one (user, symbol) with the active ones in ``alert_row``."""
+        user_key, symbol = str(user_id), symbol.upper()
+        with self._lock:
+            for direction in list(self._by_alert.get((user_key, symbol), {})):
+                self._remove_locked(user_key, symbol, direction)
+            for direction, (target_col, active_col) in ALERT_COLUMNS.items():
+                if not alert_row or not alert_row.get(active_col) or alert_row.get(target_col) is None:
+                    continue
+                threshold = float(alert_row[target_col])
+                lists = self._by_symbol.setdefault(symbol, {d: [] for d in DIRECTIONS})
+                bisect.insort(lists[direction], (threshold, user_key))
+                self._by_alert.setdefault((user_key, symbol), {})[direction] = threshold
+
+    def remove(self, user_id: Any, symbol: str, direction: str) -> None:
+        with self._lock:
+            self._remove_locked(str(user_id), symbol.upper(), direction)
+
+    def _remove_locked(self, user_key: str, symbol: str, direction: str) -> None:
+        directions = self._by_alert.get((user_key, symbol))
+        if not directions or direction not in directions:
+            return
+        entry = (directions.pop(direction), user_key)
+        if not directions:
+            del self._by_alert[(user_key, symbol)]
+        entries = self._by_symbol[symbol][direction]
+        pos = bisect.bisect_left(entries, entry)
+        if pos < len(entries) and entries[pos] == entry:
+            del entries[pos]
+        if not any(self._by_symbol[symbol].values()):
+            del self._by_symbol[symbol]
+
+    def crossed(self, symbol: str, price: float, previous_close: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """
+        ``(user_id, direction, threshold)`` for every alert on ``symbol`` crossed by
+        ``price``. At most one hit per user, in the priority order above > below >
+        dpc_above > dpc_below, matching how one DM per user/symbol is sent per check.
+        """
+        with self._lock:
+            lists = self._by_symbol.get(symbol.upper())
+            if not lists:
+                return []
+            hits: List[Tuple[str, str, float]] = []
+            hits += [(u, "above", t) for t, u in lists["above"][:bisect.bisect_left(lists["above"], price, key=_threshold_key)]]
+            hits += [(u, "below", t) for t, u in lists["below"][bisect.bisect_right(lists["below"], price, key=_threshold_key):]]
+            if previous_close:
+                change_pct = (price - previous_close) / previous_close * 100
+                dpc_above = lists["dpc_above"]
+                hits += [(u, "dpc_above", t) for t, u in dpc_above[:bisect.bisect_left(dpc_above, change_pct, key=_threshold_key)]]
+                if change_pct < 0:
+                    dpc_below = lists["dpc_below"]
+                    hits += [(u, "dpc_below", t) for t, u in dpc_below[:bisect.bisect_left(dpc_below, -change_pct, key=_threshold_key)]]
+
+        seen = set()
+        first_per_user = []
+        for hit in hits:
+            if hit[0] not in seen:
+                seen.add(hit[0])
+                first_per_user.append(hit)
+        return first_per_user
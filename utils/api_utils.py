@@ -34,6 +34,11 @@ logger = logging.getLogger(__name__)
 _cache_clearers: list = []
 
 
+def register_cache_clearer(clear) -> None:
+    """Register a custom cache's clear function so ``clear_all_caches`` resets it too."""
+    _cache_clearers.append(clear)
+
+
 def clear_all_caches() -> None:
     """Clear every ttl_cache created in this process. Mainly for tests."""
     for clear in _cache_clearers:
@@ -152,7 +157,7 @@ def ttl_cache(seconds: float, maxsize: int = 256):
             return result
 
         wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
-        _cache_clearers.append(cache.clear)
+        register_cache_clearer(cache.clear)
         return wrapper
 
     return decorator
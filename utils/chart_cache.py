@@ -0,0 +1,188 @@
+# utils/chart_cache.py
+"""
+Content-addressed cache for rendered chart images.
+
+The same chart is requested over and over: ``/stock_chart AAPL 1M`` within
+the series TTL, a habit weekday chart, or a monthly report chart regenerated
+on retry. Each image is a pure function of its Chart.js config, its size and
+the renderer. ``ChartCache.key`` hashes those into a SHA-256 key, and a
+repeated chart is served without rendering or any network call.
+
+Images are kept in two tiers:
+
+* memory: an LRU bounded by total PNG bytes;
+* disk (optional): one ``<key>.png`` per image in a directory, bounded by
+  total size. The least recently used files are evicted first, tracked by
+  modification time, so the cache survives restarts.
+
+A disk hit is promoted back into memory. Hit and miss counts are kept for
+diagnostics; see ``snapshot``. All methods are thread-safe, because charts
+are rendered in executor threads.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump to orphan cached images when the local renderer's output changes.
+CHART_CACHE_VERSION = 1
+
+
+class ChartCache:
+    """Two-tier PNG cache keyed by chart content. `directory=""` or `disk_bytes=0` disables the disk tier."""
+
+    def __init__(self, memory_bytes: int, directory: str = "", disk_bytes: int = 0):
+        self.memory_bytes = max(0, int(memory_bytes))
+        self.directory = directory if directory and disk_bytes > 0 else ""
+        self.disk_bytes = max(0, int(disk_bytes))
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk: Optional["OrderedDict[str, int]"] = None  # key -> size, oldest first; scanned lazily
+        self._disk_used = 0
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(chart_config: Dict[str, Any], width: int, height: int, renderer: str) -> str:
+        """Stable SHA-256 of everything that determines the image."""
+        payload = json.dumps(
+            {"v": CHART_CACHE_VERSION, "r": renderer, "w": int(width), "h": int(height), "c": chart_config},
+            sort_keys=True, separators=(",", ":"), default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._memory.get(key)
+            if png is not None:
+                self._memory.move_to_end(key)
+                self._hits_memory += 1
+                return png
+            png = self._disk_read(key)
+            if png is not None:
+                self._hits_disk += 1
+                self._remember(key, png)
+                return png
+            self._misses += 1
+            return None
+
+    def put(self, key: str, png: bytes) -> None:
+        if not png:
+            return
+        with self._lock:
+            self._remember(key, png)
+            self._disk_write(key, png)
+
+    def clear(self) -> None:
+        """Drops the memory tier and the counters; files on disk stay."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+            self._disk = None
+            self._disk_used = 0
+            self._hits_memory = self._hits_disk = self._misses = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters and sizes, for diagnostics."""
+        with self._lock:
+            lookups = self._hits_memory + self._hits_disk + self._misses
+            return {
+                "memory_hits": self._hits_memory,
+                "disk_hits": self._hits_disk,
+                "misses": self._misses,
+                "hit_rate": (self._hits_memory + self._hits_disk) / lookups if lookups else None,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "disk_entries": len(self._disk) if self._disk is not None else None,
+                "disk_bytes": self._disk_used if self._disk is not None else None,
+            }
+
+    # --- memory tier (callers hold the lock) ---
+
+    def _remember(self, key: str, png: bytes) -> None:
+        if len(png) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = png
+        self._memory_used += len(png)
+        while self._memory_used > self.memory_bytes:
+            _key, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    # --- disk tier (callers hold the lock) ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        if self._disk is None:
+            files = []
+            try:
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".png") and entry.is_file():
+                            stat = entry.stat()
+                            files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Chart cache: cannot scan {self.directory}: {e}")
+            files.sort()
+            self._disk = OrderedDict((key, size) for _mtime, key, size in files)
+            self._disk_used = sum(self._disk.values())
+        return self._disk
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        index = self._disk_index()
+        if key not in index:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                png = fh.read()
+            os.utime(path)  # mtime orders eviction after a restart
+        except OSError:
+            self._disk_used -= index.pop(key)
+            return None
+        index.move_to_end(key)
+        return png
+
+    def _disk_write(self, key: str, png: bytes) -> None:
+        if not self.directory or len(png) > self.disk_bytes:
+            return
+        index = self._disk_index()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(png)
+                os.replace(tmp_path, self._path(key))  # readers never see a partial file
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Chart cache: cannot write {key[:12]}: {e}")
+            return
+        self._disk_used += len(png) - index.pop(key, 0)
+        index[key] = len(png)
+        while self._disk_used > self.disk_bytes and index:
+            old_key, size = index.popitem(last=False)
+            self._disk_used -= size
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
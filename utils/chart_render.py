@@ -0,0 +1,601 @@
+# utils/chart_render.py
+"""
+Local PNG renderer for the Chart.js configs built in ``utils/chart_utils.py``.
+
+The bot's charts used to be POSTed to quickchart.io, so every chart waited on a
+remote service. This module draws the subset of Chart.js those configs use:
+
+* ``line`` and ``bar`` charts, mixed per dataset through ``type``;
+* ``null`` gaps, ``fill``, ``pointRadius``, ``borderWidth`` and rgba colours;
+* grouped bars, and a second y axis (``yAxisID: "y1"``, ``position: "right"``);
+* title, legend, axis titles, nice-number y ticks and grid lines;
+* the y-axis options ``min``/``max``, ``suggestedMin``/``suggestedMax``,
+  ``beginAtZero``, ``ticks.stepSize`` and a ``'$'`` tick callback.
+
+Options it does not know, such as ``tension`` or ``borderRadius``, are
+ignored. Drawing uses numpy with an embedded
+5x7 bitmap font. Text is folded to ASCII. The PNG is encoded with zlib, so
+no imaging library is needed.
+
+``render_png`` runs the work in a small process pool, so rasterizing never
+holds the GIL against the event loop. ``start_pool`` forks the workers once at
+startup, before the event loop and its executor threads exist: forking a
+multi-threaded process is unsafe (and deprecated from Python 3.12), and spawned
+workers would re-import ``bot.py`` as their main module. The pool is never
+re-forked later. Without a running pool, charts are rendered in the calling
+thread. A render that exceeds the timeout fails; it is not retried in-process.
+"""
+
+import concurrent.futures
+import logging
+import math
+import multiprocessing
+import re
+import struct
+import threading
+import unicodedata
+import zlib
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHART_RENDER_TIMEOUT_S = 20.0
+MAX_CHART_PIXELS = 4096 * 4096
+
+Color = Tuple[float, float, float, float]
+
+_TEXT_COLOR: Color = (102.0, 102.0, 102.0, 1.0)        # Chart.js default #666
+_TITLE_COLOR: Color = (51.0, 51.0, 51.0, 1.0)
+_AXIS_COLOR: Color = (0.0, 0.0, 0.0, 0.25)
+_DEFAULT_GRID: Color = (0.0, 0.0, 0.0, 0.1)
+_PALETTE: Tuple[Color, ...] = (
+    (54.0, 162.0, 235.0, 1.0), (255.0, 99.0, 132.0, 1.0), (75.0, 192.0, 192.0, 1.0),
+    (255.0, 159.0, 64.0, 1.0), (153.0, 102.0, 255.0, 1.0), (255.0, 205.0, 86.0, 1.0),
+)
+_NAMED_COLORS = {
+    "white": (255.0, 255.0, 255.0, 1.0), "black": (0.0, 0.0, 0.0, 1.0),
+    "transparent": (0.0, 0.0, 0.0, 0.0),
+}
+
+# Classic 5x7 LCD font for ASCII 32..126: five column bytes per glyph, bit 0 is the top row.
+_FONT_HEX = (
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12" "2313086462" "3649552250" "0005030000"
+    "001c224100" "0041221c00" "14083e0814" "08083e0808" "0050300000" "0808080808" "0060600000" "2010080402"
+    "3e5149453e" "00427f4000" "4261514946" "2141454b31" "1814127f10" "2745454539" "3c4a494930" "0171090503"
+    "3649494936" "064949291e" "0036360000" "0056360000" "0814224100" "1414141414" "0041221408" "0201510906"
+    "324959513e" "7c1211127c" "7f49494936" "3e41414122" "7f4141221c" "7f49494941" "7f09090901" "3e4149497a"
+    "7f0808087f" "00417f4100" "2040413f01" "7f08142241" "7f40404040" "7f020c027f" "7f0408107f" "3e4141413e"
+    "7f09090906" "3e4151215e" "7f09192946" "4649494931" "01017f0101" "3f4040403f" "1f2040201f" "3f4038403f"
+    "6314081463" "0708700807" "6151494543" "007f414100" "0204081020" "0041417f00" "0402010204" "4040404040"
+    "0001020400" "2054545478" "7f48444438" "3844444420" "384444487f" "3854545418" "087e090102" "0c5252523e"
+    "7f08040478" "00447d4000" "2040443d00" "7f10284400" "00417f4000" "7c04180478" "7c08040478" "3844444438"
+    "7c14141408" "081414187c" "7c08040408" "4854545420" "043f444020" "3c4040207c" "1c2040201c" "3c4030403c"
+    "4428102844" "0c5050503c" "4464544c44" "0008364100" "00007f0000" "0041360800" "1008081008"
+)
+_FONT_COLUMNS = np.frombuffer(bytes.fromhex(_FONT_HEX), dtype=np.uint8).reshape(95, 5)
+_GLYPHS = ((_FONT_COLUMNS[:, None, :] >> np.arange(7, dtype=np.uint8)[None, :, None]) & 1).astype(np.float32)
+_GLYPH_H = 7
+_GLYPH_ADVANCE = 6
+_TEXT_FOLD = str.maketrans({"ł": "l", "Ł": "L", "—": "-", "–": "-", "’": "'", "‘": "'", "“": '"', "”": '"', "•": "*", "…": "..."})
+
+
+def _ascii(text: Any) -> str:
+    """`text` folded to printable ASCII; characters without a close equivalent are dropped."""
+    folded = unicodedata.normalize("NFKD", str(text if text is not None else "").translate(_TEXT_FOLD))
+    return "".join(ch for ch in folded if 32 <= ord(ch) <= 126)
+
+
+def text_width(text: str, scale: int) -> int:
+    n = len(_ascii(text))
+    return max(0, n * _GLYPH_ADVANCE * scale - scale)
+
+
+def _text_mask(text: str, scale: int) -> np.ndarray:
+    codes = [ord(ch) - 32 for ch in _ascii(text)]
+    if not codes:
+        return np.zeros((0, 0), dtype=np.float32)
+    glyphs = np.zeros((len(codes), _GLYPH_H, _GLYPH_ADVANCE), dtype=np.float32)
+    glyphs[:, :, :5] = _GLYPHS[codes]
+    strip = glyphs.transpose(1, 0, 2).reshape(_GLYPH_H, -1)[:, :-1]
+    return np.kron(strip, np.ones((scale, scale), dtype=np.float32))
+
+
+def parse_color(value: Any, default: Optional[Color] = None) -> Color:
+    """An (r, g, b, alpha) tuple from a CSS colour string: rgb()/rgba(), #rgb/#rrggbb or a few names."""
+    if isinstance(value, str):
+        s = value.strip().lower()
+        if s in _NAMED_COLORS:
+            return _NAMED_COLORS[s]
+        m = re.fullmatch(r"rgba?\(\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*(?:,\s*([\d.]+)\s*)?\)", s)
+        if m:
+            r, g, b = (min(255.0, float(c)) for c in m.groups()[:3])
+            return (r, g, b, min(1.0, float(m.group(4))) if m.group(4) is not None else 1.0)
+        m = re.fullmatch(r"#([0-9a-f]{3}|[0-9a-f]{6})", s)
+        if m:
+            digits = m.group(1)
+            if len(digits) == 3:
+                digits = "".join(d * 2 for d in digits)
+            return (float(int(digits[0:2], 16)), float(int(digits[2:4], 16)), float(int(digits[4:6], 16)), 1.0)
+    return default if default is not None else _PALETTE[0]
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        return None
+    return v if math.isfinite(v) else None
+
+
+class _Canvas:
+    """RGB float canvas with alpha compositing of coverage masks."""
+
+    def __init__(self, width: int, height: int, background: Color):
+        self.w, self.h = width, height
+        self.px = np.empty((height, width, 3), dtype=np.float32)
+        self.px[:] = np.asarray(background[:3], dtype=np.float32)
+
+    def blend(self, x0: int, y0: int, coverage: np.ndarray, color: Color) -> None:
+        """Composites `color` through `coverage` (0..1) placed with its top-left corner at (x0, y0)."""
+        h, w = coverage.shape
+        cx0, cy0 = max(0, x0), max(0, y0)
+        cx1, cy1 = min(self.w, x0 + w), min(self.h, y0 + h)
+        if cx0 >= cx1 or cy0 >= cy1 or color[3] <= 0:
+            return
+        alpha = coverage[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0] * color[3]
+        region = self.px[cy0:cy1, cx0:cx1]
+        region += (np.asarray(color[:3], dtype=np.float32) - region) * alpha[..., None]
+
+    def rect(self, x0: float, y0: float, x1: float, y1: float, color: Color) -> None:
+        xa, xb = sorted((int(round(x0)), int(round(x1))))
+        ya, yb = sorted((int(round(y0)), int(round(y1))))
+        if xb > xa and yb > ya:
+            self.blend(xa, ya, np.ones((yb - ya, xb - xa), dtype=np.float32), color)
+
+    def text(self, text: str, x: float, y: float, scale: int, color: Color, anchor: str = "left", rotate: int = 0) -> None:
+        """Draws `text` with its top edge at `y`; `anchor` aligns it on `x`, `rotate` turns it by 90-degree steps."""
+        mask = _text_mask(text, scale)
+        if mask.size == 0:
+            return
+        if rotate:
+            mask = np.rot90(mask, rotate)
+        w = mask.shape[1]
+        if anchor == "center":
+            x -= w / 2
+        elif anchor == "right":
+            x -= w
+        self.blend(int(round(x)), int(round(y)), mask, color)
+
+    def polyline(self, points: Sequence[Tuple[float, float]], width: float, color: Color) -> None:
+        """Antialiased stroke through `points`; overlapping segment ends are composited once."""
+        if len(points) < 2:
+            return
+        hw = max(0.5, width / 2.0)
+        pts = np.asarray(points, dtype=np.float32)
+        x0 = max(0, int(math.floor(pts[:, 0].min() - hw - 1)))
+        y0 = max(0, int(math.floor(pts[:, 1].min() - hw - 1)))
+        x1 = min(self.w, int(math.ceil(pts[:, 0].max() + hw + 1)))
+        y1 = min(self.h, int(math.ceil(pts[:, 1].max() + hw + 1)))
+        if x0 >= x1 or y0 >= y1:
+            return
+        coverage = np.zeros((y1 - y0, x1 - x0), dtype=np.float32)
+        for (ax, ay), (bx, by) in zip(pts[:-1], pts[1:]):
+            sx0 = max(x0, int(math.floor(min(ax, bx) - hw - 1)))
+            sy0 = max(y0, int(math.floor(min(ay, by) - hw - 1)))
+            sx1 = min(x1, int(math.ceil(max(ax, bx) + hw + 1)))
+            sy1 = min(y1, int(math.ceil(max(ay, by) + hw + 1)))
+            if sx0 >= sx1 or sy0 >= sy1:
+                continue
+            px = np.arange(sx0, sx1, dtype=np.float32)[None, :] + 0.5 - ax
+            py = np.arange(sy0, sy1, dtype=np.float32)[:, None] + 0.5 - ay
+            dx, dy = bx - ax, by - ay
+            length2 = dx * dx + dy * dy
+            t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0) if length2 > 0 else 0.0
+            dist = np.hypot(px - t * dx, py - t * dy)
+            seg = np.clip(hw + 0.5 - dist, 0.0, 1.0)
+            view = coverage[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0]
+            np.maximum(view, seg, out=view)
+        self.blend(x0, y0, coverage, color)
+
+    def disc(self, cx: float, cy: float, radius: float, color: Color) -> None:
+        x0, y0 = int(math.floor(cx - radius - 1)), int(math.floor(cy - radius - 1))
+        size = int(math.ceil(2 * radius + 3))
+        px = np.arange(x0, x0 + size, dtype=np.float32)[None, :] + 0.5 - cx
+        py = np.arange(y0, y0 + size, dtype=np.float32)[:, None] + 0.5 - cy
+        self.blend(x0, y0, np.clip(radius + 0.5 - np.hypot(px, py), 0.0, 1.0), color)
+
+    def area(self, points: Sequence[Tuple[float, float]], base_y: float, color: Color) -> None:
+        """Fills between the polyline through `points` (x ascending) and the horizontal line `base_y`."""
+        if len(points) < 2:
+            return
+        xs = np.asarray([p[0] for p in points], dtype=np.float32)
+        ys = np.asarray([p[1] for p in points], dtype=np.float32)
+        cx0, cx1 = max(0, int(math.ceil(xs[0] - 0.5))), min(self.w, int(math.floor(xs[-1] - 0.5)) + 1)
+        if cx0 >= cx1:
+            return
+        edge = np.interp(np.arange(cx0, cx1, dtype=np.float32) + 0.5, xs, ys)
+        top = max(0, int(math.floor(min(edge.min(), base_y))))
+        bottom = min(self.h, int(math.ceil(max(edge.max(), base_y))) + 1)
+        if top >= bottom:
+            return
+        rows = np.arange(top, bottom, dtype=np.float32)[:, None] + 0.5
+        lo, hi = np.minimum(edge, base_y)[None, :], np.maximum(edge, base_y)[None, :]
+        self.blend(cx0, top, ((rows >= lo) & (rows <= hi)).astype(np.float32), color)
+
+    def to_rgb8(self) -> np.ndarray:
+        return np.clip(np.rint(self.px), 0, 255).astype(np.uint8)
+
+
+def encode_png(rgb: np.ndarray) -> bytes:
+    """PNG bytes for an (height, width, 3) uint8 array, rows filtered with the PNG "Up" filter."""
+    height, width, _ = rgb.shape
+    rows = rgb.reshape(height, width * 3)
+    filtered = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    filtered[:, 0] = 2
+    filtered[0, 1:] = rows[0]
+    filtered[1:, 1:] = rows[1:] - rows[:-1]  # uint8 arithmetic wraps modulo 256, as the filter expects
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(filtered.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+def _nice_step(span: float, target: int) -> float:
+    raw = span / max(1, target)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    for multiple in (1, 2, 2.5, 5, 10):
+        if raw <= multiple * magnitude * 1.0001:
+            return multiple * magnitude
+    return 10 * magnitude
+
+
+class _Axis:
+    """A linear value axis: its range, tick values and tick labels."""
+
+    def __init__(self, values: List[float], opts: Dict[str, Any], target_ticks: int):
+        self.opts = opts
+        tick_opts = opts.get("ticks") or {}
+        lo = min(values) if values else 0.0
+        hi = max(values) if values else 1.0
+        if opts.get("beginAtZero"):
+            lo, hi = min(lo, 0.0), max(hi, 0.0)
+        suggested_min, suggested_max = _number(opts.get("suggestedMin")), _number(opts.get("suggestedMax"))
+        if suggested_min is not None:
+            lo = min(lo, suggested_min)
+        if suggested_max is not None:
+            hi = max(hi, suggested_max)
+        fixed_min, fixed_max = _number(opts.get("min")), _number(opts.get("max"))
+        if fixed_min is not None:
+            lo = fixed_min
+        if fixed_max is not None:
+            hi = fixed_max
+        if hi <= lo:
+            hi = lo + (abs(lo) * 0.1 or 1.0)
+
+        step = _number(tick_opts.get("stepSize"))
+        if step is None or step <= 0 or (hi - lo) / step > 50:
+            step = _nice_step(hi - lo, target_ticks)
+        if fixed_min is None:
+            lo = math.floor(lo / step + 1e-9) * step
+        if fixed_max is None:
+            hi = math.ceil(hi / step - 1e-9) * step
+        self.lo, self.hi, self.step = lo, hi, step
+
+        first = math.ceil(lo / step - 1e-9)
+        last = math.floor(hi / step + 1e-9)
+        self.ticks = [i * step for i in range(first, last + 1)]
+
+        callback = str(tick_opts.get("callback") or "")
+        fixed = re.search(r"toFixed\((\d+)\)", callback)
+        self.prefix = "$" if "$" in callback else ""
+        if fixed:
+            self.decimals = int(fixed.group(1))
+        else:
+            # As many decimals as the step needs: 2.5 -> 1, 0.25 -> 2, 100 -> 0.
+            self.decimals = next(d for d in range(7) if abs(round(step, d) - step) < step * 1e-6 or d == 6)
+
+    def label(self, value: float) -> str:
+        if abs(value) < self.step * 1e-6:
+            value = 0.0
+        return f"{self.prefix}{value:,.{self.decimals}f}"
+
+    def to_px(self, value: float, top: float, bottom: float) -> float:
+        return bottom - (value - self.lo) / (self.hi - self.lo) * (bottom - top)
+
+
+def _datasets(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    chart_type = str(config.get("type") or "line")
+    datasets = []
+    for i, ds in enumerate((config.get("data") or {}).get("datasets") or []):
+        kind = str(ds.get("type") or chart_type)
+        if kind not in ("line", "bar"):
+            raise ValueError(f"Unsupported chart type: {kind}")
+        border = parse_color(ds.get("borderColor"), _PALETTE[i % len(_PALETTE)])
+        fill_default = border[:3] + (0.5,) if kind == "bar" else border[:3] + (0.1,)
+        datasets.append({
+            "type": kind,
+            "label": _ascii(ds.get("label") or ""),
+            "values": [_number(v) for v in ds.get("data") or []],
+            "border": border,
+            "background": parse_color(ds.get("backgroundColor"), fill_default),
+            "border_width": _number(ds.get("borderWidth")) if _number(ds.get("borderWidth")) is not None else (3.0 if kind == "line" else 0.0),
+            "fill": ds.get("fill") not in (None, False, "false"),
+            "point_radius": _number(ds.get("pointRadius")) if _number(ds.get("pointRadius")) is not None else 3.0,
+            "axis": str(ds.get("yAxisID") or "y"),
+        })
+    return datasets
+
+
+def _runs(xs: List[float], values: List[Optional[float]], to_px) -> List[List[Tuple[float, float]]]:
+    """Consecutive non-null points as pixel polylines; a null breaks the line."""
+    runs: List[List[Tuple[float, float]]] = []
+    current: List[Tuple[float, float]] = []
+    for x, v in zip(xs, values):
+        if v is None:
+            if current:
+                runs.append(current)
+            current = []
+        else:
+            current.append((x, to_px(v)))
+    if current:
+        runs.append(current)
+    return runs
+
+
+def render_chart(config: Dict[str, Any], width: int, height: int, background: Any = "white") -> np.ndarray:
+    """Rasterizes a Chart.js `config` to an (height, width, 3) uint8 array."""
+    width, height = int(width), int(height)
+    if width < 64 or height < 64 or width * height > MAX_CHART_PIXELS:
+        raise ValueError(f"Unsupported chart size {width}x{height}")
+    canvas = _Canvas(width, height, parse_color(background, _NAMED_COLORS["white"]))
+    options = config.get("options") or {}
+    plugins = options.get("plugins") or {}
+    scales = options.get("scales") or {}
+    labels = [_ascii(label) for label in (config.get("data") or {}).get("labels") or []]
+    datasets = _datasets(config)
+    n = max([len(labels)] + [len(ds["values"]) for ds in datasets])
+    labels += [""] * (n - len(labels))
+
+    pad, tick_scale = 12, 2
+    tick_h = _GLYPH_H * tick_scale
+    top = pad
+
+    title = plugins.get("title") or {}
+    if title.get("display") and title.get("text"):
+        title_scale = max(1, round(float((title.get("font") or {}).get("size") or 12) / 7))
+        max_chars = max(1, (width - 2 * pad + title_scale) // (_GLYPH_ADVANCE * title_scale))
+        canvas.text(_ascii(title["text"])[:max_chars], width / 2, top, title_scale, _TITLE_COLOR, anchor="center")
+        top += _GLYPH_H * title_scale + 12
+
+    legend = plugins.get("legend") or {}
+    legend_items = [ds for ds in datasets if ds["label"]] if legend.get("display", True) else []
+    if legend_items:
+        box, gap = 12, 14
+        widths = [box + 6 + text_width(ds["label"], tick_scale) for ds in legend_items]
+        rows: List[List[int]] = [[]]
+        row_width = 0
+        for i, w in enumerate(widths):
+            if rows[-1] and row_width + gap + w > width - 2 * pad:
+                rows.append([])
+                row_width = 0
+            row_width += (gap if rows[-1] else 0) + w
+            rows[-1].append(i)
+        for row in rows:
+            total = sum(widths[i] for i in row) + gap * (len(row) - 1)
+            x = (width - total) / 2
+            for i in row:
+                ds = legend_items[i]
+                canvas.rect(x, top + 1, x + box, top + 1 + box, ds["background"])
+                if ds["border_width"] > 0 or ds["type"] == "line":
+                    _outline(canvas, x, top + 1, x + box, top + 1 + box, ds["border"])
+                canvas.text(ds["label"], x + box + 6, top + 1, tick_scale, _TEXT_COLOR)
+                x += widths[i] + gap
+            top += tick_h + 6
+        top += 4
+
+    plot_top = top + tick_h // 2
+    plot_bottom = height - pad - tick_h - 10
+    if plot_bottom - plot_top < 20:
+        raise ValueError("Chart too small for its title and legend")
+
+    target_ticks = max(2, min(10, int((plot_bottom - plot_top) / 40)))
+    axes: Dict[str, _Axis] = {}
+    for axis_id in dict.fromkeys(["y"] + [ds["axis"] for ds in datasets]):
+        values = [v for ds in datasets if ds["axis"] == axis_id for v in ds["values"] if v is not None]
+        axes[axis_id] = _Axis(values, scales.get(axis_id) or {}, target_ticks)
+
+    def side(axis_id: str) -> str:
+        return "right" if (scales.get(axis_id) or {}).get("position") == "right" else "left"
+
+    def gutter(axis_id: str) -> int:
+        axis = axes[axis_id]
+        label_w = max([text_width(axis.label(t), tick_scale) for t in axis.ticks] or [0])
+        axis_title = (axis.opts.get("title") or {})
+        title_w = tick_h + 6 if axis_title.get("display") and axis_title.get("text") else 0
+        return label_w + 8 + title_w
+
+    left_axes = [a for a in axes if side(a) == "left"]
+    right_axes = [a for a in axes if side(a) == "right"]
+    plot_left = pad + sum(gutter(a) for a in left_axes)
+    plot_right = width - pad - (sum(gutter(a) for a in right_axes) if right_axes else 8)
+    if plot_right - plot_left < 20:
+        raise ValueError("Chart too narrow for its axes")
+
+    # Grid lines first, then the axes' own ticks and titles.
+    for axis_id, axis in axes.items():
+        grid = axis.opts.get("grid") or {}
+        if grid.get("display", True):
+            grid_color = parse_color(grid.get("color"), _DEFAULT_GRID)
+            for t in axis.ticks:
+                y = int(round(axis.to_px(t, plot_top, plot_bottom)))
+                canvas.rect(plot_left, y, plot_right, y + 1, grid_color)
+    x_opts = scales.get("x") or {}
+    has_bars = any(ds["type"] == "bar" for ds in datasets)
+    plot_w = plot_right - plot_left
+    if has_bars:
+        band = plot_w / max(1, n)
+        xs = [plot_left + (i + 0.5) * band for i in range(n)]
+    else:
+        band = plot_w / max(1, n - 1)
+        xs = [plot_left + i * band for i in range(n)] if n > 1 else [plot_left + plot_w / 2]
+
+    label_w = max([text_width(label, tick_scale) for label in labels] or [0])
+    slots = max(1, int(plot_w // (label_w + 12))) if label_w else n
+    max_ticks = _number((x_opts.get("ticks") or {}).get("maxTicksLimit"))
+    if max_ticks:
+        slots = min(slots, int(max_ticks))
+    stride = max(1, math.ceil(n / max(1, slots)))
+    x_grid = x_opts.get("grid") or {}
+    for i in range(0, n, stride):
+        if x_grid.get("display", True):
+            canvas.rect(xs[i], plot_top, xs[i] + 1, plot_bottom, parse_color(x_grid.get("color"), _DEFAULT_GRID))
+        w = text_width(labels[i], tick_scale)
+        x = min(max(xs[i] - w / 2, 2), width - w - 2)
+        canvas.text(labels[i], x, plot_bottom + 10, tick_scale, _TEXT_COLOR)
+
+    canvas.rect(plot_left, plot_bottom, plot_right, plot_bottom + 1, _AXIS_COLOR)
+    edges = {"left": plot_left, "right": plot_right}
+    for axis_id in left_axes + right_axes:
+        axis, where = axes[axis_id], side(axis_id)
+        edge = edges[where]
+        canvas.rect(edge - (1 if where == "left" else 0), plot_top, edge + (0 if where == "left" else 1), plot_bottom, _AXIS_COLOR)
+        for t in axis.ticks:
+            y = axis.to_px(t, plot_top, plot_bottom) - tick_h / 2
+            if where == "left":
+                canvas.text(axis.label(t), edge - 6, y, tick_scale, _TEXT_COLOR, anchor="right")
+            else:
+                canvas.text(axis.label(t), edge + 6, y, tick_scale, _TEXT_COLOR)
+        axis_title = axis.opts.get("title") or {}
+        title_text = _ascii(axis_title.get("text") or "") if axis_title.get("display") else ""
+        w = gutter(axis_id)
+        if title_text:
+            center_y = (plot_top + plot_bottom) / 2 - text_width(title_text, tick_scale) / 2
+            if where == "left":
+                canvas.text(title_text, edge - w, center_y, tick_scale, _TEXT_COLOR, rotate=1)
+            else:
+                canvas.text(title_text, edge + w - tick_h, center_y, tick_scale, _TEXT_COLOR, rotate=-1)
+        edges[where] = edge - w if where == "left" else edge + w
+
+    bar_sets = [ds for ds in datasets if ds["type"] == "bar"]
+    for j, ds in enumerate(bar_sets):
+        axis = axes[ds["axis"]]
+        base = axis.to_px(min(max(0.0, axis.lo), axis.hi), plot_top, plot_bottom)
+        slot = band * 0.8 / len(bar_sets)
+        bar_w = max(1.0, slot * 0.9)
+        for i, v in enumerate(ds["values"]):
+            if v is None:
+                continue
+            center = plot_left + i * band + band * 0.1 + slot * (j + 0.5)
+            x0, x1 = center - bar_w / 2, center + bar_w / 2
+            y = min(max(axis.to_px(v, plot_top, plot_bottom), plot_top), plot_bottom)
+            y0, y1 = min(y, base), max(y, base)
+            canvas.rect(x0, y0, x1, y1, ds["background"])
+            bw = min(ds["border_width"], bar_w / 2, y1 - y0)
+            if bw >= 0.5:
+                end = y0 if y <= base else y1 - bw  # the edge away from the base
+                canvas.rect(x0, end, x1, end + bw, ds["border"])
+                canvas.rect(x0, y0, x0 + bw, y1, ds["border"])
+                canvas.rect(x1 - bw, y0, x1, y1, ds["border"])
+
+    for ds in datasets:
+        if ds["type"] != "line":
+            continue
+        axis = axes[ds["axis"]]
+
+        def to_px(v: float, axis: _Axis = axis) -> float:
+            return axis.to_px(v, plot_top, plot_bottom)
+
+        runs = _runs(xs, ds["values"], to_px)
+        if ds["fill"]:
+            base = to_px(min(max(0.0, axis.lo), axis.hi))
+            for run in runs:
+                canvas.area(run, base, ds["background"])
+        for run in runs:
+            if ds["border_width"] > 0:
+                canvas.polyline(run, ds["border_width"], ds["border"])
+            if ds["point_radius"] > 0:
+                for x, y in run:
+                    canvas.disc(x, y, ds["point_radius"], ds["border"])
+            elif len(run) == 1 and ds["border_width"] > 0:
+                canvas.disc(run[0][0], run[0][1], ds["border_width"], ds["border"])  # a lone point would vanish
+
+    return canvas.to_rgb8()
+
+
+def _outline(canvas: _Canvas, x0: float, y0: float, x1: float, y1: float, color: Color) -> None:
+    canvas.rect(x0, y0, x1, y0 + 1, color)
+    canvas.rect(x0, y1 - 1, x1, y1, color)
+    canvas.rect(x0, y0 + 1, x0 + 1, y1 - 1, color)
+    canvas.rect(x1 - 1, y0 + 1, x1, y1 - 1, color)
+
+
+def _render_png(config: Dict[str, Any], width: int, height: int, background: Any) -> bytes:
+    return encode_png(render_chart(config, width, height, background))
+
+
+_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def start_pool(processes: int) -> None:
+    """
+    Starts `processes` render workers. Call once from the main thread at startup,
+    before any other thread exists; `processes` <= 0 keeps rendering in-process.
+    """
+    global _pool
+    if processes <= 0:
+        return
+    with _pool_lock:
+        if _pool is not None:
+            return
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers=processes, mp_context=context)
+        # A fork-context pool launches all its workers on the first submit: do it now.
+        _pool.submit(int).result()
+    logger.info(f"Chart render pool started with {processes} process(es).")
+
+
+def shutdown_pool() -> None:
+    """Stops the render workers; later charts are rendered in-process."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_png(config: Dict[str, Any], width: int, height: int, background: Any = "white",
+               timeout: float = CHART_RENDER_TIMEOUT_S) -> bytes:
+    """
+    Blocking: PNG bytes for a Chart.js `config`. Runs in the render pool when
+    `start_pool` was called, otherwise in the calling thread. Raises ValueError for
+    configs it cannot draw and TimeoutError when a pooled render exceeds `timeout`.
+    """
+    pool = _pool
+    if pool is not None:
+        try:
+            future = pool.submit(_render_png, config, width, height, background)
+        except RuntimeError as e:
+            # BrokenProcessPool, or the pool was shut down under us (interpreter exit).
+            logger.warning(f"Chart render pool unavailable ({e}); rendering in-process.")
+            shutdown_pool()
+        else:
+            try:
+                return future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                # The pool is healthy, only this chart is slow: fail it rather than re-render in-process.
+                future.cancel()
+                raise TimeoutError(f"Chart render took longer than {timeout:.0f}s") from None
+            except BrokenProcessPool as e:
+                logger.warning(f"Chart render pool broke ({e}); rendering in-process.")
+                shutdown_pool()
+    return _render_png(config, width, height, background)
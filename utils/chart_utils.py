@@ -5,32 +5,153 @@ import logging
 import urllib.parse
 import requests
 import io
-from typing import Optional
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+import config
+from utils import chart_render
+from utils.api_utils import register_cache_clearer
+from utils.chart_cache import ChartCache
 
 logger = logging.getLogger(__name__)
 
 QUICKCHART_BASE_URL = "https://quickchart.io/chart"
 QUICKCHART_SHORT_URL = "https://quickchart.io/chart/create"
 
-def _create_chart_config(symbol: str, timespan_label: str, data_points: list):
+CHART_RENDERER_LOCAL = "local"
+CHART_RENDERER_QUICKCHART = "quickchart"
+
+# Rendered PNGs by chart content; a repeated chart costs neither a render nor a request.
+CHART_CACHE = ChartCache(
+    memory_bytes=config.CHART_CACHE_MEMORY_MB * 1024 * 1024,
+    directory=config.CHART_CACHE_DIR,
+    disk_bytes=config.CHART_CACHE_DISK_MB * 1024 * 1024,
+)
+register_cache_clearer(CHART_CACHE.clear)
+
+
+def _fetch_quickchart_image(chart_config: dict, chart_width: int, chart_height: int) -> Optional[io.BytesIO]:
+    try:
+        post_payload = {
+            "chart": chart_config,
+            "width": chart_width,
+            "height": chart_height,
+            "backgroundColor": "white",
+            "format": "png",
+        }
+        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
+        if response.status_code == 200:
+            return io.BytesIO(response.content)
+        # Try to avoid printing binary data if it is one
+        error_snippet = response.text[:200] if len(response.text) < 1000 else "Response too long/binary"
+        logger.error(f"QuickChart error: {response.status_code}. Partial Response: {error_snippet}")
+        return None
+    except Exception as e:
+        logger.error(f"Error fetching chart image from QuickChart: {e}")
+        return None
+
+
+def render_chart_image(chart_config: dict, chart_width: int, chart_height: int) -> Optional[io.BytesIO]:
+    """
+    Blocking: renders a Chart.js config to PNG bytes (io.BytesIO), or None on failure.
+
+    CHART_RENDERER picks the renderer per deployment: "local" (default) draws the chart
+    in the render pool (utils/chart_render.py); "quickchart" asks quickchart.io and falls
+    back to the local renderer when it fails. ALLOW_EXTERNAL_CHARTS=False always renders locally.
+    Results are served from CHART_CACHE when the same chart was rendered before.
+    """
+    renderer = str(getattr(config, "CHART_RENDERER", CHART_RENDERER_LOCAL) or CHART_RENDERER_LOCAL).lower()
+    if not getattr(config, "ALLOW_EXTERNAL_CHARTS", True):
+        renderer = CHART_RENDERER_LOCAL
+    key = CHART_CACHE.key(chart_config, chart_width, chart_height, renderer)
+    png = CHART_CACHE.get(key)
+    if png is not None:
+        return io.BytesIO(png)
+
+    if renderer == CHART_RENDERER_QUICKCHART:
+        image = _fetch_quickchart_image(chart_config, chart_width, chart_height)
+        if image is not None:
+            CHART_CACHE.put(key, image.getvalue())
+            return image
+        logger.warning("QuickChart unavailable; rendering the chart locally.")
+        # The fallback is a local render: cache it as one, so QuickChart is retried next time.
+        key = CHART_CACHE.key(chart_config, chart_width, chart_height, CHART_RENDERER_LOCAL)
+        png = CHART_CACHE.get(key)
+        if png is not None:
+            return io.BytesIO(png)
+    try:
+        png = chart_render.render_png(chart_config, chart_width, chart_height)
+    except Exception as e:
+        logger.error(f"Error rendering chart locally: {e}", exc_info=True)
+        return None
+    CHART_CACHE.put(key, png)
+    return io.BytesIO(png)
+
+
+# An N px wide chart cannot show more than about N distinct x positions.
+POINTS_PER_PIXEL = 1.0
+DEFAULT_CHART_WIDTH = 800
+
+
+def max_points_for_width(chart_width: int) -> int:
+    """Most points worth sending for a chart `chart_width` pixels wide."""
+    return max(3, int(chart_width * POINTS_PER_PIXEL))
+
+
+def downsample_indices(series: Sequence[Sequence[Optional[float]]], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: indices of at most `threshold` points that keep the
+    visual shape of `series` (one or more value lists sharing the same x positions;
+    None marks a gap). The first and last points are always kept. With several series
+    a candidate's triangle areas are summed, so one index set keeps every dataset
+    aligned with its labels. A bucket with no values at all keeps a None, so its gap
+    still breaks the line.
     """
-    Helper to create the QuickChart config dictionary.
+    n = len(series[0]) if series else 0
+    if threshold < 3 or n <= threshold:
+        return list(range(n))
+
+    ys = np.array([[np.nan if v is None else float(v) for v in s] for s in series], dtype=float)
+    valid = ~np.isnan(ys)
+    filled = np.where(valid, ys, 0.0)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = min(int((i + 1) * every) + 1, n - 1)
+        next_end = min(int((i + 2) * every) + 1, n)
+        # Average of the next bucket (the last bucket's "next" is the final point).
+        counts = valid[:, end:next_end].sum(axis=1)
+        cy = np.divide(filled[:, end:next_end].sum(axis=1), counts,
+                       out=np.full(len(series), np.nan), where=counts > 0)
+        cx = (end + next_end - 1) / 2.0
+        bx = np.arange(start, end, dtype=float)
+        ay = ys[:, a:a + 1]
+        area = np.abs((a - cx) * (ys[:, start:end] - ay) - (a - bx) * (cy[:, None] - ay))
+        area = np.nan_to_num(area, nan=0.0).sum(axis=0)
+        area[~valid[:, start:end].any(axis=0)] = -1.0  # prefer points that carry a value
+        a = start + int(np.argmax(area))
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+
+def _create_chart_config(symbol: str, timespan_label: str, data_points: list, max_points: Optional[int] = None):
+    """
+    Helper to create the Chart.js config dictionary.
+    Long series are downsampled to `max_points` (default: one per pixel of a default-width chart).
     """
     if not data_points:
         return None
-    
-    # Auto-downsample if too many points to prevent payload issues
-    # QuickChart can handle thousands, but for a simple static image, 500 is plenty of resolution
-    # and keeps payload small.
-    MAX_POINTS = 500
-    if len(data_points) > MAX_POINTS:
-        step = len(data_points) // MAX_POINTS + 1
-        # Keep the last point (most recent) always
-        downsampled_points = data_points[::step]
-        if data_points[-1] not in downsampled_points:
-            downsampled_points.append(data_points[-1])
-        data_points = downsampled_points
-        # print(f"Downsampled chart data for {symbol} from {len(data_points) * step} to {len(data_points)} points.")
+
+    # Keep payload size and render time bounded however long the history is.
+    if max_points is None:
+        max_points = max_points_for_width(DEFAULT_CHART_WIDTH)
+    if len(data_points) > max_points:
+        keep = downsample_indices([[dp[1] for dp in data_points]], max_points)
+        data_points = [data_points[i] for i in keep]
 
     labels = []
     for dp in data_points:
@@ -125,41 +246,21 @@ def _create_chart_config(symbol: str, timespan_label: str, data_points: list):
 def get_stock_chart_image(symbol: str, timespan_label: str, data_points: list, chart_width: int = 800, chart_height: int = 500):
     """
     Generates a stock chart image and returns it as bytes (io.BytesIO).
-    Uses QuickChart.io POST endpoint to retrieve the image directly.
+    Rendered by render_chart_image (locally unless CHART_RENDERER=quickchart).
     """
-    chart_config = _create_chart_config(symbol, timespan_label, data_points)
+    chart_config = _create_chart_config(symbol, timespan_label, data_points, max_points_for_width(chart_width))
     if not chart_config:
         logger.warning(f"Error generating chart config for {symbol}: No data points.")
         return None
 
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png"
-        }
-        
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        else:
-            # Try to avoid printing binary data if it is one
-            error_snippet = response.text[:200] if len(response.text) < 1000 else "Response too long/binary"
-            logger.error(f"QuickChart error: {response.status_code}. Partial Response: {error_snippet}")
-            return None
-
-    except Exception as e:
-        logger.error(f"Error fetching chart image: {e}")
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 def generate_stock_chart_url(symbol: str, timespan_label: str, data_points: list, chart_width: int = 800, chart_height: int = 500):
     """
     Generates a stock chart image URL using QuickChart.io.
     Kept for backward compatibility, but prefer get_stock_chart_image for better reliability.
     """
-    chart_config = _create_chart_config(symbol, timespan_label, data_points)
+    chart_config = _create_chart_config(symbol, timespan_label, data_points, max_points_for_width(chart_width))
     if not chart_config:
         return None
 
@@ -271,26 +372,12 @@ def get_weekly_reading_chart_image(
 ):
     """
     Generates a weekly reading bar chart image and returns it as bytes (io.BytesIO).
-    Uses QuickChart.io POST endpoint to retrieve the image directly.
     """
     chart_config = _create_weekly_reading_chart_config(title, labels, values, unit=unit)
     if not chart_config:
         return None
 
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 
 def _create_habit_daily_chart_config(title: str, labels: list, values: list):
@@ -360,20 +447,7 @@ def get_habit_daily_chart_image(
     chart_config = _create_habit_daily_chart_config(title, labels, values)
     if not chart_config:
         return None
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 
 def _create_habit_weekday_chart_config(title: str, labels: list, values: list):
@@ -443,38 +517,35 @@ def get_habit_weekday_chart_image(
     chart_config = _create_habit_weekday_chart_config(title, labels, values)
     if not chart_config:
         return None
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 
-def _create_mood_daily_chart_config(title: str, labels: list, mood_values: list, energy_values: Optional[list] = None):
+def _create_mood_daily_chart_config(
+    title: str,
+    labels: list,
+    mood_values: list,
+    energy_values: Optional[list] = None,
+    max_points: Optional[int] = None,
+):
     """
     Line chart for mood (and optional energy) over time.
     Uses `null` values to represent gaps (breaks the line).
+    Long ranges are downsampled to `max_points`, keeping both series on the same labels.
     """
     if not labels or mood_values is None or len(labels) != len(mood_values):
         return None
     if energy_values is not None and len(energy_values) != len(labels):
         return None
 
-    # Cap to keep payload small
-    if len(labels) > 400:
-        labels = labels[-400:]
-        mood_values = mood_values[-400:]
+    if max_points is None:
+        max_points = max_points_for_width(DEFAULT_CHART_WIDTH)
+    if len(labels) > max_points:
+        series = [mood_values] + ([energy_values] if energy_values is not None else [])
+        keep = downsample_indices(series, max_points)
+        labels = [labels[i] for i in keep]
+        mood_values = [mood_values[i] for i in keep]
         if energy_values is not None:
-            energy_values = energy_values[-400:]
+            energy_values = [energy_values[i] for i in keep]
 
     datasets = [
         {
@@ -541,23 +612,12 @@ def get_mood_daily_chart_image(
     """
     Generates a mood line chart image (PNG) and returns it as bytes (io.BytesIO).
     """
-    chart_config = _create_mood_daily_chart_config(title, labels, mood_values, energy_values)
+    chart_config = _create_mood_daily_chart_config(
+        title, labels, mood_values, energy_values, max_points=max_points_for_width(chart_width)
+    )
     if not chart_config:
         return None
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 
 def _create_todo_daily_created_done_chart_config(title: str, labels: list, created: list, done: list):
@@ -638,20 +698,7 @@ def get_todo_daily_created_done_chart_image(
     chart_config = _create_todo_daily_created_done_chart_config(title, labels, created, done)
     if not chart_config:
         return None
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
 
 
 def _create_todo_weekday_done_chart_config(title: str, labels: list, values: list):
@@ -717,17 +764,4 @@ def get_todo_weekday_done_chart_image(
     chart_config = _create_todo_weekday_done_chart_config(title, labels, values)
     if not chart_config:
         return None
-    try:
-        post_payload = {
-            "chart": chart_config,
-            "width": chart_width,
-            "height": chart_height,
-            "backgroundColor": "white",
-            "format": "png",
-        }
-        response = requests.post(QUICKCHART_BASE_URL, json=post_payload, timeout=30)
-        if response.status_code == 200:
-            return io.BytesIO(response.content)
-        return None
-    except Exception:
-        return None
+    return render_chart_image(chart_config, chart_width, chart_height)
@@ -0,0 +1,162 @@
+# utils/fx.py
+"""
+In-memory FX rates backed by the ``currency_rates`` table.
+
+Portfolio commands used to quote each currency pair from Yahoo Finance on
+every invocation. ``FxService`` instead keeps one rate per currency against
+the pivot currencies (``USDPLN``: PLN per 1 USD, ``EURGBP``: GBP per 1 EUR),
+refreshed together in one batched Yahoo download by the Stocks cog's
+``refresh_fx_rates`` task and persisted to ``currency_rates`` so a restart
+starts warm. ``rate()`` answers from memory only:
+
+* a stored pair, or the inverse of one;
+* otherwise a cross rate triangulated through USD, then EUR
+  (PLN->GBP = USDGBP / USDPLN), bridging the pivots with USDEUR when the two
+  currencies are quoted against different ones.
+
+A currency the service has never seen is fetched once through ``ensure()``
+(a blocking call, run it in an executor) and is part of every later refresh.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from api_clients import yahoo_finance_client
+
+logger = logging.getLogger(__name__)
+
+# Currencies /set_portfolio_currency accepts; always part of a refresh.
+FX_BASE_CURRENCIES = ("USD", "EUR", "PLN", "GBP", "CAD", "JPY", "AUD")
+# Rates are stored against these; cross rates are triangulated through them, in order.
+FX_PIVOTS = ("USD", "EUR")
+
+
+def _pair(base: str, quote: str) -> str:
+    return f"{base}{quote}"
+
+
+def _yahoo_symbol(pair: str) -> str:
+    # Yahoo convention: BaseQuote=X. EURUSD=X means 1 EUR = x USD.
+    return f"{pair}=X"
+
+
+def _quote_price(quote) -> Optional[float]:
+    try:
+        price = float((quote or {}).get('05. price'))
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+class FxService:
+    """Spot FX rates served from memory, refreshed in batches and persisted via ``db_manager`` (optional)."""
+
+    def __init__(self, db_manager=None):
+        self.db_manager = db_manager
+        self._lock = threading.Lock()
+        self._rates: Dict[str, float] = {}
+        self._currencies: Set[str] = set(FX_BASE_CURRENCIES)
+
+    def load(self) -> int:
+        """Loads the persisted rates into memory. Returns the number of pairs loaded."""
+        if self.db_manager is None:
+            return 0
+        stored = self.db_manager.get_all_currency_rates()
+        with self._lock:
+            for pair, row in stored.items():
+                if len(pair) == 6 and row.get("rate"):
+                    self._rates[pair] = float(row["rate"])
+                    self._currencies.update((pair[:3], pair[3:]))
+        logger.info(f"FX: loaded {len(stored)} stored rate(s).")
+        return len(stored)
+
+    def currencies(self) -> Set[str]:
+        with self._lock:
+            return set(self._currencies)
+
+    def _direct(self, base: str, quote: str) -> Optional[float]:
+        rate = self._rates.get(_pair(base, quote))
+        if rate:
+            return rate
+        inverse = self._rates.get(_pair(quote, base))
+        if inverse:
+            return 1.0 / inverse
+        return None
+
+    def _leg(self, pivot: str, currency: str) -> Optional[float]:
+        """`currency` per 1 `pivot`, directly or through the other pivot (USD->EUR->SEK)."""
+        if currency == pivot:
+            return 1.0
+        direct = self._direct(pivot, currency)
+        if direct:
+            return direct
+        for other in FX_PIVOTS:
+            if other != pivot:
+                to_other = self._direct(pivot, other)
+                from_other = self._direct(other, currency)
+                if to_other and from_other:
+                    return to_other * from_other
+        return None
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Units of `to_currency` per 1 `from_currency` from memory, or None if it cannot be derived."""
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        if from_currency == to_currency:
+            return 1.0
+        with self._lock:
+            direct = self._direct(from_currency, to_currency)
+            if direct:
+                return direct
+            for pivot in FX_PIVOTS:
+                from_leg = self._leg(pivot, from_currency)
+                to_leg = self._leg(pivot, to_currency)
+                if from_leg and to_leg:
+                    return to_leg / from_leg
+        return None
+
+    def refresh(self, currencies: Optional[Iterable[str]] = None) -> int:
+        """
+        Blocking: re-quotes every known currency (plus `currencies`) against USD in one
+        batched download, retries the misses against EUR, then persists the batch.
+        Returns the number of rates updated.
+        """
+        with self._lock:
+            self._currencies.update(c.upper() for c in (currencies or []) if c)
+            wanted = sorted(self._currencies)
+
+        fetched: Dict[str, float] = {}
+        missing: List[str] = wanted
+        for pivot in FX_PIVOTS:
+            pairs = [_pair(pivot, c) for c in missing if c != pivot]
+            if not pairs:
+                break
+            quotes = yahoo_finance_client.get_stock_prices_batch([_yahoo_symbol(p) for p in pairs])
+            for pair in pairs:
+                price = _quote_price(quotes.get(_yahoo_symbol(pair)))
+                if price:
+                    fetched[pair] = price
+            covered = {pivot} | {pair[3:] for pair in fetched}
+            missing = [c for c in missing if c not in covered]
+
+        if not fetched:
+            logger.warning(f"FX: refresh returned no rates for {wanted}.")
+            return 0
+        with self._lock:
+            self._rates.update(fetched)
+        if missing:
+            logger.warning(f"FX: no rate for {missing} against any pivot.")
+        if self.db_manager is not None and not self.db_manager.update_currency_rates(fetched):
+            logger.warning("FX: refreshed rates could not be persisted.")
+        logger.info(f"FX: refreshed {len(fetched)} rate(s).")
+        return len(fetched)
+
+    def ensure(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Blocking: `rate()`, refreshing once to learn unseen currencies on a miss."""
+        rate = self.rate(from_currency, to_currency)
+        if rate is None:
+            self.refresh([from_currency, to_currency])
+            rate = self.rate(from_currency, to_currency)
+            if rate is None:
+                logger.warning(f"FX: could not resolve {from_currency.upper()}->{to_currency.upper()}.")
+        return rate
@@ -0,0 +1,166 @@
+# utils/news.py
+"""
+Stock news aggregation for /stock_news.
+
+``NewsAggregator.get`` asks Google News RSS and Yahoo Finance concurrently and
+merges their headlines. Two headlines count as the same story when they share
+a canonical URL (lowercased host without ``www.``, no fragment or ``utm_*``
+parameters, no trailing slash) or their normalized titles are at least
+``TITLE_SIMILARITY`` alike. Results are newest first.
+
+Each provider call goes through a ``ProviderLimiter``, which spaces call
+starts with ``asyncio.sleep`` instead of sleeping in an executor thread. Each
+symbol has a cache entry:
+
+* younger than ``NEWS_FRESH_S``: served as is;
+* younger than ``NEWS_STALE_S``: served as is while one background refresh
+  runs;
+* older, or missing: refreshed before answering.
+
+A refresh merges the new headlines into the cached ones instead of replacing
+them, so a provider that fails for one refresh does not drop its stories.
+Concurrent requests for one symbol share a single refresh.
+"""
+
+import asyncio
+import difflib
+import logging
+import re
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from api_clients import google_news_rss_client, yahoo_finance_client
+from utils.portfolio import ProviderLimiter
+
+logger = logging.getLogger(__name__)
+
+NEWS_FRESH_S = 10 * 60
+NEWS_STALE_S = 60 * 60
+NEWS_CACHE_ITEMS = 10      # headlines fetched per provider and kept per symbol
+TITLE_SIMILARITY = 0.85    # difflib ratio above which two normalized titles are one story
+
+# provider -> (max concurrent calls, min seconds between call starts)
+NEWS_PROVIDER_LIMITS: Dict[str, Tuple[int, float]] = {
+    "google_news": (2, 1.0),
+    "yahoo_finance": (4, 0.0),
+}
+# Merge order: earlier providers win when two headlines are the same story.
+NEWS_PROVIDERS: Dict[str, Callable[[str, int], Optional[List[Dict[str, Any]]]]] = {
+    "google_news": google_news_rss_client.fetch_stock_news,
+    "yahoo_finance": yahoo_finance_client.get_stock_news,
+}
+
+_TRACKING_PARAM_PREFIXES = ("utm_",)
+
+
+def canonical_url(url: str) -> str:
+    """Comparable form of an article URL: lowercased host without ``www.``, no tracking params or fragment."""
+    if not url:
+        return ""
+    parts = urllib.parse.urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urllib.parse.urlencode([
+        (k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    ])
+    return urllib.parse.urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def normalize_title(title: str, source: str = "") -> str:
+    """Lowercased words of a headline, without the " - Publisher" suffix Google News appends."""
+    title = (title or "").strip()
+    if source and title.endswith(f" - {source}"):
+        title = title[: -len(source) - 3]
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def _same_title(a: str, b: str) -> bool:
+    if not a or not b:
+        return False
+    return a == b or difflib.SequenceMatcher(None, a, b).ratio() >= TITLE_SIMILARITY
+
+
+def merge_headlines(batches: Iterable[Optional[List[Dict[str, Any]]]], limit: int) -> List[Dict[str, Any]]:
+    """Concatenates article lists, drops repeats of one story, then keeps the newest `limit`."""
+    kept: List[Dict[str, Any]] = []
+    urls = set()
+    titles: List[str] = []
+    for batch in batches:
+        for article in batch or []:
+            url = canonical_url(article.get("url") or "")
+            title = normalize_title(article.get("title") or "", article.get("source") or "")
+            if (url and url in urls) or any(_same_title(title, seen) for seen in titles):
+                continue
+            if url:
+                urls.add(url)
+            titles.append(title)
+            kept.append(article)
+    # Providers share the "%Y-%m-%d %H:%M:%S" format; anything else sorts last. The sort is stable.
+    kept.sort(key=lambda a: a.get("time_published") if re.match(r"\d{4}-\d{2}-\d{2}", str(a.get("time_published") or "")) else "",
+              reverse=True)
+    return kept[:limit]
+
+
+class NewsAggregator:
+    """Per-symbol cached, deduplicated headlines from every news provider. One instance per cog."""
+
+    def __init__(self, loop, limiter: Optional[ProviderLimiter] = None,
+                 providers: Optional[Dict[str, Callable[[str, int], Optional[List[Dict[str, Any]]]]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.loop = loop
+        self.limiter = limiter or ProviderLimiter(NEWS_PROVIDER_LIMITS)
+        self.providers = providers if providers is not None else dict(NEWS_PROVIDERS)
+        self._clock = clock
+        self._cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._refreshing: Dict[str, asyncio.Future] = {}
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    async def get(self, symbol: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """Up to `limit` recent headlines for `symbol`, newest first, or None if no provider has any."""
+        sym = str(symbol or "").strip().upper()
+        if not sym:
+            return None
+        limit = max(1, min(NEWS_CACHE_ITEMS, int(limit)))
+
+        entry = self._cache.get(sym)
+        age = self._clock() - entry[0] if entry else None
+        if entry is None or age >= NEWS_STALE_S:
+            # Shielded: a cancelled command must not cancel a refresh other callers share.
+            items = await asyncio.shield(self._refresh(sym))
+        else:
+            items = entry[1]
+            if age >= NEWS_FRESH_S:
+                self._refresh(sym)  # stale-while-revalidate; the refresh outlives this call
+        return list(items[:limit]) or None
+
+    def _refresh(self, sym: str) -> "asyncio.Future":
+        """The symbol's in-flight refresh, starting one if none is running."""
+        future = self._refreshing.get(sym)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_merge(sym))
+            self._refreshing[sym] = future
+            future.add_done_callback(lambda _f: self._refreshing.pop(sym, None))
+        return future
+
+    async def _fetch_one(self, provider: str, sym: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            result = await self.limiter.run(self.loop, provider, self.providers[provider], sym, NEWS_CACHE_ITEMS)
+        except Exception as e:
+            logger.warning(f"News: {provider} failed for {sym}: {e}")
+            return None
+        return result if isinstance(result, list) else None
+
+    async def _fetch_and_merge(self, sym: str) -> List[Dict[str, Any]]:
+        results = await asyncio.gather(*[self._fetch_one(provider, sym) for provider in self.providers])
+        previous = self._cache.get(sym, (0.0, []))[1]
+        if not any(results):
+            logger.info(f"News: no provider returned headlines for {sym}; keeping {len(previous)} cached.")
+            return previous
+        items = merge_headlines(list(results) + [previous], NEWS_CACHE_ITEMS)
+        self._cache[sym] = (self._clock(), items)
+        return items
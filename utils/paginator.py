@@ -1,7 +1,13 @@
 
+import asyncio
+import logging
+import typing
+
 import discord
 import math
 
+logger = logging.getLogger(__name__)
+
 class BasePaginatorView(discord.ui.View):
     message: discord.Message | None = None
 
@@ -17,6 +23,10 @@ class BasePaginatorView(discord.ui.View):
         else:
             self.total_pages = math.ceil(len(self.items) / self.items_per_page)
 
+        # Per-view cache of page data loaded via _fetch_page_data, plus in-flight (pre)fetches.
+        self._page_data: typing.Dict[int, typing.Any] = {}
+        self._page_tasks: typing.Dict[int, asyncio.Task] = {}
+
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user.id != self.user_id:
             await interaction.response.send_message("This isn't for you!", ephemeral=True)
@@ -46,6 +56,56 @@ class BasePaginatorView(discord.ui.View):
         """
         raise NotImplementedError("Subclasses must implement _get_embed_for_current_page")
 
+    def page_items(self, page: int) -> list:
+        start_index = page * self.items_per_page
+        return self.items[start_index:start_index + self.items_per_page]
+
+    async def _fetch_page_data(self, page: int) -> typing.Any:
+        """
+        Optional hook: load whatever remote data page `page` needs (API details etc.).
+        The result is cached for the lifetime of the view and prefetched for adjacent pages,
+        so subclasses should read it via `await self.get_page_data(page)` when rendering.
+        """
+        return None
+
+    async def get_page_data(self, page: int) -> typing.Any:
+        """Cached page data, joining an in-flight prefetch instead of fetching twice."""
+        if page in self._page_data:
+            return self._page_data[page]
+        task = self._page_tasks.get(page)
+        if task is None:
+            task = self._start_page_fetch(page)
+        return await asyncio.shield(task)
+
+    def _start_page_fetch(self, page: int) -> asyncio.Task:
+        async def _load():
+            try:
+                data = await self._fetch_page_data(page)
+                self._page_data[page] = data
+                return data
+            finally:
+                self._page_tasks.pop(page, None)
+
+        task = asyncio.create_task(_load())
+        self._page_tasks[page] = task
+        return task
+
+    def invalidate_page(self, page: int) -> None:
+        """Drops cached data for `page` (e.g. after a partial failure) so it is fetched again."""
+        self._page_data.pop(page, None)
+
+    def prefetch_adjacent_pages(self) -> None:
+        """Speculatively loads the previous/next page in the background while the user reads."""
+        for page in (self.current_page + 1, self.current_page - 1):
+            if 0 <= page < self.total_pages and page not in self._page_data and page not in self._page_tasks:
+                task = self._start_page_fetch(page)
+                task.add_done_callback(self._log_prefetch_failure)
+
+    @staticmethod
+    def _log_prefetch_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Paginator prefetch failed: {task.exception()}")
+
     async def start(self, ctx, ephemeral: bool = True):
         self._update_button_states()
         initial_embed = await self._get_embed_for_current_page()
@@ -59,11 +119,13 @@ class BasePaginatorView(discord.ui.View):
                  self.message = await ctx.send(embed=initial_embed, view=self)
         else:
             self.message = await ctx.send(embed=initial_embed, view=self)
+        self.prefetch_adjacent_pages()
 
     async def _edit_message(self, interaction: discord.Interaction):
         embed = await self._get_embed_for_current_page()
         await interaction.response.edit_message(embed=embed, view=self)
         self.message = interaction.message
+        self.prefetch_adjacent_pages()
 
     @discord.ui.button(label="⏪ First", style=discord.ButtonStyle.grey, row=1)
     async def first_page_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -88,6 +150,10 @@ class BasePaginatorView(discord.ui.View):
         await self._edit_message(interaction)
 
     async def on_timeout(self):
+        for task in list(self._page_tasks.values()):
+            task.cancel()
+        self._page_tasks.clear()
+
         if self.message:
             try:
                 # Try to get the last embed state
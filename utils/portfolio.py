@@ -0,0 +1,325 @@
+# utils/portfolio.py
+"""
+Portfolio valuation (/my_portfolio) and history (/portfolio_chart) engines.
+
+Holdings are valued concurrently instead of one symbol at a time:
+
+* each distinct symbol is quoted once and each distinct currency pair is
+  resolved once, however many holdings share them;
+* FX conversions are served from an ``FxService`` (``utils.fx``), which only
+  goes to the network for a currency it has never seen;
+* quotes come from the hedged ``QuoteRouter`` and every upstream call goes
+  through a ``ProviderLimiter`` (per-provider concurrency cap + minimum
+  spacing), so Yahoo Finance is queried in parallel while Alpha Vantage stays
+  throttled;
+* ``value()`` reports partial valuations as holdings resolve and gives up on
+  stragglers after ``timeout`` seconds, marking them as pending.
+
+``PortfolioHistoryEngine`` fetches every price and FX series concurrently and
+aligns them on one date index with array forward-fill (numpy). Both engines
+total holdings through ``holdings_value``.
+
+Blocking API clients run in the loop's default executor, like everywhere else in the cogs.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api_clients import yahoo_finance_client
+from utils.fx import FxService
+from utils.quote_router import PROVIDER_LABELS, QUOTE_ROUTER, QuoteRouter
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_FETCH_TIMEOUT_S = 20.0
+
+# provider -> (max concurrent calls, min seconds between call starts)
+DEFAULT_PROVIDER_LIMITS: Dict[str, Tuple[int, float]] = {
+    "yahoo_finance": (4, 0.0),
+    "alpha_vantage": (1, 0.0),  # pacing comes from alpha_vantage_client.QUOTA
+}
+
+
+class ProviderLimiter:
+    """Caps concurrent calls per provider and spaces out call starts for quota-limited ones."""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.limits = dict(limits or DEFAULT_PROVIDER_LIMITS)
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._spacing_locks: Dict[str, asyncio.Lock] = {}
+        self._last_start: Dict[str, float] = {}
+
+    async def run(self, loop, provider: str, func: Callable, *args) -> Any:
+        concurrency, spacing = self.limits.get(provider, (1, 0.0))
+        semaphore = self._semaphores.setdefault(provider, asyncio.Semaphore(max(1, concurrency)))
+        async with semaphore:
+            if spacing > 0:
+                async with self._spacing_locks.setdefault(provider, asyncio.Lock()):
+                    wait = self._last_start.get(provider, float("-inf")) + spacing - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    self._last_start[provider] = time.monotonic()
+            return await loop.run_in_executor(None, func, *args)
+
+
+def _quote_price(quote: Any) -> Optional[float]:
+    if not isinstance(quote, dict) or "error" in quote or "05. price" not in quote:
+        return None
+    try:
+        return float(quote["05. price"])
+    except (ValueError, TypeError):
+        return None
+
+
+def holdings_value(quantities: Any, prices: Any, fx_rates: Any) -> np.ndarray:
+    """
+    Value of each row of holdings: sum over the last axis of quantity * price * fx.
+    Works for one snapshot (1-D arrays -> scalar array) and for a dates x holdings matrix.
+    """
+    return np.sum(np.asarray(quantities, dtype=float) * np.asarray(prices, dtype=float) * np.asarray(fx_rates, dtype=float), axis=-1)
+
+
+def _series_arrays(series: List[Tuple[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """("YYYY-MM-DD", value) pairs -> (sorted datetime64[D] dates, float values)."""
+    if not series:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=float)
+    dates = np.array([point[0] for point in series], dtype="datetime64[D]")
+    values = np.fromiter((point[1] for point in series), dtype=float, count=len(series))
+    order = np.argsort(dates, kind="stable")
+    return dates[order], values[order]
+
+
+def forward_fill_on(index: np.ndarray, dates: np.ndarray, values: np.ndarray, before_first: float) -> np.ndarray:
+    """
+    Values of a sorted (dates, values) series at every date in `index`, carrying the
+    last known value forward; dates before the first point get `before_first`.
+    """
+    if not len(dates):
+        return np.full(len(index), before_first, dtype=float)
+    positions = np.searchsorted(dates, index, side="right") - 1
+    return np.where(positions >= 0, values[np.clip(positions, 0, None)], before_first)
+
+
+def align_portfolio_history(quantities: Dict[str, float], price_series: Dict[str, List[Tuple[str, float]]],
+                            fx_series: Dict[str, Any]) -> List[Tuple[str, float]]:
+    """
+    Daily portfolio value on the union of all price dates.
+
+    `fx_series` maps a symbol to a (date, rate) series or a constant rate. Prices
+    are forward-filled (0 before a symbol's first bar), rates forward-filled (1.0
+    before the first FX point), and days whose total is not positive are dropped.
+    """
+    symbols = [sym for sym in quantities if price_series.get(sym)]
+    if not symbols:
+        return []
+    price_arrays = {sym: _series_arrays(price_series[sym]) for sym in symbols}
+    fx_arrays: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}  # FX series are shared by symbols, convert each once
+    index = np.unique(np.concatenate([price_arrays[sym][0] for sym in symbols]))
+
+    prices = np.empty((len(index), len(symbols)))
+    rates = np.empty((len(index), len(symbols)))
+    for col, sym in enumerate(symbols):
+        prices[:, col] = forward_fill_on(index, *price_arrays[sym], 0.0)
+        fx = fx_series.get(sym)
+        if isinstance(fx, list):
+            if id(fx) not in fx_arrays:
+                fx_arrays[id(fx)] = _series_arrays(fx)
+            rates[:, col] = forward_fill_on(index, *fx_arrays[id(fx)], 1.0)
+        else:
+            rates[:, col] = float(fx or 1.0)
+
+    totals = holdings_value([quantities[sym] for sym in symbols], prices, rates)
+    keep = totals > 0
+    return list(zip(index[keep].astype(str).tolist(), totals[keep].tolist()))
+
+
+class PortfolioHistoryEngine:
+    """
+    Builds the /portfolio_chart series: every symbol's currency, every price series and
+    every distinct FX pair are fetched concurrently, then aligned in one vectorized pass.
+
+    `fetch_daily_closes(symbol, start_date)` is the caller's history source (the
+    Stocks cog passes its bar-store-backed fetcher). A pair without history is
+    converted at the `fx` service's current rate.
+    """
+
+    def __init__(self, loop, fetch_daily_closes: Callable[[str, date], Awaitable[Optional[List[Tuple[str, float]]]]],
+                 fx: Optional[FxService] = None):
+        self.loop = loop
+        self.fetch_daily_closes = fetch_daily_closes
+        self.fx = fx or FxService()
+
+    async def build(self, holdings: List[Dict[str, Any]], pref_currency: str, start_date: date) -> List[Tuple[str, float]]:
+        quantities: Dict[str, float] = {}
+        for holding in holdings:
+            symbol = holding["symbol"].upper()
+            quantities[symbol] = quantities.get(symbol, 0.0) + float(holding["quantity"])
+        symbols = list(quantities)
+
+        currencies = await asyncio.gather(*[
+            self.loop.run_in_executor(None, yahoo_finance_client.get_symbol_currency, symbol) for symbol in symbols
+        ])
+        currency_by_symbol = {symbol: (currency or "USD") for symbol, currency in zip(symbols, currencies)}
+        pairs = sorted({f"{currency}{pref_currency}=X" for currency in currency_by_symbol.values() if currency != pref_currency})
+
+        keys = symbols + pairs
+        results = await asyncio.gather(*[self.fetch_daily_closes(key, start_date) for key in keys], return_exceptions=True)
+        series = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception) or not result:
+                logger.warning(f"Could not fetch history for {key}: {result if isinstance(result, Exception) else 'no data'}")
+                continue
+            series[key] = result
+
+        fx_series: Dict[str, Any] = {}
+        for symbol, currency in currency_by_symbol.items():
+            if currency == pref_currency:
+                fx_series[symbol] = 1.0
+            else:
+                pair = f"{currency}{pref_currency}=X"
+                if pair in series:
+                    fx_series[symbol] = series[pair]
+                    continue
+                spot = self.fx.rate(currency, pref_currency)
+                logger.warning(f"Could not fetch FX history for {pair}. Using {spot or 1.0}")
+                fx_series[symbol] = spot or 1.0
+
+        return align_portfolio_history(quantities, {sym: series[sym] for sym in symbols if sym in series}, fx_series)
+
+
+class PortfolioValuator:
+    """
+    Values a list of tracked-stock rows (``symbol``, ``quantity``, ``purchase_price``)
+    in one preferred currency. One instance per command invocation: quote and FX
+    lookups are memoized as tasks for the lifetime of the instance.
+    """
+
+    def __init__(self, loop, limiter: Optional[ProviderLimiter] = None, timeout: float = PORTFOLIO_FETCH_TIMEOUT_S,
+                 router: Optional[QuoteRouter] = None, fx: Optional[FxService] = None):
+        self.loop = loop
+        self.limiter = limiter or ProviderLimiter()
+        self.router = router or QUOTE_ROUTER
+        self.fx = fx or FxService()
+        self.timeout = timeout
+        self._quote_tasks: Dict[str, asyncio.Task] = {}
+        self._fx_tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def quote(self, symbol: str) -> Awaitable[Tuple[Optional[dict], str]]:
+        symbol = symbol.upper()
+        if symbol not in self._quote_tasks:
+            self._quote_tasks[symbol] = asyncio.ensure_future(self._fetch_quote(symbol))
+        return self._quote_tasks[symbol]
+
+    async def _fetch_quote(self, symbol: str) -> Tuple[Optional[dict], str]:
+        # Hedged across providers; each provider's calls still go through the limiter.
+        quote = await self.router.quote(self.loop, symbol, runner=self._run_limited)
+        if quote is None:
+            return None, "N/A"
+        return quote, PROVIDER_LABELS[quote["source"]]
+
+    def _run_limited(self, provider: str, func: Callable, *args) -> Awaitable[Any]:
+        return self.limiter.run(self.loop, provider, func, *args)
+
+    def fx_rate(self, from_currency: str, to_currency: str) -> Awaitable[Optional[float]]:
+        pair = (from_currency.upper(), to_currency.upper())
+        if pair not in self._fx_tasks:
+            self._fx_tasks[pair] = asyncio.ensure_future(self._fetch_fx_rate(*pair))
+        return self._fx_tasks[pair]
+
+    async def _fetch_fx_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        rate = self.fx.rate(from_currency, to_currency)
+        if rate is not None:
+            return rate
+        # Unseen currency: one batched refresh that also adds it to the scheduled ones.
+        return await self.limiter.run(self.loop, "yahoo_finance", self.fx.ensure, from_currency, to_currency)
+
+    async def _value_holding(self, holding: Dict[str, Any], pref_currency: str) -> Dict[str, Any]:
+        symbol = holding["symbol"].upper()
+        quantity = float(holding["quantity"])
+        purchase_price = float(holding["purchase_price"])
+        quote, source = await self.quote(symbol)
+        price = _quote_price(quote)
+        result = {"symbol": symbol, "quantity": holding["quantity"], "source": source, "status": "ok"}
+        if price is None:
+            result["status"] = "error"
+            return result
+
+        stock_currency = quote.get("currency") or "USD"
+        # Without a resolvable pair the price is shown unconverted, as before.
+        exchange_rate = (await self.fx_rate(stock_currency, pref_currency)) or 1.0
+        # Cost basis is converted at the current rate too (no purchase date / historical FX),
+        # which keeps the asset's own % gain and ignores FX gain/loss.
+        current_price = price * exchange_rate
+        cost_basis = quantity * purchase_price * exchange_rate
+        market_value = quantity * current_price
+        result.update({
+            "currency": stock_currency,
+            "native_price": price,
+            "native_purchase_price": purchase_price,
+            "exchange_rate": exchange_rate,
+            "current_price": current_price,
+            "cost_basis": cost_basis,
+            "market_value": market_value,
+            "gain_loss": market_value - cost_basis,
+            "gain_loss_pct": ((market_value - cost_basis) / cost_basis * 100) if cost_basis else None,
+        })
+        return result
+
+    @staticmethod
+    def _summarize(holdings: List[Dict[str, Any]], resolved: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        rows = []
+        for i, holding in enumerate(holdings):
+            rows.append(resolved.get(i) or {"symbol": holding["symbol"].upper(), "quantity": holding["quantity"], "source": "N/A", "status": "pending"})
+        valued = [row for row in rows if row["status"] == "ok"]
+        quantities = [float(row["quantity"]) for row in valued]
+        rates = [row["exchange_rate"] for row in valued]
+        total_value = float(holdings_value(quantities, [row["native_price"] for row in valued], rates))
+        total_cost = float(holdings_value(quantities, [row["native_purchase_price"] for row in valued], rates))
+        return {
+            "holdings": rows,
+            "total_cost_basis": total_cost,
+            "total_market_value": total_value,
+            "total_gain_loss": total_value - total_cost,
+            "total_gain_loss_pct": ((total_value - total_cost) / total_cost * 100) if total_cost else None,
+            "resolved": len(resolved),
+            "pending": [row["symbol"] for row in rows if row["status"] == "pending"],
+            "complete": len(resolved) == len(holdings),
+        }
+
+    async def value(self, holdings: List[Dict[str, Any]], pref_currency: str,
+                    on_update: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """
+        Values every holding concurrently. ``on_update`` is awaited with a partial
+        summary after each holding resolves; holdings still unresolved after
+        ``timeout`` seconds come back with status "pending".
+        """
+        resolved: Dict[int, Dict[str, Any]] = {}
+
+        async def _indexed(i: int, holding: Dict[str, Any]):
+            try:
+                return i, await self._value_holding(holding, pref_currency)
+            except Exception as e:
+                logger.error(f"Error valuing portfolio holding {holding.get('symbol')}: {e}")
+                return i, {"symbol": holding["symbol"].upper(), "quantity": holding["quantity"], "source": "N/A", "status": "error"}
+
+        tasks = [asyncio.ensure_future(_indexed(i, h)) for i, h in enumerate(holdings)]
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.timeout):
+                try:
+                    i, result = await next_done
+                except asyncio.TimeoutError:
+                    logger.warning(f"Portfolio valuation timed out with {len(holdings) - len(resolved)} holdings pending.")
+                    break
+                resolved[i] = result
+                if on_update:
+                    await on_update(self._summarize(holdings, resolved))
+        finally:
+            for task in tasks + list(self._quote_tasks.values()) + list(self._fx_tasks.values()):
+                if not task.done():
+                    task.cancel()
+        return self._summarize(holdings, resolved)
@@ -0,0 +1,207 @@
+# utils/quota.py
+"""
+Request budgets for quota-limited providers.
+
+Alpha Vantage's free tier allows a handful of calls per minute and per day. A
+:class:`QuotaScheduler` tracks the minute budget as a token bucket and the day
+budget as a sliding 24h log of call times (a hard daily count: a refilling
+bucket would allow about twice the limit in any 24h), shared by every
+caller in the process (the API clients run in ``run_in_executor`` worker
+threads, so it is guarded by a condition variable) and serves two lanes:
+
+* ``PRIORITY_INTERACTIVE`` — slash commands. May wait briefly for a token and
+  may spend the reserve.
+* ``PRIORITY_BACKGROUND`` — periodic sweeps. Never waits, never spends the
+  last ``background_reserve`` calls of either budget and yields to any
+  interactive request that is waiting.
+
+``acquire`` refuses immediately when the predicted wait exceeds the lane's
+limit, so callers can route to another provider instead of sending a request
+that is bound to be rejected. The lane of a call is carried in a context
+variable; wrap background calls with :func:`call_with_priority`.
+"""
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+# Longest an acquire() in each lane may block waiting for a token.
+DEFAULT_MAX_WAIT_S: Dict[str, float] = {
+    PRIORITY_INTERACTIVE: 5.0,
+    PRIORITY_BACKGROUND: 0.0,
+}
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar("quota_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+def call_with_priority(priority: str, func: Callable, *args, **kwargs) -> Any:
+    """Call ``func`` with every quota acquire inside it charged to ``priority``'s lane."""
+    token = _current_priority.set(priority)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """``capacity`` tokens, refilled continuously over ``period_s``. Not thread-safe on its own."""
+
+    def __init__(self, capacity: int, period_s: float, now: float):
+        self.capacity = max(1, int(capacity))
+        self.rate = self.capacity / float(period_s)
+        self.tokens = float(self.capacity)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def seconds_until(self, needed: float) -> float:
+        """Seconds until ``needed`` tokens are available (inf if the bucket can never hold them)."""
+        if needed > self.capacity:
+            return math.inf
+        return max(0.0, (needed - self.tokens) / self.rate)
+
+    def take(self, now: float) -> None:
+        self.tokens -= 1
+
+    def drain(self, now: float) -> None:
+        self.tokens = 0.0
+
+
+class SlidingWindowLog:
+    """At most ``capacity`` calls in any ``window_s`` seconds, kept as call times. Not thread-safe on its own."""
+
+    def __init__(self, capacity: int, window_s: float, now: float):
+        self.capacity = max(1, int(capacity))
+        self.window_s = float(window_s)
+        self.calls: Deque[float] = deque()
+
+    @property
+    def tokens(self) -> float:
+        return float(self.capacity - len(self.calls))
+
+    def refill(self, now: float) -> None:
+        while self.calls and self.calls[0] <= now - self.window_s:
+            self.calls.popleft()
+
+    def seconds_until(self, needed: float, now: float) -> float:
+        """Seconds until ``needed`` calls fit in the window (inf if they never can)."""
+        if needed > self.capacity:
+            return math.inf
+        excess = len(self.calls) + int(math.ceil(needed)) - self.capacity
+        if excess <= 0:
+            return 0.0
+        return max(0.0, self.calls[excess - 1] + self.window_s - now)
+
+    def take(self, now: float) -> None:
+        self.calls.append(now)
+
+    def drain(self, now: float) -> None:
+        self.calls.extend([now] * (self.capacity - len(self.calls)))
+
+
+class QuotaScheduler:
+    """Per-minute token bucket and per-day call log for one provider, with interactive/background lanes."""
+
+    def __init__(self, name: str, per_minute: int, per_day: int,
+                 background_reserve: Tuple[int, int] = (1, 5),
+                 max_wait: Optional[Dict[str, float]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.background_reserve = background_reserve
+        self.max_wait = dict(DEFAULT_MAX_WAIT_S, **(max_wait or {}))
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._waiting_interactive = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Refill both budgets (e.g. after a plan upgrade, and between tests)."""
+        with self._cond:
+            now = self._clock()
+            self._minute = TokenBucket(self.per_minute, 60.0, now)
+            self._day = SlidingWindowLog(self.per_day, 86400.0, now)
+            self._cond.notify_all()
+
+    def _seconds_until_available(self, priority: str, now: float) -> float:
+        self._minute.refill(now)
+        self._day.refill(now)
+        minute_reserve, day_reserve = self.background_reserve if priority == PRIORITY_BACKGROUND else (0, 0)
+        return max(self._minute.seconds_until(1 + minute_reserve), self._day.seconds_until(1 + day_reserve, now))
+
+    def seconds_until_available(self, priority: Optional[str] = None) -> float:
+        with self._cond:
+            return self._seconds_until_available(priority or current_priority(), self._clock())
+
+    def available(self, priority: Optional[str] = None) -> bool:
+        """Predictive check: would an acquire() in this lane succeed within the lane's wait limit?"""
+        priority = priority or current_priority()
+        with self._cond:
+            if priority == PRIORITY_BACKGROUND and self._waiting_interactive:
+                return False
+            return self._seconds_until_available(priority, self._clock()) <= self.max_wait.get(priority, 0.0)
+
+    def acquire(self, priority: Optional[str] = None, max_wait: Optional[float] = None) -> bool:
+        """
+        Take one call from both budgets. Returns False without waiting when the
+        predicted wait exceeds ``max_wait`` (defaults to the lane's limit).
+        """
+        priority = priority or current_priority()
+        limit = self.max_wait.get(priority, 0.0) if max_wait is None else max_wait
+        interactive = priority != PRIORITY_BACKGROUND
+        with self._cond:
+            deadline = self._clock() + limit
+            if interactive:
+                self._waiting_interactive += 1
+            try:
+                while True:
+                    now = self._clock()
+                    wait = self._seconds_until_available(priority, now)
+                    # Waiting interactive requests preempt background ones.
+                    if wait == 0 and (interactive or not self._waiting_interactive):
+                        self._minute.take(now)
+                        self._day.take(now)
+                        return True
+                    if now + wait > deadline:
+                        return False
+                    self._cond.wait(timeout=max(0.01, min(wait, deadline - now)))
+            finally:
+                if interactive:
+                    self._waiting_interactive -= 1
+                    self._cond.notify_all()
+
+    def report_exhausted(self, daily: bool = False) -> None:
+        """The provider rejected a call for quota reasons: treat the minute (and day) budget as spent."""
+        with self._cond:
+            now = self._clock()
+            self._minute.refill(now)
+            self._minute.drain(now)
+            if daily:
+                self._day.refill(now)
+                self._day.drain(now)
+        logger.warning(f"{self.name}: provider reported its {'daily' if daily else 'per-minute'} limit; budget drained.")
+
+    def snapshot(self) -> Dict[str, float]:
+        """Remaining whole calls in each budget, for diagnostics."""
+        with self._cond:
+            now = self._clock()
+            self._minute.refill(now)
+            self._day.refill(now)
+            return {"minute_remaining": math.floor(self._minute.tokens), "day_remaining": math.floor(self._day.tokens)}
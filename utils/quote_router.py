@@ -0,0 +1,215 @@
+# utils/quote_router.py
+"""
+Hedged quote routing across Alpha Vantage and Yahoo Finance.
+
+Calling one provider and then the other after a failure makes the slow path
+cost both providers' latency. ``QuoteRouter.quote`` asks the preferred
+provider first. If it has not answered within a hedge delay, the router sends
+the same request to the next provider and returns whichever usable answer
+comes first. The delay is the primary's p90 latency over its recent calls. A
+failed answer fails over right away.
+
+The router keeps recent latency and error samples for each provider. A
+provider with enough samples is ranked by p90 latency scaled by its error
+rate. Unmeasured providers keep the configured order behind measured ones.
+Alpha Vantage is skipped while its request budget (``utils.quota``) says a
+call would be refused. Hedges are speculative, and a losing hedge still spends
+its call, so they are charged to the background lane. A hedge never spends the
+interactive reserve, and the router does not hedge to a provider whose background
+budget is empty.
+
+Both clients' payloads are normalized by ``normalize_quote`` into one record:
+the Alpha Vantage-style keys the cogs already read ('01. symbol',
+'05. price', '08. previous close', ...), plus ``currency`` and ``source``
+(the provider key).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from api_clients import alpha_vantage_client, yahoo_finance_client
+from utils.api_utils import register_cache_clearer
+from utils.quota import PRIORITY_BACKGROUND, call_with_priority
+
+logger = logging.getLogger(__name__)
+
+QUOTE_PROVIDERS = {
+    "yahoo_finance": yahoo_finance_client,
+    "alpha_vantage": alpha_vantage_client,
+}
+PROVIDER_LABELS = {"yahoo_finance": "Yahoo Finance", "alpha_vantage": "Alpha Vantage"}
+# Yahoo is not quota-limited, so it leads until measurements say otherwise.
+DEFAULT_PROVIDER_ORDER = ("yahoo_finance", "alpha_vantage")
+
+STATS_WINDOW = 50            # recent calls kept per provider
+MIN_SAMPLES = 5              # below this a provider counts as unmeasured
+HEDGE_DEFAULT_DELAY_S = 1.5  # hedge delay while the primary is unmeasured
+HEDGE_MIN_DELAY_S = 0.5      # cache hits skew p90 low; never hedge sooner than this
+HEDGE_MAX_DELAY_S = 6.0
+
+Runner = Callable[..., Awaitable[Any]]
+
+
+def _float_or_none(value: Any) -> Optional[float]:
+    try:
+        return float(str(value).rstrip('%'))
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_quote(raw: Any, provider: str, symbol: str) -> Optional[Dict[str, Any]]:
+    """One quote record from either client's payload, or None if it carries no usable price."""
+    if not isinstance(raw, dict) or "error" in raw:
+        return None
+    price = _float_or_none(raw.get('05. price'))
+    if price is None:
+        return None
+    record = dict(raw)
+    record['01. symbol'] = raw.get('01. symbol') or symbol
+    if record.get('08. previous close') in (None, ""):
+        change = _float_or_none(raw.get('09. change'))
+        if change is not None:
+            record['08. previous close'] = f"{price - change:.4f}"
+    # Alpha Vantage's GLOBAL_QUOTE carries no currency; its coverage is US listings.
+    record['currency'] = raw.get('currency') or 'USD'
+    record['source'] = provider
+    return record
+
+
+class ProviderStats:
+    """Latency of recent successful calls and outcome of recent calls for one provider."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+
+    def record(self, ok: bool, latency: float) -> None:
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+
+    def p90(self) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+
+class QuoteRouter:
+    """Routes quote lookups across providers; one shared instance keeps the stats (``QUOTE_ROUTER``)."""
+
+    def __init__(self, preferred=DEFAULT_PROVIDER_ORDER, available: Optional[Dict[str, Callable[[], bool]]] = None,
+                 hedge_available: Optional[Dict[str, Callable[[], bool]]] = None):
+        self.preferred = list(preferred)
+        self.available = available if available is not None else {"alpha_vantage": lambda: alpha_vantage_client.budget_available()}
+        self.hedge_available = hedge_available if hedge_available is not None else {
+            "alpha_vantage": lambda: alpha_vantage_client.budget_available(PRIORITY_BACKGROUND),
+        }
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {name: ProviderStats() for name in self.preferred}
+
+    def _score(self, provider: str) -> float:
+        stats = self._stats[provider]
+        p90 = stats.p90()
+        if p90 is None:
+            return float("inf")
+        return p90 / max(0.05, 1.0 - stats.error_rate())
+
+    def provider_order(self) -> List[str]:
+        """Providers to try, best first: measured ones by score, then the configured order."""
+        candidates = [p for p in self.preferred if self.available.get(p, lambda: True)()]
+        with self._lock:
+            return sorted(candidates, key=lambda p: (self._score(p), self.preferred.index(p)))
+
+    def hedge_delay(self, provider: str) -> float:
+        with self._lock:
+            p90 = self._stats[provider].p90()
+        return min(HEDGE_MAX_DELAY_S, max(HEDGE_MIN_DELAY_S, p90 if p90 is not None else HEDGE_DEFAULT_DELAY_S))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider p90 latency, error rate and sample count, for diagnostics."""
+        with self._lock:
+            return {
+                name: {"p90": stats.p90(), "error_rate": stats.error_rate(), "samples": len(stats.outcomes)}
+                for name, stats in self._stats.items()
+            }
+
+    def _fetch(self, provider: str, symbol: str) -> Optional[Dict[str, Any]]:
+        """Blocking provider call (runs in an executor thread); records its latency and outcome."""
+        started = time.monotonic()
+        try:
+            raw = QUOTE_PROVIDERS[provider].get_stock_price(symbol)
+        except Exception as e:
+            logger.error(f"Quote router: {provider} raised for {symbol}: {e}")
+            raw = None
+        latency = time.monotonic() - started
+        record = normalize_quote(raw, provider, symbol)
+        # Quota refusals say nothing about the provider's health; the budget handles those.
+        if not (isinstance(raw, dict) and raw.get("error") == "api_limit"):
+            with self._lock:
+                self._stats[provider].record(record is not None, latency)
+        return record
+
+    async def quote(self, loop, symbol: str, runner: Optional[Runner] = None) -> Optional[Dict[str, Any]]:
+        """
+        Normalized quote for `symbol` from the first provider to answer usefully, or None.
+        `runner(provider, func, *args)` runs the blocking call; defaults to the loop's executor.
+        """
+        if runner is None:
+            def runner(provider, func, *args):
+                return loop.run_in_executor(None, func, *args)
+
+        remaining = self.provider_order()
+        pending: Dict[asyncio.Future, str] = {}
+
+        def launch(hedge: bool = False) -> float:
+            provider = remaining.pop(0)
+            if hedge:
+                call = runner(provider, call_with_priority, PRIORITY_BACKGROUND, self._fetch, provider, symbol)
+            else:
+                call = runner(provider, self._fetch, provider, symbol)
+            pending[asyncio.ensure_future(call)] = provider
+            return self.hedge_delay(provider)
+
+        if not remaining:
+            return None
+        delay = launch()
+        try:
+            while pending:
+                # Without hedge budget the next provider is kept for failover only.
+                can_hedge = bool(remaining) and self.hedge_available.get(remaining[0], lambda: True)()
+                done, _ = await asyncio.wait(list(pending), timeout=delay if can_hedge else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"Quote router: {list(pending.values())} slow for {symbol}; hedging with {remaining[0]}.")
+                    delay = launch(hedge=True)
+                    continue
+                for future in done:
+                    pending.pop(future)
+                    record = None if future.cancelled() or future.exception() else future.result()
+                    if record:
+                        return record
+                if remaining and not pending:
+                    delay = launch()
+            logger.warning(f"Quote router: no usable quote for {symbol} from any provider.")
+            return None
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+QUOTE_ROUTER = QuoteRouter()
+register_cache_clearer(QUOTE_ROUTER.reset)
@@ -0,0 +1,253 @@
+# utils/symbol_directory.py
+"""
+Local symbol directory for stock autocomplete and symbol lookups.
+
+Both clients' ``search_symbol`` go to the network for every distinct query,
+and Alpha Vantage's also spends request budget. ``SymbolDirectory`` keeps
+every known listing in the ``symbol_directory`` table. The listings come from
+three sources:
+
+* ``alpha_vantage``: all active US listings from one LISTING_STATUS CSV,
+  re-imported when older than ``SYMBOL_DIRECTORY_REFRESH_HOURS``;
+* ``file``: an optional CSV (``SYMBOL_DIRECTORY_FILE``) for other exchanges;
+* ``builtin``: the Warsaw tickers ``yahoo_finance_client`` already knows.
+
+``search()`` answers from an in-memory index and never touches the network.
+It ranks matches in this order:
+
+1. exact symbol, after ``yahoo_finance_client.normalize_symbol`` (so "LPP"
+   finds LPP.WA and "AAPL.US" finds AAPL);
+2. ticker prefix, on the full symbol and on the part before the exchange
+   suffix;
+3. company name prefix, on the whole name, then on any word of it;
+4. fuzzy trigram similarity on ticker and name, for typos.
+
+Lookups binary-search sorted key lists and count a few trigram postings, so a
+search over tens of thousands of listings stays well under a millisecond. The
+index is rebuilt off to the side and swapped in, so searches never wait for a
+reload.
+"""
+
+import bisect
+import csv
+import logging
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api_clients import alpha_vantage_client, yahoo_finance_client
+from utils.quota import PRIORITY_BACKGROUND, call_with_priority
+from utils.timezone_utils import parse_sqlite_utc_timestamp
+
+logger = logging.getLogger(__name__)
+
+SOURCE_ALPHA_VANTAGE = "alpha_vantage"
+SOURCE_FILE = "file"
+SOURCE_BUILTIN = "builtin"
+
+PREFIX_SCAN_LIMIT = 64        # sorted keys examined per prefix lookup
+FUZZY_MIN_SIMILARITY = 0.5    # share of the query's trigrams a fuzzy match must contain
+FUZZY_MAX_POSTINGS = 500      # trigrams this common carry little signal; skip their postings
+
+_SCORE_EXACT = 1000.0
+_SCORE_TICKER_PREFIX = 500.0
+_SCORE_NAME_PREFIX = 400.0
+_SCORE_WORD_PREFIX = 300.0
+_SCORE_FUZZY = 100.0
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", (text or "").lower())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Index:
+    """Immutable lookup structures over one list of entries."""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self.entries = entries
+        self.by_symbol: Dict[str, int] = {}
+        ticker_keys: List[Tuple[str, int]] = []
+        name_keys: List[Tuple[str, int]] = []
+        word_keys: List[Tuple[str, int]] = []
+        postings: Dict[str, List[int]] = {}
+        self.gram_counts: List[int] = []
+
+        for i, entry in enumerate(entries):
+            symbol = entry["symbol"]
+            self.by_symbol[symbol] = i
+            base = symbol.split(".")[0]
+            ticker_keys.append((symbol, i))
+            if base != symbol:
+                ticker_keys.append((base, i))
+            words = _words(entry["name"])
+            if words:
+                name_keys.append((" ".join(words), i))
+                word_keys.extend((word, i) for word in set(words[1:]))
+            grams = _trigrams(base.lower()) | _trigrams(" ".join(words))
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+
+        self.ticker_keys = sorted(ticker_keys)
+        self.name_keys = sorted(name_keys)
+        self.word_keys = sorted(word_keys)
+        self.postings = postings
+
+    @staticmethod
+    def prefixed(keys: List[Tuple[str, int]], prefix: str) -> Iterable[Tuple[str, int]]:
+        start = bisect.bisect_left(keys, (prefix, -1))
+        for key, i in keys[start:start + PREFIX_SCAN_LIMIT]:
+            if not key.startswith(prefix):
+                break
+            yield key, i
+
+
+def _entry(symbol: str, name: str = "", exchange: Optional[str] = None, asset_type: Optional[str] = None) -> Dict[str, Any]:
+    return {"symbol": symbol.strip().upper(), "name": (name or "").strip(), "exchange": exchange, "asset_type": asset_type}
+
+
+def builtin_entries() -> List[Dict[str, Any]]:
+    """Warsaw tickers the Yahoo client maps to .WA, without company names."""
+    return [
+        _entry(f"{symbol}.WA", exchange=yahoo_finance_client.EUROPEAN_EXCHANGES[".WA"], asset_type="Stock")
+        for symbol in sorted(yahoo_finance_client.POLISH_STOCK_SYMBOLS)
+    ]
+
+
+def listing_status_entries(rows: Optional[List[Dict[str, str]]]) -> List[Dict[str, Any]]:
+    """Directory entries from Alpha Vantage LISTING_STATUS rows (US symbols are already in Yahoo form)."""
+    return [
+        _entry(row["symbol"], row.get("name") or "", row.get("exchange"), row.get("assetType"))
+        for row in rows or []
+        if row.get("symbol") and (row.get("status") or "Active").lower() == "active"
+    ]
+
+
+def load_listing_file(path: str) -> List[Dict[str, Any]]:
+    """
+    Entries from a CSV with a header row: symbol, name and optionally exchange and
+    assetType. Symbols are normalized like the rest of the bot (normalize_symbol).
+    """
+    entries = []
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            if row.get("symbol"):
+                entries.append(_entry(yahoo_finance_client.normalize_symbol(row["symbol"]), row.get("name", ""),
+                                      row.get("exchange") or None, row.get("assettype") or None))
+    return entries
+
+
+class SymbolDirectory:
+    """In-memory searchable copy of the ``symbol_directory`` table; `db_manager` is optional."""
+
+    def __init__(self, db_manager=None, listing_file: str = "", refresh_hours: int = 168):
+        self.db_manager = db_manager
+        self.listing_file = listing_file
+        self.refresh_hours = refresh_hours
+        self._index = _Index([])
+
+    def __len__(self) -> int:
+        return len(self._index.entries)
+
+    def load(self, entries: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Rebuilds the index from `entries`, or from the table. Returns the number of listings."""
+        if entries is None:
+            entries = self.db_manager.list_symbol_directory() if self.db_manager is not None else []
+        by_symbol = {}
+        for e in entries:
+            entry = _entry(e["symbol"], e.get("name") or "", e.get("exchange"), e.get("asset_type"))
+            by_symbol[entry["symbol"]] = entry  # a later duplicate wins
+        index = _Index(list(by_symbol.values()))
+        self._index = index  # swapped in whole; concurrent searches keep the old one
+        logger.info(f"Symbol directory: indexed {len(index.entries)} listing(s).")
+        return len(index.entries)
+
+    def _is_stale(self, source: str, now: datetime) -> bool:
+        imported = parse_sqlite_utc_timestamp(self.db_manager.get_symbol_directory_imported_at(source))
+        return imported is None or now - imported >= timedelta(hours=self.refresh_hours)
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        Blocking: re-imports the builtin and file listings, plus the Alpha Vantage
+        listing when it is stale (or `force`), then reloads the index.
+        Returns the number of listings indexed.
+        """
+        if self.db_manager is None:
+            return self.load(builtin_entries())
+        now = datetime.now(timezone.utc)
+        self.db_manager.replace_symbol_directory(SOURCE_BUILTIN, builtin_entries())
+        if force or self._is_stale(SOURCE_ALPHA_VANTAGE, now):
+            rows = call_with_priority(PRIORITY_BACKGROUND, alpha_vantage_client.get_listing_status)
+            entries = listing_status_entries(rows)
+            if entries:
+                self.db_manager.replace_symbol_directory(SOURCE_ALPHA_VANTAGE, entries)
+            else:
+                logger.warning("Symbol directory: Alpha Vantage listing unavailable; keeping the stored one.")
+        if self.listing_file:
+            try:
+                self.db_manager.replace_symbol_directory(SOURCE_FILE, load_listing_file(self.listing_file))
+            except (OSError, csv.Error, UnicodeDecodeError) as e:
+                logger.error(f"Symbol directory: could not read {self.listing_file}: {e}")
+        return self.load()
+
+    def get(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """The listing for `symbol` as the bot would normalize it, or None."""
+        index = self._index
+        for candidate in (yahoo_finance_client.normalize_symbol(symbol), (symbol or "").strip().upper()):
+            i = index.by_symbol.get(candidate)
+            if i is not None:
+                return dict(index.entries[i])
+        return None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best `limit` listings for `query` (symbol, name, exchange, asset_type), best first."""
+        query = (query or "").strip()
+        if not query:
+            return []
+        index = self._index
+        scores: Dict[int, float] = {}
+
+        def offer(i: int, score: float) -> None:
+            if score > scores.get(i, 0.0):
+                scores[i] = score
+
+        upper = query.upper()
+        for candidate in {yahoo_finance_client.normalize_symbol(query), upper}:
+            i = index.by_symbol.get(candidate)
+            if i is not None:
+                offer(i, _SCORE_EXACT)
+        for key, i in index.prefixed(index.ticker_keys, upper):
+            offer(i, _SCORE_TICKER_PREFIX - (len(key) - len(upper)))
+
+        words = _words(query)
+        if words:
+            phrase = " ".join(words)
+            for key, i in index.prefixed(index.name_keys, phrase):
+                offer(i, _SCORE_NAME_PREFIX - min(99, len(key) - len(phrase)))
+            if len(words) == 1:
+                for key, i in index.prefixed(index.word_keys, phrase):
+                    offer(i, _SCORE_WORD_PREFIX - min(99, len(key) - len(phrase)))
+
+            if len(scores) < limit and len(phrase) >= 3:
+                grams = _trigrams(phrase)
+                hits: Counter = Counter()
+                for gram in grams:
+                    posting = index.postings.get(gram)
+                    if posting and len(posting) <= FUZZY_MAX_POSTINGS:
+                        hits.update(posting)
+                for i, shared in hits.most_common(limit * 4):
+                    # Containment of the query, not Jaccard: a typo in one word of a long
+                    # name still matches. Among equals, entries with fewer trigrams win.
+                    similarity = shared / len(grams)
+                    if similarity >= FUZZY_MIN_SIMILARITY:
+                        offer(i, _SCORE_FUZZY * similarity - min(1.0, index.gram_counts[i] / 1000))
+
+        best = sorted(scores.items(), key=lambda item: (-item[1], index.entries[item[0]]["symbol"]))[:limit]
+        return [dict(index.entries[i]) for i, _score in best]
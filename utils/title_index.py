@@ -0,0 +1,179 @@
+# utils/title_index.py
+"""
+In-memory prefix + trigram index over titles (TV show names), used to answer
+Discord autocomplete requests locally instead of hitting TMDB on every keystroke.
+
+* Word-prefix lookups cover the common "user is typing the start of a word"
+  case ("brea" -> "Breaking Bad", "bad" -> "Breaking Bad").
+* A trigram fallback tolerates typos and mid-word fragments ("braking bad").
+* ``store_query_results`` keeps a short-lived per-query cache of the ranking
+  returned by the network search, so a warm query never triggers another
+  remote lookup until the entry expires.
+
+Stdlib-only and guarded by a lock, like the helpers in ``utils.api_utils``.
+"""
+
+import threading
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+MAX_PREFIX_LEN = 20
+
+
+def normalize_title(text: Any) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    cleaned = "".join(ch if ch.isalnum() else " " for ch in stripped.lower())
+    return " ".join(cleaned.split())
+
+
+def _trigrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleIndex:
+    """
+    Prefix/trigram index of ``{id, name, label}`` entries.
+
+    ``weight`` lets callers rank well-known titles (subscribed or trending shows)
+    above titles that were only seen once in a search result.
+    """
+
+    def __init__(self, query_ttl: float = 600.0, max_queries: int = 512):
+        self.query_ttl = query_ttl
+        self.max_queries = max_queries
+        self._entries: Dict[Any, Dict[str, Any]] = {}
+        self._prefixes: Dict[str, Set[Any]] = {}
+        self._trigrams: Dict[str, Set[Any]] = {}
+        self._query_results: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, item_id: Any, name: str, label: Optional[str] = None, weight: int = 0) -> None:
+        normalized = normalize_title(name)
+        if item_id is None or not normalized:
+            return
+        with self._lock:
+            existing = self._entries.get(item_id)
+            if existing:
+                # Keep the most informative label and the highest weight seen so far.
+                existing["weight"] = max(existing["weight"], weight)
+                if label and existing["label"] == existing["name"]:
+                    existing["label"] = label
+                if existing["normalized"] == normalized:
+                    return
+                self._unindex(item_id, existing["normalized"])
+                weight = existing["weight"]
+                label = label or existing["label"]
+            self._entries[item_id] = {
+                "id": item_id,
+                "name": name,
+                "label": label or name,
+                "normalized": normalized,
+                "weight": weight,
+            }
+            for word in normalized.split():
+                for i in range(1, min(len(word), MAX_PREFIX_LEN) + 1):
+                    self._prefixes.setdefault(word[:i], set()).add(item_id)
+            for gram in _trigrams(normalized):
+                self._trigrams.setdefault(gram, set()).add(item_id)
+
+    def add_many(self, items: Iterable[Dict[str, Any]], weight: int = 0) -> None:
+        """Adds items shaped like ``{"id", "name", "label"?}`` (e.g. TMDB search results)."""
+        for item in items or []:
+            if isinstance(item, dict):
+                self.add(item.get("id"), item.get("name"), item.get("label"), weight)
+
+    def _unindex(self, item_id: Any, normalized: str) -> None:
+        for word in normalized.split():
+            for i in range(1, min(len(word), MAX_PREFIX_LEN) + 1):
+                ids = self._prefixes.get(word[:i])
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del self._prefixes[word[:i]]
+        for gram in _trigrams(normalized):
+            ids = self._trigrams.get(gram)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del self._trigrams[gram]
+
+    def store_query_results(self, query: str, item_ids: List[Any]) -> None:
+        """Remembers the network ranking for ``query`` for ``query_ttl`` seconds."""
+        key = normalize_title(query)
+        if not key:
+            return
+        with self._lock:
+            if len(self._query_results) >= self.max_queries and key not in self._query_results:
+                oldest = min(self._query_results, key=lambda k: self._query_results[k][1])
+                del self._query_results[oldest]
+            self._query_results[key] = (list(item_ids), time.monotonic() + self.query_ttl)
+
+    def _fresh_query_ids(self, key: str) -> Optional[List[Any]]:
+        entry = self._query_results.get(key)
+        if entry is None:
+            return None
+        ids, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._query_results[key]
+            return None
+        return ids
+
+    def has_fresh_query(self, query: str) -> bool:
+        with self._lock:
+            return self._fresh_query_ids(normalize_title(query)) is not None
+
+    def search(self, query: str, limit: int = 25) -> List[Dict[str, Any]]:
+        """
+        Ranked entries matching ``query``: cached network results and full-prefix
+        matches first, then word-prefix matches, then trigram (fuzzy) matches.
+        """
+        normalized = normalize_title(query)
+        if not normalized or limit <= 0:
+            return []
+        words = normalized.split()
+        with self._lock:
+            scores: Dict[Any, tuple] = {}
+
+            for rank, item_id in enumerate(self._fresh_query_ids(normalized) or []):
+                if item_id in self._entries:
+                    scores[item_id] = (3, -rank)
+
+            candidate_sets = [self._prefixes.get(word[:MAX_PREFIX_LEN], set()) for word in words]
+            prefix_ids = set.intersection(*candidate_sets) if candidate_sets else set()
+            for item_id in prefix_ids:
+                entry = self._entries[item_id]
+                tier = 3 if entry["normalized"].startswith(normalized) else 2
+                scores.setdefault(item_id, (tier, entry["weight"]))
+
+            if len(scores) < limit and len(normalized) >= 3:
+                query_grams = _trigrams(normalized)
+                overlap: Dict[Any, int] = {}
+                for gram in query_grams:
+                    for item_id in self._trigrams.get(gram, ()):
+                        overlap[item_id] = overlap.get(item_id, 0) + 1
+                for item_id, shared in overlap.items():
+                    if item_id in scores:
+                        continue
+                    entry_grams = len(_trigrams(self._entries[item_id]["normalized"]))
+                    similarity = shared / float(len(query_grams) + entry_grams - shared)
+                    if similarity >= 0.3:
+                        scores[item_id] = (1, similarity)
+
+            ranked = sorted(
+                scores,
+                key=lambda i: (scores[i][0], scores[i][1], self._entries[i]["weight"], -len(self._entries[i]["name"])),
+                reverse=True,
+            )
+            return [
+                {"id": i, "name": self._entries[i]["name"], "label": self._entries[i]["label"]}
+                for i in ranked[:limit]
+            ]